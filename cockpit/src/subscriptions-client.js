@@ -454,6 +454,17 @@ function requestSyspurposeUpdate() {
         .catch(ex => statusUpdateFailed(ex));
 }
 
+/* the service pushes new statuses, so they need not be polled for */
+function subscriptionStatusChanged(event, result) {
+    client.subscriptionStatus.status = JSON.parse(result).status;
+    needRender();
+}
+
+function syspurposeStatusChanged(event, result) {
+    client.syspurposeStatus.status = result;
+    needRender();
+}
+
 /* get subscription summary */
 client.getSubscriptionStatus = function() {
     this.dfd = cockpit.defer();
@@ -588,6 +599,8 @@ client.init = () => {
     consumerService.addEventListener("ConsumerChanged", requestSubscriptionStatusUpdate);
     configService.addEventListener("ConfigChanged", updateConfig);
     syspurposeService.addEventListener("SyspurposeChanged", requestSyspurposeUpdate);
+    entitlementService.addEventListener("StatusChanged", subscriptionStatusChanged);
+    syspurposeService.addEventListener("StatusChanged", syspurposeStatusChanged);
     // get initial status
     requestSubscriptionStatusUpdate();
     requestSyspurposeUpdate();
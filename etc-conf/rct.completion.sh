@@ -35,7 +35,7 @@ _rct()
     cat-manifest)
         case "${cur}" in
             -*)
-                COMPREPLY=( $( compgen -W "-h --help --no-content" -- "$cur" ) )
+                COMPREPLY=( $( compgen -W "-h --help --no-content --json" -- "$cur" ) )
                 return 0
                 ;;
         esac
@@ -15,13 +15,20 @@ from __future__ import print_function, division, absolute_import
 # in this software or its documentation.
 #
 import errno
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
+import shutil
+import struct
 import sys
+import tempfile
 
+import six
 from six import BytesIO
-from zipfile import ZipFile, BadZipfile
+from zipfile import ZipFile, BadZipfile, ZIP_STORED
 
-from rhsm import certificate
+from rhsm import certificate, _certificate
+from rhsm.certificate2 import REDHAT_OID_NAMESPACE, EXT_CERT_VERSION
 
 from rct.commands import RCTCliCommand
 from rct.printing import xstr
@@ -42,6 +49,65 @@ def get_value(json_dict, path):
     return current
 
 
+# Layout of a zip local file header, see zipfile.structFileHeader:
+LOCAL_HEADER_FORMAT = "<4s2B4HL2L2H"
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+LOCAL_HEADER_MAGIC = b"PK\003\004"
+
+# Below this many entitlements it is not worth starting worker processes:
+MIN_PARALLEL_ENTITLEMENTS = 8
+
+# Buffer size used when copying members out of a manifest:
+COPY_CHUNK_SIZE = 64 * 1024
+
+# A compressed inner archive larger than this is decompressed into an
+# anonymous temporary file instead of being held in memory:
+INNER_ZIP_MAX_MEMORY = 16 * 1024 * 1024
+
+# Number of threads used to write out manifest members:
+EXTRACT_THREADS = 4
+
+
+class StoredMember(object):
+    """
+    Read-only, seekable window onto an uncompressed member of an open zip
+    file.  Used to open the inner consumer_export.zip in place rather than
+    copying it into memory first.
+    """
+
+    def __init__(self, fileobj, offset, size):
+        self.fileobj = fileobj
+        self.offset = offset
+        self.size = size
+        self.pos = 0
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos, whence=0):
+        if whence == 1:
+            pos += self.pos
+        elif whence == 2:
+            pos += self.size
+        self.pos = max(0, min(pos, self.size))
+        return self.pos
+
+    def read(self, size=-1):
+        remaining = self.size - self.pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        self.fileobj.seek(self.offset + self.pos)
+        data = self.fileobj.read(size)
+        self.pos += len(data)
+        return data
+
+    def close(self):
+        pass
+
+
 class ZipExtractAll(ZipFile):
     """extend ZipFile with a safer extractall
 
@@ -54,6 +120,7 @@ class ZipExtractAll(ZipFile):
     the zipfile more easily in memory"""
 
     inner_zip = None
+    entitlement_files = None
 
     def __init__(self, *args, **kwargs):
         """
@@ -65,9 +132,39 @@ class ZipExtractAll(ZipFile):
             print(_("Manifest zip is invalid."))
             sys.exit(1)
 
+    def _open_stored_member(self, archive_path):
+        """
+        Returns a StoredMember for archive_path if it is stored uncompressed,
+        otherwise None.
+        """
+        info = self.getinfo(archive_path)
+        if info.compress_type != ZIP_STORED or info.flag_bits & 0x1:
+            return None
+        self.fp.seek(info.header_offset)
+        header = struct.unpack(LOCAL_HEADER_FORMAT, self.fp.read(LOCAL_HEADER_SIZE))
+        if header[0] != LOCAL_HEADER_MAGIC:
+            return None
+        # Skip the local header, file name and extra field:
+        offset = info.header_offset + LOCAL_HEADER_SIZE + header[10] + header[11]
+        return StoredMember(self.fp, offset, info.file_size)
+
+    def _copy_member(self, archive_path, outfile):
+        source = self.open(archive_path)
+        try:
+            shutil.copyfileobj(source, outfile, COPY_CHUNK_SIZE)
+        finally:
+            source.close()
+
     def _get_inner_zip(self):
         if self.inner_zip is None:
-            output = BytesIO(self.read(RCTManifestCommand.INNER_FILE))
+            output = self._open_stored_member(RCTManifestCommand.INNER_FILE)
+            if output is None:
+                if self.getinfo(RCTManifestCommand.INNER_FILE).file_size > INNER_ZIP_MAX_MEMORY:
+                    output = tempfile.TemporaryFile()
+                else:
+                    output = BytesIO()
+                self._copy_member(RCTManifestCommand.INNER_FILE, output)
+                output.seek(0)
             self.inner_zip = ZipExtractAll(output, 'r')
         return self.inner_zip
 
@@ -86,21 +183,44 @@ class ZipExtractAll(ZipFile):
         return result
 
     def _get_entitlements(self):
-        results = []
-        in_zip = self._get_inner_zip()
-        for filename in in_zip.namelist():
-            (read_path, read_file) = os.path.split(filename)
-            if (read_path == os.path.join("export", "entitlements")) and (len(read_file) > 0):
-                results.append(filename)
-        return results
+        if self.entitlement_files is None:
+            results = []
+            in_zip = self._get_inner_zip()
+            for filename in in_zip.namelist():
+                (read_path, read_file) = os.path.split(filename)
+                if (read_path == os.path.join("export", "entitlements")) and (len(read_file) > 0):
+                    results.append(filename)
+            self.entitlement_files = results
+        return self.entitlement_files
 
     def _open_excl(self, path):
         return os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL), 'wb')
 
     def _write_file(self, output_path, archive_path):
         outfile = self._open_excl(output_path)
-        outfile.write(self.read(archive_path))
-        outfile.close()
+        try:
+            self._copy_member(archive_path, outfile)
+        finally:
+            outfile.close()
+
+    def _write_files(self, to_write, threads=1):
+        """
+        Writes out (output_path, archive_path) pairs, using up to 'threads'
+        threads.  Reading one archive from several threads relies on the
+        locking ZipFile.open does on python 3, so python 2 writes serially.
+        """
+        threads = min(threads, len(to_write))
+        if threads < 2 or six.PY2:
+            for (output_path, archive_path) in to_write:
+                self._write_file(output_path, archive_path)
+            return
+
+        pool = ThreadPool(threads)
+        try:
+            pool.map(lambda paths: self._write_file(*paths), to_write)
+        finally:
+            pool.close()
+            pool.join()
 
     def _is_secure(self, base, new_file):
         base_path = os.path.abspath(base)
@@ -114,9 +234,12 @@ class ZipExtractAll(ZipFile):
         elif os.path.islink(new_path):
             raise Exception(_('Unable to trace symbolic link.  Possibly circular linkage.'))
 
-    def extractall(self, location, overwrite=False):
+    def extractall(self, location, overwrite=False, exclude=(), threads=1):
         self._is_secure(location, location)
+        to_write = []
         for path_name in self.namelist():
+            if path_name in exclude:
+                continue
             (directory, filename) = os.path.split(path_name)
             directory = os.path.join(location, directory)
             self._is_secure(location, directory)
@@ -126,7 +249,8 @@ class ZipExtractAll(ZipFile):
             self._is_secure(location, new_location)
             if (os.path.exists(new_location) and overwrite):
                 os.remove(new_location)
-            self._write_file(new_location, path_name)
+            to_write.append((new_location, path_name))
+        self._write_files(to_write, threads)
 
 
 class RCTManifestCommand(RCTCliCommand):
@@ -149,25 +273,134 @@ class RCTManifestCommand(RCTCliCommand):
             raise InvalidCLIOptionError(_("The specified manifest file does not exist."))
 
     def _extract_manifest(self, location, overwrite=False):
-        # Extract the outer file
+        # Extract the outer file, apart from the inner archive
         archive = ZipExtractAll(self._get_file_from_args(), 'r')
-        archive.extractall(location, overwrite)
-
-        # now extract the inner file
-        if location:
-            inner_file = os.path.join(location, self.INNER_FILE)
+        archive.extractall(location, overwrite, exclude=[self.INNER_FILE],
+                           threads=EXTRACT_THREADS)
+
+        # now extract the inner file straight out of the outer one, without
+        # writing the intermediate archive to disk
+        archive._get_inner_zip().extractall(location, overwrite,
+                                            threads=EXTRACT_THREADS)
+
+
+def get_product_attribute(name, data):
+    return_value = None
+    for attr in get_value(data, "pool.productAttributes"):
+        if attr["name"] == name:
+            return_value = attr["value"]
+            break
+
+    return return_value
+
+
+def read_cert_version(pem):
+    """
+    Returns the version of an entitlement certificate without parsing its
+    order, products or content.
+    """
+    x509 = _certificate.load(pem=pem)
+    if not x509:
+        raise certificate.CertificateException("Error loading certificate from string: %s" % pem)
+    version = x509.get_extension(oid="%s.%s" % (REDHAT_OID_NAMESPACE, EXT_CERT_VERSION))
+    if version is None:
+        # Absence of the extension implies v1.0:
+        return "1.0"
+    return version.decode('utf-8')
+
+
+def summarize_entitlement(zip_archive, ent_file, with_content=True):
+    """
+    Reads one entitlement and its certificate from the manifest and returns
+    a dict of the values cat-manifest reports for it.  The certificate is
+    only fully parsed when its content sets are wanted.
+    """
+    data = json.loads(zip_archive._read_file(ent_file))
+    virt_limit = get_product_attribute("virt_limit", data)
+    # Get the certificate to get the version
+    serial = data["certificates"][0]["serial"]["id"]
+    cert_file = os.path.join("export", "entitlement_certificates", "%s.pem" % serial)
+
+    summary = {
+        "name": get_value(data, "pool.productName"),
+        "quantity": get_value(data, "quantity"),
+        "created": get_value(data, "created"),
+        "start_date": get_value(data, "startDate"),
+        "end_date": get_value(data, "endDate"),
+        "service_level": get_product_attribute("support_level", data),
+        "service_type": get_product_attribute("support_type", data),
+        "architectures": get_product_attribute("arch", data),
+        "sku": get_value(data, "pool.productId"),
+        "contract": get_value(data, "pool.contractNumber"),
+        "order": get_value(data, "pool.orderNumber"),
+        "account": get_value(data, "pool.accountNumber"),
+        "virt_limit": virt_limit,
+        "requires_virt_who": bool(virt_limit),
+        "entitlement_file": os.path.join("export", "entitlements", "%s.json" % data["id"]),
+        "certificate_file": cert_file,
+        "provided_products": sorted((int(pp["productId"]), pp["productName"])
+                                    for pp in data["pool"]["providedProducts"]),
+        "derived_products": None,
+        "content_sets": None,
+    }
+
+    # Get the derived provided Products (if available)
+    if "derivedProvidedProducts" in data["pool"]:
+        summary["derived_products"] = sorted((int(pp["productId"]), pp["productName"])
+                                             for pp in data["pool"]["derivedProvidedProducts"])
+
+    try:
+        pem = zip_archive._read_file(cert_file).decode('utf-8')
+        if with_content:
+            cert = certificate.create_from_pem(pem)
+            summary["certificate_version"] = str(cert.version)
+            summary["content_sets"] = sorted(item.url for item in cert.content)
         else:
-            inner_file = self.INNER_FILE
+            summary["certificate_version"] = read_cert_version(pem)
+    except certificate.CertificateException as ce:
+        raise certificate.CertificateException(
+                _("Unable to read certificate file '%s': %s") % (cert_file,
+                ce))
+    return summary
+
 
-        archive = ZipExtractAll(inner_file, 'r')
-        archive.extractall(location, overwrite)
+# The manifest opened by each cat-manifest worker process:
+_worker_archive = None
 
-        # Delete the intermediate file
-        os.remove(inner_file)
+
+def _init_summary_worker(manifest_file):
+    global _worker_archive
+    _worker_archive = ZipExtractAll(manifest_file, 'r')
+
+
+def _summarize_in_worker(args):
+    (ent_file, with_content) = args
+    return summarize_entitlement(_worker_archive, ent_file, with_content)
 
 
 class CatManifestCommand(RCTManifestCommand):
 
+    # Labels for the subscription values, in the order they are printed:
+    SUBSCRIPTION_FIELDS = [
+        ("name", _("Name")),
+        ("quantity", _("Quantity")),
+        ("created", _("Created")),
+        ("start_date", _("Start Date")),
+        ("end_date", _("End Date")),
+        ("service_level", _("Service Level")),
+        ("service_type", _("Service Type")),
+        ("architectures", _("Architectures")),
+        ("sku", _("SKU")),
+        ("contract", _("Contract")),
+        ("order", _("Order")),
+        ("account", _("Account")),
+        ("virt_limit", _("Virt Limit")),
+        ("requires_virt_who", _("Requires Virt-who")),
+        ("entitlement_file", _("Entitlement File")),
+        ("certificate_file", _("Certificate File")),
+        ("certificate_version", _("Certificate Version")),
+    ]
+
     def __init__(self):
         RCTManifestCommand.__init__(self, name="cat-manifest", aliases=['cm'],
                                shortdesc=_("Print manifest information"),
@@ -175,6 +408,9 @@ class CatManifestCommand(RCTManifestCommand):
         self.parser.add_option("--no-content", action="store_true",
                                default=False,
                                help=_("skip printing Content Sets"))
+        self.parser.add_option("--json", action="store_true",
+                               default=False,
+                               help=_("print one JSON object per line instead of formatted text"))
 
     def _print_section(self, title, items, indent=1, whitespace=True):
         # Allow a bit of customization of the tabbing
@@ -189,104 +425,109 @@ class CatManifestCommand(RCTManifestCommand):
         if whitespace:
             print("")
 
-    def _print_general(self, zip_archive):
-        # Print out general data
+    def _print_json(self, record_type, record):
+        record = dict(record)
+        record["type"] = record_type
+        print(json.dumps(record, sort_keys=True))
+
+    def _get_general(self, zip_archive):
         part = zip_archive._read_file(os.path.join("export", "meta.json"))
         data = json.loads(part)
-        to_print = []
-        to_print.append((_("Server"), get_value(data, "webAppPrefix")))
-        to_print.append((_("Server Version"), get_value(data, "version")))
-        to_print.append((_("Date Created"), get_value(data, "created")))
-        to_print.append((_("Creator"), get_value(data, "principalName")))
-        self._print_section(_("General:"), to_print)
-
-    def _print_consumer(self, zip_archive):
-        # Print out the consumer data
+        return [
+            ("server", _("Server"), get_value(data, "webAppPrefix")),
+            ("server_version", _("Server Version"), get_value(data, "version")),
+            ("date_created", _("Date Created"), get_value(data, "created")),
+            ("creator", _("Creator"), get_value(data, "principalName")),
+        ]
+
+    def _get_consumer(self, zip_archive):
         part = zip_archive._read_file(os.path.join("export", "consumer.json"))
         data = json.loads(part)
-        to_print = []
-        to_print.append((_("Name"), get_value(data, "name")))
-        to_print.append((_("UUID"), get_value(data, "uuid")))
         # contentAccessMode is entitlement if null, blank or non-present
         contentAccessMode = 'entitlement'
         if "contentAccessMode" in data and data["contentAccessMode"] == 'org_environment':
             contentAccessMode = 'org_environment'
-        to_print.append((_("Content Access Mode"), contentAccessMode))
-        to_print.append((_("Type"), get_value(data, "type.label")))
-        to_print.append((_("API URL"), get_value(data, "urlApi")))
-        to_print.append((_("Web URL"), get_value(data, "urlWeb")))
-        self._print_section(_("Consumer:"), to_print)
+        return [
+            ("name", _("Name"), get_value(data, "name")),
+            ("uuid", _("UUID"), get_value(data, "uuid")),
+            ("content_access_mode", _("Content Access Mode"), contentAccessMode),
+            ("type", _("Type"), get_value(data, "type.label")),
+            ("api_url", _("API URL"), get_value(data, "urlApi")),
+            ("web_url", _("Web URL"), get_value(data, "urlWeb")),
+        ]
+
+    def _print_general(self, zip_archive):
+        # Print out general data
+        fields = self._get_general(zip_archive)
+        if self.options.json:
+            self._print_json("general", dict((key, value) for (key, label, value) in fields))
+        else:
+            self._print_section(_("General:"), [(label, value) for (key, label, value) in fields])
+
+    def _print_consumer(self, zip_archive):
+        # Print out the consumer data
+        fields = self._get_consumer(zip_archive)
+        if self.options.json:
+            self._print_json("consumer", dict((key, value) for (key, label, value) in fields))
+        else:
+            self._print_section(_("Consumer:"), [(label, value) for (key, label, value) in fields])
 
     def _get_product_attribute(self, name, data):
-        return_value = None
-        for attr in get_value(data, "pool.productAttributes"):
-            if attr["name"] == name:
-                return_value = attr["value"]
-                break
+        return get_product_attribute(name, data)
+
+    def _summarize_entitlements(self, zip_archive, entitlements, with_content):
+        """
+        Yields the summary of each entitlement in manifest order.  Fully
+        parsing certificates is the expensive part, so when content sets
+        are wanted for a manifest on disk the work is spread over a pool of
+        processes, each reading the manifest independently.
+        """
+        manifest_file = self._get_file_from_args()
+        processes = min(multiprocessing.cpu_count(), len(entitlements))
+        if not with_content or processes < 2 or \
+                len(entitlements) < MIN_PARALLEL_ENTITLEMENTS or \
+                not isinstance(manifest_file, six.string_types):
+            for ent_file in entitlements:
+                yield summarize_entitlement(zip_archive, ent_file, with_content)
+            return
 
-        return return_value
+        pool = multiprocessing.Pool(processes, _init_summary_worker, (manifest_file,))
+        try:
+            tasks = [(ent_file, with_content) for ent_file in entitlements]
+            for summary in pool.imap(_summarize_in_worker, tasks, chunksize=16):
+                yield summary
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
 
     def _print_products(self, zip_archive):
         entitlements = zip_archive._get_entitlements()
         if len(entitlements) == 0:
-            self._print_section(_("Subscriptions:"), [["None"]], 1, True)
+            if not self.options.json:
+                self._print_section(_("Subscriptions:"), [["None"]], 1, True)
             return
 
-        for ent_file in entitlements:
-            part = zip_archive._read_file(ent_file)
-            data = json.loads(part)
-            to_print = []
-            to_print.append((_("Name"), get_value(data, "pool.productName")))
-            to_print.append((_("Quantity"), get_value(data, "quantity")))
-            to_print.append((_("Created"), get_value(data, "created")))
-            to_print.append((_("Start Date"), get_value(data, "startDate")))
-            to_print.append((_("End Date"), get_value(data, "endDate")))
-            to_print.append((_("Service Level"), self._get_product_attribute("support_level", data)))
-            to_print.append((_("Service Type"), self._get_product_attribute("support_type", data)))
-            to_print.append((_("Architectures"), self._get_product_attribute("arch", data)))
-            to_print.append((_("SKU"), get_value(data, "pool.productId")))
-            to_print.append((_("Contract"), get_value(data, "pool.contractNumber")))
-            to_print.append((_("Order"), get_value(data, "pool.orderNumber")))
-            to_print.append((_("Account"), get_value(data, "pool.accountNumber")))
-            virt_limit = self._get_product_attribute("virt_limit", data)
-            to_print.append((_("Virt Limit"), virt_limit))
-            require_virt_who = False
-            if virt_limit:
-                require_virt_who = True
-            to_print.append((_("Requires Virt-who"), require_virt_who))
-
-            entitlement_file = os.path.join("export", "entitlements", "%s.json" % data["id"])
-            to_print.append((_("Entitlement File"), entitlement_file))
-            #Get the certificate to get the version
-            serial = data["certificates"][0]["serial"]["id"]
-
-            cert_file = os.path.join("export", "entitlement_certificates", "%s.pem" % serial)
-            to_print.append((_("Certificate File"), cert_file))
-
-            try:
-                cert = certificate.create_from_pem(zip_archive._read_file(cert_file).decode('utf-8'))
-            except certificate.CertificateException as ce:
-                raise certificate.CertificateException(
-                        _("Unable to read certificate file '%s': %s") % (cert_file,
-                        ce))
-            to_print.append((_("Certificate Version"), cert.version))
+        with_content = not self.options.no_content
+        for summary in self._summarize_entitlements(zip_archive, entitlements, with_content):
+            if self.options.json:
+                self._print_json("subscription", summary)
+                continue
 
+            to_print = [(label, summary[key]) for (key, label) in self.SUBSCRIPTION_FIELDS]
             self._print_section(_("Subscription:"), to_print, 1, False)
 
             # Get the provided Products
-            to_print = [(int(pp["productId"]), pp["productName"]) for pp in data["pool"]["providedProducts"]]
-
-            self._print_section(_("Provided Products:"), sorted(to_print), 2, False)
+            self._print_section(_("Provided Products:"), summary["provided_products"], 2, False)
 
             # Get the derived provided Products (if available)
-            if "derivedProvidedProducts" in data["pool"]:
-                to_print = [(int(pp["productId"]), pp["productName"]) for pp in data["pool"]["derivedProvidedProducts"]]
-                self._print_section(_("Derived Products:"), sorted(to_print), 2, False)
+            if summary["derived_products"] is not None:
+                self._print_section(_("Derived Products:"), summary["derived_products"], 2, False)
 
             # Get the Content Sets
-            if not self.options.no_content:
-                to_print = [[item.url] for item in cert.content]
-                self._print_section(_("Content Sets:"), sorted(to_print), 2, True)
+            if with_content:
+                to_print = [[url] for url in summary["content_sets"]]
+                self._print_section(_("Content Sets:"), to_print, 2, True)
             else:  # bz#1369577: print a blank line to separate subscriptions when --no-content in use
                 print("")
 
@@ -295,10 +536,11 @@ class CatManifestCommand(RCTManifestCommand):
         Does the work that this command intends.
         """
         temp = ZipExtractAll(self._get_file_from_args(), 'r')
-        # Print out the header
-        print("\n+-------------------------------------------+")
-        print(_("\tManifest"))
-        print("+-------------------------------------------+\n")
+        if not self.options.json:
+            # Print out the header
+            print("\n+-------------------------------------------+")
+            print(_("\tManifest"))
+            print("+-------------------------------------------+\n")
 
         self._print_general(temp)
         self._print_consumer(temp)
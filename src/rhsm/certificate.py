@@ -664,9 +664,58 @@ class GMT(tzinfo):
         return timedelta(seconds=0)
 
 
+_NO_VALUE = object()
+
+
+class _OIDNode(object):
+    """
+    A node in the prefix trie over OID parts used by :class:`Extensions`.
+    """
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children = {}
+        self.value = _NO_VALUE
+
+    def walk(self, parts):
+        """
+        Yields (parts, node) for every node reached by following *parts*,
+        which may contain (*) wildcards. The yielded parts are the actual
+        ones the wildcards matched.
+        """
+        nodes = [([], self)]
+        for part in parts:
+            if part == OID.WILDCARD:
+                nodes = [(path + [name], child) for (path, node) in nodes
+                         for (name, child) in node.children.items()]
+            else:
+                nodes = [(path + [part], node.children[part]) for (path, node) in nodes
+                         if part in node.children]
+            if not nodes:
+                break
+        return nodes
+
+    def items(self, path=None):
+        """
+        Yields (parts, value) for this node and everything below it, in the
+        same order as sorting the OID strings.
+        """
+        stack = [(path or [], self)]
+        while stack:
+            (path, node) = stack.pop()
+            if node.value is not _NO_VALUE:
+                yield (path, node.value)
+            for name in sorted(node.children, reverse=True):
+                stack.append((path + [name], node.children[name]))
+
+
 class Extensions(dict):
     """
     Represents x.509 (v3) custom extensions.
+
+    Lookups are answered from a trie over the OID parts, built the first
+    time one is needed. Branches share the trie of the extensions they
+    were cut from.
     """
 
     def __init__(self, x509):
@@ -674,11 +723,38 @@ class Extensions(dict):
         :param x509: An :module:`rhsm._certificate` :class:`X509` object or dict.
         :type x509: :obj:`X509`
         """
+        self._trie = None
         if isinstance(x509, dict):
             self.update(x509)
         else:
             self._parse(x509)
 
+    def __setitem__(self, key, value):
+        self._trie = None
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._trie = None
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        self._trie = None
+        dict.update(self, *args, **kwargs)
+
+    def _get_trie(self):
+        if self._trie is None:
+            root = _OIDNode()
+            for oid, value in self.items():
+                node = root
+                for part in OID(oid).part if isinstance(oid, str) else oid.part:
+                    child = node.children.get(part)
+                    if child is None:
+                        child = node.children[part] = _OIDNode()
+                    node = child
+                node.value = value
+            self._trie = root
+        return self._trie
+
     def ltrim(self, n):
         """
         Left trim *n* parts.
@@ -726,11 +802,32 @@ class Extensions(dict):
         :rtype: (`OID`, value)
         :see: OID.match()
         """
-        ext = []
-        found = 0
         if isinstance(oid, str):
             oid = OID(oid)
 
+        # Matching the end can not use the trie:
+        if not oid[0]:
+            return self._scan(oid, limit, ignoreOrder)
+
+        if not oid[-1]:
+            nodes = self._get_trie().walk(oid.part[:-1])
+            matches = [(path, value) for (prefix, node) in nodes
+                       for (path, value) in node.items(prefix)]
+        else:
+            matches = [(path, node.value) for (path, node) in self._get_trie().walk(oid.part)
+                       if node.value is not _NO_VALUE]
+
+        ext = [(OID(path), value) for (path, value) in matches]
+        if not ignoreOrder:
+            ext.sort(key=lambda item: str(item[0]))
+        if limit:
+            ext = ext[:limit]
+        return ext
+
+    def _scan(self, oid, limit, ignoreOrder):
+        ext = []
+        found = 0
+
         # Only order the keys if we want more than a singel return avalue
         if ignoreOrder:
             keyset = list(self.keys())
@@ -755,16 +852,26 @@ class Extensions(dict):
         :return: A subtree.
         :rtype: :class:`Extensions`
         """
-        d = {}
         if isinstance(root, str):
             root = OID(root)
         if root[-1]:
             root = root.append('')
-        ln = len(root) - 1
-        for oid, v in self.find(root):
-            trimmed = oid.ltrim(ln)
-            d[trimmed] = v
-        return Extensions(d)
+        if not root[0] or OID.WILDCARD in root.part:
+            # Not a single subtree, trim whatever matched:
+            d = {}
+            ln = len(root) - 1
+            for oid, v in self.find(root):
+                trimmed = oid.ltrim(ln)
+                d[trimmed] = v
+            return Extensions(d)
+
+        branch = Extensions({})
+        for (path, node) in self._get_trie().walk(root.part[:-1]):
+            for (sub_path, value) in node.items():
+                dict.__setitem__(branch, OID(sub_path), value)
+            # The branch is cut from this trie, so it can share the node:
+            branch._trie = node
+        return branch
 
     def _parse(self, x509):
         """
@@ -20,6 +20,7 @@ import os
 import posixpath
 import re
 import six
+import weakref
 import zlib
 
 log = logging.getLogger(__name__)
@@ -684,10 +685,72 @@ class EntitlementCertificate(ProductCertificate):
         return key_path
 
 
+class _FrozenList(list):
+    """
+    A list that can not be modified. Tag and arch lists are shared between
+    every product and content set that carries the same values, so they
+    must not be changed in place.
+    """
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("%s is read-only" % self.__class__.__name__)
+
+    append = extend = insert = pop = remove = reverse = sort = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    __setslice__ = __delslice__ = _immutable  # python 2
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+EMPTY_LIST = _FrozenList()
+
+# Lists of tags and arches currently in use, keyed by their values:
+_shared_lists = weakref.WeakValueDictionary()
+
+
+_intern_str = six.moves.intern
+
+
+def _intern(value):
+    """
+    Interns values that repeat across thousands of content sets in one
+    certificate (types, vendors, tags, arches) so they are stored once.
+    Only native strings can be interned, anything else is returned as is.
+    """
+    try:
+        return _intern_str(value)
+    except TypeError:
+        return value
+
+
+def _shared_list(values):
+    """
+    Returns a read-only list of values, shared with every other caller
+    asking for the same values.
+    """
+    if not values:
+        return EMPTY_LIST
+    key = tuple(values)
+    shared = _shared_lists.get(key)
+    if shared is None:
+        shared = _FrozenList(_intern(value) for value in key)
+        _shared_lists[key] = shared
+    return shared
+
+
 class Product(object):
     """
     Represents the product information from a certificate.
     """
+    __slots__ = ("id", "name", "version", "architectures", "provided_tags",
+                 "brand_type", "brand_name")
+
     def __init__(self, id=None, name=None, version=None, architectures=None,
             provided_tags=None, brand_type=None, brand_name=None):
 
@@ -700,17 +763,13 @@ class Product(object):
         self.name = name
         self.version = version
 
-        self.architectures = architectures
         # If this is sent in as a string split it, as the field
         # can technically be multi-valued:
-        if isinstance(self.architectures, six.string_types):
-            self.architectures = parse_tags(self.architectures)
-        if self.architectures is None:
-            self.architectures = []
+        if isinstance(architectures, six.string_types):
+            architectures = parse_tags(architectures)
+        self.architectures = _shared_list(architectures)
 
-        self.provided_tags = provided_tags
-        if self.provided_tags is None:
-            self.provided_tags = []
+        self.provided_tags = _shared_list(provided_tags)
 
         self.brand_type = brand_type
         self.brand_name = brand_name
@@ -724,6 +783,10 @@ class Order(object):
     Represents the order information for the subscription an entitlement
     originated from.
     """
+    __slots__ = ("name", "number", "sku", "subscription", "quantity", "quantity_used",
+                 "virt_limit", "stacking_id", "socket_limit", "warning_period",
+                 "contract", "account", "provides_management", "service_level",
+                 "service_type", "virt_only", "ram_limit", "core_limit")
 
     def __init__(self, name=None, number=None, sku=None, subscription=None,
             quantity=None, virt_limit=None, socket_limit=None,
@@ -770,6 +833,8 @@ class Order(object):
 
 
 class Content(object):
+    __slots__ = ("content_type", "name", "label", "vendor", "url", "gpg", "enabled",
+                 "metadata_expire", "required_tags", "arches")
 
     def __init__(self, content_type=None, name=None, label=None, vendor=None, url=None,
             gpg=None, enabled=None, metadata_expire=None, required_tags=None, arches=None):
@@ -777,10 +842,10 @@ class Content(object):
         if (name is None) or (label is None):
             raise CertificateException("Content missing name/label")
 
-        self.content_type = content_type
+        self.content_type = _intern(content_type)
         self.name = name
-        self.label = label
-        self.vendor = vendor
+        self.label = _intern(label)
+        self.vendor = _intern(vendor)
         self.url = url
         self.gpg = gpg
 
@@ -798,9 +863,9 @@ class Content(object):
             self.enabled = True
 
         self.metadata_expire = metadata_expire
-        self.required_tags = required_tags or []
+        self.required_tags = _shared_list(required_tags)
 
-        self.arches = arches or []
+        self.arches = _shared_list(arches)
 
     def __eq__(self, other):
         return isinstance(other, self.__class__) and (self.label == other.label)
@@ -817,6 +882,8 @@ class Pool(object):
     """
     Represents the pool an entitlement originates from.
     """
+    __slots__ = ("id",)
+
     def __init__(self, id=None):
         if id is None:
             raise CertificateException("Pool is missing ID")
@@ -73,7 +73,9 @@ RHSM_DEFAULTS = {
         'plugindir': '/usr/share/rhsm-plugins',
         'pluginconfdir': '/etc/rhsm/pluginconf.d',
         'auto_enable_yum_plugins': '1',
-        'inotify': '1'
+        'inotify': '1',
+        'inotify_debounce': '250',
+        'read_smbios_tables': '0'
         }
 
 RHSMCERTD_DEFAULTS = {
@@ -112,13 +114,31 @@ class RhsmConfigParser(SafeConfigParser):
     # defaults unused but kept to preserve compatibility
     def __init__(self, config_file=None, defaults=None):
         self.config_file = config_file
+        # Maps (section, prop) to the value get() resolved for it. Emptied
+        # by anything that changes the parsed config, see _invalidate().
+        self._resolved = {}
         SafeConfigParser.__init__(self)
         self.read(self.config_file)
 
+    def _invalidate(self):
+        # Replaced rather than cleared: a get() running concurrently with a
+        # change stores what it resolved in the dict it started with.
+        self._resolved = {}
+
+    def read(self, filenames):
+        result = SafeConfigParser.read(self, filenames)
+        self._invalidate()
+        return result
+
+    def readfp(self, fp, filename=None):
+        SafeConfigParser.readfp(self, fp, filename)
+        self._invalidate()
+
     def save(self, config_file=None):
         """Writes config file to storage."""
         fo = open(self.config_file, "w")
         self.write(fo)
+        self._invalidate()
 
     def get(self, section, prop):
         """Get a value from rhsm config.
@@ -132,7 +152,21 @@ class RhsmConfigParser(SafeConfigParser):
 
         If config item exists, but is not set,
         an empty string is return.
+
+        Values are resolved once, and then returned from a cache until
+        the config is changed or read again.
         """
+        resolved = self._resolved
+        try:
+            return resolved[(section, prop)]
+        except KeyError:
+            pass
+        value = self._resolve(section, prop)
+        resolved[(section, prop)] = value
+        return value
+
+    def _resolve(self, section, prop):
+        """Resolve a value, interpolating it and falling back to the defaults."""
         try:
             return SafeConfigParser.get(self, section, prop)
         except InterpolationMissingOptionError:
@@ -167,6 +201,17 @@ class RhsmConfigParser(SafeConfigParser):
             if not self.has_section(section):
                 self.add_section(section)
             super(RhsmConfigParser, self).set(section, name, value)
+            self._invalidate()
+
+    def remove_option(self, section, option):
+        result = super(RhsmConfigParser, self).remove_option(section, option)
+        self._invalidate()
+        return result
+
+    def remove_section(self, section):
+        result = super(RhsmConfigParser, self).remove_section(section)
+        self._invalidate()
+        return result
 
     def get_int(self, section, prop):
         """Get a int value from the config.
@@ -18,15 +18,20 @@ from __future__ import print_function, division, absolute_import
 
 import base64
 from rhsm import certificate
+import codecs
 import datetime
 import dateutil.parser
+import itertools
 import locale
 import logging
 import os
+import re
 import six
 import socket
 import sys
+import threading
 import time
+import zlib
 from email.utils import formatdate
 
 from rhsm.https import httplib, ssl
@@ -321,6 +326,13 @@ class ContentConnection(object):
                 config.get('server', 'proxy_password') or \
                 info['proxy_password']
 
+        # Parsed entitlement certificates, SSL contexts and idle connections,
+        # all keyed on the cert and key paths and the cert modification time:
+        self._ent_certs = {}
+        self._contexts = {}
+        self._idle_connections = {}
+        self._lock = threading.Lock()
+
     @property
     def user_agent(self):
         return "RHSM-content/1.0 (cmd=%s)" % utils.cmd_name(sys.argv)
@@ -380,40 +392,156 @@ class ContentConnection(object):
         except OSError as e:
             raise ConnectionSetupException(e.strerror)
 
-    def _request(self, request_type, handler, body="", headers=None, ent_cert_key_pairs=None):
+    def _new_context(self):
         # See note in Restlib._request
         context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
 
         # Disable SSLv2 and SSLv3 support to avoid poodles.
         context.options = ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3
+        return context
+
+    @staticmethod
+    def _cert_key(cert_path, key_path):
+        try:
+            mtime = os.path.getmtime(cert_path)
+        except OSError:
+            mtime = None
+        return (cert_path, key_path, mtime)
+
+    def _get_context(self, cert_path, key_path):
+        """
+        Returns the SSL context for a cert-key pair, creating it the first
+        time the pair is used.
+        """
+        cache_key = self._cert_key(cert_path, key_path)
+        with self._lock:
+            context = self._contexts.get(cache_key)
+        if context is None:
+            context = self._new_context()
+            self._load_ca_certificate(context, cert_path, key_path)
+            with self._lock:
+                self._contexts[cache_key] = context
+        return context
+
+    def _get_ent_cert(self, cert_path):
+        """
+        Returns the parsed entitlement certificate at cert_path, or None
+        when it can not be read.
+        """
+        cache_key = self._cert_key(cert_path, None)
+        if cache_key not in self._ent_certs:
+            try:
+                self._ent_certs[cache_key] = certificate.create_from_file(cert_path)
+            except Exception as e:
+                log.debug("Unable to read entitlement certificate %s: %s" % (cert_path, e))
+                self._ent_certs[cache_key] = None
+        return self._ent_certs[cache_key]
+
+    def _select_ent_cert_key_pairs(self, handler, ent_cert_key_pairs):
+        """
+        Returns the cert-key pairs worth trying for handler: the ones whose
+        certificate grants access to the path come first, followed by any
+        whose certificate could not be checked. Pairs whose v3 certificate
+        does not cover the path are left out, the CDN would refuse them.
+        v1 certificates only list content URLs, which do not tell whether
+        files such as listings next to them are covered, so those are kept.
+        """
+        path = handler.split('?', 1)[0]
+        matching = []
+        unknown = []
+        for cert_path, key_path in ent_cert_key_pairs:
+            ent_cert = self._get_ent_cert(cert_path)
+            try:
+                entitled = ent_cert.check_path(path)
+            except Exception:
+                # Not a readable entitlement certificate, let the CDN decide:
+                unknown.append((cert_path, key_path))
+                continue
+            if entitled:
+                matching.append((cert_path, key_path))
+            elif ent_cert.version.major < 3:
+                unknown.append((cert_path, key_path))
+            else:
+                log.debug("Entitlement certificate %s does not grant access to %s" %
+                          (cert_path, path))
+        return matching + unknown
+
+    def _get_idle_connection(self, cache_key):
+        with self._lock:
+            idle = self._idle_connections.get(cache_key)
+            if idle:
+                return idle.pop()
+        return None
+
+    def _release_connection(self, cache_key, conn):
+        with self._lock:
+            self._idle_connections.setdefault(cache_key, []).append(conn)
+
+    def close(self):
+        """
+        Closes the connections kept open for reuse.
+        """
+        with self._lock:
+            idle_connections = self._idle_connections
+            self._idle_connections = {}
+        for connections in idle_connections.values():
+            for conn in connections:
+                conn.close()
+
+    def _request_with(self, cert_path, key_path, request_type, handler, body, headers):
+        """
+        Makes the request authenticated with one cert-key pair. An idle
+        connection for the pair is reused when there is one; if the server
+        closed it in the meantime, the request is retried on a new one.
+        """
+        cache_key = self._cert_key(cert_path, key_path)
+        context = self._get_context(cert_path, key_path)
+        conn = self._get_idle_connection(cache_key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._create_connection(context)
+            try:
+                conn.request(request_type, handler, body=body, headers=headers)
+                response = conn.getresponse()
+                content = response.read()
+            except (httplib.HTTPException, socket.error):
+                conn.close()
+                if not reused:
+                    raise
+                reused = False
+                conn = None
+                continue
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release_connection(cache_key, conn)
 
+        return {
+            "content": content.decode('utf-8'),
+            "status": response.status,
+            "headers": dict(response.getheaders())}
+
+    def _request(self, request_type, handler, body="", headers=None, ent_cert_key_pairs=None):
         final_headers = {"Host": "%s:%s" % (normalized_host(self.host), self.ssl_port),
                          "Content-Length": "0",
                          "User-Agent": self.user_agent}
         if headers:
             final_headers.update(headers)
+        conditional = "If-None-Match" in final_headers or "If-Modified-Since" in final_headers
 
         # When no list of entitlement certificates is provided, then try to use all
         # entitlement certificates installed on the system
         if ent_cert_key_pairs is None or len(ent_cert_key_pairs) == 0:
             ent_cert_key_pairs = self._get_ent_cert_key_list()
 
-        for cert_path, key_path in ent_cert_key_pairs:
-            self._load_ca_certificate(context, cert_path, key_path)
-
-            conn = self._create_connection(context)
+        for cert_path, key_path in self._select_ent_cert_key_pairs(handler, ent_cert_key_pairs):
+            result = self._request_with(cert_path, key_path, request_type, handler,
+                                        body, final_headers)
 
-            conn.request(request_type, handler,
-                         body=body,
-                         headers=final_headers)
-            response = conn.getresponse()
-
-            result = {
-                "content": response.read().decode('utf-8'),
-                "status": response.status,
-                "headers": dict(response.getheaders())}
-
-            if response.status == 200:
+            if result["status"] == 200 or (conditional and result["status"] == 304):
                 return result
 
             log.debug("Unable to get valid response: %s from CDN: %s" %
@@ -439,6 +567,23 @@ class ContentConnection(object):
 
         return ''
 
+    def get_listing(self, path, ent_cert_key_pairs=None, etag=None, last_modified=None):
+        """
+        Fetches a listing file. When the validators of a cached copy are
+        given, the request is conditional and the result has status 304
+        if the listing has not changed.
+
+        :return: dict with the "status", "content" and "headers" of the response
+        """
+        handler = "%s/%s" % (self.handler, path)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return self._request("GET", handler, body="", headers=headers,
+                             ent_cert_key_pairs=ent_cert_key_pairs)
+
     def _get_versions_for_product(self, product_id):
         pass
 
@@ -461,6 +606,260 @@ def _get_locale():
     return None
 
 
+# Bytes read off the wire at a time from a response body:
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Bytes of JSON compressed at a time for a request body:
+REQUEST_CHUNK_SIZE = 64 * 1024
+
+# Servers with this capability take gzip encoded request bodies:
+REQUEST_COMPRESSION_CAPABILITY = "request_compression"
+
+# Seconds a cached server version is trusted before GET /status confirms it:
+SERVER_VERSION_CHECK_INTERVAL = 60 * 60
+
+
+class ResponseBody(object):
+    """
+    Iterates over the body of an httplib response in chunks, decompressing
+    it on the fly when the server sent it gzip or deflate encoded. Counts
+    the bytes read off the wire and the bytes handed out after decoding.
+    """
+
+    def __init__(self, response, chunk_size=RESPONSE_CHUNK_SIZE):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.encoding = (response.getheader('content-encoding') or 'identity').strip().lower()
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    def _decompressor(self):
+        if self.encoding in ('gzip', 'x-gzip'):
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.encoding == 'deflate':
+            return zlib.decompressobj()
+        return None
+
+    def __iter__(self):
+        decompressor = self._decompressor()
+        while True:
+            raw = self.response.read(self.chunk_size)
+            if not raw:
+                break
+            first = self.wire_bytes == 0
+            self.wire_bytes += len(raw)
+            chunk = raw
+            if decompressor is not None:
+                try:
+                    chunk = decompressor.decompress(raw)
+                except zlib.error as e:
+                    if not (first and self.encoding == 'deflate'):
+                        raise ConnectionException("Unable to decode %s response: %s" % (self.encoding, e))
+                    # Some servers send deflate without the zlib header:
+                    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    chunk = decompressor.decompress(raw)
+            if chunk:
+                self.decoded_bytes += len(chunk)
+                yield chunk
+        if decompressor is not None:
+            chunk = decompressor.flush()
+            if chunk:
+                self.decoded_bytes += len(chunk)
+                yield chunk
+
+    def read(self):
+        return b"".join(self)
+
+    def iter_json_array(self):
+        """
+        Yields the items of the JSON array in the body as they arrive, see
+        iter_json_array().
+        """
+        for item in iter_json_array(self):
+            yield item
+        self.log_sizes()
+
+    def log_sizes(self):
+        if self.encoding == 'identity':
+            log.debug("Response body: %d bytes" % self.decoded_bytes)
+        else:
+            log.debug("Response body: %d bytes, %d bytes %s encoded" %
+                      (self.decoded_bytes, self.wire_bytes, self.encoding))
+
+
+def iter_json(obj, depth=2):
+    """
+    Yields the same JSON as json.dumps(obj), in pieces. Dicts and lists
+    down to depth levels are taken apart, whatever is below that is
+    encoded by json.dumps() in one go.
+    """
+    if depth > 0 and isinstance(obj, dict) and \
+            all(isinstance(key, six.string_types) for key in obj):
+        yield "{"
+        for (i, (key, value)) in enumerate(obj.items()):
+            yield "%s%s: " % (", " if i else "", json.dumps(key))
+            for piece in iter_json(value, depth - 1):
+                yield piece
+        yield "}"
+    elif depth > 0 and isinstance(obj, (list, tuple)):
+        yield "["
+        for (i, value) in enumerate(obj):
+            if i:
+                yield ", "
+            for piece in iter_json(value, depth - 1):
+                yield piece
+        yield "]"
+    else:
+        yield json.dumps(obj, default=json.encode)
+
+
+class RequestBody(object):
+    """
+    Encodes the JSON body of a request. Compressed bodies are encoded and
+    gzipped piece by piece, so the uncompressed JSON is never held in
+    memory all at once. Counts the bytes encoded and the bytes to send.
+    """
+
+    def __init__(self, info, compress=False, chunk_size=REQUEST_CHUNK_SIZE):
+        self.info = info
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.encoding = 'gzip' if compress else 'identity'
+        self.encoded_bytes = 0
+        self.wire_bytes = 0
+
+    def _encoded_chunks(self):
+        pending = []
+        pending_size = 0
+        for piece in iter_json(self.info):
+            pending.append(piece)
+            pending_size += len(piece)
+            if pending_size >= self.chunk_size:
+                yield "".join(pending).encode('utf-8')
+                pending = []
+                pending_size = 0
+        if pending:
+            yield "".join(pending).encode('utf-8')
+
+    def __iter__(self):
+        compressor = None
+        if self.compress:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in self._encoded_chunks():
+            self.encoded_bytes += len(chunk)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                self.wire_bytes += len(chunk)
+                yield chunk
+        if compressor is not None:
+            chunk = compressor.flush()
+            self.wire_bytes += len(chunk)
+            yield chunk
+
+    def read(self):
+        if not self.compress:
+            body = json.dumps(self.info, default=json.encode).encode('utf-8')
+            self.encoded_bytes = self.wire_bytes = len(body)
+            return body
+        return b"".join(self)
+
+    def log_sizes(self):
+        if self.encoding == 'identity':
+            log.debug("Request body: %d bytes" % self.encoded_bytes)
+        else:
+            log.debug("Request body: %d bytes, %d bytes %s encoded" %
+                      (self.encoded_bytes, self.wire_bytes, self.encoding))
+
+
+def split_hypervisor_report(report, max_size):
+    """
+    Splits a hypervisors_async report, a dict with a list of "hypervisors",
+    into reports whose JSON takes at most about max_size bytes each. A
+    hypervisor too large for that gets a report of its own.
+    """
+    rest = dict((key, value) for (key, value) in report.items() if key != "hypervisors")
+    overhead = len(json.dumps(dict(rest, hypervisors=[]), default=json.encode))
+    hypervisors = []
+    size = overhead
+    for hypervisor in report.get("hypervisors", []):
+        # plus the ", " separating it from the previous one:
+        hypervisor_size = len(json.dumps(hypervisor, default=json.encode)) + 2
+        if hypervisors and size + hypervisor_size > max_size:
+            yield dict(rest, hypervisors=hypervisors)
+            hypervisors = []
+            size = overhead
+        hypervisors.append(hypervisor)
+        size += hypervisor_size
+    if hypervisors or not report.get("hypervisors"):
+        yield dict(rest, hypervisors=hypervisors)
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_NUMBER_PART = re.compile(r'[0-9.eE+-]*')
+
+# What iter_json_array() expects to find next:
+(_ARRAY_START, _ARRAY_FIRST_ITEM, _ARRAY_ITEM, _ARRAY_SEPARATOR, _ARRAY_END) = range(5)
+
+
+def iter_json_array(chunks):
+    """
+    Parses a JSON array from an iterable of utf-8 encoded byte chunks,
+    yielding each of its items as soon as it has arrived in full. Only the
+    text of the item being received is kept around, not the whole document.
+
+    Raises ValueError if the chunks do not make up a JSON array.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    state = _ARRAY_START
+    text = ''
+    # A trailing None marks the end of the input:
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        text += decoder.decode(chunk or b'', final)
+        pos = 0
+        while True:
+            pos = _JSON_WHITESPACE.match(text, pos).end()
+            if pos == len(text):
+                break
+            char = text[pos]
+            if state == _ARRAY_START:
+                if char != '[':
+                    raise ValueError("Expected a JSON array, found %r" % char)
+                state = _ARRAY_FIRST_ITEM
+                pos += 1
+            elif state == _ARRAY_END:
+                raise ValueError("Extra data after the JSON array")
+            elif state == _ARRAY_SEPARATOR or (state == _ARRAY_FIRST_ITEM and char == ']'):
+                if char == ']':
+                    state = _ARRAY_END
+                elif char == ',' and state == _ARRAY_SEPARATOR:
+                    state = _ARRAY_ITEM
+                else:
+                    raise ValueError("Expected ',' or ']' in the JSON array, found %r" % char)
+                pos += 1
+            else:
+                try:
+                    (item, end) = _JSON_DECODER.raw_decode(text, pos)
+                except ValueError:
+                    if final:
+                        raise
+                    # The item is not complete yet
+                    break
+                if char in '-0123456789' and not final and \
+                        _JSON_NUMBER_PART.match(text, end).end() == len(text):
+                    # The next chunk may hold more of this number
+                    break
+                yield item
+                state = _ARRAY_SEPARATOR
+                pos = end
+        text = text[pos:]
+
+    if state != _ARRAY_END:
+        raise ValueError("Truncated JSON array")
+
+
 class BaseRestLib(object):
     """
     A low-level wrapper around httplib
@@ -498,6 +897,7 @@ class BaseRestLib(object):
 
         self.headers = {"Content-type": "application/json",
                         "Accept": "application/json",
+                        "Accept-Encoding": "gzip, deflate",
                         "x-subscription-manager-version": subman_version}
 
         if lc:
@@ -523,6 +923,17 @@ class BaseRestLib(object):
         if username and password:
             self.headers['Authorization'] = _encode_auth(username, password)
 
+        # Called with the method when the server answers 404 without a body,
+        # meaning it has no such resource at all:
+        self.not_found_callback = None
+
+        # Called with the X-Version header, "<version>-<release>", that
+        # Candlepin sends with its responses:
+        self.server_version_callback = None
+        # Called with the request type and method before and after any
+        # request that may change something on the server:
+        self.write_callback = None
+
     def _load_ca_certificates(self, context):
         loaded_ca_certs = []
         cert_path = ''
@@ -543,7 +954,27 @@ class BaseRestLib(object):
             log.debug("Loaded CA certificates from %s: %s" % (self.ca_dir, ', '.join(loaded_ca_certs)))
 
     # FIXME: can method be empty?
-    def _request(self, request_type, method, info=None, headers=None):
+    def _request(self, request_type, method, info=None, headers=None, stream=False,
+                 compress=False):
+        """
+        Makes the request. With stream, a 200 response is not read up front:
+        its content is None and its "items" parse the JSON array in the body
+        off the connection as they are iterated over. With compress, info is
+        sent gzip encoded, which only servers with the request_compression
+        capability accept.
+        """
+        if request_type in ("GET", "HEAD") or self.write_callback is None:
+            return self._send_request(request_type, method, info, headers, stream, compress)
+
+        # Before, and after whatever was read while the request was made,
+        # even if it failed, since the change may still have been made:
+        self.write_callback(request_type, method)
+        try:
+            return self._send_request(request_type, method, info, headers, stream, compress)
+        finally:
+            self.write_callback(request_type, method)
+
+    def _send_request(self, request_type, method, info, headers, stream, compress):
         handler = self.apihandler + method
 
         # See M2Crypto/SSL/Context.py in m2crypto source and
@@ -583,8 +1014,11 @@ class BaseRestLib(object):
         else:
             conn = httplib.HTTPSConnection(self.host, self.ssl_port, context=context, timeout=self.timeout)
 
+        request_body = None
         if info is not None:
-            body = json.dumps(info, default=json.encode)
+            request_body = RequestBody(info, compress=compress)
+            body = request_body.read()
+            request_body.log_sizes()
         else:
             body = None
 
@@ -596,6 +1030,8 @@ class BaseRestLib(object):
         final_headers = self.headers.copy()
         if body is None:
             final_headers["Content-Length"] = "0"
+        elif request_body.encoding != 'identity':
+            final_headers["Content-Encoding"] = request_body.encoding
         if headers:
             final_headers.update(headers)
 
@@ -619,8 +1055,10 @@ class BaseRestLib(object):
                 raise ProxyException(err)
             raise
         response = conn.getresponse()
+        body = ResponseBody(response)
+        streaming = stream and response.status == 200
         result = {
-            "content": response.read().decode('utf-8'),
+            "content": None if streaming else body.read().decode('utf-8'),
             "status": response.status,
             "headers": dict(response.getheaders())
         }
@@ -632,15 +1070,28 @@ class BaseRestLib(object):
         response_log = "%s, request=\"%s %s\"" % (response_log,
             request_type, handler)
         log.info(response_log)
+        if streaming:
+            result["items"] = body.iter_json_array()
+        else:
+            body.log_sizes()
 
         # Look for server drift, and log a warning
         if drift_check(response.getheader('date')):
             log.warn("Clock skew detected, please check your system time")
 
+        server_version = response.getheader('x-version')
+        if server_version and self.server_version_callback is not None:
+            self.server_version_callback(server_version)
+
         # FIXME: we should probably do this in a wrapper method
         # so we can use the request method for normal http
 
-        self.validateResponse(result, request_type, handler)
+        try:
+            self.validateResponse(result, request_type, handler)
+        except RemoteServerException as e:
+            if str(e.code) == "404" and self.not_found_callback is not None:
+                self.not_found_callback(method)
+            raise
 
         return result
 
@@ -735,11 +1186,11 @@ class BaseRestLib(object):
         if 'errors' in body:
             return " ".join("%s" % errmsg for errmsg in body['errors'])
 
-    def request_get(self, method, headers=None):
-        return self._request("GET", method, headers=headers)
+    def request_get(self, method, headers=None, stream=False):
+        return self._request("GET", method, headers=headers, stream=stream)
 
-    def request_post(self, method, params=None, headers=None):
-        return self._request("POST", method, params, headers=headers)
+    def request_post(self, method, params=None, headers=None, compress=False):
+        return self._request("POST", method, params, headers=headers, compress=compress)
 
     def request_head(self, method, headers=None):
         return self._request("HEAD", method, headers=headers)
@@ -760,14 +1211,23 @@ class Restlib(BaseRestLib):
      of communication with the server.
     """
 
-    def _request(self, request_type, method, info=None, headers=None):
+    def _request(self, request_type, method, info=None, headers=None, stream=False,
+                 compress=False):
+        """
+        Returns the parsed JSON of the response, or with stream an iterator
+        over the items of the JSON array it holds.
+        """
         result = super(Restlib, self)._request(request_type, method,
-            info=info, headers=headers)
+            info=info, headers=headers, stream=stream, compress=compress)
+
+        if 'items' in result:
+            return result['items']
 
         # Handle 204s
         if not len(result['content']):
-            return None
-        return json.loads(result['content'])
+            return iter(()) if stream else None
+        parsed = json.loads(result['content'])
+        return iter(parsed) if stream else parsed
 
 
 # FIXME: there should probably be a class here for just
@@ -793,7 +1253,9 @@ class UEPConnection(object):
             timeout=None,
             restlib_class=None,
             correlation_id=None,
-            no_proxy=None):
+            no_proxy=None,
+            capability_cache=None,
+            consumer_cache=None):
         """
         Two ways to authenticate:
             - username/password for HTTP basic authentication. (owner admin role)
@@ -801,6 +1263,16 @@ class UEPConnection(object):
               (consumer role)
 
         Must specify one method of authentication or the other, not both.
+
+        capability_cache is an optional store for the resources and
+        capabilities of the server, shared between connections and
+        processes. It needs get(key) returning a dict or None,
+        update(key, **values) and invalidate(key).
+
+        consumer_cache is an optional store for consumer and owner objects,
+        shared between connections. It needs get(kind, uuid) returning the
+        object or None, set(kind, uuid, value) and invalidate(), which is
+        called before every request that may change something on the server.
         """
         restlib_class = restlib_class or Restlib
         self.host = host or config.get('server', 'hostname')
@@ -906,9 +1378,16 @@ class UEPConnection(object):
             auth_description = "auth=none"
 
         self.conn.user_agent = "RHSM/1.0 (cmd=%s)" % utils.cmd_name(sys.argv)
+        self.conn.not_found_callback = self._resource_not_found
+        self.conn.server_version_callback = self._check_version
+        self.consumer_cache = consumer_cache
+        if consumer_cache is not None:
+            self.conn.write_callback = self._server_written
 
         self.resources = None
         self.capabilities = None
+        self.capability_cache = capability_cache
+        self._version_checked = False
         connection_description = ""
         if proxy_description:
             connection_description += proxy_description
@@ -926,12 +1405,18 @@ class UEPConnection(object):
         replaced later) If something goes wrong making this request, just
         leave the list of supported resources empty.
         """
+        cached = self._get_cached("resources")
+        if cached is not None:
+            self.resources = cached
+            return
+
         self.resources = {}
         resources_list = self.conn.request_get("/")
         for r in resources_list:
             self.resources[r['rel']] = r['href']
         log.debug("Server supports the following resources: %s",
                   self.resources)
+        self._update_cached(resources=self.resources)
 
     def supports_resource(self, resource_name):
         """
@@ -966,10 +1451,101 @@ class UEPConnection(object):
         """
         Check if the server we're connected to has a particular capability.
         """
+        if self.capabilities is None:
+            self.capabilities = self._get_cached("capabilities")
         if self.capabilities is None:
             self.capabilities = self._load_manager_capabilities()
+            self._update_cached(capabilities=self.capabilities)
         return capability in self.capabilities
 
+    def _capability_cache_key(self):
+        return "%s:%s%s" % (self.host, self.ssl_port, self.handler)
+
+    def _get_cached(self, name):
+        if self.capability_cache is None:
+            return None
+        entry = self.capability_cache.get(self._capability_cache_key())
+        if entry is not None and not self._version_checked and not self._version_fresh(entry):
+            # The server may have been upgraded since the entry was cached,
+            # GET /status drops the entry if so:
+            self._version_checked = True
+            self.getStatus()
+            entry = self.capability_cache.get(self._capability_cache_key())
+        if entry is None:
+            return None
+        return entry.get(name)
+
+    @staticmethod
+    def _version_fresh(entry):
+        return 0 <= time.time() - entry.get("version_checked", 0) < SERVER_VERSION_CHECK_INTERVAL
+
+    def _update_cached(self, **values):
+        if self.capability_cache is not None:
+            self.capability_cache.update(self._capability_cache_key(), **values)
+
+    def _invalidate_cached(self):
+        self.resources = None
+        self.capabilities = None
+        if self.capability_cache is not None:
+            self.capability_cache.invalidate(self._capability_cache_key())
+
+    def _check_server_version(self, status):
+        if isinstance(status, dict):
+            self._check_version("%s-%s" % (status.get('version'), status.get('release')))
+
+    def _check_version(self, version):
+        """
+        Drops what is known about the server when it is running a different
+        version than when that was cached. The version comes from GET /status
+        and from the X-Version header of every response.
+        """
+        if self.capability_cache is None:
+            return
+        self._version_checked = True
+        key = self._capability_cache_key()
+        entry = self.capability_cache.get(key) or {}
+        cached_version = entry.get("version")
+        if cached_version is not None and cached_version != version:
+            log.debug("Server version changed from %s to %s, dropping its cached resources" %
+                      (cached_version, version))
+            self._invalidate_cached()
+        elif cached_version == version and self._version_fresh(entry):
+            return
+        self.capability_cache.update(key, version=version, version_checked=time.time())
+
+    def _resource_not_found(self, method):
+        """
+        Called by the Restlib when the server has no resource at method. If
+        it was advertised, the list of resources is out of date.
+        """
+        if not self.resources:
+            return
+        path = method.split('?', 1)[0]
+        for href in self.resources.values():
+            href = href.rstrip('/')
+            if href and (path == href or path.startswith(href + '/')):
+                log.debug("Advertised resource %s not found on the server, "
+                          "dropping its cached resources" % href)
+                self._invalidate_cached()
+                return
+
+    def _server_written(self, request_type, method):
+        self.consumer_cache.invalidate()
+
+    def _get_consumer_object(self, kind, uuid, method):
+        """
+        Returns the consumer or owner object at method, from the consumer
+        cache when it has it.
+        """
+        if self.consumer_cache is not None:
+            value = self.consumer_cache.get(kind, uuid)
+            if value is not None:
+                return value
+        value = self.conn.request_get(method)
+        if self.consumer_cache is not None and value is not None:
+            self.consumer_cache.set(kind, uuid, value)
+        return value
+
     def shutDown(self):
         self.conn.close()
         log.info("remote connection closed")
@@ -1022,7 +1598,8 @@ class UEPConnection(object):
 
         return self.conn.request_post(url, params)
 
-    def hypervisorCheckIn(self, owner, env, host_guest_mapping, options=None):
+    def hypervisorCheckIn(self, owner, env, host_guest_mapping, options=None,
+                          max_job_size=None):
         """
         Sends a mapping of hostIds to list of guestIds to candlepin
         to be registered/updated.
@@ -1034,7 +1611,13 @@ class UEPConnection(object):
             - RateLimitExceededException: This means that too many requests
             have been made in the given time period.
 
+        The report is sent gzip compressed if the server supports that.
+        With the hypervisors_async capability, max_job_size splits the report
+        into jobs of at most about that many bytes of JSON each, see
+        split_hypervisor_report(), and a list of the created jobs is
+        returned instead of the one job.
         """
+        compress = self.has_capability(REQUEST_COMPRESSION_CAPABILITY)
         if (self.has_capability("hypervisors_async")):
             priorContentType = self.conn.headers['Content-type']
             self.conn.headers['Content-type'] = 'text/plain'
@@ -1045,15 +1628,21 @@ class UEPConnection(object):
 
             query_params = urlencode(params)
             url = "/hypervisors/%s?%s" % (owner, query_params)
-            res = self.conn.request_post(url, host_guest_mapping)
-            self.conn.headers['Content-type'] = priorContentType
+            try:
+                if max_job_size:
+                    res = [self.conn.request_post(url, report, compress=compress)
+                           for report in split_hypervisor_report(host_guest_mapping, max_job_size)]
+                else:
+                    res = self.conn.request_post(url, host_guest_mapping, compress=compress)
+            finally:
+                self.conn.headers['Content-type'] = priorContentType
         else:
             # fall back to original report api
             # this results in the same json as in the result_data field
             # of the new api method
             query_params = urlencode({"owner": owner, "env": env})
             url = "/hypervisors?%s" % (query_params)
-            res = self.conn.request_post(url, host_guest_mapping)
+            res = self.conn.request_post(url, host_guest_mapping, compress=compress)
         return res
 
     def updateConsumerFacts(self, consumer_uuid, facts={}):
@@ -1176,7 +1765,7 @@ class UEPConnection(object):
         Returns a consumer object with pem/key for existing consumers
         """
         method = '/consumers/%s' % self.sanitize(uuid)
-        return self.conn.request_get(method)
+        return self._get_consumer_object('consumer', uuid, method)
 
     def getConsumers(self, owner=None):
         """
@@ -1220,7 +1809,7 @@ class UEPConnection(object):
         Returns an owner object with pem/key for existing consumers
         """
         method = '/consumers/%s/owner' % self.sanitize(uuid)
-        return self.conn.request_get(method)
+        return self._get_consumer_object('owner', uuid, method)
 
     def deleteOwner(self, key):
         """
@@ -1266,16 +1855,18 @@ class UEPConnection(object):
         method = '/consumers/%s' % self.sanitize(consumerId)
         return self.conn.request_delete(method)
 
-    def getCertificates(self, consumer_uuid, serials=[]):
+    def getCertificates(self, consumer_uuid, serials=[], stream=False):
         """
         Fetch all entitlement certificates for this consumer.
         Specify a list of serial numbers to filter if desired.
+        With stream, returns an iterator that parses the certificates one
+        at a time as they are downloaded.
         """
         method = '/consumers/%s/certificates' % (self.sanitize(consumer_uuid))
         if len(serials) > 0:
             serials_str = ','.join(serials)
             method = "%s?serials=%s" % (method, serials_str)
-        return self.conn.request_get(method)
+        return self.conn.request_get(method, stream=stream)
 
     def getCertificateSerials(self, consumerId):
         """
@@ -1368,12 +1959,16 @@ class UEPConnection(object):
 
         return self.conn.request_put(method)
 
-    def getPoolsList(self, consumer=None, listAll=False, active_on=None, owner=None, filter_string=None, future=None, after_date=None):
+    def getPoolsList(self, consumer=None, listAll=False, active_on=None, owner=None, filter_string=None, future=None, after_date=None,
+                     stream=False):
         """
         List pools for a given consumer or owner.
 
         Ideally, try to always pass the owner key argument. The old method is deprecated
         and may eventually be removed.
+
+        With stream, returns an iterator that parses the pools one at a time
+        as they are downloaded.
         """
 
         if owner:
@@ -1401,7 +1996,7 @@ class UEPConnection(object):
                     self.sanitize(active_on.isoformat(), plus=True))
         if filter_string:
             method = "%s&matches=%s" % (method, self.sanitize(filter_string, plus=True))
-        results = self.conn.request_get(method)
+        results = self.conn.request_get(method, stream=stream)
         return results
 
     def getPool(self, poolId, consumerId=None):
@@ -1431,14 +2026,19 @@ class UEPConnection(object):
         method = "/consumers/%s/available_releases" % self.sanitize(consumerId)
         return self.conn.request_get(method)
 
-    def getEntitlementList(self, consumerId, request_certs=False):
+    def getEntitlementList(self, consumerId, request_certs=False, stream=False):
+        """
+        List the entitlements of a consumer, leaving out their certificates
+        unless request_certs is given. With stream, returns an iterator that
+        parses the entitlements one at a time as they are downloaded.
+        """
         method = "/consumers/%s/entitlements" % self.sanitize(consumerId)
         if not request_certs:
             # It is unnecessary to download the certificate and key here
             filters = "?exclude=certificates.key&exclude=certificates.cert"
         else:
             filters = ""
-        results = self.conn.request_get(method + filters)
+        results = self.conn.request_get(method + filters, stream=stream)
         return results
 
     def getServiceLevelList(self, owner_key):
@@ -1543,7 +2143,9 @@ class UEPConnection(object):
 
     def getStatus(self):
         method = "/status"
-        return self.conn.request_get(method)
+        status = self.conn.request_get(method)
+        self._check_server_version(status)
+        return status
 
     def getContentOverrides(self, consumerId):
         """
@@ -37,6 +37,8 @@ __all__ = [
     'SYSPURPOSE_INTERFACE',
     'SYSPURPOSE_DBUS_PATH',
     'DBUS_PROPERTIES_INTERFACE',
+    'STATUS_MAX_AGE',
+    'STATUS_CHECK_INTERVAL',
 ]
 
 # The base of the 'well known name' used for bus and service names, as well
@@ -87,3 +89,9 @@ SYSPURPOSE_INTERFACE = '%s.%s' % (INTERFACE_BASE, 'Syspurpose')
 SYSPURPOSE_DBUS_PATH = '%s/%s' % (ROOT_DBUS_PATH, 'Syspurpose')
 
 DBUS_PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+# Seconds a status is handed out again before the server is asked for it,
+# since it can change there without any local file changing:
+STATUS_MAX_AGE = 15 * 60
+# Seconds between checks whether a status a client asked for changed:
+STATUS_CHECK_INTERVAL = 60
@@ -44,6 +44,18 @@ class BaseFacts(base_object.BaseObject):
         cleaned = dict([(str(key), str(value)) for key, value in list(collection.data.items())])
         return dbus.Dictionary(cleaned, signature="ss")
 
+    @util.dbus_service_method(
+        dbus_interface=constants.FACTS_DBUS_INTERFACE)
+    @util.dbus_handle_exceptions
+    def Refresh(self, sender=None):
+        """
+        Drops the cached facts, so that the next GetFacts collects all of
+        them again, including those that only change with a reboot.
+        """
+        if self.facts_collector.facts_cache is not None:
+            log.debug("Dropping cached facts")
+            self.facts_collector.facts_cache.invalidate()
+
 
 def class_factory(name, facts_collector=None):
     """Function used for creating subclasses of class BaseFact"""
@@ -55,8 +67,12 @@ def class_factory(name, facts_collector=None):
     return type(name, (BaseFacts,), {"__init__": __init__})
 
 
-AllFacts = class_factory('AllFacts', all.AllFactsCollector())
-HostFacts = class_factory('HostFacts', host_collector.HostCollector())
-HardwareFacts = class_factory('HardwareFacts', hwprobe.HardwareCollector())
-CustomFacts = class_factory('CustomFacts', custom.CustomFactsCollector())
+# The facts service runs for a long time, so the facts objects share the
+# results of the expensive collectors:
+facts_cache = collector.FactsCache()
+
+AllFacts = class_factory('AllFacts', all.AllFactsCollector(facts_cache=facts_cache))
+HostFacts = class_factory('HostFacts', host_collector.HostCollector(facts_cache=facts_cache))
+HardwareFacts = class_factory('HardwareFacts', hwprobe.HardwareCollector(facts_cache=facts_cache))
+CustomFacts = class_factory('CustomFacts', custom.CustomFactsCollector(facts_cache=facts_cache))
 StaticFacts = class_factory('StaticFacts', collector.StaticFactsCollector())
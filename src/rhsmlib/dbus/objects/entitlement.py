@@ -16,10 +16,14 @@ from __future__ import print_function, division, absolute_import
 import dbus
 import json
 import logging
+import threading
+from datetime import datetime, timedelta
 
+from rhsm.certificate import GMT
 from rhsmlib.dbus import constants, base_object, util, dbus_utils
 from rhsmlib.services.entitlement import EntitlementService
 
+from subscription_manager import injection as inj
 from subscription_manager.injectioninit import init_dep_injection
 from subscription_manager.i18n import Locale
 
@@ -38,6 +42,16 @@ class EntitlementDBusObject(base_object.BaseObject):
 
     def __init__(self, conn=None, object_path=None, bus_name=None):
         super(EntitlementDBusObject, self).__init__(conn=conn, object_path=object_path, bus_name=bus_name)
+        # GetStatus results as {(on_date, locale): JSON string}, valid while
+        # nothing in _status_state() changes, until _status_cache_until:
+        self._status_cache = {}
+        self._status_cache_state = None
+        self._status_cache_until = None
+        self._status_lock = threading.Lock()
+        # The locale and current status last handed out without a date,
+        # which StatusChanged follows:
+        self._status_locale = None
+        self._current_status = None
 
     @util.dbus_service_method(
         constants.ENTITLEMENT_INTERFACE,
@@ -60,16 +74,98 @@ class EntitlementDBusObject(base_object.BaseObject):
             on_date = None
         else:
             on_date = self._parse_date(on_date)
-        Locale.set(locale)
 
+        return self._get_status(on_date, locale)
+
+    def _status_state(self):
+        """
+        Returns what the entitlement status is computed from: the
+        registration, the entitlement and product certificates and the
+        compliance status last fetched from the server.
+        """
+        identity = inj.require(inj.IDENTITY)
+        return (
+            identity.uuid,
+            inj.require(inj.ENT_DIR).generation(),
+            inj.require(inj.PROD_DIR).generation(),
+            inj.require(inj.ENTITLEMENT_STATUS_CACHE).timestamp(),
+        )
+
+    @staticmethod
+    def _status_until(now):
+        """
+        Returns when a status computed now is to be computed again: when the
+        next entitlement certificate starts or ends, or after STATUS_MAX_AGE
+        for whatever changed on the server.
+        """
+        until = now + timedelta(seconds=constants.STATUS_MAX_AGE)
+        for cert in inj.require(inj.ENT_DIR).list():
+            for boundary in (cert.valid_range.begin(), cert.valid_range.end()):
+                if now < boundary < until:
+                    until = boundary
+        return until
+
+    def _get_status(self, on_date, locale):
+        """
+        Returns the status as JSON, computing it only if something it
+        depends on changed since it was last asked for, or it is due again.
+        Emits StatusChanged when the current status turns out to be
+        different from the last one handed out.
+        """
+        state = self._status_state()
+        now = datetime.now(GMT())
+        with self._status_lock:
+            expired = self._status_cache_until is not None and now >= self._status_cache_until
+            if expired or state != self._status_cache_state:
+                self._status_cache = {}
+                self._status_cache_state = state
+                self._status_cache_until = None
+            result = self._status_cache.get((on_date, locale))
+        if result is not None:
+            return result
+
+        Locale.set(locale)
         try:
             # get_status doesn't need a Candlepin connection
-            status = EntitlementService(None).get_status(on_date)
+            entitlement_service = EntitlementService(None)
+            if expired:
+                # fetches the compliance status again and sorts the
+                # certificates for the current time:
+                entitlement_service.reload()
+            status = entitlement_service.get_status(on_date)
         except Exception as e:
             log.exception(e)
             raise dbus.DBusException(str(e))
+        result = json.dumps(status)
+
+        changed = False
+        with self._status_lock:
+            if state == self._status_cache_state:
+                self._status_cache[(on_date, locale)] = result
+                if self._status_cache_until is None:
+                    self._status_cache_until = self._status_until(now)
+            if on_date is None:
+                changed = self._current_status is not None and result != self._current_status
+                self._current_status = result
+                self._status_locale = locale
+        if changed:
+            self.StatusChanged(result)
+        return result
 
-        return json.dumps(status)
+    @util.dbus_service_signal(
+        constants.ENTITLEMENT_INTERFACE,
+        signature='s'
+    )
+    @util.dbus_handle_exceptions
+    def StatusChanged(self, status):
+        """
+        Signal fired, when the status of entitlements changed. Clients can
+        listen to it instead of polling GetStatus.
+        :param status: String with JSON dump of the new status, as GetStatus returns it
+        :return: None
+        """
+        log.debug("D-Bus signal StatusChanged emitted on %s" % constants.ENTITLEMENT_INTERFACE)
+        return None
 
     @util.dbus_service_signal(
         constants.ENTITLEMENT_INTERFACE,
@@ -218,3 +314,16 @@ class EntitlementDBusObject(base_object.BaseObject):
         # TODO: find better solution
         entitlement_service.identity.reload()
         entitlement_service.reload()
+        self.check_status()
+
+    def check_status(self):
+        """
+        Recomputes the current status, if a client ever asked for it and it
+        may have changed, so that StatusChanged is emitted when it did.
+        """
+        if self._status_locale is None:
+            return
+        try:
+            self._get_status(None, self._status_locale)
+        except Exception as e:
+            log.exception(e)
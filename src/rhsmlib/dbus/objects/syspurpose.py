@@ -22,11 +22,14 @@ It uses interface: com.redhat.RHSM1.Syspurpose and path:
 import dbus
 import json
 import logging
+import threading
+import time
 
 from rhsmlib.dbus import constants, base_object, util, dbus_utils
 from rhsmlib.services import syspurpose
 from syspurpose.files import SyspurposeStore
 from subscription_manager import injection as inj
+from subscription_manager.certdirectory import file_state
 
 from subscription_manager.injectioninit import init_dep_injection
 from subscription_manager.i18n import Locale
@@ -35,6 +38,8 @@ init_dep_injection()
 
 log = logging.getLogger(__name__)
 
+SYSPURPOSE_PATH = '/etc/rhsm/syspurpose/syspurpose.json'
+
 
 class SyspurposeDBusObject(base_object.BaseObject):
     """
@@ -46,6 +51,12 @@ class SyspurposeDBusObject(base_object.BaseObject):
 
     def __init__(self, conn=None, object_path=None, bus_name=None):
         super(SyspurposeDBusObject, self).__init__(conn=conn, object_path=object_path, bus_name=bus_name)
+        # (state, JSON string) of the last GetSyspurpose:
+        self._contents = (None, None)
+        # (state, time to ask again, status from the server) of the last
+        # GetSyspurposeStatus:
+        self._status = (None, None, None)
+        self._lock = threading.Lock()
 
     @util.dbus_service_method(
         constants.SYSPURPOSE_INTERFACE,
@@ -59,19 +70,26 @@ class SyspurposeDBusObject(base_object.BaseObject):
         :param sender:
         :return: json representation of system purpose contents
         """
-        syspurpose_path = '/etc/rhsm/syspurpose/syspurpose.json'
-
         locale = dbus_utils.dbus_to_python(locale, expected_type=str)
         Locale.set(locale)
 
-        syspurpose_store = SyspurposeStore.read(syspurpose_path)
+        state = file_state(SYSPURPOSE_PATH)
+        with self._lock:
+            (cached_state, result) = self._contents
+        if state is not None and state == cached_state:
+            return result
+
+        syspurpose_store = SyspurposeStore.read(SYSPURPOSE_PATH)
 
         try:
             contents = syspurpose_store.contents
         except Exception as err:
             raise dbus.DBusException(str(err))
 
-        return json.dumps(contents)
+        result = json.dumps(contents)
+        with self._lock:
+            self._contents = (state, result)
+        return result
 
     @util.dbus_service_method(
         constants.SYSPURPOSE_INTERFACE,
@@ -80,10 +98,83 @@ class SyspurposeDBusObject(base_object.BaseObject):
     )
     @util.dbus_handle_exceptions
     def GetSyspurposeStatus(self, sender=None):
+        """
+        D-Bus method for getting the overall system purpose status. The
+        server is only asked again when something the status depends on
+        changed since the last call, or after STATUS_MAX_AGE.
+        :param sender:
+        :return: string with the translated status
+        """
+        return syspurpose.Syspurpose.get_overall_status(self._get_status())
+
+    def _status_state(self):
+        """
+        Returns what the system purpose status is computed from: the
+        registration, the entitlement and product certificates, the system
+        purpose itself and the status last fetched by other clients.
+        """
+        identity = inj.require(inj.IDENTITY)
+        return (
+            identity.uuid,
+            inj.require(inj.ENT_DIR).generation(),
+            inj.require(inj.PROD_DIR).generation(),
+            file_state(SYSPURPOSE_PATH),
+            inj.require(inj.SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE).timestamp(),
+        )
+
+    def _get_status(self):
+        """
+        Returns the status from the server, or the one cached for the current
+        state. Emits StatusChanged when it differs from the one handed out
+        before.
+        """
+        state = self._status_state()
+        now = time.time()
+        with self._lock:
+            (cached_state, until, previous) = self._status
+        if previous is not None and state == cached_state and now < until:
+            return previous
+
         cp = inj.require(inj.CP_PROVIDER).get_consumer_auth_cp()
-        systempurpose = syspurpose.Syspurpose(cp)
-        syspurpose_status = systempurpose.get_syspurpose_status()['status']
-        return systempurpose.get_overall_status(syspurpose_status)
+        status = syspurpose.Syspurpose(cp).get_syspurpose_status()['status']
+        with self._lock:
+            self._status = (state, now + constants.STATUS_MAX_AGE, status)
+        overall_status = syspurpose.Syspurpose.get_overall_status(status)
+        if previous is not None and overall_status != syspurpose.Syspurpose.get_overall_status(previous):
+            self.StatusChanged(overall_status)
+        return status
+
+    @util.dbus_service_signal(
+        constants.SYSPURPOSE_INTERFACE,
+        signature='s'
+    )
+    @util.dbus_handle_exceptions
+    def StatusChanged(self, status):
+        """
+        Signal fired, when the system purpose status changed. Clients can
+        listen to it instead of polling GetSyspurposeStatus.
+        :param status: string with the new status, as GetSyspurposeStatus returns it
+        :return: None
+        """
+        log.debug("D-Bus signal StatusChanged emitted on %s" % constants.SYSPURPOSE_INTERFACE)
+        return None
+
+    def reload(self):
+        self.check_status()
+
+    def check_status(self):
+        """
+        Recomputes the status, if a client ever asked for it and it may have
+        changed, so that StatusChanged is emitted when it did.
+        """
+        with self._lock:
+            (cached_state, until, previous) = self._status
+        if previous is None:
+            return
+        try:
+            self._get_status()
+        except Exception as e:
+            log.exception(e)
 
     @util.dbus_service_signal(
         constants.SYSPURPOSE_INTERFACE,
@@ -102,6 +102,9 @@ class Server(object):
             products_dir_list.append(self.object_map["ProductsDBusObject"].InstalledProductsChanged)
         if "SyspurposeDBusObject" in self.object_map:
             syspurpose_dir_list.append(self.object_map["SyspurposeDBusObject"].SyspurposeChanged)
+            # The system purpose status also depends on the registration and the certificates:
+            for dir_list in (consumer_dir_list, entitlement_dir_list, products_dir_list, syspurpose_dir_list):
+                dir_list.append(self.object_map["SyspurposeDBusObject"].reload)
 
         consumer_dir_watch = DirectoryWatch(self.identity.cert_dir_path, consumer_dir_list)
         entitlement_dir_watch = DirectoryWatch(entitlement_cert_dir_path, entitlement_dir_list)
@@ -119,6 +122,24 @@ class Server(object):
         self._thread = threading.Thread(target=self.filesystem_watcher.loop)
         self._thread.start()
 
+        # Statuses also change with time and on the server, which no file
+        # watch notices:
+        self._status_checks = [self.object_map[name].check_status
+                               for name in ("EntitlementDBusObject", "SyspurposeDBusObject")
+                               if name in self.object_map]
+        if self._status_checks:
+            GLib.timeout_add_seconds(constants.STATUS_CHECK_INTERVAL, self.check_status)
+
+    def check_status(self):
+        """
+        Timer callback asking the objects with a status to emit StatusChanged
+        when it changed.
+        """
+        for check_status in self._status_checks:
+            check_status()
+        # Keep running this callback
+        return True
+
     def run(self, started_event=None, stopped_event=None):
         """
         The two arguments, started_event and stopped_event, should be instances of threading.
@@ -19,12 +19,13 @@ from rhsmlib.facts import hwprobe
 
 
 class AllFactsCollector(collector.FactsCollector):
-    def __init__(self):
+    def __init__(self, facts_cache=None):
+        self.facts_cache = facts_cache
         self.collectors = [
             collector.StaticFactsCollector(),
-            host_collector.HostCollector(),
-            hwprobe.HardwareCollector(),
-            custom.CustomFactsCollector(),
+            host_collector.HostCollector(facts_cache=facts_cache),
+            hwprobe.HardwareCollector(facts_cache=facts_cache),
+            custom.CustomFactsCollector(facts_cache=facts_cache),
         ]
 
     def get_all(self):
@@ -16,11 +16,16 @@ from __future__ import print_function, division, absolute_import
 import logging
 import os
 import platform
+import threading
+import time
 
 from rhsmlib.facts import collection
 
 log = logging.getLogger(__name__)
 
+# Seconds facts that may change at any time are reused for by a FactsCache:
+DYNAMIC_FACTS_MAX_AGE = 60
+
 
 def get_arch(prefix=None):
     """Get the systems architecture.
@@ -55,12 +60,64 @@ def get_arch(prefix=None):
         log.exception(e)
         raise
 
+
+class FactsCache(object):
+    """
+    Keeps what expensive collectors found for a long running process, like
+    the facts D-Bus service, so that asking for the facts again does not run
+    dmidecode, lscpu or virt-what every time.
+
+    Static facts only change with a reboot and are kept until invalidated.
+    Others are kept for max_age seconds, and only while the state function
+    given along with them keeps returning the same value.
+    """
+
+    def __init__(self, max_age=DYNAMIC_FACTS_MAX_AGE):
+        self.max_age = max_age
+        # name -> (facts, time collected, state)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, collect, static=False, state=None):
+        """
+        Returns a copy of the facts cached under name, calling collect() to
+        get them when there are none or they expired.
+        """
+        current_state = state() if state is not None else None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is not None:
+            (facts, collected, cached_state) = entry
+            if cached_state == current_state and (static or 0 <= now - collected < self.max_age):
+                return dict(facts)
+            log.debug("Cached %s facts expired" % name)
+
+        facts = collect()
+        with self._lock:
+            self._entries[name] = (facts, now, current_state)
+        return dict(facts)
+
+    def invalidate(self, name=None):
+        """
+        Drops the facts cached under name, or all of them.
+        """
+        with self._lock:
+            if name is None:
+                self._entries = {}
+            else:
+                self._entries.pop(name, None)
+
+
 # An empty FactsCollector should just return an empty dict on get_all()
 
 
 class FactsCollector(object):
+    # FactsCache shared by the collectors of a long running process, if any:
+    facts_cache = None
+
     def __init__(self, arch=None, prefix=None, testing=None,
-                 hardware_methods=None, collected_hw_info=None):
+                 hardware_methods=None, collected_hw_info=None, facts_cache=None):
         """Base class for facts collecting classes.
 
         self._collected_hw_info will reference the passed collected_hw_info
@@ -79,6 +136,16 @@ class FactsCollector(object):
         self.arch = arch or get_arch(prefix=self.prefix)
 
         self.hardware_methods = hardware_methods or []
+        self.facts_cache = facts_cache
+
+    def cached(self, name, collect, static=False, state=None):
+        """
+        Returns the facts collect() returns, through the facts cache if
+        there is one. See FactsCache.get().
+        """
+        if self.facts_cache is None:
+            return collect()
+        return self.facts_cache.get(name, collect, static=static, state=state)
 
     def collect(self):
         """Return a FactsCollection iterable."""
@@ -88,10 +155,13 @@ class FactsCollector(object):
         return facts_collection
 
     def get_all(self):
+        return self.run_hardware_methods(self.hardware_methods)
+
+    def run_hardware_methods(self, hardware_methods):
         # try each hardware method, and try/except around, since
         # these tend to be fragile
         all_hw_info = {}
-        for hardware_method in self.hardware_methods:
+        for hardware_method in hardware_methods:
             info_dict = {}
             try:
                 info_dict = hardware_method()
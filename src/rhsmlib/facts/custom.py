@@ -103,11 +103,12 @@ class CustomFactsDirectories(object):
 
 class CustomFactsCollector(FactsCollector):
     def __init__(self, prefix=None, testing=None, collected_hw_info=None,
-                 path_and_globs=None):
+                 path_and_globs=None, facts_cache=None):
         super(CustomFactsCollector, self).__init__(
             prefix=prefix,
             testing=testing,
-            collected_hw_info=collected_hw_info
+            collected_hw_info=collected_hw_info,
+            facts_cache=facts_cache
         )
         self.path_and_globs = path_and_globs
         if path_and_globs is None:
@@ -117,8 +118,28 @@ class CustomFactsCollector(FactsCollector):
         self.facts_directories = CustomFactsDirectories(self.path_and_globs)
 
     def get_all(self):
+        # Custom facts change whenever somebody edits the files, so they are
+        # only reused while none of them changed:
+        return self.cached('custom', self.get_custom_facts, static=True, state=self.files_state)
+
+    def get_custom_facts(self):
         facts_dict = {}
         for facts_dir in self.facts_directories:
             for custom_facts in facts_dir:
                 facts_dict.update(custom_facts.data)
         return facts_dict
+
+    def files_state(self):
+        """
+        Returns the modification times of the custom facts directories and
+        files, which change whenever a file is added, removed or edited.
+        """
+        state = []
+        for (path, glob_pattern) in self.path_and_globs:
+            paths = [path] + sorted(glob.glob(os.path.join(path, glob_pattern)))
+            for file_path in paths:
+                try:
+                    state.append((file_path, os.stat(file_path).st_mtime))
+                except OSError:
+                    state.append((file_path, None))
+        return state
@@ -15,22 +15,38 @@ from __future__ import print_function, division, absolute_import
 #
 """Load and collect DMI data.
 
-Note: This module will fail to import if dmidecode fails to import.
-      firmware_info.py expects that and handles it, and any other
-      module that imports it should handle an import error as well."""
+When read_smbios_tables is enabled in rhsm.conf, the SMBIOS tables exported
+in sysfs are decoded in one pass by the smbios module. Otherwise, or when
+those can not be read, dmidecode is used, and then collecting fails with an
+ImportError if dmidecode fails to import."""
 import logging
 import os
 import six
 
+from six.moves import configparser
+
 from subscription_manager.i18n import ugettext as _
 
 log = logging.getLogger(__name__)
 
+from rhsm.config import initConfig
 from rhsmlib.facts import collector
+from rhsmlib.facts import smbios
 
 FIRMWARE_DUMP_FILENAME = "dmi.dump"
 
 
+def smbios_enabled():
+    """
+    Whether rhsm.conf enables decoding the SMBIOS tables in sysfs.
+    """
+    try:
+        return bool(initConfig().get_int('rhsm', 'read_smbios_tables'))
+    except (ValueError, configparser.Error) as e:
+        log.exception(e)
+        return False
+
+
 class DmiFirmwareInfoCollector(collector.FactsCollector):
     def __init__(self, prefix=None, testing=None, collected_hw_info=None):
         super(DmiFirmwareInfoCollector, self).__init__(
@@ -46,6 +62,9 @@ class DmiFirmwareInfoCollector(collector.FactsCollector):
         if testing and prefix:
             self.dump_file = os.path.join(prefix, FIRMWARE_DUMP_FILENAME)
 
+        self.smbios_dir = self.prefix + smbios.SMBIOS_TABLES_DIR
+        self.use_smbios = smbios_enabled()
+
     def use_dump_file(self, dmidecode):
         """Set this instances to use a dmidecode dump file.
 
@@ -61,6 +80,22 @@ class DmiFirmwareInfoCollector(collector.FactsCollector):
     # This needs all of the previously collected hwinfo, so it can decide
     # what is bogus enough that the DMI info is better.
     def get_all(self):
+        self._socket_designation = []
+
+        # A dump file is in the format of dmidecode --dump-bin, which only
+        # dmidecode reads.
+        if self.use_smbios and self.dump_file is None:
+            try:
+                dmi_data = smbios.read_smbios(self.smbios_dir)
+            except (EnvironmentError, smbios.SmbiosError) as e:
+                log.debug("Unable to read SMBIOS tables, using dmidecode: %s" % e)
+            else:
+                return self._get_all_dmi_data(
+                    dict(("dmi.%s." % group, data) for (group, data) in dmi_data.items()))
+
+        return self.get_all_dmidecode()
+
+    def get_all_dmidecode(self):
         try:
             import dmidecode
         except ImportError:
@@ -84,15 +119,22 @@ class DmiFirmwareInfoCollector(collector.FactsCollector):
                 "dmi.memory.": self._read_dmi(dmidecode.memory),
                 "dmi.connector.": self._read_dmi(dmidecode.connector),
             }
-
-            for tag, func in list(dmi_data.items()):
-                dmiinfo = self._get_dmi_data(func, tag, dmiinfo)
+            dmiinfo = self._get_all_dmi_data(dmi_data)
         except Exception as e:
             log.warn(_("Error reading system DMI information: %s"), e, exc_info=True)
         finally:
             self.log_warnings(dmidecode)
         return dmiinfo
 
+    def _get_all_dmi_data(self, dmi_data):
+        """
+        Flattens the DMI data of every group, keyed by fact prefix, into facts.
+        """
+        dmiinfo = {}
+        for tag, func in list(dmi_data.items()):
+            dmiinfo = self._get_dmi_data(func, tag, dmiinfo)
+        return dmiinfo
+
     def _read_dmi(self, func):
         try:
             return func()
@@ -115,7 +157,9 @@ class DmiFirmwareInfoCollector(collector.FactsCollector):
                     self._socket_designation.append(value1)
 
                 nkey = ''.join([tag, key1.lower()]).replace(" ", "_")
-                ddict[nkey] = six.text_type(value1, 'utf-8')
+                if isinstance(value1, six.binary_type):
+                    value1 = six.text_type(value1, 'utf-8')
+                ddict[nkey] = value1
 
         # Populate how many socket descriptions we saw in a faux-fact, so we can
         # use it to munge lscpu info later if needed.
@@ -20,6 +20,7 @@ import logging
 
 from rhsmlib.facts import dmiinfo
 from rhsmlib.facts import collector
+from rhsmlib.facts import smbios
 
 ARCHES_WITHOUT_DMI = ["ppc64", "ppc64le", "s390x"]
 
@@ -92,6 +93,8 @@ def get_firmware_collector(arch, prefix=None, testing=None,
     if arch in ARCHES_WITHOUT_DMI:
         log.debug("Not looking for DMI info since it is not available on '%s'" % arch)
         firmware_provider_class = NullFirmwareInfoCollector
+    elif dmiinfo.smbios_enabled() and smbios.tables_readable((prefix or '') + smbios.SMBIOS_TABLES_DIR):
+        firmware_provider_class = dmiinfo.DmiFirmwareInfoCollector
     else:
         try:
             import dmidecode  # noqa
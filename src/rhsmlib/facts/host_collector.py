@@ -49,27 +49,15 @@ class HostCollector(collector.FactsCollector):
     def get_all(self):
         host_facts = {}
         hardware_collector = hwprobe.HardwareCollector(
-            prefix=self.prefix,
-            testing=self.testing
-        )
-        hardware_info = hardware_collector.get_all()
-
-        firmware_collector = firmware_info.FirmwareCollector(
-            prefix=self.prefix,
-            testing=self.testing,
-        )
-        firmware_info_dict = firmware_collector.get_all()
-
-        virt_collector = virt.VirtCollector(
             prefix=self.prefix,
             testing=self.testing,
-            collected_hw_info=firmware_info_dict
+            facts_cache=self.facts_cache
         )
-        virt_collector_info = virt_collector.get_all()
+        hardware_info = hardware_collector.get_all()
 
         host_facts.update(hardware_info)
-        host_facts.update(virt_collector_info)
-        host_facts.update(firmware_info_dict)
+        # Firmware and virt facts only change with a reboot:
+        host_facts.update(self.cached('host.platform', self.get_platform_info, static=True))
 
         locale_info = {}
         effective_locale = 'Unknown'
@@ -98,3 +86,26 @@ class HostCollector(collector.FactsCollector):
 
         host_facts.update(cleanup_info)
         return host_facts
+
+    def get_platform_info(self):
+        """
+        Returns the firmware facts (DMI, device tree) and the virt facts
+        found from them.
+        """
+        firmware_collector = firmware_info.FirmwareCollector(
+            prefix=self.prefix,
+            testing=self.testing,
+        )
+        firmware_info_dict = firmware_collector.get_all()
+
+        virt_collector = virt.VirtCollector(
+            prefix=self.prefix,
+            testing=self.testing,
+            collected_hw_info=firmware_info_dict
+        )
+        virt_collector_info = virt_collector.get_all()
+
+        platform_info = {}
+        platform_info.update(virt_collector_info)
+        platform_info.update(firmware_info_dict)
+        return platform_info
@@ -41,6 +41,10 @@ except ImportError as e:
 from rhsmlib.compat import check_output as compat_check_output
 from subprocess import CalledProcessError
 
+# Hosts with at least this many CPUs get their lscpu topology facts from
+# sysfs, when it describes the whole topology, instead of running lscpu:
+LSCPU_MAX_CPUS = 512
+
 
 class ClassicCheck(object):
     def is_registered_with_classic(self):
@@ -82,6 +86,115 @@ def gather_entries(entries_string):
     return entries
 
 
+class SysCpuTopology(object):
+    """
+    The CPU topology read in bulk from /sys/devices/system/cpu.
+
+    Rather than visiting every cpuN directory, the online CPUs are taken from
+    the 'online' range file, and the sibling lists are read for one CPU per
+    socket only: every CPU listed in that CPU's core_siblings_list is in the
+    same socket. Reading a 1024 CPU host this way takes a handful of opens.
+
+    complete is False whenever the layout is not one this can describe, like
+    s390 books or sockets of different sizes, and HardwareCollector then
+    goes through every CPU the way it always did.
+    """
+
+    def __init__(self, sys_cpu_path, sys_node_path):
+        self.sys_cpu_path = sys_cpu_path
+        self.sys_node_path = sys_node_path
+        self.online = []
+        self.sockets = []
+        self.threads_per_core = None
+        self.complete = False
+        try:
+            self.complete = self._read()
+        except (IOError, OSError, ValueError) as e:
+            log.debug("Unable to read the CPU topology from %s: %s", sys_cpu_path, e)
+
+    def _read_file(self, *path):
+        with open(os.path.join(*path), 'r') as sys_file:
+            return sys_file.read().rstrip('\n\x00')
+
+    def _read_list(self, *path):
+        entries = self._read_file(*path)
+        if not entries:
+            return None
+        return set(gather_entries(entries))
+
+    def _read(self):
+        self.online = sorted(self._read_list(self.sys_cpu_path, 'online') or [])
+        if not self.online:
+            return False
+        if os.path.exists(os.path.join(self.sys_cpu_path, 'cpu%d' % self.online[0],
+                                       'topology', 'book_siblings_list')):
+            return False
+
+        uncovered = set(self.online)
+        threads = set()
+        for cpu in self.online:
+            if cpu not in uncovered:
+                continue
+            topology_dir = os.path.join(self.sys_cpu_path, 'cpu%d' % cpu, 'topology')
+            core_siblings = self._read_list(topology_dir, 'core_siblings_list')
+            thread_siblings = self._read_list(topology_dir, 'thread_siblings_list')
+            if not core_siblings or not thread_siblings or \
+                    cpu not in thread_siblings or not thread_siblings <= core_siblings or \
+                    not core_siblings <= uncovered:
+                return False
+            uncovered -= core_siblings
+            self.sockets.append(core_siblings)
+            threads.add(len(thread_siblings))
+
+        # lscpu assumes every socket has the same number of cores, and every
+        # core the same number of threads, and so does cpu.core(s)_per_socket
+        if len(threads) != 1 or len(set(len(socket_cpus) for socket_cpus in self.sockets)) != 1:
+            return False
+        self.threads_per_core = threads.pop()
+        return len(self.sockets[0]) % self.threads_per_core == 0
+
+    @property
+    def cpu_count(self):
+        return len(self.online)
+
+    @property
+    def cores_per_socket(self):
+        return len(self.sockets[0]) // self.threads_per_core
+
+    def get_cpu_info(self):
+        return {
+            'cpu.cpu(s)': self.cpu_count,
+            'cpu.cpu_socket(s)': len(self.sockets),
+            'cpu.core(s)_per_socket': self.cores_per_socket,
+            'cpu.thread(s)_per_core': self.threads_per_core,
+            'cpu.topology_source': 'kernel /sys cpu sibling lists',
+        }
+
+    def get_lscpu_info(self, arch):
+        """
+        Returns the topology facts lscpu would report, under the same keys.
+        """
+        lscpu_info = {
+            'lscpu.architecture': arch,
+            'lscpu.cpu(s)': '%d' % self.cpu_count,
+            'lscpu.on-line_cpu(s)_list': self._read_file(self.sys_cpu_path, 'online'),
+            'lscpu.thread(s)_per_core': '%d' % self.threads_per_core,
+            'lscpu.core(s)_per_socket': '%d' % self.cores_per_socket,
+            'lscpu.socket(s)': '%d' % len(self.sockets),
+        }
+        try:
+            numa_info = {}
+            nodes = sorted(self._read_list(self.sys_node_path, 'online') or [])
+            for node in nodes:
+                numa_info['lscpu.numa_node%d_cpu(s)' % node] = \
+                    self._read_file(self.sys_node_path, 'node%d' % node, 'cpulist')
+            numa_info['lscpu.numa_node(s)'] = '%d' % len(nodes)
+            lscpu_info.update(numa_info)
+        except (IOError, OSError, ValueError) as e:
+            log.debug("Unable to read the NUMA nodes from %s: %s", self.sys_node_path, e)
+        return lscpu_info
+
+
 class GenericPlatformSpecificInfoProvider(object):
     """Default provider for platform without a specific platform info provider.
     ie, all platforms except those with DMI (ie, intel platforms)"""
@@ -94,12 +207,13 @@ class GenericPlatformSpecificInfoProvider(object):
 
 
 class HardwareCollector(collector.FactsCollector):
-    def __init__(self, arch=None, prefix=None, testing=None, collected_hw_info=None):
+    def __init__(self, arch=None, prefix=None, testing=None, collected_hw_info=None, facts_cache=None):
         super(HardwareCollector, self).__init__(
             arch=arch,
             prefix=prefix,
             testing=testing,
-            collected_hw_info=None
+            collected_hw_info=None,
+            facts_cache=facts_cache
         )
 
         self.hardware_methods = [
@@ -114,6 +228,27 @@ class HardwareCollector(collector.FactsCollector):
             self.get_network_interfaces,
         ]
 
+        # The CPU topology only changes with a reboot, so a facts cache
+        # keeps it until then:
+        self.static_hardware_methods = [
+            self.get_proc_cpuinfo,
+            self.get_cpu_info,
+            self.get_ls_cpu_info,
+        ]
+
+    def get_all(self):
+        if self.facts_cache is None:
+            return super(HardwareCollector, self).get_all()
+
+        dynamic_methods = [method for method in self.hardware_methods
+                           if method not in self.static_hardware_methods]
+        hw_info = self.cached('hardware.static',
+                              lambda: self.run_hardware_methods(self.static_hardware_methods),
+                              static=True)
+        hw_info.update(self.cached('hardware.dynamic',
+                                   lambda: self.run_hardware_methods(dynamic_methods)))
+        return hw_info
+
     def get_uname_info(self):
         uname_info = {}
         uname_data = os.uname()
@@ -371,7 +506,18 @@ class HardwareCollector(collector.FactsCollector):
             log.debug("Could not gather proc_stat facts: %s", e)
         return proc_stat
 
+    def read_cpu_topology(self):
+        return SysCpuTopology(self.prefix + "/sys/devices/system/cpu",
+                              self.prefix + "/sys/devices/system/node")
+
     def get_cpu_info(self):
+        # s390 topology comes from books and /proc/sysinfo, which only the
+        # per CPU code below knows about
+        if not self.arch.startswith("s390"):
+            topology = self.read_cpu_topology()
+            if topology.complete:
+                return topology.get_cpu_info()
+
         cpu_info = {}
         # we also have cpufreq, etc in this dir, so match just the numbs
         cpu_re = r'cpu([0-9]+$)'
@@ -536,6 +682,15 @@ class HardwareCollector(collector.FactsCollector):
     def get_ls_cpu_info(self):
         lscpu_info = {}
 
+        # lscpu itself reads every CPU's sysfs files, which takes long on
+        # big hosts, only to report the topology already read from sysfs
+        if not self.testing and not self.arch.startswith("s390"):
+            topology = self.read_cpu_topology()
+            if topology.complete and topology.cpu_count >= LSCPU_MAX_CPUS:
+                log.debug("Using the sysfs CPU topology instead of lscpu for %d CPUs",
+                          topology.cpu_count)
+                return topology.get_lscpu_info(self.arch)
+
         LSCPU_CMD = '/usr/bin/lscpu'
 
         # if we have `lscpu`, let's use it for facts as well, under
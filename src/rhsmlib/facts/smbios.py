@@ -0,0 +1,1383 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""Decode the SMBIOS tables the kernel exports in sysfs.
+
+dmidecode has to be run once for every group of DMI types, and every run
+reads and decodes the whole table again. The kernel exports the table and
+its entry point in /sys/firmware/dmi/tables, so they can be read once and
+decoded here instead.
+
+read_smbios() returns the same structure the python-dmidecode functions
+(dmidecode.bios(), dmidecode.system(), ...) return, only for the DMI types
+and the string values DmiFirmwareInfoCollector turns into facts.
+"""
+import logging
+import os
+import struct
+import uuid
+from collections import OrderedDict
+
+import six
+
+log = logging.getLogger(__name__)
+
+SMBIOS_TABLES_DIR = "/sys/firmware/dmi/tables"
+ENTRY_POINT_FILE = "smbios_entry_point"
+TABLE_FILE = "DMI"
+
+END_OF_TABLE = 127
+
+# The DMI types in each group python-dmidecode reports, as in dmidecode --type:
+GROUPS = {
+    'bios': (0, 13),
+    'system': (1, 12, 15, 23, 32),
+    'baseboard': (2, 10, 41),
+    'chassis': (3,),
+    'processor': (4,),
+    'memory': (5, 6, 16, 17),
+    'connector': (8,),
+    'slot': (9,),
+}
+
+
+class SmbiosError(Exception):
+    pass
+
+
+class Structure(object):
+    """
+    One structure of the table: its formatted area and its strings.
+    """
+
+    def __init__(self, dmi_type, handle, data, strings):
+        self.type = dmi_type
+        self.handle = handle
+        self.data = data
+        self.strings = strings
+
+    @property
+    def length(self):
+        return len(self.data)
+
+    def byte(self, offset):
+        return self.data[offset]
+
+    def word(self, offset):
+        return struct.unpack_from('<H', bytes(self.data), offset)[0]
+
+    def dword(self, offset):
+        return struct.unpack_from('<I', bytes(self.data), offset)[0]
+
+    def qword(self, offset):
+        return struct.unpack_from('<Q', bytes(self.data), offset)[0]
+
+    def string(self, offset):
+        index = self.data[offset]
+        if index == 0:
+            return u'Not Specified'
+        if index > len(self.strings):
+            return u'<BAD INDEX>'
+        return self.strings[index - 1]
+
+    def handle_ref(self, offset):
+        return u'0x%04x' % self.word(offset)
+
+
+def parse_entry_point(data):
+    """
+    Returns the SMBIOS version (major, minor) from an entry point structure.
+    """
+    data = bytearray(data)
+    if data[:5] == b'_SM3_' and len(data) >= 0x18:
+        return (data[0x07], data[0x08])
+    if data[:4] == b'_SM_' and len(data) >= 0x1f:
+        (major, minor) = (data[0x06], data[0x07])
+        # Some firmware claims 2.33 or 2.51 where it means 2.3 and 2.5:
+        if (major, minor) in ((2, 33), (2, 51)):
+            minor //= 10
+        return (major, minor)
+    if data[:5] == b'_DMI_' and len(data) >= 0x0f:
+        return (data[0x0e] >> 4, data[0x0e] & 0x0f)
+    raise SmbiosError("Unknown SMBIOS entry point")
+
+
+def _clean_string(raw):
+    # Control characters are shown as dots and surrounding white space is
+    # dropped, as in python-dmidecode.
+    text = raw.decode('utf-8', 'replace')
+    return u''.join(u'.' if ord(char) < 32 or ord(char) == 127 else char for char in text).strip()
+
+
+def iter_structures(table):
+    """
+    Yields a Structure for every structure in table, up to the end of
+    table structure.
+    """
+    table = bytearray(table)
+    offset = 0
+    while offset + 4 <= len(table):
+        (dmi_type, length, handle) = struct.unpack_from('<BBH', bytes(table[offset:offset + 4]))
+        if length < 4 or offset + length > len(table):
+            raise SmbiosError("Broken SMBIOS structure at offset %d" % offset)
+        data = table[offset:offset + length]
+
+        end = table.find(b'\0\0', offset + length)
+        if end < 0:
+            raise SmbiosError("Unterminated SMBIOS strings at offset %d" % offset)
+        strings_area = table[offset + length:end]
+        strings = [_clean_string(bytes(raw)) for raw in strings_area.split(b'\0') if raw]
+
+        yield Structure(dmi_type, handle, data, strings)
+        if dmi_type == END_OF_TABLE:
+            return
+        offset = end + 2
+
+
+def _lookup(table, value):
+    return table.get(value, u'<OUT OF SPEC>')
+
+
+def _size(value, units=(u'bytes', u'kB', u'MB', u'GB', u'TB', u'PB', u'EB')):
+    """
+    Formats a size in the largest unit it is a whole number of, like
+    dmidecode does. value is in the first of units.
+    """
+    unit = 0
+    while value and value % 1024 == 0 and unit < len(units) - 1:
+        value //= 1024
+        unit += 1
+    return u'%d %s' % (value, units[unit])
+
+
+def _memory_handle(structure, offset):
+    handle = structure.word(offset)
+    if handle == 0xfffe:
+        return u'Not Provided'
+    if handle == 0xffff:
+        return u'No Error'
+    return u'0x%04x' % handle
+
+
+# Type 0
+def decode_bios(structure, version):
+    data = {
+        'Vendor': structure.string(0x04),
+        'Version': structure.string(0x05),
+        # python-dmidecode really spells it like this:
+        'Relase Date': structure.string(0x08),
+    }
+    segment = structure.word(0x06)
+    if segment:
+        data['Address'] = u'0x%04x0' % segment
+        runtime = (0x10000 - segment) << 4
+        if runtime % 1024:
+            data['Runtime Size'] = u'%d bytes' % runtime
+        else:
+            data['Runtime Size'] = u'%d KB' % (runtime >> 10)
+
+    rom_size = structure.byte(0x09)
+    if rom_size == 0xff and structure.length >= 0x1a:
+        extended = structure.word(0x18)
+        unit = (u'MB', u'GB')[(extended >> 14) & 0x01]
+        data['ROM Size'] = u'%d %s' % (extended & 0x3fff, unit)
+    else:
+        data['ROM Size'] = u'%d KB' % ((rom_size + 1) << 6)
+
+    if structure.length >= 0x18:
+        if structure.byte(0x14) != 0xff and structure.byte(0x15) != 0xff:
+            data['BIOS Revision'] = u'%d.%d' % (structure.byte(0x14), structure.byte(0x15))
+        if structure.byte(0x16) != 0xff and structure.byte(0x17) != 0xff:
+            data['Firmware Revision'] = u'%d.%d' % (structure.byte(0x16), structure.byte(0x17))
+    return data
+
+
+# Type 13
+def decode_bios_language(structure, version):
+    data = {
+        'Installable Languages': structure.strings[:structure.byte(0x04)],
+        'Currently Installed Language': structure.string(0x15),
+    }
+    if version >= (2, 1):
+        data['Language Description Format'] = u'Abbreviated' if structure.byte(0x05) & 0x01 else u'Long'
+    return data
+
+
+WAKE_UP_TYPES = {
+    0x00: u'Reserved',
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'APM Timer',
+    0x04: u'Modem Ring',
+    0x05: u'LAN Remote',
+    0x06: u'Power Switch',
+    0x07: u'PCI PME#',
+    0x08: u'AC Power Restored',
+}
+
+
+def _system_uuid(raw, version):
+    raw = bytes(raw)
+    if raw == b'\xff' * 16:
+        return u'Not Present'
+    if raw == b'\0' * 16:
+        return u'Not Settable'
+    # Since SMBIOS 2.6 the first three fields are little endian:
+    if version >= (2, 6):
+        return six.text_type(uuid.UUID(bytes_le=raw))
+    return six.text_type(uuid.UUID(bytes=raw))
+
+
+# Type 1
+def decode_system(structure, version):
+    data = {
+        'Manufacturer': structure.string(0x04),
+        'Product Name': structure.string(0x05),
+        'Version': structure.string(0x06),
+        'Serial Number': structure.string(0x07),
+    }
+    if structure.length >= 0x19:
+        data['UUID'] = _system_uuid(structure.data[0x08:0x18], version)
+        data['Wake-Up Type'] = _lookup(WAKE_UP_TYPES, structure.byte(0x18))
+    if structure.length >= 0x1b:
+        data['SKU Number'] = structure.string(0x19)
+        data['Family'] = structure.string(0x1a)
+    return data
+
+
+# Type 12
+def decode_system_options(structure, version):
+    return {'Options': structure.strings[:structure.byte(0x04)]}
+
+
+EVENT_LOG_ACCESS_METHODS = {
+    0x00: u'Indexed I/O, one 8-bit index port, one 8-bit data port',
+    0x01: u'Indexed I/O, two 8-bit index ports, one 8-bit data port',
+    0x02: u'Indexed I/O, one 16-bit index port, one 8-bit data port',
+    0x03: u'Memory-mapped physical 32-bit address',
+    0x04: u'Available through General-Purpose NonVolatile Data functions',
+}
+
+
+def _event_log_address(method, structure):
+    if method <= 0x02:
+        return u'Index 0x%04X, Data 0x%04X' % (structure.word(0x10), structure.word(0x12))
+    if method == 0x03:
+        return u'0x%08X' % structure.dword(0x10)
+    if method == 0x04:
+        return u'0x%04X' % structure.word(0x10)
+    return u'Unknown'
+
+
+# Type 15
+def decode_event_log(structure, version):
+    (header_start, data_start) = (structure.word(0x06), structure.word(0x08))
+    method = structure.byte(0x0a)
+    status = structure.byte(0x0b)
+    data = {
+        'Area Length': u'%d bytes' % structure.word(0x04),
+        'Header Start Offset': u'0x%04X' % header_start,
+        'Data Start Offset': u'0x%04X' % data_start,
+        'Access Method': u'OEM-specific' if method >= 0x80 else _lookup(EVENT_LOG_ACCESS_METHODS, method),
+        'Access Address': _event_log_address(method, structure),
+        'Status': u'%s, %s' % (u'Valid' if status & 0x01 else u'Invalid',
+                               u'Full' if status & 0x02 else u'Not Full'),
+        'Change Token': u'0x%08X' % structure.dword(0x0c),
+    }
+    if data_start > header_start:
+        data['Header Length'] = u'%d bytes' % (data_start - header_start)
+    if structure.length >= 0x17:
+        header_format = structure.byte(0x14)
+        if header_format >= 0x80:
+            data['Header Format'] = u'OEM-specific'
+        else:
+            data['Header Format'] = {0x00: u'No Header', 0x01: u'Type 1'}.get(header_format, u'Unknown')
+        data['Supported Log Type Descriptors'] = u'%d' % structure.byte(0x15)
+    return data
+
+
+SYSTEM_RESET_BOOT_OPTIONS = {
+    0x00: u'Reserved',
+    0x01: u'Operating System',
+    0x02: u'System Utilities',
+    0x03: u'Do Not Reboot',
+}
+
+
+def _reset_value(value, unit=u''):
+    if value == 0xffff:
+        return u'Unknown'
+    return u'%d%s' % (value, unit)
+
+
+# Type 23
+def decode_system_reset(structure, version):
+    capabilities = structure.byte(0x04)
+    data = {
+        'Status': u'Enabled' if capabilities & 0x01 else u'Disabled',
+        'Watchdog Timer': u'Present' if capabilities & 0x20 else u'Not Present',
+    }
+    if capabilities & 0x20:
+        data['Boot Option'] = SYSTEM_RESET_BOOT_OPTIONS[(capabilities >> 1) & 0x03]
+        data['Boot Option On Limit'] = SYSTEM_RESET_BOOT_OPTIONS[(capabilities >> 3) & 0x03]
+        data['Reset Count'] = _reset_value(structure.word(0x05))
+        data['Reset Limit'] = _reset_value(structure.word(0x07))
+        data['Timer Interval'] = _reset_value(structure.word(0x09), u' min')
+        data['Timeout'] = _reset_value(structure.word(0x0b), u' min')
+    return data
+
+
+# Type 2
+def decode_baseboard(structure, version):
+    data = {
+        'Manufacturer': structure.string(0x04),
+        'Product Name': structure.string(0x05),
+        'Version': structure.string(0x06),
+        'Serial Number': structure.string(0x07),
+    }
+    if structure.length >= 0x09:
+        data['Asset Tag'] = structure.string(0x08)
+    return data
+
+
+# Type 10, obsoleted by type 41. Devices of one structure share the keys,
+# so like with structures of a type the last device wins when flattened.
+def decode_onboard_devices(structure, version):
+    data = {}
+    for offset in range(0x04, structure.length - 1, 2):
+        data['Type'] = _lookup(ONBOARD_DEVICE_TYPES, structure.byte(offset) & 0x7f)
+        data['Status'] = u'Enabled' if structure.byte(offset) & 0x80 else u'Disabled'
+        data['Description'] = structure.string(offset + 1)
+    return data
+
+
+CHASSIS_TYPES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Desktop',
+    0x04: u'Low Profile Desktop',
+    0x05: u'Pizza Box',
+    0x06: u'Mini Tower',
+    0x07: u'Tower',
+    0x08: u'Portable',
+    0x09: u'Laptop',
+    0x0a: u'Notebook',
+    0x0b: u'Hand Held',
+    0x0c: u'Docking Station',
+    0x0d: u'All In One',
+    0x0e: u'Sub Notebook',
+    0x0f: u'Space-saving',
+    0x10: u'Lunch Box',
+    0x11: u'Main Server Chassis',
+    0x12: u'Expansion Chassis',
+    0x13: u'Sub Chassis',
+    0x14: u'Bus Expansion Chassis',
+    0x15: u'Peripheral Chassis',
+    0x16: u'RAID Chassis',
+    0x17: u'Rack Mount Chassis',
+    0x18: u'Sealed-case PC',
+    0x19: u'Multi-system',
+    0x1a: u'CompactPCI',
+    0x1b: u'AdvancedTCA',
+    0x1c: u'Blade',
+    0x1d: u'Blade Enclosing',
+    0x1e: u'Tablet',
+    0x1f: u'Convertible',
+    0x20: u'Detachable',
+    0x21: u'IoT Gateway',
+    0x22: u'Embedded PC',
+    0x23: u'Mini PC',
+    0x24: u'Stick PC',
+}
+
+CHASSIS_STATES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Safe',
+    0x04: u'Warning',
+    0x05: u'Critical',
+    0x06: u'Non-recoverable',
+}
+
+CHASSIS_SECURITY_STATUS = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'None',
+    0x04: u'External Interface Locked Out',
+    0x05: u'External Interface Enabled',
+}
+
+
+# Type 3
+def decode_chassis(structure, version):
+    data = {
+        'Manufacturer': structure.string(0x04),
+        'Type': _lookup(CHASSIS_TYPES, structure.byte(0x05) & 0x7f),
+        'Lock': u'Present' if structure.byte(0x05) & 0x80 else u'Not Present',
+        'Version': structure.string(0x06),
+        'Serial Number': structure.string(0x07),
+        'Asset Tag': structure.string(0x08),
+    }
+    if structure.length >= 0x0d:
+        data['Boot-up State'] = _lookup(CHASSIS_STATES, structure.byte(0x09))
+        data['Power Supply State'] = _lookup(CHASSIS_STATES, structure.byte(0x0a))
+        data['Thermal State'] = _lookup(CHASSIS_STATES, structure.byte(0x0b))
+        data['Security Status'] = _lookup(CHASSIS_SECURITY_STATUS, structure.byte(0x0c))
+    return data
+
+
+PROCESSOR_TYPES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Central Processor',
+    0x04: u'Math Processor',
+    0x05: u'DSP Processor',
+    0x06: u'Video Processor',
+}
+
+# As dmidecode names them. 0xBE is ambiguous and left to _processor_family().
+PROCESSOR_FAMILIES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'8086',
+    0x04: u'80286',
+    0x05: u'80386',
+    0x06: u'80486',
+    0x07: u'8087',
+    0x08: u'80287',
+    0x09: u'80387',
+    0x0a: u'80487',
+    0x0b: u'Pentium',
+    0x0c: u'Pentium Pro',
+    0x0d: u'Pentium II',
+    0x0e: u'Pentium MMX',
+    0x0f: u'Celeron',
+    0x10: u'Pentium II Xeon',
+    0x11: u'Pentium III',
+    0x12: u'M1',
+    0x13: u'M2',
+    0x14: u'Celeron M',
+    0x15: u'Pentium 4 HT',
+    0x18: u'Duron',
+    0x19: u'K5',
+    0x1a: u'K6',
+    0x1b: u'K6-2',
+    0x1c: u'K6-3',
+    0x1d: u'Athlon',
+    0x1e: u'AMD29000',
+    0x1f: u'K6-2+',
+    0x20: u'Power PC',
+    0x21: u'Power PC 601',
+    0x22: u'Power PC 603',
+    0x23: u'Power PC 603+',
+    0x24: u'Power PC 604',
+    0x25: u'Power PC 620',
+    0x26: u'Power PC x704',
+    0x27: u'Power PC 750',
+    0x28: u'Core Duo',
+    0x29: u'Core Duo Mobile',
+    0x2a: u'Core Solo Mobile',
+    0x2b: u'Atom',
+    0x2c: u'Core M',
+    0x2d: u'Core m3',
+    0x2e: u'Core m5',
+    0x2f: u'Core m7',
+    0x30: u'Alpha',
+    0x31: u'Alpha 21064',
+    0x32: u'Alpha 21066',
+    0x33: u'Alpha 21164',
+    0x34: u'Alpha 21164PC',
+    0x35: u'Alpha 21164a',
+    0x36: u'Alpha 21264',
+    0x37: u'Alpha 21364',
+    0x38: u'Turion II Ultra Dual-Core Mobile M',
+    0x39: u'Turion II Dual-Core Mobile M',
+    0x3a: u'Athlon II Dual-Core M',
+    0x3b: u'Opteron 6100',
+    0x3c: u'Opteron 4100',
+    0x3d: u'Opteron 6200',
+    0x3e: u'Opteron 4200',
+    0x3f: u'FX',
+    0x40: u'MIPS',
+    0x41: u'MIPS R4000',
+    0x42: u'MIPS R4200',
+    0x43: u'MIPS R4400',
+    0x44: u'MIPS R4600',
+    0x45: u'MIPS R10000',
+    0x46: u'C-Series',
+    0x47: u'E-Series',
+    0x48: u'A-Series',
+    0x49: u'G-Series',
+    0x4a: u'Z-Series',
+    0x4b: u'R-Series',
+    0x4c: u'Opteron 4300',
+    0x4d: u'Opteron 6300',
+    0x4e: u'Opteron 3300',
+    0x4f: u'FirePro',
+    0x50: u'SPARC',
+    0x51: u'SuperSPARC',
+    0x52: u'MicroSPARC II',
+    0x53: u'MicroSPARC IIep',
+    0x54: u'UltraSPARC',
+    0x55: u'UltraSPARC II',
+    0x56: u'UltraSPARC IIi',
+    0x57: u'UltraSPARC III',
+    0x58: u'UltraSPARC IIIi',
+    0x60: u'68040',
+    0x61: u'68xxx',
+    0x62: u'68000',
+    0x63: u'68010',
+    0x64: u'68020',
+    0x65: u'68030',
+    0x66: u'Athlon X4',
+    0x67: u'Opteron X1000',
+    0x68: u'Opteron X2000',
+    0x69: u'Opteron A-Series',
+    0x6a: u'Opteron X3000',
+    0x6b: u'Zen',
+    0x70: u'Hobbit',
+    0x78: u'Crusoe TM5000',
+    0x79: u'Crusoe TM3000',
+    0x7a: u'Efficeon TM8000',
+    0x80: u'Weitek',
+    0x82: u'Itanium',
+    0x83: u'Athlon 64',
+    0x84: u'Opteron',
+    0x85: u'Sempron',
+    0x86: u'Turion 64',
+    0x87: u'Dual-Core Opteron',
+    0x88: u'Athlon 64 X2',
+    0x89: u'Turion 64 X2',
+    0x8a: u'Quad-Core Opteron',
+    0x8b: u'Third-Generation Opteron',
+    0x8c: u'Phenom FX',
+    0x8d: u'Phenom X4',
+    0x8e: u'Phenom X2',
+    0x8f: u'Athlon X2',
+    0x90: u'PA-RISC',
+    0x91: u'PA-RISC 8500',
+    0x92: u'PA-RISC 8000',
+    0x93: u'PA-RISC 7300LC',
+    0x94: u'PA-RISC 7200',
+    0x95: u'PA-RISC 7100LC',
+    0x96: u'PA-RISC 7100',
+    0xa0: u'V30',
+    0xa1: u'Quad-Core Xeon 3200',
+    0xa2: u'Dual-Core Xeon 3000',
+    0xa3: u'Quad-Core Xeon 5300',
+    0xa4: u'Dual-Core Xeon 5100',
+    0xa5: u'Dual-Core Xeon 5000',
+    0xa6: u'Dual-Core Xeon LV',
+    0xa7: u'Dual-Core Xeon ULV',
+    0xa8: u'Dual-Core Xeon 7100',
+    0xa9: u'Quad-Core Xeon 5400',
+    0xaa: u'Quad-Core Xeon',
+    0xab: u'Dual-Core Xeon 5200',
+    0xac: u'Dual-Core Xeon 7200',
+    0xad: u'Quad-Core Xeon 7300',
+    0xae: u'Quad-Core Xeon 7400',
+    0xaf: u'Multi-Core Xeon 7400',
+    0xb0: u'Pentium III Xeon',
+    0xb1: u'Pentium III Speedstep',
+    0xb2: u'Pentium 4',
+    0xb3: u'Xeon',
+    0xb4: u'AS400',
+    0xb5: u'Xeon MP',
+    0xb6: u'Athlon XP',
+    0xb7: u'Athlon MP',
+    0xb8: u'Itanium 2',
+    0xb9: u'Pentium M',
+    0xba: u'Celeron D',
+    0xbb: u'Pentium D',
+    0xbc: u'Pentium EE',
+    0xbd: u'Core Solo',
+    0xbf: u'Core 2 Duo',
+    0xc0: u'Core 2 Solo',
+    0xc1: u'Core 2 Extreme',
+    0xc2: u'Core 2 Quad',
+    0xc3: u'Core 2 Extreme Mobile',
+    0xc4: u'Core 2 Duo Mobile',
+    0xc5: u'Core 2 Solo Mobile',
+    0xc6: u'Core i7',
+    0xc7: u'Dual-Core Celeron',
+    0xc8: u'IBM390',
+    0xc9: u'G4',
+    0xca: u'G5',
+    0xcb: u'ESA/390 G6',
+    0xcc: u'z/Architecture',
+    0xcd: u'Core i5',
+    0xce: u'Core i3',
+    0xcf: u'Core i9',
+    0xd2: u'C7-M',
+    0xd3: u'C7-D',
+    0xd4: u'C7',
+    0xd5: u'Eden',
+    0xd6: u'Multi-Core Xeon',
+    0xd7: u'Dual-Core Xeon 3xxx',
+    0xd8: u'Quad-Core Xeon 3xxx',
+    0xd9: u'Nano',
+    0xda: u'Dual-Core Xeon 5xxx',
+    0xdb: u'Quad-Core Xeon 5xxx',
+    0xdd: u'Dual-Core Xeon 7xxx',
+    0xde: u'Quad-Core Xeon 7xxx',
+    0xdf: u'Multi-Core Xeon 7xxx',
+    0xe0: u'Multi-Core Xeon 3400',
+    0xe4: u'Opteron 3000',
+    0xe5: u'Sempron II',
+    0xe6: u'Embedded Opteron Quad-Core',
+    0xe7: u'Phenom Triple-Core',
+    0xe8: u'Turion Ultra Dual-Core Mobile',
+    0xe9: u'Turion Dual-Core Mobile',
+    0xea: u'Athlon Dual-Core',
+    0xeb: u'Sempron SI',
+    0xec: u'Phenom II',
+    0xed: u'Athlon II',
+    0xee: u'Six-Core Opteron',
+    0xef: u'Sempron M',
+    0xfa: u'i860',
+    0xfb: u'i960',
+    0x100: u'ARMv7',
+    0x101: u'ARMv8',
+    0x104: u'SH-3',
+    0x105: u'SH-4',
+    0x118: u'ARM',
+    0x119: u'StrongARM',
+    0x12c: u'6x86',
+    0x12d: u'MediaGX',
+    0x12e: u'MII',
+    0x140: u'WinChip',
+    0x15e: u'DSP',
+    0x1f4: u'Video Processor',
+    0x200: u'RV32',
+    0x201: u'RV64',
+    0x202: u'RV128',
+}
+
+PROCESSOR_UPGRADES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Daughter Board',
+    0x04: u'ZIF Socket',
+    0x05: u'Replaceable Piggy Back',
+    0x06: u'None',
+    0x07: u'LIF Socket',
+    0x08: u'Slot 1',
+    0x09: u'Slot 2',
+    0x0a: u'370-pin Socket',
+    0x0b: u'Slot A',
+    0x0c: u'Slot M',
+    0x0d: u'Socket 423',
+    0x0e: u'Socket A (Socket 462)',
+    0x0f: u'Socket 478',
+    0x10: u'Socket 754',
+    0x11: u'Socket 940',
+    0x12: u'Socket 939',
+    0x13: u'Socket mPGA604',
+    0x14: u'Socket LGA771',
+    0x15: u'Socket LGA775',
+    0x16: u'Socket S1',
+    0x17: u'Socket AM2',
+    0x18: u'Socket F (1207)',
+    0x19: u'Socket LGA1366',
+    0x1a: u'Socket G34',
+    0x1b: u'Socket AM3',
+    0x1c: u'Socket C32',
+    0x1d: u'Socket LGA1156',
+    0x1e: u'Socket LGA1567',
+    0x1f: u'Socket PGA988A',
+    0x20: u'Socket BGA1288',
+    0x21: u'Socket rPGA988B',
+    0x22: u'Socket BGA1023',
+    0x23: u'Socket BGA1224',
+    0x24: u'Socket LGA1155',
+    0x25: u'Socket LGA1356',
+    0x26: u'Socket LGA2011',
+    0x27: u'Socket FS1',
+    0x28: u'Socket FS2',
+    0x29: u'Socket FM1',
+    0x2a: u'Socket FM2',
+    0x2b: u'Socket LGA2011-3',
+    0x2c: u'Socket LGA1356-3',
+    0x2d: u'Socket LGA1150',
+    0x2e: u'Socket BGA1168',
+    0x2f: u'Socket BGA1234',
+    0x30: u'Socket BGA1364',
+    0x31: u'Socket AM4',
+    0x32: u'Socket LGA1151',
+    0x33: u'Socket BGA1356',
+    0x34: u'Socket BGA1440',
+    0x35: u'Socket BGA1515',
+    0x36: u'Socket LGA3647-1',
+    0x37: u'Socket SP3',
+    0x38: u'Socket SP3r2',
+    0x39: u'Socket LGA2066',
+    0x3a: u'Socket BGA1392',
+    0x3b: u'Socket BGA1510',
+    0x3c: u'Socket BGA1528',
+}
+
+PROCESSOR_STATUS = {
+    0x00: u'Unknown',
+    0x01: u'Enabled',
+    0x02: u'Disabled By User',
+    0x03: u'Disabled By BIOS',
+    0x04: u'Idle',
+    0x07: u'Other',
+}
+
+
+def _is_intel(manufacturer):
+    return u'Intel' in manufacturer or manufacturer.lower().startswith(u'intel')
+
+
+def _processor_family(structure, version):
+    family = structure.byte(0x06)
+    if family == 0x30 and version == (2, 0) and _is_intel(structure.string(0x07)):
+        # SMBIOS 2.0 had 0x30 for the Pentium Pro, which is Alpha since:
+        return u'Pentium Pro'
+    if family == 0xfe and structure.length >= 0x2a:
+        family = structure.word(0x28)
+    if family == 0xbe:
+        # 0xBE is both Intel Core 2 and AMD K7, tell them apart by vendor:
+        manufacturer = structure.string(0x07)
+        if _is_intel(manufacturer):
+            return u'Core 2'
+        if u'AMD' in manufacturer:
+            return u'K7'
+        return u'Core 2 or K7'
+    return _lookup(PROCESSOR_FAMILIES, family)
+
+
+def _processor_voltage(value):
+    if value & 0x80:
+        return u'%.1f V' % ((value & 0x7f) / 10.0)
+    voltages = [name for (bit, name) in ((0x01, u'5.0 V'), (0x02, u'3.3 V'), (0x04, u'2.9 V'))
+                if value & bit]
+    return u' '.join(voltages) or u'Unknown'
+
+
+def _processor_status(value):
+    if not value & 0x40:
+        return u'Unpopulated'
+    return u'Populated:%s' % _lookup(PROCESSOR_STATUS, value & 0x07)
+
+
+# Type 4
+def decode_processor(structure, version):
+    data = {
+        'Socket Designation': structure.string(0x04),
+        'Type': _lookup(PROCESSOR_TYPES, structure.byte(0x05)),
+        'Family': _processor_family(structure, version),
+        'Version': structure.string(0x10),
+        'Voltage': _processor_voltage(structure.byte(0x11)),
+        'Status': _processor_status(structure.byte(0x18)),
+        'Upgrade': _lookup(PROCESSOR_UPGRADES, structure.byte(0x19)),
+    }
+    if structure.length >= 0x20:
+        for (offset, name) in ((0x1a, 'L1 Cache Handle'),
+                               (0x1c, 'L2 Cache Handle'),
+                               (0x1e, 'L3 Cache Handle')):
+            # A cache the firmware does not provide is left out.
+            if structure.word(offset) != 0xffff:
+                data[name] = structure.handle_ref(offset)
+    if structure.length >= 0x23:
+        data['Serial Number'] = structure.string(0x20)
+        data['Asset Tag'] = structure.string(0x21)
+        data['Part Number'] = structure.string(0x22)
+    return data
+
+
+CONNECTOR_TYPES = {
+    0x00: u'None',
+    0x01: u'Centronics',
+    0x02: u'Mini Centronics',
+    0x03: u'Proprietary',
+    0x04: u'DB-25 male',
+    0x05: u'DB-25 female',
+    0x06: u'DB-15 male',
+    0x07: u'DB-15 female',
+    0x08: u'DB-9 male',
+    0x09: u'DB-9 female',
+    0x0a: u'RJ-11',
+    0x0b: u'RJ-45',
+    0x0c: u'50 Pin MiniSCSI',
+    0x0d: u'Mini DIN',
+    0x0e: u'Micro DIN',
+    0x0f: u'PS/2',
+    0x10: u'Infrared',
+    0x11: u'HP-HIL',
+    0x12: u'Access Bus (USB)',
+    0x13: u'SSA SCSI',
+    0x14: u'Circular DIN-8 male',
+    0x15: u'Circular DIN-8 female',
+    0x16: u'On Board IDE',
+    0x17: u'On Board Floppy',
+    0x18: u'9 Pin Dual Inline (pin 10 cut)',
+    0x19: u'25 Pin Dual Inline (pin 26 cut)',
+    0x1a: u'50 Pin Dual Inline',
+    0x1b: u'68 Pin Dual Inline',
+    0x1c: u'On Board Sound Input From CD-ROM',
+    0x1d: u'Mini Centronics Type-14',
+    0x1e: u'Mini Centronics Type-26',
+    0x1f: u'Mini Jack (headphones)',
+    0x20: u'BNC',
+    0x21: u'IEEE 1394',
+    0x22: u'SAS/SATA Plug Receptacle',
+    0x23: u'USB Type-C Receptacle',
+    0xa0: u'PC-98',
+    0xa1: u'PC-98 Hireso',
+    0xa2: u'PC-H98',
+    0xa3: u'PC-98 Note',
+    0xa4: u'PC-98 Full',
+    0xff: u'Other',
+}
+
+PORT_TYPES = {
+    0x00: u'None',
+    0x01: u'Parallel Port XT/AT Compatible',
+    0x02: u'Parallel Port PS/2',
+    0x03: u'Parallel Port ECP',
+    0x04: u'Parallel Port EPP',
+    0x05: u'Parallel Port ECP/EPP',
+    0x06: u'Serial Port XT/AT Compatible',
+    0x07: u'Serial Port 16450 Compatible',
+    0x08: u'Serial Port 16550 Compatible',
+    0x09: u'Serial Port 16550A Compatible',
+    0x0a: u'SCSI Port',
+    0x0b: u'MIDI Port',
+    0x0c: u'Joystick Port',
+    0x0d: u'Keyboard Port',
+    0x0e: u'Mouse Port',
+    0x0f: u'SSA SCSI',
+    0x10: u'USB',
+    0x11: u'Firewire (IEEE P1394)',
+    0x12: u'PCMCIA Type I',
+    0x13: u'PCMCIA Type II',
+    0x14: u'PCMCIA Type III',
+    0x15: u'Cardbus',
+    0x16: u'Access Bus Port',
+    0x17: u'SCSI II',
+    0x18: u'SCSI Wide',
+    0x19: u'PC-98',
+    0x1a: u'PC-98 Hireso',
+    0x1b: u'PC-H98',
+    0x1c: u'Video Port',
+    0x1d: u'Audio Port',
+    0x1e: u'Modem Port',
+    0x1f: u'Network Port',
+    0x20: u'SATA',
+    0x21: u'SAS',
+    0xa0: u'8251 Compatible',
+    0xa1: u'8251 FIFO Compatible',
+    0xff: u'Other',
+}
+
+
+# Type 8
+def decode_connector(structure, version):
+    return {
+        'Internal Reference Designator': structure.string(0x04),
+        'Internal Connector Type': _lookup(CONNECTOR_TYPES, structure.byte(0x05)),
+        'External Reference Designator': structure.string(0x06),
+        'External Connector Type': _lookup(CONNECTOR_TYPES, structure.byte(0x07)),
+        'Port Type': _lookup(PORT_TYPES, structure.byte(0x08)),
+    }
+
+
+SLOT_TYPES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'ISA',
+    0x04: u'MCA',
+    0x05: u'EISA',
+    0x06: u'PCI',
+    0x07: u'PC Card (PCMCIA)',
+    0x08: u'VLB',
+    0x09: u'Proprietary',
+    0x0a: u'Processor Card',
+    0x0b: u'Proprietary Memory Card',
+    0x0c: u'I/O Riser Card',
+    0x0d: u'NuBus',
+    0x0e: u'PCI-66',
+    0x0f: u'AGP',
+    0x10: u'AGP 2x',
+    0x11: u'AGP 4x',
+    0x12: u'PCI-X',
+    0x13: u'AGP 8x',
+    0x14: u'M.2 Socket 1-DP',
+    0x15: u'M.2 Socket 1-SD',
+    0x16: u'M.2 Socket 2',
+    0x17: u'M.2 Socket 3',
+    0x18: u'MXM Type I',
+    0x19: u'MXM Type II',
+    0x1a: u'MXM Type III',
+    0x1b: u'MXM Type III-HE',
+    0x1c: u'MXM Type IV',
+    0x1d: u'MXM 3.0 Type A',
+    0x1e: u'MXM 3.0 Type B',
+    0x1f: u'PCI Express 2 SFF-8639 (U.2)',
+    0x20: u'PCI Express 3 SFF-8639 (U.2)',
+    0x21: u'PCI Express Mini 52-pin with bottom-side keep-outs',
+    0x22: u'PCI Express Mini 52-pin without bottom-side keep-outs',
+    0x23: u'PCI Express Mini 76-pin',
+    0xa0: u'PC-98/C20',
+    0xa1: u'PC-98/C24',
+    0xa2: u'PC-98/E',
+    0xa3: u'PC-98/Local Bus',
+    0xa4: u'PC-98/Card',
+    0xa5: u'PCI Express',
+    0xa6: u'PCI Express x1',
+    0xa7: u'PCI Express x2',
+    0xa8: u'PCI Express x4',
+    0xa9: u'PCI Express x8',
+    0xaa: u'PCI Express x16',
+    0xab: u'PCI Express 2',
+    0xac: u'PCI Express 2 x1',
+    0xad: u'PCI Express 2 x2',
+    0xae: u'PCI Express 2 x4',
+    0xaf: u'PCI Express 2 x8',
+    0xb0: u'PCI Express 2 x16',
+    0xb1: u'PCI Express 3',
+    0xb2: u'PCI Express 3 x1',
+    0xb3: u'PCI Express 3 x2',
+    0xb4: u'PCI Express 3 x4',
+    0xb5: u'PCI Express 3 x8',
+    0xb6: u'PCI Express 3 x16',
+    0xb7: u'PCI Express 4',
+    0xb8: u'PCI Express 4 x1',
+    0xb9: u'PCI Express 4 x2',
+    0xba: u'PCI Express 4 x4',
+    0xbb: u'PCI Express 4 x8',
+    0xbc: u'PCI Express 4 x16',
+}
+
+SLOT_BUS_WIDTHS = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'8-bit',
+    0x04: u'16-bit',
+    0x05: u'32-bit',
+    0x06: u'64-bit',
+    0x07: u'128-bit',
+    0x08: u'x1',
+    0x09: u'x2',
+    0x0a: u'x4',
+    0x0b: u'x8',
+    0x0c: u'x12',
+    0x0d: u'x16',
+    0x0e: u'x32',
+}
+
+SLOT_USAGES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Available',
+    0x04: u'In Use',
+    0x05: u'Unavailable',
+}
+
+SLOT_LENGTHS = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Short',
+    0x04: u'Long',
+    0x05: u'2.5" drive form factor',
+    0x06: u'3.5" drive form factor',
+}
+
+
+# Type 9
+def decode_slot(structure, version):
+    return {
+        'Designation': structure.string(0x04),
+        'Type:SlotType': _lookup(SLOT_TYPES, structure.byte(0x05)),
+        'Type:SlotBusWidth': _lookup(SLOT_BUS_WIDTHS, structure.byte(0x06)),
+        'Current Usage': _lookup(SLOT_USAGES, structure.byte(0x07)),
+        'SlotLength': _lookup(SLOT_LENGTHS, structure.byte(0x08)),
+        'SlotID': u'%d' % structure.byte(0x09),
+    }
+
+
+MEMORY_ARRAY_LOCATIONS = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'System Board Or Motherboard',
+    0x04: u'ISA Add-on Card',
+    0x05: u'EISA Add-on Card',
+    0x06: u'PCI Add-on Card',
+    0x07: u'MCA Add-on Card',
+    0x08: u'PCMCIA Add-on Card',
+    0x09: u'Proprietary Add-on Card',
+    0x0a: u'NuBus',
+    0xa0: u'PC-98/C20 Add-on Card',
+    0xa1: u'PC-98/C24 Add-on Card',
+    0xa2: u'PC-98/E Add-on Card',
+    0xa3: u'PC-98/Local Bus Add-on Card',
+}
+
+MEMORY_ARRAY_USES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'System Memory',
+    0x04: u'Video Memory',
+    0x05: u'Flash Memory',
+    0x06: u'Non-volatile RAM',
+    0x07: u'Cache Memory',
+}
+
+MEMORY_ERROR_CORRECTION_TYPES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'None',
+    0x04: u'Parity',
+    0x05: u'Single-bit ECC',
+    0x06: u'Multi-bit ECC',
+    0x07: u'CRC',
+}
+
+
+MEMORY_ERROR_DETECTING_METHODS = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'None',
+    0x04: u'8-bit Parity',
+    0x05: u'32-bit ECC',
+    0x06: u'64-bit ECC',
+    0x07: u'128-bit ECC',
+    0x08: u'CRC',
+}
+
+MEMORY_INTERLEAVES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'One-way Interleave',
+    0x04: u'Two-way Interleave',
+    0x05: u'Four-way Interleave',
+    0x06: u'Eight-way Interleave',
+    0x07: u'Sixteen-way Interleave',
+}
+
+
+# Type 5, obsolete since SMBIOS 2.1
+def decode_memory_controller(structure, version):
+    module_size = 1 << structure.byte(0x08)
+    voltages = [name for (bit, name) in ((0x01, u'5.0 V'), (0x02, u'3.3 V'), (0x04, u'2.9 V'))
+                if structure.byte(0x0d) & bit]
+    return {
+        'Error Detecting Method': _lookup(MEMORY_ERROR_DETECTING_METHODS, structure.byte(0x04)),
+        'Supported Interleave': _lookup(MEMORY_INTERLEAVES, structure.byte(0x06)),
+        'Current Interleave': _lookup(MEMORY_INTERLEAVES, structure.byte(0x07)),
+        'Maximum Memory Module Size': u'%d MB' % module_size,
+        'Maximum Total Memory Size': u'%d MB' % (module_size * structure.byte(0x0e)),
+        'Memory Module Voltage': u' '.join(voltages) or u'Unknown',
+    }
+
+
+def _module_bank_connections(value):
+    if value == 0xff:
+        return u'None'
+    if value & 0xf0 == 0xf0:
+        return u'%d' % (value & 0x0f)
+    if value & 0x0f == 0x0f:
+        return u'%d' % (value >> 4)
+    return u'%d %d' % (value >> 4, value & 0x0f)
+
+
+def _module_size(value):
+    size = value & 0x7f
+    if size in (0x7d, 0x7e, 0x7f):
+        text = {0x7d: u'Not Determinable', 0x7e: u'Disabled', 0x7f: u'Not Installed'}[size]
+    else:
+        text = u'%d MB' % (1 << size)
+    if value & 0x80:
+        return text + u' (Double-bank Connection)'
+    return text + u' (Single-bank Connection)'
+
+
+def _module_error_status(value):
+    if value & 0x04:
+        return u'See Event Log'
+    if value & 0x03 == 0:
+        return u'OK'
+    return u' '.join(name for (bit, name) in ((0x01, u'Uncorrectable Errors'), (0x02, u'Correctable Errors'))
+                     if value & bit)
+
+
+# Type 6, obsolete since SMBIOS 2.1
+def decode_memory_module(structure, version):
+    speed = structure.byte(0x06)
+    return {
+        'Socket Designation': structure.string(0x04),
+        'Bank Connections': _module_bank_connections(structure.byte(0x05)),
+        'Current Speed': u'%d ns' % speed if speed else u'Unknown',
+        'Installed Size': _module_size(structure.byte(0x09)),
+        'Enabled Size': _module_size(structure.byte(0x0a)),
+        'Error Status': _module_error_status(structure.byte(0x0b)),
+    }
+
+
+# Type 16
+def decode_memory_array(structure, version):
+    data = {
+        'Location': _lookup(MEMORY_ARRAY_LOCATIONS, structure.byte(0x04)),
+        'Use': _lookup(MEMORY_ARRAY_USES, structure.byte(0x05)),
+        'Error Correction Type': _lookup(MEMORY_ERROR_CORRECTION_TYPES, structure.byte(0x06)),
+        'Error Information Handle': _memory_handle(structure, 0x0b),
+    }
+    capacity = structure.dword(0x07)
+    if capacity == 0x80000000 and structure.length >= 0x17:
+        data['Maximum Capacity'] = _size(structure.qword(0x0f))
+    else:
+        data['Maximum Capacity'] = _size(capacity, units=(u'kB', u'MB', u'GB', u'TB'))
+    return data
+
+
+MEMORY_FORM_FACTORS = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'SIMM',
+    0x04: u'SIP',
+    0x05: u'Chip',
+    0x06: u'DIP',
+    0x07: u'ZIP',
+    0x08: u'Proprietary Card',
+    0x09: u'DIMM',
+    0x0a: u'TSOP',
+    0x0b: u'Row Of Chips',
+    0x0c: u'RIMM',
+    0x0d: u'SODIMM',
+    0x0e: u'SRIMM',
+    0x0f: u'FB-DIMM',
+    0x10: u'Die',
+}
+
+MEMORY_TYPES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'DRAM',
+    0x04: u'EDRAM',
+    0x05: u'VRAM',
+    0x06: u'SRAM',
+    0x07: u'RAM',
+    0x08: u'ROM',
+    0x09: u'Flash',
+    0x0a: u'EEPROM',
+    0x0b: u'FEPROM',
+    0x0c: u'EPROM',
+    0x0d: u'CDRAM',
+    0x0e: u'3DRAM',
+    0x0f: u'SDRAM',
+    0x10: u'SGRAM',
+    0x11: u'RDRAM',
+    0x12: u'DDR',
+    0x13: u'DDR2',
+    0x14: u'DDR2 FB-DIMM',
+    0x15: u'Reserved',
+    0x16: u'Reserved',
+    0x17: u'Reserved',
+    0x18: u'DDR3',
+    0x19: u'FBD2',
+    0x1a: u'DDR4',
+    0x1b: u'LPDDR',
+    0x1c: u'LPDDR2',
+    0x1d: u'LPDDR3',
+    0x1e: u'LPDDR4',
+    0x1f: u'Logical non-volatile device',
+    0x20: u'HBM',
+    0x21: u'HBM2',
+    0x22: u'DDR5',
+    0x23: u'LPDDR5',
+}
+
+
+def _memory_width(value):
+    if value == 0xffff:
+        return u'Unknown'
+    return u'%d bit' % value
+
+
+def _memory_size(structure):
+    size = structure.word(0x0c)
+    if size == 0:
+        return u'No Module Installed'
+    if size == 0xffff:
+        return u'Unknown'
+    if size == 0x7fff and structure.length >= 0x20:
+        return u'%d MB' % (structure.dword(0x1c) & 0x7fffffff)
+    if size & 0x8000:
+        return u'%d KB' % (size & 0x7fff)
+    return u'%d MB' % size
+
+
+def _memory_speed(speed):
+    if speed == 0:
+        return u'Unknown'
+    return u'%d MHz (%.1fns)' % (speed, 1000.0 / speed)
+
+
+# Type 17
+def decode_memory_device(structure, version):
+    data = {
+        'Array Handle': structure.handle_ref(0x04),
+        'Error Information Handle': _memory_handle(structure, 0x06),
+        'Total Width': _memory_width(structure.word(0x08)),
+        'Data Width': _memory_width(structure.word(0x0a)),
+        'Size': _memory_size(structure),
+        'Form Factor': _lookup(MEMORY_FORM_FACTORS, structure.byte(0x0e)),
+        'Locator': structure.string(0x10),
+        'Bank Locator': structure.string(0x11),
+        'Type': _lookup(MEMORY_TYPES, structure.byte(0x12)),
+    }
+    if structure.length >= 0x17:
+        data['Speed'] = _memory_speed(structure.word(0x15))
+    if structure.length >= 0x1b:
+        data['Manufacturer'] = structure.string(0x17)
+        data['Serial Number'] = structure.string(0x18)
+        data['AssetTag'] = structure.string(0x19)
+        data['Part Number'] = structure.string(0x1a)
+    return data
+
+
+SYSTEM_BOOT_STATUS = {
+    0x00: u'No errors detected',
+    0x01: u'No bootable media',
+    0x02: u'Operating system failed to load',
+    0x03: u'Firmware-detected hardware failure',
+    0x04: u'Operating system-detected hardware failure',
+    0x05: u'User-requested boot',
+    0x06: u'System security violation',
+    0x07: u'Previously-requested image',
+    0x08: u'System watchdog timer expired',
+}
+
+
+# Type 32
+def decode_system_boot(structure, version):
+    if structure.length < 0x0b:
+        return {}
+    status = structure.byte(0x0a)
+    if 128 <= status <= 191:
+        return {'Status': u'OEM-specific'}
+    if status >= 192:
+        return {'Status': u'Product-specific'}
+    return {'Status': _lookup(SYSTEM_BOOT_STATUS, status)}
+
+
+ONBOARD_DEVICE_TYPES = {
+    0x01: u'Other',
+    0x02: u'Unknown',
+    0x03: u'Video',
+    0x04: u'SCSI Controller',
+    0x05: u'Ethernet',
+    0x06: u'Token Ring',
+    0x07: u'Sound',
+    0x08: u'PATA Controller',
+    0x09: u'SATA Controller',
+    0x0a: u'SAS Controller',
+    0x0b: u'Wireless LAN',
+    0x0c: u'Bluetooth',
+    0x0d: u'WWAN',
+    0x0e: u'eMMC',
+    0x0f: u'NVMe Controller',
+    0x10: u'UFS Controller',
+}
+
+
+# Type 41
+def decode_onboard_device(structure, version):
+    data = {
+        'Reference Designation': structure.string(0x04),
+        'Type': _lookup(ONBOARD_DEVICE_TYPES, structure.byte(0x05) & 0x7f),
+        'Status': u'Enabled' if structure.byte(0x05) & 0x80 else u'Disabled',
+        'Type Instance': u'%d' % structure.byte(0x06),
+    }
+    (segment, bus, devfn) = (structure.word(0x07), structure.byte(0x09), structure.byte(0x0a))
+    if (segment, bus, devfn) != (0xffff, 0xff, 0xff):
+        data['Bus Address'] = u'%04x:%02x:%02x.%x' % (segment, bus, devfn >> 3, devfn & 0x07)
+    return data
+
+
+# DMI type -> (minimal length of its formatted area, decoder), for every
+# type in GROUPS.
+DECODERS = {
+    0: (0x12, decode_bios),
+    1: (0x08, decode_system),
+    2: (0x08, decode_baseboard),
+    3: (0x09, decode_chassis),
+    4: (0x1a, decode_processor),
+    5: (0x0f, decode_memory_controller),
+    6: (0x0c, decode_memory_module),
+    8: (0x09, decode_connector),
+    9: (0x0c, decode_slot),
+    10: (0x04, decode_onboard_devices),
+    12: (0x05, decode_system_options),
+    13: (0x16, decode_bios_language),
+    15: (0x14, decode_event_log),
+    16: (0x0f, decode_memory_array),
+    17: (0x15, decode_memory_device),
+    23: (0x0d, decode_system_reset),
+    32: (0x0b, decode_system_boot),
+    41: (0x0b, decode_onboard_device),
+}
+
+
+def decode_tables(entry_point, table):
+    """
+    Returns {group: {handle: {'dmi_type': type, 'data': {name: value}}}}
+    for every group in GROUPS, like python-dmidecode does.
+    """
+    version = parse_entry_point(entry_point)
+    group_of_type = {}
+    for (group, dmi_types) in GROUPS.items():
+        for dmi_type in dmi_types:
+            group_of_type[dmi_type] = group
+
+    # In table order, so later structures of a type win when flattened:
+    groups = dict((group, OrderedDict()) for group in GROUPS)
+    for structure in iter_structures(table):
+        if structure.type not in group_of_type:
+            continue
+        if structure.type not in DECODERS:
+            # Leaving its values out would change the facts, dmidecode has to decode it:
+            raise SmbiosError("No decoder for DMI type %d" % structure.type)
+        (min_length, decoder) = DECODERS[structure.type]
+        if structure.length < min_length:
+            log.debug("Skipping short DMI type %d structure 0x%04x" %
+                      (structure.type, structure.handle))
+            continue
+        groups[group_of_type[structure.type]]['0x%04x' % structure.handle] = {
+            'dmi_type': structure.type,
+            'data': decoder(structure, version),
+        }
+    return groups
+
+
+def read_smbios(tables_dir=SMBIOS_TABLES_DIR):
+    """
+    Reads and decodes the SMBIOS tables in tables_dir, see decode_tables().
+
+    Raises EnvironmentError when the tables can not be read, which they
+    only can be by root, and SmbiosError when they can not be decoded.
+    """
+    with open(os.path.join(tables_dir, ENTRY_POINT_FILE), 'rb') as entry_point_file:
+        entry_point = entry_point_file.read()
+    with open(os.path.join(tables_dir, TABLE_FILE), 'rb') as table_file:
+        table = table_file.read()
+    return decode_tables(entry_point, table)
+
+
+def tables_readable(tables_dir=SMBIOS_TABLES_DIR):
+    return all(os.access(os.path.join(tables_dir, name), os.R_OK)
+               for name in (ENTRY_POINT_FILE, TABLE_FILE))
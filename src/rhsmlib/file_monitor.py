@@ -16,20 +16,137 @@ from __future__ import print_function, division, absolute_import
 from rhsm.config import initConfig
 from rhsmlib.services import config
 from six.moves import configparser
+import collections
+import ctypes
+import errno
 import logging
 import os.path
 import fnmatch
+import glob
+import select
+import struct
+import sys
 import time
 
-try:
-    import pyinotify
-except ImportError:
-    pyinotify = None
-
 
 log = logging.getLogger(__name__)
 conf = config.Config(initConfig())
 
+# Flags from inotify(7):
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# struct inotify_event, followed by a NUL padded name of len bytes:
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+# Milliseconds a dir watch has to go without events before its callbacks
+# are called, unless set by inotify_debounce in rhsm.conf:
+DEFAULT_DEBOUNCE = 250
+
+# Seconds between checks whether the loop should stop:
+LOOP_TIMEOUT = 0.5
+
+_clock = getattr(time, "monotonic", time.time)
+
+
+def _load_libc():
+    # The libc the interpreter is linked with; no need to go looking for it.
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError) as e:
+        log.debug("inotify is not available: %s" % e)
+        return None
+    return libc
+
+
+libc = _load_libc()
+
+InotifyEvent = collections.namedtuple("InotifyEvent", ["path", "pathname", "mask"])
+
+
+class Inotify(object):
+    """
+    Minimal binding of the inotify(7) calls, through ctypes
+
+    Only what InotifyFilesystemWatcher needs: adding watches on paths and
+    reading the events on them.
+    """
+    def __init__(self):
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_errno()
+        # watch descriptor -> watched path
+        self.paths = {}
+        self.poller = select.poll()
+        self.poller.register(self.fd, select.POLLIN)
+
+    @staticmethod
+    def _raise_errno(path=None):
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), path)
+
+    def add_watch(self, path, mask):
+        """
+        :param path: path to watch
+        :param mask: inotify events to watch for
+        :return: watch descriptor
+        """
+        encoded = path if isinstance(path, bytes) else path.encode(sys.getfilesystemencoding())
+        wd = libc.inotify_add_watch(self.fd, encoded, mask)
+        if wd < 0:
+            self._raise_errno(path)
+        self.paths[wd] = path
+        return wd
+
+    def read_events(self, timeout):
+        """
+        Waits for events on the watched paths
+        :param timeout: seconds to wait for events
+        :return: list of InotifyEvent, empty if there were none within timeout
+        """
+        try:
+            if not self.poller.poll(int(timeout * 1000)):
+                return []
+            data = os.read(self.fd, INOTIFY_BUFFER_SIZE)
+        except (OSError, select.error) as e:
+            if e.args[0] in (errno.EAGAIN, errno.EINTR):
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            (wd, mask, cookie, length) = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(InotifyEvent(None, None, mask))
+                continue
+            path = self.paths.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                # The watched path is gone, and with it the watch:
+                del self.paths[wd]
+            if name and not isinstance(path, bytes):
+                name = name.decode(sys.getfilesystemencoding())
+            events.append(InotifyEvent(path, os.path.join(path, name) if name else path, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
 
 class FilesystemWatcher(object):
     """
@@ -107,61 +224,101 @@ class InotifyFilesystemWatcher(FilesystemWatcher):
     Watches a set of directories and notifies when there are changes
 
     Inotify implementation
-    Calls callbacks associated with directory when the directory changes
+    Calls callbacks associated with directory when the directory changes,
+    once the events on it have stopped for the debounce window, so that a
+    burst of certificate writes results in a single notification
     Uses a loop running in its own thread
     ** Use create_filesystem_watcher to create instance of filesystem watcher
     """
-    def __init__(self, dir_watches):
+    def __init__(self, dir_watches, debounce=DEFAULT_DEBOUNCE):
         """
-        Filesystem watcher if pyinotify is configured and available
+        Filesystem watcher if inotify is configured and available
         loop function will override parent class loop function
         :param dir_watches: list of directories to watch (see DirectoryWatch class below)
+        :param debounce: milliseconds a dir watch has to go without events before it is notified
         """
         super(InotifyFilesystemWatcher, self).__init__(dir_watches)
-        self.watch_manager = None
-        self.notifier = None
+        self.debounce = debounce / 1000.0
+        self.inotify = None
+        # dir watch -> time its callbacks are due
+        self.pending = {}
 
     def loop(self, callback=None):
         """
-        sets up watch manager, notifier, adds watches to watch manager, and starts loop
+        sets up inotify, adds watches and starts loop
         :param callback: callback method to be called at the end of each iteration of the loop
         :return:
         """
-        self.watch_manager = pyinotify.WatchManager()
-        self.notifier = pyinotify.Notifier(self.watch_manager, self.handle_event)
-        self.add_watches()
-
-        def inotify_callback():
-            return end_loop_cb(self, user_callback=callback)
-
-        while not inotify_callback():
-            self.notifier.process_events()
-            if self.notifier.check_events(500):  # keeps tests reasonably fast while still timing out
-                self.notifier.read_events()
+        self.inotify = Inotify()
+        try:
+            self.add_watches()
+            while not end_loop_cb(self, user_callback=callback):
+                for event in self.inotify.read_events(self.timeout()):
+                    self.handle_event(event)
+                self.notify_pending()
+        finally:
+            self.inotify.close()
+
+    def timeout(self):
+        """
+        :return: seconds to wait for events before the next dir watch is due, or
+        before checking again whether the loop should stop
+        """
+        if not self.pending:
+            return LOOP_TIMEOUT
+        return min(max(min(self.pending.values()) - _clock(), 0), LOOP_TIMEOUT)
 
     def handle_event(self, event):
         """
-        default process function for pyinotify notifier
-        :param event: pyinotify Event object, has path and mask of flags representing file modification
+        schedules the notification of the dir watches the event is relevant to,
+        postponing any already scheduled
+        :param event: InotifyEvent, has path and mask of flags representing file modification
         :return:
         """
+        due = _clock() + self.debounce
+        if event.mask & IN_Q_OVERFLOW:
+            # events were dropped, so any of them may have changed
+            log.warning("Too many filesystem events, notifying all watched directories")
+            for dir_watch in self.dir_watches:
+                self.pending[dir_watch] = due
+            return
         for dir_watch in self.dir_watches:
             if dir_watch.paths_match(event.path, event.pathname) and dir_watch.file_modified(event.mask):
-                dir_watch.notify()
+                self.pending[dir_watch] = due
+
+    def notify_pending(self):
+        """
+        notifies the dir watches that have gone the debounce window without events
+        :return: set of notified dir watches, for testing purposes
+        """
+        now = _clock()
+        due_dir_watches = set(dw for (dw, due) in self.pending.items() if due <= now)
+        for dir_watch in due_dir_watches:
+            del self.pending[dir_watch]
+            dir_watch.notify()
+        return due_dir_watches
 
     def add_watches(self):
         """
-        adds watches to the watch manager
+        adds watches to inotify, one per directory
         :return:
         """
+        masks = {}
         for dir_watch in self.dir_watches:
             if dir_watch.is_file:
                 # watch for any changes in the directory, but only be notified of the specific path
                 dir_name = os.path.abspath(os.path.dirname(dir_watch.path))
-                self.watch_manager.add_watch(dir_name, dir_watch.mask, self.handle_event, do_glob=dir_watch.is_glob)
             else:
                 # is already directory
-                self.watch_manager.add_watch(dir_watch.path, dir_watch.mask, self.handle_event, do_glob=dir_watch.is_glob)
+                dir_name = dir_watch.path
+            for path in (glob.glob(dir_name) if dir_watch.is_glob else [dir_name]):
+                masks[path] = masks.get(path, 0) | dir_watch.mask
+
+        for (path, mask) in masks.items():
+            try:
+                self.inotify.add_watch(path, mask)
+            except OSError as e:
+                log.error("Unable to watch %s: %s" % (path, e))
 
 
 class DirectoryWatch(object):
@@ -178,15 +335,18 @@ class DirectoryWatch(object):
         :param callbacks: list of methods called when directory is changed
         :param is_glob: bool - if path provided is glob or not
         """
-        self.IN_DELETE = 0x00000200
-        self.IN_MODIFY = 0x00000002
+        self.IN_DELETE = IN_DELETE
+        self.IN_MODIFY = IN_MODIFY
+        # certificates are written to a temporary file and renamed into place
+        self.IN_MOVED_FROM = IN_MOVED_FROM
+        self.IN_MOVED_TO = IN_MOVED_TO
 
         self.path = os.path.abspath(path)
         self.is_file = not os.path.isdir(self.path)  # used isdir because if path does not exist, assumed to be file
         self.timestamp = None
         self.is_glob = is_glob
         self.callbacks = callbacks
-        self.mask = self.IN_DELETE | self.IN_MODIFY
+        self.mask = self.IN_DELETE | self.IN_MODIFY | self.IN_MOVED_FROM | self.IN_MOVED_TO
 
     def notify(self):
         """
@@ -203,9 +363,9 @@ class DirectoryWatch(object):
     def paths_match(self, event_path, event_pathname):
         """
         checks if event path matches any of the dir watch paths associated to it
-        :param event_path: path of the inotify event object
-        :param event_pathname: pathname of the inotify event object
-        see pyinotify event class for more info
+        :param event_path: watched path of the inotify event object
+        :param event_pathname: full path of the file the inotify event object is about
+        see InotifyEvent for more info
         :return: bool - if paths match or not
         """
         event_pathname = os.path.realpath(event_pathname)
@@ -236,7 +396,7 @@ def end_loop_cb(fsw, user_callback=None):
 def create_filesystem_watcher(dir_watches):
     """
     determines if inotify is available and configured in rhsm.conf
-    If yes, uses pyinotify. Else, uses polling methods.
+    If yes, uses inotify. Else, uses polling methods.
     Uses inotify by default
     :param dir_watches: list of directories to watch to create
     correct filesystem watcher object
@@ -252,11 +412,11 @@ def create_filesystem_watcher(dir_watches):
     if not (available and configed):
         return FilesystemWatcher(dir_watches)
     else:
-        return InotifyFilesystemWatcher(dir_watches)
+        return InotifyFilesystemWatcher(dir_watches, debounce=get_inotify_debounce())
 
 
 def is_inotify_available():
-    return pyinotify is not None
+    return libc is not None
 
 
 def is_inotify_config():
@@ -278,3 +438,23 @@ def is_inotify_config():
             return True
 
     return bool(use_inotify)
+
+
+def get_inotify_debounce():
+    """
+    Get the debounce window of inotify from rhsm.conf.
+    :return: It returns the window in milliseconds, DEFAULT_DEBOUNCE when it is not set or invalid.
+    """
+    try:
+        debounce = conf['rhsm'].get_int('inotify_debounce')
+    except ValueError as e:
+        log.exception(e)
+        return DEFAULT_DEBOUNCE
+    except configparser.Error as e:
+        log.exception(e)
+        return DEFAULT_DEBOUNCE
+    else:
+        if debounce is None or debounce < 0:
+            return DEFAULT_DEBOUNCE
+
+    return debounce
@@ -59,30 +59,38 @@ class InstalledProducts(object):
             ['product_name', 'product_id', 'version', 'arch', 'status', 'status_details', 'starts', 'ends']
         )
 
+        installed = []
         for installed_product in sorted(sorter.installed_products):
             product_cert = sorter.installed_products[installed_product]
-
             if cert_filter is None or cert_filter.match(product_cert):
-                for product in product_cert.products:
-                    begin = ""
-                    end = ""
-                    prod_status_range = calculator.calculate(product.id)
+                installed.extend((installed_product, product) for product in product_cert.products)
+
+        # Looked up for all the listed products at once, rather than
+        # searching the status and the reasons again for each product:
+        listed = [product for (installed_product, product) in installed]
+        date_ranges = calculator.calculate_all([product.id for product in listed])
+        reasons = sorter.reasons.get_product_reasons_map(listed)
+
+        for (installed_product, product) in installed:
+            begin = ""
+            end = ""
+            prod_status_range = date_ranges.get(product.id)
 
-                    if prod_status_range:
-                        # Format the date in user's local time as the date
-                        # range is returned in GMT.
-                        begin = managerlib.format_date(prod_status_range.begin())
-                        end = managerlib.format_date(prod_status_range.end())
+            if prod_status_range:
+                # Format the date in user's local time as the date
+                # range is returned in GMT.
+                begin = managerlib.format_date(prod_status_range.begin())
+                end = managerlib.format_date(prod_status_range.end())
 
-                    product_status.append(ProductStatus(
-                        product.name,
-                        installed_product,
-                        product.version,
-                        ",".join(product.architectures),
-                        sorter.get_status(product.id),
-                        sorter.reasons.get_product_reasons(product),
-                        begin,
-                        end
-                    ))
+            product_status.append(ProductStatus(
+                product.name,
+                installed_product,
+                product.version,
+                ",".join(product.architectures),
+                sorter.get_status(product.id),
+                reasons.get(product.id, []),
+                begin,
+                end
+            ))
 
         return product_status
@@ -39,5 +39,6 @@ class Syspurpose(object):
             self.purpose_status = self.cp.getSyspurposeCompliance(self.identity.uuid)
         return self.purpose_status
 
-    def get_overall_status(self, status):
+    @staticmethod
+    def get_overall_status(status):
         return STATUS_MAP.get(status, STATUS_MAP['unknown'])
@@ -30,6 +30,7 @@ from subscription_manager.packageprofilelib import PackageProfileActionInvoker
 from subscription_manager.installedproductslib import InstalledProductsActionInvoker
 from subscription_manager.content_action_client import ContentActionClient
 from subscription_manager.syspurposelib import SyspurposeSyncActionInvoker
+from subscription_manager.consumerupdatelib import ConsumerUpdateActionInvoker
 
 log = logging.getLogger(__name__)
 
@@ -46,16 +47,33 @@ class ActionClient(base_action_client.BaseActionClient):
         self.installedprodlib = InstalledProductsActionInvoker()
         self.idcertlib = IdentityCertActionInvoker()
         self.syspurposelib = SyspurposeSyncActionInvoker()
+        self.consumerupdatelib = ConsumerUpdateActionInvoker()
 
-        # WARNING: order is important here, we need to update a number
-        # of things before attempting to autoheal, and we need to autoheal
-        # before attempting to fetch our certificates:
+        # The order of the reports; the order the libs run in is given
+        # by _get_lib_dependencies:
         lib_set = [self.entcertlib, self.idcertlib, self.content_client,
                    self.factlib, self.profilelib,
-                   self.installedprodlib, self.syspurposelib]
+                   self.installedprodlib, self.syspurposelib,
+                   self.consumerupdatelib]
 
         return lib_set
 
+    def _get_lib_dependencies(self):
+        # The identity cert is only replaced once the entitlement certs are
+        # fetched, and every lib after that uses the new one. Repos need the
+        # new entitlement certs. The facts, installed products and syspurpose
+        # changes are sent by consumerupdatelib.
+        return {
+            self.idcertlib: [self.entcertlib],
+            self.content_client: [self.entcertlib, self.idcertlib],
+            self.factlib: [self.idcertlib],
+            self.profilelib: [self.idcertlib],
+            self.installedprodlib: [self.idcertlib],
+            self.syspurposelib: [self.idcertlib],
+            self.consumerupdatelib: [self.factlib, self.profilelib,
+                                     self.installedprodlib, self.syspurposelib],
+        }
+
 
 class HealingActionClient(base_action_client.BaseActionClient):
     def _get_libset(self):
@@ -63,12 +81,23 @@ class HealingActionClient(base_action_client.BaseActionClient):
         self.entcertlib = EntCertActionInvoker()
         self.installedprodlib = InstalledProductsActionInvoker()
         self.syspurposelib = SyspurposeSyncActionInvoker()
+        self.consumerupdatelib = ConsumerUpdateActionInvoker()
         self.healinglib = HealingActionInvoker()
 
-        lib_set = [self.installedprodlib, self.syspurposelib, self.healinglib, self.entcertlib]
+        lib_set = [self.installedprodlib, self.syspurposelib, self.consumerupdatelib,
+                   self.healinglib, self.entcertlib]
 
         return lib_set
 
+    def _get_lib_dependencies(self):
+        # The server has to know the installed products and syspurpose
+        # before it can heal, and the certs are fetched once healed:
+        return {
+            self.consumerupdatelib: [self.installedprodlib, self.syspurposelib],
+            self.healinglib: [self.consumerupdatelib],
+            self.entcertlib: [self.healinglib],
+        }
+
 
 # it may make more sense to have *Lib.cleanup actions?
 # *Lib things are weird, since some are idempotent, but
@@ -16,8 +16,15 @@ from __future__ import print_function, division, absolute_import
 # in this software or its documentation.
 #
 import logging
+import sys
+import threading
+import time
+
+import six
 
 from subscription_manager import injection as inj
+from subscription_manager.certlib import ActionReport
+from subscription_manager.consumerupdatelib import ConsumerUpdateActionInvoker
 
 from rhsm.connection import GoneException, ExpiredIdentityCertException
 
@@ -27,11 +34,17 @@ log = logging.getLogger(__name__)
 class BaseActionClient(object):
     """
     An object used to update the certficates, yum repos, and facts for the system.
+
+    The libs run in parallel, on up to MAX_WORKERS threads, as far as the
+    dependencies from _get_lib_dependencies() allow.
     """
 
+    MAX_WORKERS = 4
+
     def __init__(self):
 
-        self._libset = self._get_libset()
+        self._libset = list(self._get_libset())
+        self._lib_dependencies = self._get_lib_dependencies()
         self.lock = inj.require(inj.ACTION_LOCK)
         self.report = None
         self.update_reports = []
@@ -39,6 +52,14 @@ class BaseActionClient(object):
     def _get_libset(self):
         return []
 
+    def _get_lib_dependencies(self):
+        """
+        Returns a dict of lib to the list of libs from the libset that
+        have to finish before it may start. By default every lib waits
+        for the one before it, so the libs run in libset order.
+        """
+        return dict((lib, [previous]) for (previous, lib) in zip(self._libset, self._libset[1:]))
+
     def update(self, autoheal=False):
         """
         Update I{entitlement} certificates and corresponding
@@ -58,6 +79,7 @@ class BaseActionClient(object):
     def _run_update(self, lib):
         update_report = None
 
+        start = time.time()
         try:
             update_report = lib.update()
         # see bz#852706, reraise GoneException so that
@@ -70,21 +92,87 @@ class BaseActionClient(object):
         except Exception as e:
             log.warning("Exception caught while running %s update" % lib)
             log.exception(e)
+        finally:
+            duration = time.time() - start
+            log.debug("lib %s took %.3fs" % (lib, duration))
 
+        if isinstance(update_report, ActionReport):
+            update_report.duration = duration
         if update_report:
             update_report.print_exceptions()
 
         return update_report
 
+    def _run_lib(self, index, lib, results):
+        try:
+            update_report = self._run_update(lib)
+        except Exception:
+            results.put((index, None, sys.exc_info()))
+        else:
+            results.put((index, update_report, None))
+
     def _run_updates(self, autoheal):
 
-        update_reports = []
+        # a map/dict may make more sense here
+        update_reports = [None] * len(self._libset)
 
-        for lib in self._libset:
-            log.debug("running lib: %s" % lib)
-            update_report = self._run_update(lib)
+        # Consumer attributes changed by the libs are sent together, by the
+        # ConsumerUpdateActionInvoker in the libset or once the outermost
+        # action client ran all its libs.
+        batch = inj.require(inj.CONSUMER_UPDATE_BATCH)
+        nested = batch.batching
+        batch.start()
+        try:
+            error = self._run_lib_graph(update_reports)
+            if error is not None:
+                six.reraise(*error)
 
-            # a map/dict may make more sense here
-            update_reports.append(update_report)
+            if not nested and batch.has_pending():
+                update_reports.append(self._run_update(ConsumerUpdateActionInvoker()))
+        finally:
+            batch.stop()
 
         return update_reports
+
+    def _run_lib_graph(self, update_reports):
+        """
+        Runs every lib once the libs it depends on finished. A GoneException
+        or ExpiredIdentityCertException stops any further lib from starting;
+        the exc_info of the first one is returned once the running libs are
+        done.
+        """
+        waiting = list(enumerate(self._libset))
+        finished = set()
+        running = 0
+        error = None
+        results = six.moves.queue.Queue()
+
+        while waiting or running:
+            for (index, lib) in list(waiting):
+                if running >= self.MAX_WORKERS:
+                    break
+                if any(dependency not in finished
+                       for dependency in self._lib_dependencies.get(lib, [])):
+                    continue
+                log.debug("running lib: %s" % lib)
+                waiting.remove((index, lib))
+                thread = threading.Thread(target=self._run_lib, args=(index, lib, results),
+                                          name="ActionClient%sThread" % lib.__class__.__name__)
+                thread.start()
+                running += 1
+
+            if not running:
+                # Whatever is still waiting depends on a lib that is not in the libset
+                log.error("Unable to run libs, their dependencies did not run: %s" %
+                          ", ".join(str(lib) for (index, lib) in waiting))
+                break
+
+            (index, update_report, lib_error) = results.get()
+            running -= 1
+            finished.add(self._libset[index])
+            update_reports[index] = update_report
+            if lib_error is not None and error is None:
+                error = lib_error
+                waiting = []
+
+        return error
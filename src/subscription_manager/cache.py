@@ -24,6 +24,7 @@ import logging
 import os
 import socket
 import threading
+import time
 from rhsm.https import ssl
 
 from rhsm.config import initConfig
@@ -93,6 +94,16 @@ class CacheManager(object):
     def _cache_exists(self):
         return os.path.exists(self.CACHE_FILE)
 
+    def timestamp(self):
+        """
+        Returns the modification time of the cache on disk, or None if
+        there is no cache.
+        """
+        try:
+            return os.stat(self.CACHE_FILE).st_mtime
+        except OSError:
+            return None
+
     def write_cache(self, debug=True):
         """
         Write the current cache to disk. Should only be done after
@@ -574,9 +585,10 @@ class InstalledProductsManager(CacheManager):
         return final
 
     def _sync_with_server(self, uep, consumer_uuid, *args, **kwargs):
-        uep.updateConsumer(consumer_uuid,
-                installed_products=self.format_for_server(),
-                content_tags=self.tags)
+        inj.require(inj.CONSUMER_UPDATE_BATCH).update_consumer(
+            uep, consumer_uuid, on_failure=self.delete_cache,
+            installed_products=self.format_for_server(),
+            content_tags=self.tags)
 
 
 class PoolStatusCache(StatusCache):
@@ -586,7 +598,7 @@ class PoolStatusCache(StatusCache):
     CACHE_FILE = "/var/lib/rhsm/cache/pool_status.json"
 
     def _sync_with_server(self, uep, uuid, *args, **kwargs):
-        self.server_status = uep.getEntitlementList(uuid)
+        self.server_status = list(uep.getEntitlementList(uuid, stream=True))
 
 
 class PoolTypeCache(object):
@@ -674,15 +686,22 @@ class ContentAccessCache(object):
         return self._query_for_update(if_modified_since=last_update)
 
     @staticmethod
-    def update_cert(cert, data):
+    def update_cert(cert, data, transaction=None):
+        """
+        Rewrites cert with its content from data, in place or as part of the
+        given certdirectory.DirectoryTransaction.
+        """
         if data is None:
             return
         if data["contentListing"] is None or str(cert.serial) not in data["contentListing"]:
             log.warning("Cert serial %s not contained in content listing; not updating it." % cert.serial)
             return
+        updated_cert = "".join(data["contentListing"][str(cert.serial)])
+        log.info("Updating certificate %s with new content" % cert.serial)
+        if transaction is not None:
+            transaction.write(os.path.basename(cert.path), updated_cert)
+            return
         with open(cert.path, "w") as output:
-            updated_cert = "".join(data["contentListing"][str(cert.serial)])
-            log.info("Updating certificate %s with new content" % cert.serial)
             output.write(updated_cert)
 
     def _update_cache(self, data):
@@ -695,6 +714,176 @@ class ContentAccessCache(object):
             return cache.read()
 
 
+class ReleaseListingCache(CacheManager):
+    """
+    Cache of the release listing files read from the CDN, together with
+    the ETag and Last-Modified validators the CDN sent for them, keyed by
+    "host:port/prefix/path" so that switching to another CDN does not
+    return the listings of the previous one.
+
+    Listings fetched less than TTL seconds ago are used as they are. Older
+    ones should be revalidated with a conditional GET.
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/release_listings.json"
+
+    TTL = 60 * 60 * 24
+
+    def __init__(self):
+        self.listings = None
+        self._changed = False
+        self._lock = threading.Lock()
+
+    def _get_listings(self):
+        if self.listings is None:
+            self.listings = self.read_cache_only() or {}
+        return self.listings
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._get_listings())
+
+    def _load_data(self, open_file):
+        try:
+            return json.loads(open_file.read()) or {}
+        except ValueError:
+            # ignore json file parse errors, we are going to generate
+            # a new as if it didn't exist
+            pass
+
+    def has_changed(self):
+        return self._changed
+
+    def write_cache(self, debug=True):
+        super(ReleaseListingCache, self).write_cache(debug)
+        self._changed = False
+
+    def get(self, key):
+        """
+        Returns the cached entry for the listing at key, a dict with the
+        listing "content", its "etag" and "last_modified" validators and
+        the time it was "fetched", or None.
+        """
+        with self._lock:
+            return self._get_listings().get(key)
+
+    def is_fresh(self, entry):
+        return 0 <= time.time() - entry["fetched"] < self.TTL
+
+    def update(self, key, content, headers):
+        """
+        Stores a listing just read from the CDN with the headers it came with.
+        """
+        headers = dict((name.lower(), value) for (name, value) in headers.items())
+        with self._lock:
+            self._get_listings()[key] = {
+                "content": content,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "fetched": time.time(),
+            }
+            self._changed = True
+
+    def revalidated(self, key):
+        """
+        Marks the cached listing as fresh again after the CDN answered a
+        conditional GET with 304 Not Modified.
+        """
+        with self._lock:
+            entry = self._get_listings().get(key)
+            if entry is not None:
+                entry["fetched"] = time.time()
+                self._changed = True
+
+    def delete_cache(self):
+        with self._lock:
+            self.listings = None
+            self._changed = False
+        if self._cache_exists():
+            log.debug("Deleting cache: %s" % self.CACHE_FILE)
+            os.remove(self.CACHE_FILE)
+
+
+class ServerCapabilityCache(CacheManager):
+    """
+    Resources and manager capabilities of the entitlement servers, keyed
+    by "host:port/prefix", so that each process and connection does not
+    have to ask the server with GET / and GET /status again.
+
+    Entries older than TTL seconds are ignored. Connections drop an entry
+    when the server version changes or an advertised resource is missing.
+    They learn the version from responses, and ask GET /status for it
+    before using an entry whose version was not checked for an hour.
+    """
+
+    CACHE_FILE = "/var/lib/rhsm/cache/server_capabilities.json"
+
+    TTL = 60 * 60 * 24
+
+    def __init__(self):
+        self.servers = None
+        self._lock = threading.Lock()
+
+    def _get_servers(self):
+        if self.servers is None:
+            self.servers = self.read_cache_only() or {}
+        return self.servers
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._get_servers())
+
+    def _load_data(self, open_file):
+        try:
+            return json.loads(open_file.read()) or {}
+        except ValueError:
+            # ignore json file parse errors, we are going to generate
+            # a new as if it didn't exist
+            pass
+
+    def _is_fresh(self, entry):
+        return 0 <= time.time() - entry.get("created", 0) < self.TTL
+
+    def get(self, server_key):
+        with self._lock:
+            entry = self._get_servers().get(server_key)
+            if entry is None or not self._is_fresh(entry):
+                return None
+            return dict(entry)
+
+    def update(self, server_key, **values):
+        with self._lock:
+            servers = self._get_servers()
+            entry = servers.get(server_key)
+            if entry is None or not self._is_fresh(entry):
+                entry = servers[server_key] = {"created": time.time()}
+            if all(entry.get(key) == value for (key, value) in values.items()):
+                return
+            entry.update(values)
+        self.write_cache(debug=False)
+
+    def invalidate(self, server_key):
+        with self._lock:
+            if self._get_servers().pop(server_key, None) is None:
+                return
+        self.write_cache(debug=False)
+
+    def write_cache(self, debug=True):
+        # Unprivileged users can still talk to the server, they just do
+        # not get to keep what they learned about it.
+        try:
+            super(ServerCapabilityCache, self).write_cache(debug)
+        except OSError as err:
+            log.debug("Unable to write cache %s: %s" % (self.CACHE_FILE, err))
+
+    def delete_cache(self):
+        with self._lock:
+            self.servers = None
+        if os.path.exists(self.CACHE_FILE):
+            log.debug("Deleting cache: %s" % self.CACHE_FILE)
+            os.remove(self.CACHE_FILE)
+
+
 class RhsmIconCache(CacheManager):
     """
     Cache to keep track of last status returned by the StatusCache.
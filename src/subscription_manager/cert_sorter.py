@@ -15,8 +15,10 @@ from __future__ import print_function, division, absolute_import
 #
 from copy import copy
 from datetime import datetime
+import hashlib
 import logging
 
+from rhsm import ourjson as json
 from rhsm.certificate import GMT
 from rhsm.connection import RestlibException
 import subscription_manager.injection as inj
@@ -53,6 +55,38 @@ RHN_CLASSIC = 3
 RHSM_PARTIALLY_VALID = 4
 RHSM_REGISTRATION_REQUIRED = 5
 
+# What _parse_server_status() computes, and a load() with the same
+# fingerprint can reuse:
+SORTED_ATTRIBUTES = ('valid_products', 'partially_valid_products', 'partial_stacks',
+                     'reasons', 'supports_reasons', 'system_status', 'compliant_until',
+                     'unentitled_products', 'expired_products', 'future_products',
+                     'valid_entitlement_certs')
+
+
+def directory_generation(cert_dir):
+    """
+    Returns the generation() of a certificate directory, or None for
+    directories that cannot tell when they changed, such as in-memory ones.
+    """
+    try:
+        generation = cert_dir.generation()
+    except AttributeError:
+        return None
+    return generation if isinstance(generation, tuple) else None
+
+
+def status_digest(status):
+    """
+    Returns a digest of a compliance status that changes with anything but
+    the date it was computed for, or None if the status is not JSON.
+    """
+    try:
+        relevant = dict((key, value) for (key, value) in status.items() if key != 'date')
+        encoded = json.dumps(relevant, sort_keys=True)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
 
 class ComplianceManager(object):
 
@@ -62,12 +96,20 @@ class ComplianceManager(object):
         self.entitlement_dir = inj.require(inj.ENT_DIR)
         self.identity = inj.require(inj.IDENTITY)
         self.on_date = on_date
+        self._installed_generation = None
+        self._fingerprint = None
+        self._sorted = None
+        self._sorted_until = None
         self.load()
 
     def load(self):
         # All products installed on this machine, regardless of status. Maps
-        # installed product ID to product certificate.
-        self.installed_products = self.product_dir.get_installed_products()
+        # installed product ID to product certificate. Only listed again
+        # once the product directory changed.
+        installed_generation = directory_generation(self.product_dir)
+        if installed_generation is None or installed_generation != self._installed_generation:
+            self.installed_products = self.product_dir.get_installed_products()
+            self._installed_generation = installed_generation
 
         # Installed products which do not have an entitlement that is valid,
         # or expired. They may however have entitlements for the future.
@@ -131,6 +173,14 @@ class ComplianceManager(object):
         if status is None:
             return
 
+        fingerprint = self._get_fingerprint(status)
+        if self._can_reuse(fingerprint):
+            log.debug("Compliance status and certificates unchanged, reusing product status.")
+            for name in SORTED_ATTRIBUTES:
+                setattr(self, name, self._sorted[name])
+            self.log_products()
+            return
+
         # TODO: we're now mapping product IDs to entitlement cert JSON,
         # previously we mapped to actual entitlement cert objects. However,
         # nothing seems to actually use these, so it may not matter for now.
@@ -171,16 +221,24 @@ class ComplianceManager(object):
         # Add in any installed products not in the server response. This
         # could happen if something changes before the certd runs. Log
         # a warning if it does, and treat it like an unentitled product.
+        reported_pids = set(unentitled_pids)
         for pid in list(self.installed_products.keys()):
             if pid not in self.valid_products and pid not in \
                     self.partially_valid_products and pid not in \
-                    unentitled_pids:
+                    reported_pids:
                 log.warn("Installed product %s not present in response from "
                          "server." % pid)
                 unentitled_pids.append(pid)
 
+        # Same as product_dir.find_by_product(), for all of them at once:
+        prod_certs = {}
+        if unentitled_pids:
+            for prod_cert in self.product_dir.list():
+                for product in prod_cert.products:
+                    prod_certs.setdefault(product.id, prod_cert)
+
         for unentitled_pid in unentitled_pids:
-            prod_cert = self.product_dir.find_by_product(unentitled_pid)
+            prod_cert = prod_certs.get(unentitled_pid)
             # Ignore anything server thinks we have but we don't.
             if prod_cert is None:
                 log.warn("Server reported installed product not on system: %s" %
@@ -190,8 +248,33 @@ class ComplianceManager(object):
 
         self._scan_entitlement_certs()
 
+        # Now that the valid entitlement certs are known, index the reasons
+        # once rather than on every per-product/per-subscription lookup:
+        self.reasons.get_index()
+
+        self._fingerprint = fingerprint
+        self._sorted = dict((name, getattr(self, name)) for name in SORTED_ATTRIBUTES)
+
         self.log_products()
 
+    def _get_fingerprint(self, status):
+        """
+        Returns what the product status computed from status depends on,
+        or None if that cannot be told.
+        """
+        fingerprint = (self._installed_generation, directory_generation(self.entitlement_dir),
+                       status_digest(status))
+        if None in fingerprint:
+            return None
+        return fingerprint + (self.on_date,)
+
+    def _can_reuse(self, fingerprint):
+        if fingerprint is None or fingerprint != self._fingerprint:
+            return False
+        # Expired and future products, and the valid certificates, depend
+        # on the time of the scan until the next certificate starts or ends:
+        return self._sorted_until is None or datetime.now(GMT()) < self._sorted_until
+
     def log_products(self):
         fj = utils.friendly_join
 
@@ -216,20 +299,25 @@ class ComplianceManager(object):
         """
         # Subtract out the valid and partially valid items from the
         # list of installed products
-        unknown_products = dict((k, v) for (k, v) in list(self.installed_products.items()) if
-                                k not in list(self.valid_products.keys()) and
-                                k not in list(self.partially_valid_products.keys()))
+        unknown_products = set(k for k in self.installed_products if
+                               k not in self.valid_products and
+                               k not in self.partially_valid_products)
         ent_certs = self.entitlement_dir.list()
 
         on_date = datetime.now(GMT())
+        self._sorted_until = None
         for ent_cert in ent_certs:
 
             # Builds the list of valid entitlement certs today:
             if ent_cert.is_valid():
                 self.valid_entitlement_certs.append(ent_cert)
 
+            for boundary in (ent_cert.valid_range.begin(), ent_cert.valid_range.end()):
+                if boundary > on_date and (self._sorted_until is None or boundary < self._sorted_until):
+                    self._sorted_until = boundary
+
             for product in ent_cert.products:
-                if product.id in list(unknown_products.keys()):
+                if product.id in unknown_products:
                     # If the entitlement starts after the date we're checking, we
                     # consider this a future entitlement. Technically it could be
                     # partially stacked on that date, but we cannot determine that
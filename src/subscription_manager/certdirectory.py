@@ -18,6 +18,9 @@ from __future__ import print_function, division, absolute_import
 #
 import logging
 import os
+import shutil
+import tempfile
+import time
 
 from rhsm.certificate import Key, create_from_file
 from rhsm.config import initConfig
@@ -32,6 +35,84 @@ conf = config.Config(initConfig())
 
 DEFAULT_PRODUCT_CERT_DIR = "/etc/pki/product-default"
 
+# Written by DirectoryTransaction, see there:
+COMMIT_COUNT_FILE = '.commit-count'
+STAGING_PREFIX = '.staging-'
+
+# Seconds a staging directory may be left over before the next transaction
+# takes it for one of a crashed process and removes it:
+STALE_STAGING_AGE = 3600
+
+# How long CertificateDirectory.list() waits between looks at a commit in
+# progress, and how long it waits for one that makes no progress before
+# taking it for crashed and listing the directory anyway:
+LIST_RETRY_DELAY = 0.01
+COMMIT_TIMEOUT = 1.0
+
+
+def file_state(path):
+    """
+    Returns a value that changes whenever the file at path is created,
+    removed or rewritten, or None if there is no such file.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime, st.st_size)
+
+
+def read_commit_count(path):
+    """
+    Returns the counter in the commit count file of the directory at path,
+    or None if there is no readable one.
+    """
+    try:
+        with open(os.path.join(path, COMMIT_COUNT_FILE)) as count_file:
+            return int(count_file.read())
+    except (EnvironmentError, ValueError):
+        return None
+
+
+def write_commit_count(path, count):
+    # Replaced rather than rewritten, so readers never see a partial
+    # counter. Not synced: a count file lost in a crash only costs
+    # readers a full rescan.
+    (fd, tmp_path) = tempfile.mkstemp(prefix=COMMIT_COUNT_FILE + '.', dir=path)
+    try:
+        os.write(fd, str(count).encode('ascii'))
+        os.fchmod(fd, 0o644)
+    finally:
+        os.close(fd)
+    os.rename(tmp_path, os.path.join(path, COMMIT_COUNT_FILE))
+
+
+def remove_stale_staging(path):
+    """
+    Removes the staging directories that transactions of crashed processes
+    left in the directory at path.
+    """
+    now = time.time()
+    for fn in os.listdir(path):
+        staging_path = os.path.join(path, fn)
+        if not fn.startswith(STAGING_PREFIX) or not os.path.isdir(staging_path):
+            continue
+        try:
+            if now - os.stat(staging_path).st_mtime < STALE_STAGING_AGE:
+                continue
+        except OSError:
+            continue
+        log.debug("Removing leftover staging directory %s" % staging_path)
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
 
 class Directory(object):
 
@@ -86,6 +167,20 @@ class Directory(object):
             else:
                 os.unlink(path)
 
+    def generation(self):
+        """
+        Returns a value that changes whenever a file directly in this
+        directory is added, removed or rewritten, so whatever was computed
+        from its contents can tell when it went stale. Much cheaper than
+        listing and parsing the certificates.
+
+        Unlike CertificateDirectory.commit_state(), this notices files
+        rewritten in place by anyone, at the cost of a stat() per file.
+        """
+        if not os.path.exists(self.path):
+            return None
+        return tuple((fn, file_state(self.abspath(fn))) for fn in sorted(os.listdir(self.path)))
+
     def abspath(self, filename):
         """
         Return path for a filename relative to this directory.
@@ -106,21 +201,84 @@ class CertificateDirectory(Directory):
         super(CertificateDirectory, self).__init__(path)
         self.create()
         self._listing = None
+        self._listing_state = None
+        self._stale = False
 
     def refresh(self):
-        # simply clear the cache. the next list() will reload.
-        self._listing = None
+        # the next list() reloads, unless no transaction was committed
+        # since the current listing was made.
+        self._stale = True
+
+    def commit_state(self):
+        """
+        Returns the count of DirectoryTransaction commits to this directory,
+        with a value that changes whenever a file is added to or removed from
+        it, or None if the directory has no commit count file to go by. The
+        count is odd while a commit is in progress.
+
+        Cheaper than generation(), which also notices files rewritten in
+        place; certificates are only ever renamed into place.
+        """
+        count = read_commit_count(self.path)
+        if count is None:
+            return None
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (count, st.st_ino, st.st_mtime)
 
     def list(self):
         if self._listing is not None:
-            return self._listing
+            if not self._stale:
+                return self._listing
+            if self._listing_state is not None and \
+                    self._listing_state == self.commit_state():
+                self._stale = False
+                return self._listing
+        (self._listing, self._listing_state) = self._load()
+        self._stale = False
+        return self._listing
+
+    def _load(self):
+        """
+        Reads the certificates, waiting out a transaction being committed
+        and retrying a listing that raced with one, so the listing is never
+        a mix of two commits. Returns the listing and the commit state it
+        was read at.
+        """
+        waited_since = None
+        last_state = None
+        while True:
+            state = self.commit_state()
+            if state is not None and state[0] % 2:
+                # A commit in progress changes the directory as it goes; one
+                # that does not for COMMIT_TIMEOUT crashed and left the count
+                # odd, and the next transaction will set it right.
+                if state != last_state:
+                    (waited_since, last_state) = (time.time(), state)
+                if time.time() - waited_since < COMMIT_TIMEOUT:
+                    time.sleep(LIST_RETRY_DELAY)
+                    continue
+                log.debug("Commit to %s did not finish, listing it anyway." % self.path)
+                return (self._read_certs(), None)
+            try:
+                listing = self._read_certs()
+            except EnvironmentError:
+                # a certificate went away while being read
+                if state is None:
+                    raise
+                continue
+            if state == self.commit_state():
+                return (listing, state)
+
+    def _read_certs(self):
         listing = []
         for _p, fn in Directory.list(self):
             if not fn.endswith('.pem') or fn.endswith(self.KEY):
                 continue
             path = self.abspath(fn)
             listing.append(create_from_file(path))
-        self._listing = listing
         return listing
 
     def list_valid(self):
@@ -238,6 +396,9 @@ class ProductDirectory(ProductCertificateDirectory):
         self.installed_prod_dir.refresh()
         self.default_prod_dir.refresh()
 
+    def generation(self):
+        return (self.installed_prod_dir.generation(), self.default_prod_dir.generation())
+
     # In productid.py, ProductDirectory.path is used as path to write new certs
     # to. Souse  the installed_prod_dir (/etc/pki/product) as that is
     # meant to be writable
@@ -285,7 +446,7 @@ class EntitlementDirectory(CertificateDirectory):
 
             # write the key/cert out again in new style format
             key = Key.read(old_key_path)
-            cert_writer = Writer(self)
+            cert_writer = Writer(ent_dir=self)
             cert_writer.write(key, cert)
         return True
 
@@ -356,19 +517,152 @@ class Path(object):
         return os.path.isdir(path)
 
 
+class DirectoryTransaction(object):
+    """
+    Applies a batch of changes to a certificate directory, so that readers
+    never see a partly written file and can tell a batch is in progress.
+
+    New files are staged in a hidden directory next to the certificates
+    and synced once the batch is complete. commit() then renames them into
+    place and applies the deletions, which is all the time the batch is
+    visibly in progress: whatever can take long, like fetching the
+    certificates, has to happen before. The commit count file in the
+    directory is odd while a batch is being applied and even once it is
+    done, which is how CertificateDirectory.list() knows to wait for a
+    commit, retry a listing that raced with one, and skip one when nothing
+    was committed.
+
+    Used as a context manager, the transaction is committed when the block
+    exits normally and aborted otherwise.
+    """
+
+    def __init__(self, directory):
+        self.path = directory.path
+        self._staging_path = None
+        # (staged path, final path, object to point at the final path)
+        self._staged = []
+        # certificates to delete on commit
+        self._deleting = []
+        # certificates the commit deleted
+        self.deleted = []
+        self._count = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def _begin(self):
+        if self._count is not None or not os.path.isdir(self.path):
+            return
+        count = read_commit_count(self.path) or 0
+        # a crashed commit leaves the counter odd, keep it that way:
+        self._count = count + 1 + count % 2
+        write_commit_count(self.path, self._count)
+
+    def _finish(self):
+        if self._count is None:
+            return
+        write_commit_count(self.path, self._count + 1)
+        fsync_path(self.path)
+        self._count = None
+
+    def _stage_path(self, filename):
+        """
+        Returns where to write filename until the commit, which is its
+        final location if the directory does not exist (yet).
+        """
+        final_path = os.path.join(self.path, filename)
+        if not os.path.isdir(self.path):
+            return final_path
+        if self._staging_path is None:
+            remove_stale_staging(self.path)
+            self._staging_path = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.path)
+        return os.path.join(self._staging_path, filename)
+
+    def stage(self, filename, pem):
+        """
+        Stages anything with a write(path) method, such as a Key or a
+        certificate, to be written as filename. Its path is set to the
+        final location on commit.
+        """
+        staged_path = self._stage_path(filename)
+        pem.write(staged_path)
+        self._staged.append((staged_path, os.path.join(self.path, filename), pem))
+
+    def write(self, filename, content):
+        staged_path = self._stage_path(filename)
+        with open(staged_path, 'w') as staged_file:
+            staged_file.write(content)
+        self._staged.append((staged_path, os.path.join(self.path, filename), None))
+
+    def delete(self, cert):
+        """
+        Deletes the certificate (and its key) on commit. Those that could
+        be deleted are listed in self.deleted afterwards.
+        """
+        self._deleting.append(cert)
+
+    def commit(self):
+        staged = [entry for entry in self._staged if entry[0] != entry[1]]
+        try:
+            for (staged_path, final_path, pem) in staged:
+                fsync_path(staged_path)
+            if staged or self._deleting:
+                self._begin()
+            for (staged_path, final_path, pem) in staged:
+                os.rename(staged_path, final_path)
+                if pem is not None:
+                    pem.path = final_path
+            self._staged = []
+            for cert in self._deleting:
+                try:
+                    cert.delete()
+                    self.deleted.append(cert)
+                except OSError as e:
+                    log.exception(e)
+                    log.warn("Failed to delete cert")
+            self._deleting = []
+            self._finish()
+        finally:
+            self.abort()
+
+    def abort(self):
+        """
+        Drops whatever was staged or marked for deletion but not committed
+        yet.
+        """
+        self._staged = []
+        self._deleting = []
+        if self._staging_path is not None:
+            shutil.rmtree(self._staging_path, ignore_errors=True)
+            self._staging_path = None
+        self._finish()
+
+
 class Writer(object):
 
-    def __init__(self):
-        self.ent_dir = require(ENT_DIR)
+    def __init__(self, ent_dir=None, transaction=None):
+        self.ent_dir = ent_dir or require(ENT_DIR)
+        self.transaction = transaction
 
     def write(self, key, cert):
-        serial = cert.serial
-        ent_dir_path = self.ent_dir.productpath()
-
-        key_filename = '%s-key.pem' % str(serial)
-        key_path = Path.join(ent_dir_path, key_filename)
-        key.write(key_path)
+        """
+        Writes the key and the certificate as part of the transaction, or
+        of one of their own if there is none. The key goes first, so no
+        reader finds the certificate without it.
+        """
+        if self.transaction is None:
+            with DirectoryTransaction(self.ent_dir) as transaction:
+                self._stage(transaction, key, cert)
+        else:
+            self._stage(self.transaction, key, cert)
 
-        cert_filename = '%s.pem' % str(serial)
-        cert_path = Path.join(ent_dir_path, cert_filename)
-        cert.write(cert_path)
+    def _stage(self, transaction, key, cert):
+        serial = cert.serial
+        transaction.stage('%s-key.pem' % str(serial), key)
+        transaction.stage('%s.pem' % str(serial), cert)
@@ -41,6 +41,9 @@ class ActionReport(object):
     """Base class for cert lib and action reports"""
     name = "Report"
 
+    # Seconds the lib took, set by the action client that ran it
+    duration = None
+
     def __init__(self):
         self._status = None
         self._exceptions = []
@@ -68,8 +71,10 @@ class ActionReport(object):
         status: %(status)s
         updates: %(updates)s
         exceptions: %(exceptions)s
+        duration: %(duration)s
         """
         return template % {'report_name': self.name,
                            'status': self._status,
                            'updates': self._updates,
-                           'exceptions': self.format_exceptions()}
+                           'exceptions': self.format_exceptions(),
+                           'duration': self.duration}
@@ -0,0 +1,169 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+import logging
+import threading
+from collections import OrderedDict
+
+from subscription_manager import certlib
+from subscription_manager import injection as inj
+
+log = logging.getLogger(__name__)
+
+
+class ConsumerUpdateBatch(object):
+    """
+    Collects the consumer attributes the libs of an action client want to
+    update, so they reach the server as one PUT /consumers/{uuid} instead
+    of one per lib.
+
+    Outside of start()/stop() nothing is batched, and update_consumer()
+    sends the update right away. Action clients run inside other action
+    clients, so start() and stop() nest. Libs run in parallel, so all of
+    it is thread safe.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        # consumer uuid -> (uep, attributes, failure callbacks)
+        self._pending = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def batching(self):
+        return self._depth > 0
+
+    def start(self):
+        with self._lock:
+            self._depth += 1
+
+    def stop(self):
+        """
+        Stops batching once the outermost start() is matched. Anything not
+        flushed by then is dropped, so the caches that depended on it are
+        told the update failed.
+        """
+        with self._lock:
+            self._depth = max(self._depth - 1, 0)
+            if self._depth or not self._pending:
+                return
+            (dropped, self._pending) = (self._pending, OrderedDict())
+        log.warning("Dropping unsent consumer updates: %s" %
+                    ", ".join(sorted(self._attributes(dropped))))
+        self._fail(dropped)
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def pending_attributes(self):
+        with self._lock:
+            return self._attributes(self._pending)
+
+    @staticmethod
+    def _attributes(pending):
+        attributes = set()
+        for (uep, consumer_attributes, on_failure) in pending.values():
+            attributes.update(consumer_attributes)
+        return attributes
+
+    def update_consumer(self, uep, consumer_uuid, on_failure=None, **attributes):
+        """
+        Updates the consumer with the given updateConsumer() keyword
+        arguments, now or when the batch is flushed. A value queued later
+        replaces one queued earlier for the same attribute.
+
+        on_failure is called if a batched update never makes it to the
+        server, for example to drop a cache that was written expecting it
+        would.
+        """
+        if not self.batching:
+            return uep.updateConsumer(consumer_uuid, **attributes)
+
+        log.debug("Queueing consumer update: %s" % ", ".join(sorted(attributes)))
+        with self._lock:
+            (queued_uep, queued, callbacks) = self._pending.setdefault(consumer_uuid, (uep, {}, []))
+            queued.update(attributes)
+            if on_failure is not None:
+                callbacks.append(on_failure)
+
+    def flush(self):
+        """
+        Sends the queued updates, one request per consumer. Returns the
+        number of requests made.
+        """
+        with self._lock:
+            (pending, self._pending) = (self._pending, OrderedDict())
+        sent = 0
+        try:
+            for consumer_uuid in list(pending):
+                (uep, attributes, on_failure) = pending[consumer_uuid]
+                log.debug("Updating consumer %s: %s" % (consumer_uuid, ", ".join(sorted(attributes))))
+                uep.updateConsumer(consumer_uuid, **attributes)
+                del pending[consumer_uuid]
+                sent += 1
+        except Exception:
+            self._fail(pending)
+            raise
+        return sent
+
+    def _fail(self, pending):
+        for (uep, attributes, on_failure) in pending.values():
+            for callback in on_failure:
+                try:
+                    callback()
+                except Exception as e:
+                    log.exception(e)
+
+
+class ConsumerUpdateActionInvoker(certlib.BaseActionInvoker):
+    """
+    Sends the consumer updates batched by the libs run before it. Action
+    clients place it before the libs that need the server to already know
+    about those updates, such as healing.
+    """
+
+    def _do_update(self):
+        action = ConsumerUpdateActionCommand()
+        return action.perform()
+
+
+class ConsumerUpdateActionCommand(object):
+    """
+    Flushes the ConsumerUpdateBatch.
+
+    Returns a ConsumerUpdateActionReport.
+    """
+
+    def __init__(self):
+        self.report = ConsumerUpdateActionReport()
+        self.batch = inj.require(inj.CONSUMER_UPDATE_BATCH)
+
+    def perform(self):
+        self.report.attributes = sorted(self.batch.pending_attributes())
+        if self.report.attributes:
+            self.report._status = self.batch.flush()
+        else:
+            log.debug("No consumer attributes changed, skipping update.")
+            self.report._status = 0
+        return self.report
+
+
+class ConsumerUpdateActionReport(certlib.ActionReport):
+    name = "Consumer Update"
+
+    def __init__(self):
+        super(ConsumerUpdateActionReport, self).__init__()
+        self.attributes = []
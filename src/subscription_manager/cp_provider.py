@@ -13,10 +13,62 @@ from __future__ import print_function, division, absolute_import
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 #
+import copy
+import logging
+import threading
+import time
 
 from subscription_manager.identity import ConsumerIdentity
+from subscription_manager import injection as inj
 import rhsm.connection as connection
 
+log = logging.getLogger(__name__)
+
+
+class ConsumerCache(object):
+    """
+    Consumer and owner objects fetched during one run, shared by all the
+    connections of a CPProvider so the same consumer is not fetched over
+    and over. Any request that may change something on the server empties
+    it, and entries expire after MAX_AGE seconds for long running processes.
+    """
+
+    MAX_AGE = 60
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, kind, uuid):
+        with self._lock:
+            entry = self.entries.get((kind, uuid))
+            if entry is not None and time.time() - entry[0] > self.MAX_AGE:
+                del self.entries[(kind, uuid)]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            log.debug("Consumer cache %s for %s %s (hits: %d, misses: %d)" %
+                      ("miss" if entry is None else "hit", kind, uuid, self.hits, self.misses))
+        if entry is None:
+            return None
+        # Callers are free to modify what they get
+        return copy.deepcopy(entry[1])
+
+    def set(self, kind, uuid, value):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self.entries[(kind, uuid)] = (time.time(), value)
+
+    def invalidate(self):
+        with self._lock:
+            if self.entries:
+                log.debug("Consumer cache invalidated")
+            self.entries = {}
+
 
 class CPProvider(object):
     """
@@ -39,6 +91,7 @@ class CPProvider(object):
 
     # Initialize with default connection info from the config file
     def __init__(self):
+        self.consumer_cache = ConsumerCache()
         self.set_connection_info()
         self.correlation_id = None
 
@@ -93,6 +146,14 @@ class CPProvider(object):
         self.consumer_auth_cp = None
         self.basic_auth_cp = None
         self.no_auth_cp = None
+        self.consumer_cache.invalidate()
+
+    def _get_capability_cache(self):
+        # Shared by every connection, so the server is only asked once
+        try:
+            return inj.require(inj.SERVER_CAPABILITY_CACHE)
+        except KeyError:
+            return None
 
     def get_consumer_auth_cp(self):
         if not self.consumer_auth_cp:
@@ -107,7 +168,9 @@ class CPProvider(object):
                     cert_file=self.cert_file, key_file=self.key_file,
                     correlation_id=self.correlation_id,
                     no_proxy=self.no_proxy,
-                    restlib_class=self.restlib_class)
+                    restlib_class=self.restlib_class,
+                    capability_cache=self._get_capability_cache(),
+                    consumer_cache=self.consumer_cache)
         return self.consumer_auth_cp
 
     def get_basic_auth_cp(self):
@@ -124,7 +187,9 @@ class CPProvider(object):
                     password=self.password,
                     correlation_id=self.correlation_id,
                     no_proxy=self.no_proxy,
-                    restlib_class=self.restlib_class)
+                    restlib_class=self.restlib_class,
+                    capability_cache=self._get_capability_cache(),
+                    consumer_cache=self.consumer_cache)
         return self.basic_auth_cp
 
     def get_no_auth_cp(self):
@@ -139,7 +204,9 @@ class CPProvider(object):
                     proxy_password=self.proxy_password,
                     correlation_id=self.correlation_id,
                     no_proxy=self.no_proxy,
-                    restlib_class=self.restlib_class)
+                    restlib_class=self.restlib_class,
+                    capability_cache=self._get_capability_cache(),
+                    consumer_cache=self.consumer_cache)
         return self.no_auth_cp
 
     def get_content_connection(self):
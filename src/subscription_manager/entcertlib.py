@@ -20,7 +20,7 @@ import socket
 from rhsm.certificate import Key, create_from_pem
 from rhsm.certificate2 import CONTENT_ACCESS_CERT_TYPE
 
-from subscription_manager.certdirectory import Writer
+from subscription_manager.certdirectory import DirectoryTransaction, Writer
 from subscription_manager import certlib
 from subscription_manager import content_action_client
 from subscription_manager import utils
@@ -69,11 +69,12 @@ class EntCertDeleteAction(object):
         self.ent_dir = ent_dir
 
     def perform(self, serial_numbers):
-        for sn in serial_numbers:
-            cert = self.ent_dir.find(sn)
-            if cert is None:
-                continue
-            cert.delete()
+        with DirectoryTransaction(self.ent_dir) as transaction:
+            for sn in serial_numbers:
+                cert = self.ent_dir.find(sn)
+                if cert is None:
+                    continue
+                transaction.delete(cert)
         return self
 
 
@@ -125,8 +126,17 @@ class EntCertUpdateAction(object):
         missing_serials = self._find_missing_serials(local, expected)
         rogue_serials = self._find_rogue_serials(local, expected)
 
-        self.delete(rogue_serials)
-        self.install(missing_serials)
+        # Fetched first, so the transaction is only in progress for as
+        # long as it takes to apply it:
+        cert_bundles = self.get_certificates_by_serial_list(missing_serials)
+
+        # One transaction, so readers of the directory see either the old
+        # set of certificates or the new one.
+        with DirectoryTransaction(self.ent_dir) as transaction:
+            for cert in rogue_serials:
+                transaction.delete(cert)
+            self.install_bundles(cert_bundles, transaction)
+        self._report_deleted(transaction.deleted)
 
         log.info('certs updated:\n%s', self.report)
         self.syslog_results()
@@ -162,8 +172,7 @@ class EntCertUpdateAction(object):
                     log.info('Deleting obsolete content access certificate')
                     self.delete(obsolete_certs)
                 update_data = self.content_access_cache.check_for_update()
-                for content_access_cert in content_access_certs:
-                    self.content_access_cache.update_cert(content_access_cert, update_data)
+                self._update_content_access_certs(content_access_certs, update_data)
             if update_data is not None:
                 self.ent_dir.refresh()
                 self.repo_hook()
@@ -173,14 +182,22 @@ class EntCertUpdateAction(object):
         # of *Lib.update
         return self.report
 
-    def install(self, missing_serials):
+    def install(self, missing_serials, transaction=None):
         """Install any missing entitlement certificates."""
 
         cert_bundles = self.get_certificates_by_serial_list(missing_serials)
+        self.install_bundles(cert_bundles, transaction)
 
-        ent_cert_bundles_installer = EntitlementCertBundlesInstaller(self.report)
+    def install_bundles(self, cert_bundles, transaction=None):
+        """Install already fetched entitlement certificate bundles."""
+        ent_cert_bundles_installer = EntitlementCertBundlesInstaller(self.report, transaction)
         ent_cert_bundles_installer.install(cert_bundles)
 
+    def _update_content_access_certs(self, content_access_certs, update_data):
+        with DirectoryTransaction(self.ent_dir) as transaction:
+            for content_access_cert in content_access_certs:
+                self.content_access_cache.update_cert(content_access_cert, update_data, transaction)
+
     def _find_content_access_certs(self):
         certs = self.ent_dir.list_with_content_access()
         return [cert for cert in certs if cert.entitlement_type == CONTENT_ACCESS_CERT_TYPE]
@@ -192,8 +209,7 @@ class EntCertUpdateAction(object):
         update_data = None
         if len(content_access_certs) > 0:
             update_data = self.content_access_cache.check_for_update()
-        for content_access_cert in content_access_certs:
-            self.content_access_cache.update_cert(content_access_cert, update_data)
+        self._update_content_access_certs(content_access_certs, update_data)
         if len(content_access_certs) == 0 and self.content_access_cache.exists():
             self.content_access_cache.remove()
         if update_data is not None:
@@ -283,7 +299,7 @@ class EntCertUpdateAction(object):
             # NOTE: use injected IDENTITY, need to validate this
             # handles disconnected errors properly
             reply = self.uep.getCertificates(self.identity.uuid,
-                                              serials=sn_list)
+                                              serials=sn_list, stream=True)
             for cert in reply:
                 result.append(cert)
         return result
@@ -294,13 +310,18 @@ class EntCertUpdateAction(object):
         return exp
 
     def delete(self, rogue):
+        deleted = []
         for cert in rogue:
             try:
                 cert.delete()
-                self.report.rogue.append(cert)
+                deleted.append(cert)
             except OSError as er:
                 log.exception(er)
                 log.warn("Failed to delete cert")
+        self._report_deleted(deleted)
+
+    def _report_deleted(self, deleted):
+        self.report.rogue.extend(deleted)
 
         # If we just deleted certs, we need to refresh the now stale
         # entitlement directory before we go to delete expired certs.
@@ -318,15 +339,19 @@ class EntitlementCertBundlesInstaller(object):
     pre_install() is triggered before any of the ent cert
     bundles are installed. post_install() is triggered after
     all of the ent cert bundles are installed.
+
+    If a certdirectory.DirectoryTransaction is given, the bundles are
+    written as part of it, and only in place once it is committed.
     """
 
-    def __init__(self, report):
+    def __init__(self, report, transaction=None):
         self.exceptions = []
         self.report = report
+        self.transaction = transaction
 
     def install(self, cert_bundles):
         """Fetch entitliement certs, install them, and update the report."""
-        bundle_installer = EntitlementCertBundleInstaller(self.report)
+        bundle_installer = EntitlementCertBundleInstaller(self.report, self.transaction)
         for cert_bundle in cert_bundles:
             bundle_installer.install(cert_bundle)
         self.exceptions = bundle_installer.exceptions
@@ -364,15 +389,16 @@ class EntitlementCertBundleInstaller(object):
     bundles, while this is pre/post each ent cert bundle.
     """
 
-    def __init__(self, report):
+    def __init__(self, report, transaction=None):
         self.exceptions = []
         self.report = report
+        self.transaction = transaction
 
     def install(self, bundle):
         """Persist an ent cert and it's key after splitting it from the bundle."""
         self.pre_install(bundle)
 
-        cert_bundle_writer = Writer()
+        cert_bundle_writer = Writer(transaction=self.transaction)
         try:
             key, cert = self.build_cert(bundle)
             cert_bundle_writer.write(key, cert)
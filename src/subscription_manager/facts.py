@@ -16,7 +16,7 @@ from datetime import datetime
 import logging
 import os
 
-from subscription_manager.injection import PLUGIN_MANAGER, require
+from subscription_manager.injection import PLUGIN_MANAGER, CONSUMER_UPDATE_BATCH, require
 from subscription_manager.cache import CacheManager
 from rhsm import ourjson as json
 
@@ -85,7 +85,8 @@ class Facts(CacheManager):
 
     def _sync_with_server(self, uep, consumer_uuid):
         log.debug("Updating facts on server")
-        uep.updateConsumer(consumer_uuid, facts=self.get_facts())
+        require(CONSUMER_UPDATE_BATCH).update_consumer(
+            uep, consumer_uuid, on_failure=self.delete_cache, facts=self.get_facts())
 
     def _load_data(self, open_file):
         json_str = open_file.read()
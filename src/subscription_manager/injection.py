@@ -38,6 +38,9 @@ INSTALLED_PRODUCTS_MANAGER = "INSTALLED_PRODUCTS_MANAGER"
 RELEASE_STATUS_CACHE = "RELEASE_STATUS_CACHE"
 CONTENT_ACCESS_CACHE = "CONTENT_ACCESS_CACHE"
 SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE = "SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE"
+RELEASE_LISTING_CACHE = "RELEASE_LISTING_CACHE"
+SERVER_CAPABILITY_CACHE = "SERVER_CAPABILITY_CACHE"
+CONSUMER_UPDATE_BATCH = "CONSUMER_UPDATE_BATCH"
 
 
 class FeatureBroker(object):
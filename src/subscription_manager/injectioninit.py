@@ -21,9 +21,10 @@ from subscription_manager.cache import ProductStatusCache, \
     EntitlementStatusCache, OverrideStatusCache, ProfileManager, \
     InstalledProductsManager, PoolTypeCache, ReleaseStatusCache, \
     RhsmIconCache, ContentAccessCache, PoolStatusCache, \
-    SyspurposeComplianceStatusCache
+    SyspurposeComplianceStatusCache, ReleaseListingCache, ServerCapabilityCache
 
 from subscription_manager.cert_sorter import CertSorter
+from subscription_manager.consumerupdatelib import ConsumerUpdateBatch
 from subscription_manager.certdirectory import EntitlementDirectory
 from subscription_manager.certdirectory import ProductDirectory
 from subscription_manager.facts import Facts
@@ -62,6 +63,9 @@ def init_dep_injection():
     inj.provide(inj.RELEASE_STATUS_CACHE, ReleaseStatusCache,
                 singleton=False)
     inj.provide(inj.CONTENT_ACCESS_CACHE, ContentAccessCache, singleton=True)
+    inj.provide(inj.RELEASE_LISTING_CACHE, ReleaseListingCache, singleton=True)
+    inj.provide(inj.SERVER_CAPABILITY_CACHE, ServerCapabilityCache, singleton=True)
+    inj.provide(inj.CONSUMER_UPDATE_BATCH, ConsumerUpdateBatch, singleton=True)
 
     inj.provide(inj.PROFILE_MANAGER, ProfileManager, singleton=True)
     inj.provide(inj.INSTALLED_PRODUCTS_MANAGER, InstalledProductsManager, singleton=True)
@@ -33,7 +33,8 @@ from subscription_manager import identity
 from subscription_manager.injection import require, CERT_SORTER, \
         IDENTITY, ENTITLEMENT_STATUS_CACHE, SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE, \
         PROD_STATUS_CACHE, ENT_DIR, PROD_DIR, CP_PROVIDER, OVERRIDE_STATUS_CACHE, \
-        POOLTYPE_CACHE, RELEASE_STATUS_CACHE, FACTS, POOL_STATUS_CACHE
+        POOLTYPE_CACHE, RELEASE_STATUS_CACHE, FACTS, POOL_STATUS_CACHE, \
+        RELEASE_LISTING_CACHE, SERVER_CAPABILITY_CACHE
 from subscription_manager import isodate
 from subscription_manager.jsonwrapper import PoolWrapper
 from subscription_manager.repolib import RepoActionInvoker
@@ -283,9 +284,9 @@ def list_pools(uep, consumer_uuid, list_all=False, active_on=None, filter_string
     owner = uep.getOwner(consumer_uuid)
     ownerid = owner['key']
 
-    return uep.getPoolsList(consumer=consumer_uuid, listAll=list_all,
+    return list(uep.getPoolsList(consumer=consumer_uuid, listAll=list_all,
             active_on=active_on, owner=ownerid, filter_string=filter_string, future=future,
-                            after_date=after_date)
+                                 after_date=after_date, stream=True))
 
 
 # TODO: This method is morphing the actual pool json and returning a new
@@ -873,6 +874,8 @@ def clean_all_data(backup=True):
     require(POOL_STATUS_CACHE).delete_cache()
     require(OVERRIDE_STATUS_CACHE).delete_cache()
     require(RELEASE_STATUS_CACHE).delete_cache()
+    require(RELEASE_LISTING_CACHE).delete_cache()
+    require(SERVER_CAPABILITY_CACHE).delete_cache()
 
     RepoActionInvoker.delete_repo_file()
     log.info("Cleaned local data")
@@ -17,6 +17,79 @@ from __future__ import print_function, division, absolute_import
 from subscription_manager.i18n import ugettext as _
 
 
+class ReasonIndex(object):
+    """
+    Lookup tables built from a single pass over the compliance reasons
+    and the valid entitlement certificates, so the per-product and
+    per-subscription queries do not need to rescan either list.
+    """
+
+    def __init__(self, reasons, valid_entitlement_certs):
+        # Maps product ID to the valid entitlement certs providing it:
+        self.product_entitlements = {}
+        # Maps stack ID to the CNs of the valid entitlement certs in it:
+        self.stack_entitlements = {}
+
+        for ent_cert in valid_entitlement_certs:
+            for product_id in set(product.id for product in ent_cert.products):
+                self.product_entitlements.setdefault(product_id, []).append(ent_cert)
+            stack_id = ent_cert.order.stacking_id
+            if stack_id:
+                self.stack_entitlements.setdefault(stack_id, set()).add(ent_cert.subject['CN'])
+
+        # Messages keyed by the id a reason is reported against. A reason is
+        # filed under the first of product/entitlement/stack id it carries.
+        self.product_messages = {}
+        self.entitlement_messages = {}
+        self.stack_messages = {}
+        # Maps valid entitlement CN to its de-duplicated messages, in the
+        # order the server reported them:
+        self.subscription_messages = {}
+        # Maps reason name to its de-duplicated messages:
+        self.name_messages = {}
+
+        subscription_seen = {}
+        for ent_cert in valid_entitlement_certs:
+            self.subscription_messages[ent_cert.subject['CN']] = []
+            subscription_seen[ent_cert.subject['CN']] = set()
+
+        name_seen = {}
+        for reason in reasons:
+            attributes = reason['attributes']
+            message = reason['message']
+
+            if 'name' in attributes:
+                seen = name_seen.setdefault(attributes['name'], set())
+                messages = self.name_messages.setdefault(attributes['name'], [])
+                if message not in seen:
+                    seen.add(message)
+                    messages.append(message)
+
+            if 'product_id' in attributes:
+                self.product_messages.setdefault(attributes['product_id'], set()).add(message)
+            elif 'entitlement_id' in attributes:
+                self.entitlement_messages.setdefault(attributes['entitlement_id'], set()).add(message)
+            elif 'stack_id' in attributes:
+                self.stack_messages.setdefault(attributes['stack_id'], set()).add(message)
+
+            if 'entitlement_id' in attributes:
+                # Note there are no entries for any expired certs, so
+                # reasons against them are dropped here.
+                sub_ids = [attributes['entitlement_id']]
+            elif 'stack_id' in attributes:
+                sub_ids = self.stack_entitlements.get(attributes['stack_id'], ())
+            else:
+                continue
+
+            for sub_id in sub_ids:
+                if sub_id not in subscription_seen:
+                    continue
+                if message in subscription_seen[sub_id]:
+                    continue
+                subscription_seen[sub_id].add(message)
+                self.subscription_messages[sub_id].append(message)
+
+
 class Reasons(object):
     """
     Holds reasons and parses them for
@@ -26,58 +99,43 @@ class Reasons(object):
     def __init__(self, reasons, sorter):
         self.reasons = reasons
         self.sorter = sorter
+        self._index = None
+        self._index_key = None
+
+    def get_index(self):
+        """
+        Returns the ReasonIndex for the current reasons and valid
+        entitlement certs, rebuilding it only when either list has been
+        replaced or resized since it was last built.
+        """
+        valid_ents = self.sorter.valid_entitlement_certs
+        key = (id(self.reasons), len(self.reasons), id(valid_ents), len(valid_ents))
+        if self._index is None or key != self._index_key:
+            self._index = ReasonIndex(self.reasons, valid_ents)
+            self._index_key = key
+        return self._index
 
     def get_subscription_reasons(self, sub_id):
         """
         returns reasons for sub_id, or empty list
         if there are none.
         """
-        return self.get_subscription_reasons_map().get(sub_id, [])
+        return list(self.get_index().subscription_messages.get(sub_id, []))
 
     def get_subscription_reasons_map(self):
         """
         returns a dictionary that maps
         valid entitlements to lists of reasons.
         """
-        result = {}
-        for s in self.sorter.valid_entitlement_certs:
-            result[s.subject['CN']] = []
-
-        for reason in self.reasons:
-            if 'entitlement_id' in reason['attributes']:
-                # Note 'result' won't have entries for any expired certs, so
-                # result['some_ent_that_has_expired'] could throw a KeyError
-                ent_id = reason['attributes']['entitlement_id']
-                if ent_id in result:
-                    if reason['message'] in result[ent_id]:
-                        continue
-
-                    result[ent_id].append(reason['message'])
-
-            elif 'stack_id' in reason['attributes']:
-                for s_id in self.get_stack_subscriptions(reason['attributes']['stack_id']):
-                    if reason['message'] in result[s_id]:
-                        continue
-                    result[s_id].append(reason['message'])
-        return result
+        return dict((sub_id, list(messages)) for (sub_id, messages) in
+                    self.get_index().subscription_messages.items())
 
     def get_name_message_map(self):
-        result = {}
-        for reason in self.reasons:
-            reason_name = reason['attributes']['name']
-            if reason_name not in result:
-                result[reason_name] = []
-            if reason['message'] in result[reason_name]:
-                continue
-            result[reason_name].append(reason['message'])
-        return result
+        return dict((name, list(messages)) for (name, messages) in
+                    self.get_index().name_messages.items())
 
     def get_stack_subscriptions(self, stack_id):
-        result = set([])
-        for s in self.sorter.valid_entitlement_certs:
-            if s.order.stacking_id and s.order.stacking_id == stack_id:
-                result.add(s.subject['CN'])
-        return list(result)
+        return list(self.get_index().stack_entitlements.get(stack_id, []))
 
     def get_reason_id(self, reason):
         # returns ent/prod/stack id
@@ -104,34 +162,34 @@ class Reasons(object):
         if prod.id in self.sorter.valid_products:
             return []
 
-        result = set([])
-        subscriptions = self.get_product_subscriptions(prod)
-
-        sub_ids = []
-        stack_ids = []
+        index = self.get_index()
+        result = set(index.product_messages.get(prod.id, ()))
 
-        for s in subscriptions:
+        for s in index.product_entitlements.get(prod.id, ()):
             if 'CN' in s.subject:
-                sub_ids.append(s.subject['CN'])
+                result.update(index.entitlement_messages.get(s.subject['CN'], ()))
             if s.order.stacking_id:
-                stack_ids.append(s.order.stacking_id)
-        for reason in self.reasons:
-            if 'product_id' in reason['attributes']:
-                if reason['attributes']['product_id'] == prod.id:
-                    result.add(reason['message'])
-            elif 'entitlement_id' in reason['attributes']:
-                if reason['attributes']['entitlement_id'] in sub_ids:
-                    result.add(reason['message'])
-            elif 'stack_id' in reason['attributes']:
-                if reason['attributes']['stack_id'] in stack_ids:
-                    result.add(reason['message'])
+                result.update(index.stack_messages.get(s.order.stacking_id, ()))
         return list(result)
 
+    def get_product_reasons_map(self, products=None):
+        """
+        returns a dictionary that maps the IDs
+        of the given products, or of all the
+        installed products, to lists of reasons.
+        """
+        if products is None:
+            products = [product for product_cert in self.sorter.installed_products.values()
+                        for product in product_cert.products]
+        result = {}
+        for product in products:
+            if product.id not in result:
+                result[product.id] = self.get_product_reasons(product)
+        return result
+
     def get_product_subscriptions(self, prod):
         """
         Returns a list of subscriptions that provide
         the product.
         """
-        results = [valid_ent for valid_ent in self.sorter.valid_entitlement_certs
-                if prod in valid_ent.products]
-        return results
+        return list(self.get_index().product_entitlements.get(prod.id, []))
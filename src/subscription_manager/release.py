@@ -19,6 +19,7 @@ from __future__ import print_function, division, absolute_import
 #
 
 import logging
+from multiprocessing.pool import ThreadPool
 import socket
 import six
 
@@ -37,6 +38,9 @@ log = logging.getLogger(__name__)
 
 cfg = rhsm.config.initConfig()
 
+# Most listing files fetched from the CDN at the same time:
+LISTING_THREADS = 4
+
 
 class MultipleReleaseProductsError(ValueError):
     def __init__(self, certificates):
@@ -91,6 +95,7 @@ class CdnReleaseVersionProvider(object):
         self.product_dir = inj.require(inj.PROD_DIR)
         self.cp_provider = inj.require(inj.CP_PROVIDER)
         self.content_connection = self.cp_provider.get_content_connection()
+        self.listing_cache = inj.require(inj.RELEASE_LISTING_CACHE)
 
     def get_releases(self):
         # cdn base url
@@ -143,19 +148,23 @@ class CdnReleaseVersionProvider(object):
         # with one content with one listing file. We shall see.
         releases = []
         listings = sorted(set(listings))
-        for listing_path in listings:
+        ent_cert_key_pairs = list(ent_cert_key_pairs)
+        threads = min(len(listings), LISTING_THREADS)
+        if threads > 1:
+            pool = ThreadPool(threads)
             try:
-                data = self.content_connection.get_versions(listing_path, list(ent_cert_key_pairs))
-            except (socket.error,
-                    six.moves.http_client.HTTPException,
-                    ssl.SSLError,
-                    NoValidEntitlement) as e:
-                # content connection doesn't handle any exceptions
-                # and the code that invokes this doesn't either, so
-                # swallow them here.
-                log.exception(e)
-                continue
-
+                listing_data = pool.map(lambda path: self._get_listing(path, ent_cert_key_pairs),
+                                        listings)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            listing_data = [self._get_listing(path, ent_cert_key_pairs) for path in listings]
+
+        if self.listing_cache.has_changed():
+            self.listing_cache.write_cache()
+
+        for data in listing_data:
             # any non 200 response on fetching the release version
             # listing file returns a None here
             if not data:
@@ -169,6 +178,45 @@ class CdnReleaseVersionProvider(object):
         releases_set = sorted(set(releases))
         return releases_set
 
+    def _get_listing(self, listing_path, ent_cert_key_pairs):
+        """
+        Returns the content of a listing file. A cached copy is used as is
+        while it is fresh; once it is stale, the CDN is asked whether it
+        changed. Returns None when the listing could not be fetched.
+        """
+        cache_key = self._listing_cache_key(listing_path)
+        entry = self.listing_cache.get(cache_key)
+        if entry is not None and self.listing_cache.is_fresh(entry):
+            return entry["content"]
+
+        validators = {}
+        if entry is not None:
+            validators = {"etag": entry["etag"], "last_modified": entry["last_modified"]}
+        try:
+            result = self.content_connection.get_listing(listing_path, ent_cert_key_pairs,
+                                                         **validators)
+        except (socket.error,
+                six.moves.http_client.HTTPException,
+                ssl.SSLError,
+                NoValidEntitlement) as e:
+            # content connection doesn't handle any exceptions
+            # and the code that invokes this doesn't either, so
+            # swallow them here.
+            log.exception(e)
+            return None
+
+        if result["status"] == 304:
+            log.debug("Listing %s has not changed" % listing_path)
+            self.listing_cache.revalidated(cache_key)
+            return entry["content"]
+
+        self.listing_cache.update(cache_key, result["content"], result["headers"])
+        return result["content"]
+
+    def _listing_cache_key(self, listing_path):
+        conn = self.content_connection
+        return "%s:%s%s%s" % (conn.host, conn.ssl_port, conn.handler.rstrip('/'), listing_path)
+
     def _build_listing_path(self, content_url):
         listing_parts = content_url.split('$releasever', 1)
         listing_base = listing_parts[0]
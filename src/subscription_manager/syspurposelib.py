@@ -31,6 +31,7 @@ from subscription_manager.utils import three_way_merge
 import logging
 import json
 import os
+import six
 log = logging.getLogger(__name__)
 
 try:
@@ -360,6 +361,8 @@ class SyspurposeSyncActionCommand(object):
             if value is not None:
                 server_sp[attr] = value
 
+        filesystem_sp = None
+        cached_values = None
         try:
             filesystem_sp = read_syspurpose(raise_on_error=True)
         except (os.error, ValueError):
@@ -371,24 +374,54 @@ class SyspurposeSyncActionCommand(object):
                       % USER_SYSPURPOSE)
         else:
             cached_values = sp_cache.read_cache_only()
+            # The server keeps addons as a set, the order it returns them in
+            # is not a change
+            cached_addons = (cached_values or {}).get(ADDONS)
+            if isinstance(cached_addons, list) and isinstance(server_sp.get(ADDONS), list) and \
+                    sorted(cached_addons) == sorted(server_sp[ADDONS]):
+                server_sp[ADDONS] = cached_addons
             result = three_way_merge(local=filesystem_sp, base=cached_values, remote=server_sp,
                                      on_change=self.report.record_change)
 
-        sp_cache.syspurpose = result
-        sp_cache.write_cache()
-
-        write_syspurpose(result)
-        addons = result.get(ADDONS)
-        self.uep.updateConsumer(
-                consumer_identity.uuid,
-                role=result.get(ROLE) or "",
-                addons=addons if addons is not None else "",
-                service_level=result.get(SERVICE_LEVEL) or "",
-                usage=result.get(USAGE) or ""
-        )
+        # Only write to the places that do not have the merged values yet,
+        # so a sync where nothing changed writes nothing.
+        if result != cached_values:
+            sp_cache.syspurpose = result
+            sp_cache.write_cache()
+
+        if result != filesystem_sp:
+            write_syspurpose(result)
+            log.debug('Updated syspurpose located at \'%s\'' % USER_SYSPURPOSE)
+
+        if self._differs_from_server(result, server_sp):
+            addons = result.get(ADDONS)
+            inj.require(inj.CONSUMER_UPDATE_BATCH).update_consumer(
+                    self.uep,
+                    consumer_identity.uuid,
+                    role=result.get(ROLE) or "",
+                    addons=addons if addons is not None else "",
+                    service_level=result.get(SERVICE_LEVEL) or "",
+                    usage=result.get(USAGE) or ""
+            )
+        else:
+            log.debug('Syspurpose on the server is up to date')
 
         self.report._status = 'Successfully synced system purpose'
 
-        log.debug('Updated syspurpose located at \'%s\'' % USER_SYSPURPOSE)
-
         return result
+
+    @staticmethod
+    def _differs_from_server(values, server_sp):
+        """
+        Compares syspurpose values with those of the consumer. An empty
+        value is the same as a missing one and addons are compared as a set.
+        """
+        for attr in ATTRIBUTES:
+            (local_value, server_value) = (values.get(attr) or None, server_sp.get(attr) or None)
+            if attr == ADDONS:
+                if isinstance(local_value, six.string_types):
+                    local_value = [local_value]
+                (local_value, server_value) = (sorted(local_value or []), sorted(server_value or []))
+            if local_value != server_value:
+                return True
+        return False
@@ -29,6 +29,7 @@ class ValidProductDateRangeCalculator(object):
     def __init__(self, uep=None):
         uep = uep or inj.require(inj.CP_PROVIDER).get_consumer_auth_cp()
         self.identity = inj.require(inj.IDENTITY)
+        self._status_index = None
         if self.identity.is_valid():
             self.prod_status_cache = inj.require(inj.PROD_STATUS_CACHE)
             self.prod_status = self.prod_status_cache.load_status(
@@ -53,23 +54,8 @@ class ValidProductDateRangeCalculator(object):
         if self.prod_status is None:
             return None
 
-        for prod in self.prod_status:
-            if product_hash != prod['productId']:
-                continue
-
-            # Found the product ID requested:
-            if 'startDate' in prod and 'endDate' in prod:
-
-                # Unentitled product:
-                if prod['startDate'] is None or prod['endDate'] is None:
-                    return None
-
-                return DateRange(parse_date(prod['startDate']),
-                    parse_date(prod['endDate']))
-            else:
-                # If startDate / endDate not supported
-                log.warn("Server does not support product date ranges.")
-                return None
+        if product_hash in self._get_status_index():
+            return self._date_range(product_hash)
 
         # At this point, we haven't found the installed product that was
         # asked for, which could indicate the server somehow doesn't know
@@ -78,3 +64,61 @@ class ValidProductDateRangeCalculator(object):
         log.error("Requested status for installed product server does not "
                 "know about: %s" % product_hash)
         return None
+
+    def calculate_all(self, product_ids=None):
+        """
+        Calculate the valid date ranges of several installed products at
+        once: all of those the server reported status for, or only the
+        ones in product_ids.
+
+        Returns a dict mapping product ID to its DateRange, or to None if
+        the product is not entitled. Products the server did not report
+        are left out, and the dict is empty if we're not registered. Like
+        calculate(), the date ranges are in GMT.
+        """
+        if not self.identity.is_valid():
+            return {}
+
+        if self.prod_status is None:
+            return {}
+
+        status_index = self._get_status_index()
+        if product_ids is None:
+            product_ids = status_index
+        return dict((product_id, self._date_range(product_id))
+                    for product_id in product_ids if product_id in status_index)
+
+    def _get_status_index(self):
+        """
+        Maps product ID to the first status the server reported for it,
+        built in one pass over the status.
+        """
+        if self._status_index is None:
+            self._status_index = {}
+            for prod in self.prod_status:
+                self._status_index.setdefault(prod['productId'], prod)
+            self._date_ranges = {}
+            # Products entitled by the same subscriptions share their
+            # dates, so each distinct date is only parsed once:
+            self._dates = {}
+        return self._status_index
+
+    def _date_range(self, product_id):
+        if product_id not in self._date_ranges:
+            prod = self._status_index[product_id]
+            date_range = None
+            if 'startDate' in prod and 'endDate' in prod:
+                # Unentitled product stays None:
+                if prod['startDate'] is not None and prod['endDate'] is not None:
+                    date_range = DateRange(self._parse_date(prod['startDate']),
+                        self._parse_date(prod['endDate']))
+            else:
+                # If startDate / endDate not supported
+                log.warn("Server does not support product date ranges.")
+            self._date_ranges[product_id] = date_range
+        return self._date_ranges[product_id]
+
+    def _parse_date(self, date):
+        if date not in self._dates:
+            self._dates[date] = parse_date(date)
+        return self._dates[date]
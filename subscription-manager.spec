@@ -5,7 +5,6 @@
 %global has_ostree %use_systemd && 0%{?suse_version} == 0
 %global use_initial_setup 1
 %global use_firstboot 0
-%global use_inotify 1
 %global py2_package_prefix python2
 
 %if (0%{?rhel} >= 7 || 0%{?fedora})
@@ -43,7 +42,6 @@
 %if 0%{?rhel} == 6 || 0%{?suse_version}
 %global use_initial_setup 0
 %global use_firstboot 1
-%global use_inotify 0
 %endif
 
 %if %{use_subman_gui} || %{use_initial_setup} || %{use_firstboot}
@@ -208,10 +206,6 @@ Requires:  %{py_package_prefix}-dmidecode %{?dmidecode_version}
 %endif
 %endif
 
-%if %use_inotify
-Requires:  %{py_package_prefix}-inotify
-%endif
-
 %if %use_systemd
 Requires(post): systemd
 Requires(preun): systemd
@@ -0,0 +1,181 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Benchmark harness.
+
+The bench_*.py modules in this package are not collected by nose. Each one
+can be run directly, for example:
+
+    PYTHONPATH=src python -m test.bench.bench_certificate
+
+Results are compared with the baseline stored in test/bench/baselines/ and
+the run fails if any benchmark got slower, or used more memory or objects,
+than the baseline allows for. Use --save-baseline to record a new one.
+"""
+import gc
+import json
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+try:
+    import tracemalloc
+except ImportError:
+    # python 2
+    tracemalloc = None
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# Default allowed slowdown/growth relative to the baseline:
+DEFAULT_TOLERANCE = 1.25
+
+# Differences smaller than these are treated as noise, whatever the ratio:
+NOISE_FLOOR = {"seconds": 0.001, "peak_kib": 64, "objects": 50, "retained_kib": 64}
+
+
+class BenchmarkResult(object):
+    """
+    Measurements for one benchmark: best time per call in seconds, peak
+    memory allocated by python during one call and memory still held by
+    its result, both in KiB (None when tracemalloc is unavailable), and the
+    number of gc tracked objects still alive from one call.
+    """
+
+    def __init__(self, name, seconds, peak_kib, objects, retained_kib=None):
+        self.name = name
+        self.seconds = seconds
+        self.peak_kib = peak_kib
+        self.objects = objects
+        self.retained_kib = retained_kib
+
+    def to_dict(self):
+        return {"seconds": self.seconds, "peak_kib": self.peak_kib, "objects": self.objects,
+                "retained_kib": self.retained_kib}
+
+
+def measure(name, func, repeat=5, number=1):
+    """
+    Measures func, which is called with no arguments. Whatever func returns
+    is kept alive while objects are counted, so a parser should return what
+    it parsed.
+    """
+    seconds = min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+    peak_kib = None
+    retained_kib = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        result = func()
+        (current, peak) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_kib = peak / 1024.0
+        retained_kib = current / 1024.0
+        del result
+
+    gc.collect()
+    before = len(gc.get_objects())
+    result = func()
+    gc.collect()
+    objects = len(gc.get_objects()) - before
+    del result
+
+    return BenchmarkResult(name, seconds, peak_kib, objects, retained_kib)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results):
+    with open(path, "w") as baseline_file:
+        json.dump(dict((result.name, result.to_dict()) for result in results),
+                  baseline_file, indent=4, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns a message for every measurement that exceeds its baseline value
+    times tolerance, by more than the noise floor. Benchmarks missing from
+    the baseline are skipped.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if not expected:
+            continue
+        for (key, value) in sorted(result.to_dict().items()):
+            if value is None or expected.get(key) is None:
+                continue
+            if value > expected[key] * tolerance and \
+                    value - expected[key] > NOISE_FLOOR[key]:
+                regressions.append("%s: %s %.6g exceeds baseline %.6g" %
+                                   (result.name, key, value, expected[key]))
+    return regressions
+
+
+def print_results(results, baseline):
+    print("%-40s %12s %12s %12s %12s %10s" % ("benchmark", "ms/call", "peak KiB",
+                                               "kept KiB", "objects", "vs base"))
+    for result in results:
+        ratio = ""
+        if result.name in baseline:
+            ratio = "%.2fx" % (result.seconds / baseline[result.name]["seconds"])
+        peak = "-" if result.peak_kib is None else "%.1f" % result.peak_kib
+        kept = "-" if result.retained_kib is None else "%.1f" % result.retained_kib
+        print("%-40s %12.3f %12s %12s %12d %10s" % (result.name, result.seconds * 1000,
+                                                    peak, kept, result.objects, ratio))
+
+
+def get_parser(default_baseline):
+    parser = OptionParser()
+    parser.add_option("--baseline", default=default_baseline,
+                      help="baseline file to compare with (default: %default)")
+    parser.add_option("--save-baseline", action="store_true", default=False,
+                      help="store the results as the new baseline")
+    parser.add_option("--tolerance", type="float", default=DEFAULT_TOLERANCE,
+                      help="allowed ratio to the baseline (default: %default)")
+    parser.add_option("--repeat", type="int", default=5,
+                      help="timing repetitions per benchmark (default: %default)")
+    return parser
+
+
+def main(run_benchmarks, baseline_name, parser=None, args=None):
+    """
+    Runs run_benchmarks(options), which returns a list of BenchmarkResult,
+    and reports them against the named baseline. Returns the exit code.
+    """
+    parser = parser or get_parser(os.path.join(BASELINE_DIR, baseline_name))
+    (options, args) = parser.parse_args(args)
+
+    results = run_benchmarks(options)
+    baseline = load_baseline(options.baseline)
+    print_results(results, baseline)
+
+    if options.save_baseline:
+        save_baseline(options.baseline, results)
+        print("Saved baseline to %s" % options.baseline)
+        return 0
+
+    regressions = find_regressions(results, baseline, options.tolerance)
+    for regression in regressions:
+        print("REGRESSION: %s" % regression, file=sys.stderr)
+    return 1 if regressions else 0
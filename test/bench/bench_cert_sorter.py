@@ -0,0 +1,130 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Compliance status sorting benchmarks.
+
+    PYTHONPATH=src python -m test.bench.bench_cert_sorter [--entitlements N] [--products N]
+
+Sorts the installed products of a system with 200 entitlement certificates
+and 50 installed products, all of them on disk, against a canned compliance
+status. Compares a first load with reloads that find nothing changed.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import subscription_manager.injection as inj
+from subscription_manager.cert_sorter import ComplianceManager
+from subscription_manager.certdirectory import CertificateDirectory, ProductDirectory
+
+from test.bench import certgen, get_parser, main, measure, BASELINE_DIR
+
+# Installed products each entitlement provides:
+PRODUCTS_PER_ENTITLEMENT = 5
+
+
+class BenchIdentity(object):
+    uuid = "bench-consumer"
+
+    def is_valid(self):
+        return True
+
+
+class BenchUEP(object):
+    def __init__(self, status):
+        self.status = status
+
+    def getCompliance(self, uuid, on_date=None):
+        return dict(self.status, date=datetime.utcnow().isoformat())
+
+
+class BenchCPProvider(object):
+    def __init__(self, status):
+        self.uep = BenchUEP(status)
+
+    def get_consumer_auth_cp(self):
+        return self.uep
+
+
+def write_certs(path, entitlements, products):
+    ent_path = os.path.join(path, "entitlement")
+    prod_path = os.path.join(path, "product")
+    os.makedirs(ent_path)
+    os.makedirs(prod_path)
+
+    now = datetime.utcnow()
+    for serial in range(1, entitlements + 1):
+        # some expired, some only valid in the future:
+        if serial % 4 == 0:
+            (start, end) = (now - timedelta(days=400), now - timedelta(days=35))
+        elif serial % 5 == 0:
+            (start, end) = (now + timedelta(days=30), now + timedelta(days=395))
+        else:
+            (start, end) = (now - timedelta(days=1), now + timedelta(days=364))
+        pem = certgen.generate_v3_entitlement(
+            products=PRODUCTS_PER_ENTITLEMENT, content=1, serial=serial, start=start, end=end,
+            first_product=serial * PRODUCTS_PER_ENTITLEMENT % products)
+        with open(os.path.join(ent_path, "%d.pem" % serial), "w") as pem_file:
+            pem_file.write(pem)
+
+    for product in range(products):
+        with open(os.path.join(prod_path, "%d.pem" % (1000 + product)), "w") as pem_file:
+            pem_file.write(certgen.generate_product(1000 + product, serial=product + 1))
+    return (ent_path, prod_path)
+
+
+def compliance_status(products):
+    product_ids = [str(1000 + product) for product in range(products)]
+    return {
+        "status": "invalid",
+        "compliantUntil": None,
+        "compliantProducts": dict((pid, []) for pid in product_ids[::2]),
+        "partiallyCompliantProducts": {},
+        "partialStacks": {},
+        "nonCompliantProducts": product_ids[1::2],
+        "reasons": [],
+    }
+
+
+def run_benchmarks(options):
+    results = []
+    path = tempfile.mkdtemp(prefix="bench-cert-sorter-")
+    try:
+        (ent_path, prod_path) = write_certs(path, options.entitlements, options.products)
+        inj.provide(inj.ENT_DIR, CertificateDirectory(ent_path))
+        inj.provide(inj.PROD_DIR, ProductDirectory(path=prod_path, default_path=os.path.join(path, "none")))
+        inj.provide(inj.IDENTITY, BenchIdentity())
+        inj.provide(inj.CP_PROVIDER, BenchCPProvider(compliance_status(options.products)))
+
+        # parses the certificates once, like the first load of a process:
+        sorter = ComplianceManager()
+        results.append(measure("sorter_new", ComplianceManager, options.repeat))
+        results.append(measure("sorter_reload_unchanged", sorter.load, options.repeat))
+    finally:
+        shutil.rmtree(path)
+    return results
+
+
+if __name__ == "__main__":
+    parser = get_parser(os.path.join(BASELINE_DIR, "cert_sorter.json"))
+    parser.add_option("--entitlements", type="int", default=200,
+                      help="entitlement certificates on the system (default: %default)")
+    parser.add_option("--products", type="int", default=50,
+                      help="installed products on the system (default: %default)")
+    sys.exit(main(run_benchmarks, "cert_sorter.json", parser=parser))
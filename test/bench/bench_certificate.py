@@ -0,0 +1,89 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Entitlement certificate parsing benchmarks.
+
+    PYTHONPATH=src python -m test.bench.bench_certificate [--products N] [--content N]
+
+Covers loading the x509 structure, the full create_from_pem path for v1
+and v3 entitlement certificates, and building the v3 content PathTree.
+"""
+import os
+import sys
+
+from rhsm import _certificate
+from rhsm.certificate import create_from_pem
+from rhsm.certificate2 import EXT_ENT_PAYLOAD
+from rhsm.pathtree import PathTree
+
+from test.bench import certgen, get_parser, main, measure, BASELINE_DIR
+
+# (name, products, content sets per product) for the default run:
+SIZES = [
+    ("small", 1, 10),
+    ("medium", 5, 100),
+    ("large", 20, 500),
+]
+
+# v1 certificates carry every content set as a group of extensions, which
+# makes them far larger; Candlepin never issues them with thousands of
+# content sets, so they get sizes of their own.
+V1_SIZES = [
+    ("small", 1, 10),
+    ("medium", 5, 20),
+    ("large", 10, 100),
+]
+
+
+def bench_sizes(options):
+    if options.products or options.content:
+        size = ("custom", options.products or 1, options.content or 10)
+        return [size], [size]
+    return SIZES, V1_SIZES
+
+
+def run_benchmarks(options):
+    results = []
+    sizes, v1_sizes = bench_sizes(options)
+
+    for (name, products, content) in v1_sizes:
+        pem = certgen.generate_v1_entitlement(products, content)
+        results.append(measure("v1_x509_load_%s" % name,
+                               lambda: _certificate.load(pem=pem), options.repeat))
+        results.append(measure("v1_create_from_pem_%s" % name,
+                               lambda: create_from_pem(pem), options.repeat))
+
+    for (name, products, content) in sizes:
+        pem = certgen.generate_v3_entitlement(products, content)
+        results.append(measure("v3_x509_load_%s" % name,
+                               lambda: _certificate.load(pem=pem), options.repeat))
+        results.append(measure("v3_create_from_pem_%s" % name,
+                               lambda: create_from_pem(pem), options.repeat))
+        tree_data = create_from_pem(pem).extensions[EXT_ENT_PAYLOAD]
+        results.append(measure("v3_path_tree_%s" % name,
+                               lambda: PathTree(tree_data), options.repeat))
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = get_parser(os.path.join(BASELINE_DIR, "certificate.json"))
+    parser.add_option("--products", type="int", default=0,
+                      help="products per certificate, instead of the standard sizes")
+    parser.add_option("--content", type="int", default=0,
+                      help="content sets per product, instead of the standard sizes")
+    sys.exit(main(run_benchmarks, "certificate.json", parser=parser))
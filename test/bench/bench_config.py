@@ -0,0 +1,77 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+rhsm.conf lookup benchmarks.
+
+    PYTHONPATH=src python -m test.bench.bench_config [--lookups N]
+
+Reads the rhsm.conf shipped in etc-conf and looks up a mix of set,
+interpolated and default-only values through RhsmConfigParser.get, with
+and without the cache of resolved values.
+"""
+import os
+import sys
+
+from rhsm.config import RhsmConfigParser
+
+from test.bench import get_parser, main, measure, BASELINE_DIR
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "etc-conf", "rhsm.conf")
+
+# The lookups connection setup, repolib and the cert directories make:
+LOOKUPS = [
+    ("server", "hostname"),
+    ("server", "port"),
+    ("server", "prefix"),
+    ("server", "proxy_hostname"),
+    ("server", "no_proxy"),
+    ("rhsm", "baseurl"),
+    ("rhsm", "repo_ca_cert"),
+    ("rhsm", "productCertDir"),
+    ("rhsm", "entitlementCertDir"),
+    ("rhsm", "consumerCertDir"),
+    ("rhsm", "manage_repos"),
+    ("rhsm", "inotify_debounce"),
+    ("rhsmcertd", "splay"),
+    ("logging", "default_log_level"),
+]
+
+
+def lookup_all(get, count):
+    lookups = (LOOKUPS * (count // len(LOOKUPS) + 1))[:count]
+
+    def lookup():
+        for (section, prop) in lookups:
+            get(section, prop)
+    return lookup
+
+
+def run_benchmarks(options):
+    parser = RhsmConfigParser(config_file=CONFIG_FILE)
+    return [
+        measure("config_get_%d" % options.lookups,
+                lookup_all(parser.get, options.lookups), options.repeat),
+        measure("config_get_%d_uncached" % options.lookups,
+                lookup_all(parser._resolve, options.lookups), options.repeat),
+    ]
+
+
+if __name__ == "__main__":
+    parser = get_parser(os.path.join(BASELINE_DIR, "config.json"))
+    parser.add_option("--lookups", type="int", default=10000,
+                      help="config values looked up per call (default: %default)")
+    sys.exit(main(run_benchmarks, "config.json", parser=parser))
@@ -0,0 +1,55 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Facts collection benchmarks.
+
+    PYTHONPATH=src python -m test.bench.bench_facts
+
+Compares collecting all facts from scratch, as every GetFacts call of the
+facts D-Bus service used to, with back-to-back calls served by a FactsCache.
+Collecting runs dmidecode, lscpu and virt-what on the machine running the
+benchmark, so only compare with a baseline recorded on the same machine.
+"""
+import sys
+
+from rhsmlib.facts.all import AllFactsCollector
+from rhsmlib.facts.collector import FactsCache
+
+from test.bench import main, measure
+
+
+def get_facts(facts_collector):
+    """
+    Does what GetFacts of the facts D-Bus objects does, minus D-Bus.
+    """
+    collection = facts_collector.collect()
+    return dict([(str(key), str(value)) for key, value in list(collection.data.items())])
+
+
+def run_benchmarks(options):
+    results = []
+    uncached = AllFactsCollector()
+    results.append(measure("get_facts_uncached", lambda: get_facts(uncached), options.repeat))
+
+    cached = AllFactsCollector(facts_cache=FactsCache())
+    get_facts(cached)
+    results.append(measure("get_facts_cached", lambda: get_facts(cached), options.repeat))
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(main(run_benchmarks, "facts.json"))
@@ -0,0 +1,106 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Installed product listing benchmarks.
+
+    PYTHONPATH=src python -m test.bench.bench_products [--entitlements N] [--products N]
+
+Lists the installed products of a system with 500 installed product
+certificates and 200 entitlement certificates, the way `list --installed`
+does, against a canned compliance and installed product status.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import subscription_manager.injection as inj
+from subscription_manager.cert_sorter import ComplianceManager
+from subscription_manager.certdirectory import CertificateDirectory, ProductDirectory
+from subscription_manager.validity import ValidProductDateRangeCalculator
+from rhsmlib.services.products import InstalledProducts
+
+from test.bench import get_parser, main, measure, BASELINE_DIR
+from test.bench.bench_cert_sorter import BenchCPProvider, BenchIdentity, compliance_status, \
+    write_certs
+
+
+class BenchProductStatusCache(object):
+    def __init__(self, status):
+        self.status = status
+
+    def load_status(self, uep, uuid):
+        return self.status
+
+
+def installed_product_status(products):
+    now = datetime.utcnow()
+    status = []
+    for product in range(products):
+        (start, end) = (None, None)
+        if product % 2 == 0:
+            start = (now - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+            end = (now + timedelta(days=364)).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        status.append({
+            "productId": str(1000 + product),
+            "productName": "Bench Product %d" % (1000 + product),
+            "status": "green" if product % 2 == 0 else "red",
+            "startDate": start,
+            "endDate": end,
+        })
+    return status
+
+
+def run_benchmarks(options):
+    results = []
+    path = tempfile.mkdtemp(prefix="bench-products-")
+    try:
+        (ent_path, prod_path) = write_certs(path, options.entitlements, options.products)
+        status = compliance_status(options.products)
+        status["reasons"] = [{
+            "key": "NOTCOVERED",
+            "message": "Not supported by a valid subscription.",
+            "attributes": {"product_id": product_id, "name": "Bench Product %s" % product_id},
+        } for product_id in status["nonCompliantProducts"]]
+
+        inj.provide(inj.ENT_DIR, CertificateDirectory(ent_path))
+        inj.provide(inj.PROD_DIR, ProductDirectory(path=prod_path, default_path=os.path.join(path, "none")))
+        inj.provide(inj.IDENTITY, BenchIdentity())
+        inj.provide(inj.CP_PROVIDER, BenchCPProvider(status))
+        inj.provide(inj.PLUGIN_MANAGER, object())
+        inj.provide(inj.PROD_STATUS_CACHE, BenchProductStatusCache(installed_product_status(options.products)))
+        inj.provide(inj.CERT_SORTER, ComplianceManager())
+        inj.provide(inj.PRODUCT_DATE_RANGE_CALCULATOR, ValidProductDateRangeCalculator)
+
+        uep = BenchCPProvider(status).get_consumer_auth_cp()
+        results.append(measure("installed_products_list",
+                               lambda: InstalledProducts(uep).list(), options.repeat))
+        results.append(measure("installed_products_list_filtered",
+                               lambda: InstalledProducts(uep).list("*10*"), options.repeat))
+    finally:
+        shutil.rmtree(path)
+    return results
+
+
+if __name__ == "__main__":
+    parser = get_parser(os.path.join(BASELINE_DIR, "products.json"))
+    parser.add_option("--entitlements", type="int", default=200,
+                      help="entitlement certificates on the system (default: %default)")
+    parser.add_option("--products", type="int", default=500,
+                      help="installed products on the system (default: %default)")
+    sys.exit(main(run_benchmarks, "products.json", parser=parser))
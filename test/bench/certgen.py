@@ -0,0 +1,315 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+"""
+Generates v1 and v3 entitlement certificates of arbitrary size.
+
+The certificates are assembled directly in DER, so no CA or crypto library
+is needed. They carry a real public key but a dummy signature: rhsm only
+ever parses entitlement certificates, it never verifies them.
+"""
+import base64
+import json
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+from rhsm.huffman import HuffmanNode
+
+REDHAT_OID = "1.3.6.1.4.1.2312.9"
+SHA256_WITH_RSA = "1.2.840.113549.1.1.11"
+RSA_ENCRYPTION = "1.2.840.113549.1.1.1"
+COMMON_NAME = "2.5.4.3"
+
+# DER encoded SubjectPublicKeyInfo of a throwaway 2048 bit RSA key.
+PUBLIC_KEY_INFO = base64.b64decode(
+    "MIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAsWRFnPzhJ2qHVBq1O7FO"
+    "t8pDBIievWLyPItDY4IAWmP42A0W02gF75BEQ+kh7LWOrlFOKynfaH6WDSkHElW7"
+    "nYeCh1VTdPr4DDeyQ9KTNSw1PAsREb0rSdjPpAJh0SWiBjY/qmFrz38DlwtXt1D+"
+    "OtLg7pDIi2EhGtXfQuqqQ68+c3k0MKLiKoz4Vjh/5yeZ15j+pGhWHS+vqkjtwvh8"
+    "JOuFum5Ex3zGUBPnSsLo28rdhwZ68MQ63CtcciLGGmCTQHQipoDhzTp3OSKQ0qmO"
+    "atWA/nyR8wE+1l7pKMxdHOEA/iOXFWoNVYKPdLQW0OdClEtJ3Vn6agwQ+UxcOu5j"
+    "xwIDAQAB"
+)
+
+
+def _der(tag, content):
+    length = len(content)
+    if length < 0x80:
+        header = struct.pack("BB", tag, length)
+    else:
+        length_bytes = b""
+        while length:
+            length_bytes = struct.pack("B", length & 0xff) + length_bytes
+            length >>= 8
+        header = struct.pack("BB", tag, 0x80 | len(length_bytes)) + length_bytes
+    return header + content
+
+
+def _sequence(*items):
+    return _der(0x30, b"".join(items))
+
+
+def _integer(value):
+    content = b""
+    while True:
+        content = struct.pack("B", value & 0xff) + content
+        value >>= 8
+        if not value and not (struct.unpack("B", content[:1])[0] & 0x80):
+            break
+    return _der(0x02, content)
+
+
+def _oid(dotted):
+    parts = [int(part) for part in dotted.split(".")]
+    content = struct.pack("B", parts[0] * 40 + parts[1])
+    for part in parts[2:]:
+        encoded = [part & 0x7f]
+        part >>= 7
+        while part:
+            encoded.insert(0, 0x80 | (part & 0x7f))
+            part >>= 7
+        content += struct.pack("%dB" % len(encoded), *encoded)
+    return _der(0x06, content)
+
+
+def _utf8(text):
+    return _der(0x0c, text.encode("utf-8"))
+
+
+def _time(when):
+    if when.year < 2050:
+        return _der(0x17, when.strftime("%y%m%d%H%M%SZ").encode("ascii"))
+    return _der(0x18, when.strftime("%Y%m%d%H%M%SZ").encode("ascii"))
+
+
+def _name(common_name):
+    return _sequence(_der(0x31, _sequence(_oid(COMMON_NAME), _utf8(common_name))))
+
+
+def _extension(oid, value):
+    return _sequence(_oid(oid), _der(0x04, value))
+
+
+def build_pem(extensions, serial=1, subject="benchmark", start=None, end=None):
+    """
+    Returns the PEM of a certificate carrying the given extensions.
+
+    :param extensions:  list of (dotted oid, DER encoded value) tuples
+    """
+    start = start or datetime.utcnow() - timedelta(days=1)
+    end = end or start + timedelta(days=365)
+    algorithm = _sequence(_oid(SHA256_WITH_RSA), _der(0x05, b""))
+    tbs = _sequence(
+        _der(0xa0, _integer(2)),
+        _integer(serial),
+        algorithm,
+        _name("benchmark-ca"),
+        _sequence(_time(start), _time(end)),
+        _name(subject),
+        PUBLIC_KEY_INFO,
+        _der(0xa3, _sequence(*[_extension(oid, value) for (oid, value) in extensions])),
+    )
+    der = _sequence(tbs, algorithm, _der(0x03, b"\x00" + b"\x5a" * 256))
+    body = base64.b64encode(der).decode("ascii")
+    lines = [body[i:i + 64] for i in range(0, len(body), 64)]
+    return "-----BEGIN CERTIFICATE-----\n%s\n-----END CERTIFICATE-----\n" % "\n".join(lines)
+
+
+def content_paths(products, content):
+    """
+    Returns the content set paths used for a certificate with the given
+    number of products and content sets per product.
+    """
+    paths = []
+    for product in range(products):
+        for index in range(content):
+            paths.append("/content/dist/product%d/$releasever/$basearch/repo%d/os" %
+                         (product, index))
+    return paths
+
+
+def encode_path_tree(paths):
+    """
+    Encodes paths in the huffman coded format v3 entitlement certificates
+    use for their content path extension, the inverse of rhsm.pathtree.
+    """
+    root = {}
+    for path in paths:
+        node = root
+        for word in path.strip("/").split("/"):
+            node = node.setdefault(word, {})
+
+    # Number every node; the root is not given a huffman code.
+    nodes = [root]
+    for node in nodes:
+        nodes.extend(node[word] for word in sorted(node))
+
+    # The empty word marks the end of a node's list of children.
+    words = [""] + sorted(set(word for node in nodes for word in node))
+    word_leaves = [HuffmanNode(weight, word) for (weight, word) in enumerate(words, 1)]
+    HuffmanNode.build_tree(word_leaves)
+    word_codes = dict((leaf.value, leaf.code) for leaf in word_leaves)
+
+    path_leaves = [HuffmanNode(weight, {}) for weight in range(1, len(nodes))]
+    HuffmanNode.build_tree(path_leaves)
+    node_codes = dict((id(node), leaf.code) for (node, leaf) in zip(nodes[1:], path_leaves))
+
+    node_count = len(nodes)
+    if node_count < 128:
+        header = struct.pack("B", node_count)
+    else:
+        count_bytes = b""
+        while node_count:
+            count_bytes = struct.pack("B", node_count & 0xff) + count_bytes
+            node_count >>= 8
+        header = struct.pack("B", 128 + len(count_bytes)) + count_bytes
+
+    bits = []
+    for node in nodes:
+        for word in sorted(node):
+            bits.append(word_codes[word])
+            bits.append(node_codes[id(node[word])])
+        bits.append(word_codes[""])
+    bits = "".join(bits)
+    bits += "0" * (-len(bits) % 8)
+    tree = bytearray(int(bits[i:i + 8], 2) for i in range(0, len(bits), 8))
+
+    word_list = zlib.compress("\0".join(words).encode("utf-8"))
+    return word_list + header + bytes(tree)
+
+
+def generate_v1_entitlement(products=1, content=10, serial=1):
+    """
+    Returns the PEM of a v1 entitlement certificate with the given number
+    of products, each providing the given number of content sets.
+    """
+    def ext(suffix, value):
+        return ("%s.%s" % (REDHAT_OID, suffix), _utf8(value))
+
+    extensions = [
+        ext("4.1", "Benchmark Subscription"),
+        ext("4.2", "12345"),
+        ext("4.3", "BENCH-SKU"),
+        ext("4.5", "10"),
+        ext("4.12", "30"),
+        ext("4.13", "1234567"),
+        ext("4.15", "Premium"),
+        ext("4.17", "bench-stack"),
+    ]
+    paths = content_paths(products, content)
+    for product in range(products):
+        product_id = 1000 + product
+        extensions.extend([
+            ext("1.%d.1" % product_id, "Benchmark Product %d" % product),
+            ext("1.%d.2" % product_id, "1.0"),
+            ext("1.%d.3" % product_id, "x86_64,ppc64le"),
+        ])
+        for index in range(content):
+            content_id = 100000 + product * content + index
+            extensions.extend([
+                ext("2.%d.1" % content_id, "yum"),
+                ext("2.%d.1.1" % content_id, "Benchmark Content %d" % content_id),
+                ext("2.%d.1.2" % content_id, "bench-content-%d" % content_id),
+                ext("2.%d.1.5" % content_id, "Red Hat"),
+                ext("2.%d.1.6" % content_id, paths[product * content + index]),
+                ext("2.%d.1.7" % content_id, "file:///etc/pki/rpm-gpg/RPM-GPG-KEY-redhat-release"),
+                ext("2.%d.1.8" % content_id, "1"),
+                ext("2.%d.1.10" % content_id, "rhel-7-server,rhel-7-workstation"),
+            ])
+    return build_pem(extensions, serial=serial, subject="bench-%d" % serial)
+
+
+def generate_v3_entitlement(products=1, content=10, serial=1, first_product=0,
+                            start=None, end=None):
+    """
+    Returns the PEM of a v3 entitlement certificate, including its
+    ENTITLEMENT DATA payload, with the given number of products each
+    providing the given number of content sets. Product IDs count up from
+    1000 + first_product.
+    """
+    paths = content_paths(products, content)
+    payload = {
+        "consumer": "bench-consumer",
+        "quantity": 1,
+        "subscription": {
+            "sku": "BENCH-SKU",
+            "name": "Benchmark Subscription",
+            "warning": 30,
+            "sockets": 2,
+            "management": False,
+            "stacking_id": "bench-stack",
+            "service": {"level": "Premium", "type": "L1-L3"},
+        },
+        "order": {
+            "number": "12345",
+            "quantity": 10,
+            "contract": "9999",
+            "account": "1234567",
+        },
+        "pool": {"id": "bench-pool"},
+        "products": [],
+    }
+    for product in range(products):
+        product_content = []
+        for index in range(content):
+            content_id = 100000 + product * content + index
+            product_content.append({
+                "id": str(content_id),
+                "type": "yum",
+                "name": "Benchmark Content %d" % content_id,
+                "label": "bench-content-%d" % content_id,
+                "vendor": "Red Hat",
+                "path": paths[product * content + index],
+                "gpg_url": "file:///etc/pki/rpm-gpg/RPM-GPG-KEY-redhat-release",
+                "enabled": True,
+                "metadata_expire": 86400,
+                "required_tags": ["rhel-7-server", "rhel-7-workstation"],
+                "arches": ["x86_64", "ppc64le"],
+            })
+        payload["products"].append({
+            "id": str(1000 + first_product + product),
+            "name": "Benchmark Product %d" % product,
+            "version": "1.0",
+            "architectures": ["x86_64", "ppc64le"],
+            "content": product_content,
+        })
+
+    extensions = [
+        ("%s.6" % REDHAT_OID, _utf8("3.2")),
+        ("%s.7" % REDHAT_OID, _der(0x04, encode_path_tree(paths))),
+        ("%s.8" % REDHAT_OID, _utf8("Basic")),
+    ]
+    pem = build_pem(extensions, serial=serial, subject="bench-%d" % serial, start=start, end=end)
+    data = base64.b64encode(zlib.compress(json.dumps(payload).encode("utf-8")))
+    return "%s-----BEGIN ENTITLEMENT DATA-----\n%s\n-----END ENTITLEMENT DATA-----\n" % (
+        pem, data.decode("ascii"))
+
+
+def generate_product(product_id, serial=1):
+    """
+    Returns the PEM of a product certificate for the given product ID.
+    """
+    def ext(suffix, value):
+        return ("%s.1.%d.%s" % (REDHAT_OID, product_id, suffix), _utf8(value))
+
+    extensions = [
+        ext("1", "Benchmark Product %d" % product_id),
+        ext("2", "1.0"),
+        ext("3", "x86_64"),
+        ext("4", "rhel-7,rhel-7-server"),
+    ]
+    return build_pem(extensions, serial=serial, subject="bench-product-%d" % product_id)
@@ -0,0 +1,96 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from datetime import datetime
+
+from rhsm.certificate import create_from_pem
+from rhsm.pathtree import PathTree
+
+from test.bench import BenchmarkResult, find_regressions, measure
+from test.bench import certgen
+
+
+class CertGenTests(unittest.TestCase):
+
+    def test_v1_entitlement(self):
+        cert = create_from_pem(certgen.generate_v1_entitlement(products=2, content=3, serial=42))
+        self.assertEqual("1.0", str(cert.version))
+        self.assertEqual(42, cert.serial)
+        self.assertEqual(2, len(cert.products))
+        self.assertEqual(6, len(cert.content))
+        self.assertEqual("bench-stack", cert.order.stacking_id)
+        self.assertTrue(cert.check_path("/content/dist/product1/7Server/x86_64/repo2/os"))
+
+    def test_v3_entitlement(self):
+        cert = create_from_pem(certgen.generate_v3_entitlement(products=3, content=4, serial=43))
+        self.assertEqual("3.2", str(cert.version))
+        self.assertEqual(43, cert.serial)
+        self.assertEqual(3, len(cert.products))
+        self.assertEqual(12, len(cert.content))
+        self.assertEqual("bench-pool", cert.pool.id)
+        self.assertTrue(cert.check_path("/content/dist/product2/7Server/x86_64/repo3/os/repodata"))
+        self.assertFalse(cert.check_path("/content/dist/product3/7Server/x86_64/repo0/os"))
+
+    def test_v3_entitlement_products_and_dates(self):
+        start = datetime(2020, 1, 1)
+        cert = create_from_pem(certgen.generate_v3_entitlement(products=2, content=1, first_product=5,
+                                                               start=start, end=datetime(2021, 1, 1)))
+        self.assertEqual(["1005", "1006"], [product.id for product in cert.products])
+        self.assertEqual(2020, cert.valid_range.begin().year)
+        self.assertEqual(2021, cert.valid_range.end().year)
+
+    def test_product(self):
+        cert = create_from_pem(certgen.generate_product(1007, serial=44))
+        self.assertEqual(44, cert.serial)
+        self.assertEqual(["1007"], [product.id for product in cert.products])
+        self.assertEqual(["rhel-7", "rhel-7-server"], cert.products[0].provided_tags)
+        self.assertEqual(None, getattr(cert, "order", None))
+
+    def test_path_tree_round_trip(self):
+        paths = certgen.content_paths(products=4, content=50)
+        tree = PathTree(certgen.encode_path_tree(paths))
+        for path in paths:
+            self.assertTrue(tree.match_path(path))
+        self.assertFalse(tree.match_path("/content/dist/product9/7/x86_64/repo0/os"))
+
+
+class BenchHarnessTests(unittest.TestCase):
+
+    def test_measure(self):
+        result = measure("list", lambda: [[i] for i in range(1000)], repeat=1)
+        self.assertEqual("list", result.name)
+        self.assertTrue(result.seconds > 0)
+        self.assertTrue(result.objects >= 1000)
+        if result.retained_kib is not None:
+            self.assertTrue(0 < result.retained_kib <= result.peak_kib)
+
+    def test_find_regressions(self):
+        baseline = {"fast": {"seconds": 0.5, "peak_kib": 1000, "objects": 1000}}
+        ok = BenchmarkResult("fast", 0.55, 1100, 1100)
+        slow = BenchmarkResult("fast", 1.0, 1100, 1100)
+        unknown = BenchmarkResult("new", 10.0, 10000, 10000)
+        self.assertEqual([], find_regressions([ok, unknown], baseline))
+        self.assertEqual(1, len(find_regressions([slow], baseline)))
+
+    def test_find_regressions_ignores_noise(self):
+        baseline = {"tiny": {"seconds": 0.0001, "peak_kib": 1, "objects": 2}}
+        result = BenchmarkResult("tiny", 0.0003, 3, 6)
+        self.assertEqual([], find_regressions([result], baseline))
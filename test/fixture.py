@@ -28,6 +28,7 @@ from contextlib import contextmanager
 from . import stubs
 import subscription_manager.injection as inj
 import subscription_manager.managercli
+from subscription_manager.consumerupdatelib import ConsumerUpdateBatch
 from rhsmlib.services import config
 
 # use instead of the normal pid file based ActionLock
@@ -171,6 +172,7 @@ class SubManFixture(unittest.TestCase):
         # Don't really care about date ranges here:
         self.mock_calc = NonCallableMock()
         self.mock_calc.calculate.return_value = None
+        self.mock_calc.calculate_all.return_value = {}
 
         # Avoid trying to read real /etc/yum.repos.d/redhat.repo
         self.mock_repofile_path_exists_patcher = patch('subscription_manager.repolib.YumRepoFile.path_exists')
@@ -200,6 +202,10 @@ class SubManFixture(unittest.TestCase):
         self.stub_cp_provider = stubs.StubCPProvider()
         self._release_versions = []
         self.stub_cp_provider.content_connection.get_versions = self._get_release_versions
+        self.stub_cp_provider.content_connection.get_listing = self._get_release_listing
+        inj.provide(inj.RELEASE_LISTING_CACHE, stubs.StubReleaseListingCache())
+        inj.provide(inj.SERVER_CAPABILITY_CACHE, stubs.StubServerCapabilityCache())
+        inj.provide(inj.CONSUMER_UPDATE_BATCH, ConsumerUpdateBatch())
 
         inj.provide(inj.CP_PROVIDER, self.stub_cp_provider)
         inj.provide(inj.CERT_SORTER, stubs.StubCertSorter())
@@ -273,6 +279,9 @@ class SubManFixture(unittest.TestCase):
     def _get_release_versions(self, listing_path, ent_cert_key_pairs):
         return self._release_versions
 
+    def _get_release_listing(self, listing_path, ent_cert_key_pairs, etag=None, last_modified=None):
+        return {"status": 200, "content": self._release_versions, "headers": {}}
+
     # For changing injection consumer id to one that fails "is_valid"
     def _inject_mock_valid_consumer(self, uuid=None):
         """For changing injected consumer identity to one that passes is_valid()
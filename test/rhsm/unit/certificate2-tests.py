@@ -380,6 +380,24 @@ class ContentTests(unittest.TestCase):
         self.assertTrue(isinstance(c.arches, list))
         self.assertTrue('ALL' in c.arches)
 
+    def test_arches_shared(self):
+        c = Content(content_type="yum", name="mycontent", label="mycontent", enabled=1,
+                    arches=['i386', 's390'], required_tags=['rhel-7'])
+        d = Content(content_type="yum", name="othercontent", label="othercontent", enabled=1,
+                    arches=['i386', 's390'])
+        self.assertTrue(c.arches is d.arches)
+        self.assertTrue(d.required_tags is Content(content_type="yum", name="x", label="x").required_tags)
+        self.assertRaises(TypeError, c.arches.append, 'x86_64')
+        self.assertRaises(TypeError, c.required_tags.remove, 'rhel-7')
+        self.assertEqual(['i386', 's390'], list(c.arches))
+
+    def test_no_instance_dict(self):
+        c = Content(content_type="yum", name="mycontent", label="mycontent")
+        self.assertFalse(hasattr(c, '__dict__'))
+        c.gpg = "file:///etc/pki/rpm-gpg/RPM-GPG-KEY"
+        self.assertEqual("file:///etc/pki/rpm-gpg/RPM-GPG-KEY", c.gpg)
+        self.assertRaises(AttributeError, setattr, c, 'not_an_attribute', 1)
+
     def test_compare(self):
         c = Content(content_type="yum", name="mycontent", label="mycontent", enabled=1, arches=['ALL'])
         d = c
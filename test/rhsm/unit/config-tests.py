@@ -338,6 +338,38 @@ class ConfigTests(BaseConfigTests):
         self.assertEqual(123456789009876543211234567890, value)
 
 
+class CachedConfigTests(BaseConfigTests):
+    cfgfile_data = TEST_CONFIG
+
+    def test_resolved_once(self):
+        with patch.object(self.cfgParser, '_resolve', wraps=self.cfgParser._resolve) as resolve:
+            for i in range(3):
+                self.assertEqual("/etc/rhsm/ca-test/redhat-uep-non-default.pem",
+                                 self.cfgParser.get("rhsm", "repo_ca_cert"))
+        self.assertEqual(1, resolve.call_count)
+
+    def test_set_invalidates(self):
+        self.assertEqual("/etc/rhsm/ca-test/redhat-uep-non-default.pem",
+                         self.cfgParser.get("rhsm", "repo_ca_cert"))
+        self.cfgParser.set("rhsm", "ca_cert_dir", "/etc/rhsm/ca-other/")
+        self.assertEqual("/etc/rhsm/ca-other/redhat-uep-non-default.pem",
+                         self.cfgParser.get("rhsm", "repo_ca_cert"))
+
+    def test_remove_invalidates(self):
+        self.assertEqual("server.example.conf", self.cfgParser.get("server", "hostname"))
+        self.cfgParser.remove_option("server", "hostname")
+        self.assertEqual("subscription.rhsm.redhat.com", self.cfgParser.get("server", "hostname"))
+        self.assertEqual("245", self.cfgParser.get("rhsmcertd", "certCheckInterval"))
+        self.cfgParser.remove_section("rhsmcertd")
+        self.assertEqual("240", self.cfgParser.get("rhsmcertd", "certCheckInterval"))
+
+    def test_read_invalidates(self):
+        self.assertEqual("server.example.conf", self.cfgParser.get("server", "hostname"))
+        fid = write_temp_file("[server]\nhostname = other.example.conf\n")
+        self.cfgParser.read(fid.name)
+        self.assertEqual("other.example.conf", self.cfgParser.get("server", "hostname"))
+
+
 class SomeOptionConfigTest(BaseConfigTests):
     cfgfile_data = TEST_CONFIG
 
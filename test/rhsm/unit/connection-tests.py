@@ -22,8 +22,16 @@ import unittest
 import shutil
 import os
 import ssl
+import threading
+import zlib
 from tempfile import mkdtemp
 
+try:
+    import tracemalloc
+except ImportError:
+    # python 2
+    tracemalloc = None
+
 from nose.plugins.skip import SkipTest
 
 from rhsm import connection
@@ -33,9 +41,11 @@ from rhsm.connection import UEPConnection, Restlib, ConnectionException, Connect
         ForbiddenException, AuthenticationException, RateLimitExceededException, ContentConnection
 
 from mock import Mock, patch
+from six.moves import BaseHTTPServer, http_client
 from datetime import date
 from time import strftime, gmtime
 from rhsm import ourjson as json
+from test.rhsm.unit import certdata
 
 
 class ConnectionTests(unittest.TestCase):
@@ -360,6 +370,610 @@ class ConnectionTests(unittest.TestCase):
             restlib._load_ca_certificates(ssl.SSLContext(ssl.PROTOCOL_SSLv23))
 
 
+class DictCapabilityCache(object):
+    """
+    In memory capability cache, as UEPConnection expects one.
+    """
+
+    def __init__(self):
+        self.servers = {}
+
+    def get(self, server_key):
+        return self.servers.get(server_key)
+
+    def update(self, server_key, **values):
+        self.servers.setdefault(server_key, {}).update(values)
+
+    def invalidate(self, server_key):
+        self.servers.pop(server_key, None)
+
+
+class CapabilityCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.capability_cache = DictCapabilityCache()
+        self.cp = self._connection()
+
+    def _connection(self):
+        cp = UEPConnection(username="dummy", password="dummy", handler="/Test/",
+                           insecure=True, capability_cache=self.capability_cache)
+        cp.conn = Mock()
+        return cp
+
+    def _serve(self, cp, version, capabilities):
+        responses = {
+            '/': [{'rel': 'consumers', 'href': '/consumers'}],
+            '/status': {'version': version, 'release': '1', 'managerCapabilities': capabilities},
+        }
+        cp.conn.request_get.side_effect = lambda method: responses[method]
+
+    def _age_version_check(self, cp):
+        entry = self.capability_cache.get(cp._capability_cache_key())
+        entry['version_checked'] -= connection.SERVER_VERSION_CHECK_INTERVAL + 1
+        self.capability_cache.update(cp._capability_cache_key(), **entry)
+
+    def test_resources_cached_between_connections(self):
+        self._serve(self.cp, '2.0', ['cores'])
+        self.assertTrue(self.cp.supports_resource('consumers'))
+
+        # The version of the server is not known yet, so checked once:
+        other = self._connection()
+        self._serve(other, '2.0', ['cores'])
+        self.assertTrue(other.supports_resource('consumers'))
+        self.assertFalse(other.supports_resource('environments'))
+        other.conn.request_get.assert_called_once_with('/status')
+
+        third = self._connection()
+        self.assertTrue(third.supports_resource('consumers'))
+        self.assertFalse(third.conn.request_get.called)
+
+    def test_capabilities_cached_between_connections(self):
+        self.cp.conn.request_get.return_value = {'version': '2.0', 'release': '1',
+                                                 'managerCapabilities': ['cores']}
+        self.assertTrue(self.cp.has_capability('cores'))
+
+        other = self._connection()
+        self.assertTrue(other.has_capability('cores'))
+        self.assertFalse(other.conn.request_get.called)
+
+    def test_version_change_invalidates(self):
+        self.cp.conn.request_get.return_value = {'version': '2.0', 'release': '1',
+                                                 'managerCapabilities': ['cores']}
+        self.assertTrue(self.cp.has_capability('cores'))
+
+        other = self._connection()
+        other.conn.request_get.return_value = {'version': '2.1', 'release': '1',
+                                               'managerCapabilities': ['ram']}
+        other.getStatus()
+        self.assertFalse(other.has_capability('cores'))
+        self.assertTrue(other.has_capability('ram'))
+        self.assertEqual('2.1-1', self.capability_cache.get(other._capability_cache_key())['version'])
+
+    def test_version_change_while_capabilities_cached(self):
+        self._serve(self.cp, '2.0', ['cores'])
+        self.assertTrue(self.cp.has_capability('cores'))
+        self.assertTrue(self.cp.supports_resource('consumers'))
+
+        # Checked recently, the cached capabilities are used as they are:
+        upgraded = self._connection()
+        self._serve(upgraded, '2.1', ['ram'])
+        self.assertTrue(upgraded.has_capability('cores'))
+        self.assertFalse(upgraded.conn.request_get.called)
+
+        self._age_version_check(self.cp)
+        upgraded = self._connection()
+        self._serve(upgraded, '2.1', ['ram'])
+        self.assertFalse(upgraded.has_capability('cores'))
+        self.assertTrue(upgraded.has_capability('ram'))
+        self.assertEqual('2.1-1', self.capability_cache.get(upgraded._capability_cache_key())['version'])
+
+        # Checked again, so the next connection trusts the new entry:
+        other = self._connection()
+        self.assertTrue(other.has_capability('ram'))
+        self.assertFalse(other.conn.request_get.called)
+
+    def test_version_header_invalidates(self):
+        self._serve(self.cp, '2.0', ['cores'])
+        self.assertTrue(self.cp.has_capability('cores'))
+
+        self.cp._check_version('2.0-1')
+        self.assertEqual(['cores'], self.capability_cache.get(self.cp._capability_cache_key())['capabilities'])
+
+        # A response from the downgraded server, before the next check:
+        self.cp._check_version('1.9-1')
+        self.assertEqual(None, self.capability_cache.get(self.cp._capability_cache_key()).get('capabilities'))
+        self.assertEqual(None, self.cp.capabilities)
+
+    def test_missing_advertised_resource_invalidates(self):
+        self.cp.conn.request_get.return_value = [{'rel': 'consumers', 'href': '/consumers'}]
+        self.assertTrue(self.cp.supports_resource('consumers'))
+
+        self.cp._resource_not_found('/owners/admin')
+        self.assertTrue(self.capability_cache.get(self.cp._capability_cache_key()))
+
+        self.cp._resource_not_found('/consumers/abc?include=id')
+        self.assertEqual(None, self.capability_cache.get(self.cp._capability_cache_key()))
+        self.assertEqual(None, self.cp.resources)
+
+    @patch('rhsm.connection.drift_check', Mock(return_value=False))
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_restlib_reports_not_found(self, mock_https):
+        response = mock_https.return_value.getresponse.return_value
+        response.status = 404
+        response.read.return_value = b''
+        response.getheaders.return_value = []
+        response.getheader.return_value = None
+        restlib = Restlib("somehost", "123", "/candlepin", insecure=True)
+        restlib.not_found_callback = Mock()
+
+        self.assertRaises(RemoteServerException, restlib.request_get, "/consumers/abc")
+        restlib.not_found_callback.assert_called_once_with("/consumers/abc")
+
+    @patch('rhsm.connection.drift_check', Mock(return_value=False))
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_restlib_reports_version_header(self, mock_https):
+        response = mock_https.return_value.getresponse.return_value
+        response.status = 200
+        response.read.side_effect = [b'{}', b'']
+        response.getheaders.return_value = [('x-version', '2.5.8-1')]
+        response.getheader.side_effect = lambda name, default=None: dict(response.getheaders.return_value).get(name)
+        restlib = Restlib("somehost", "123", "/candlepin", insecure=True)
+        restlib.server_version_callback = Mock()
+
+        restlib.request_get("/status")
+        restlib.server_version_callback.assert_called_once_with("2.5.8-1")
+
+
+class FakeResponse(object):
+    """
+    httplib response serving its body in reads of at most chunk_size bytes.
+    """
+
+    def __init__(self, body, headers=None, status=200, chunk_size=7):
+        self.body = body
+        self.headers = headers or {}
+        self.status = status
+        self.chunk_size = chunk_size
+        self.reads = 0
+
+    def read(self, amt=None):
+        amt = min(amt or len(self.body), self.chunk_size)
+        (chunk, self.body) = (self.body[:amt], self.body[amt:])
+        self.reads += 1
+        return chunk
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+
+class ResponseBodyTests(unittest.TestCase):
+    content = json.dumps([{"id": str(i), "name": "pool %d" % i} for i in range(50)]).encode('utf-8')
+
+    def test_identity(self):
+        body = connection.ResponseBody(FakeResponse(self.content))
+        self.assertEqual(self.content, body.read())
+        self.assertEqual(len(self.content), body.wire_bytes)
+        self.assertEqual(len(self.content), body.decoded_bytes)
+
+    def test_gzip(self):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        gzipped = compressor.compress(self.content) + compressor.flush()
+        response = FakeResponse(gzipped, {'content-encoding': 'gzip'})
+        body = connection.ResponseBody(response)
+        self.assertEqual(self.content, body.read())
+        self.assertEqual(len(gzipped), body.wire_bytes)
+        self.assertEqual(len(self.content), body.decoded_bytes)
+        self.assertTrue(response.reads > 1)
+
+    def test_deflate(self):
+        for compressed in (zlib.compress(self.content), zlib.compress(self.content)[2:-4]):
+            body = connection.ResponseBody(FakeResponse(compressed, {'content-encoding': 'deflate'}))
+            self.assertEqual(self.content, body.read())
+
+    def test_corrupt(self):
+        body = connection.ResponseBody(FakeResponse(b"not gzip at all", {'content-encoding': 'gzip'}))
+        self.assertRaises(ConnectionException, body.read)
+
+    @patch('rhsm.connection.drift_check', Mock(return_value=False))
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_restlib_negotiates_gzip(self, mock_https):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        mock_https.return_value.getresponse.return_value = FakeResponse(
+            compressor.compress(self.content) + compressor.flush(), {'content-encoding': 'gzip'})
+        restlib = Restlib("somehost", "123", "/candlepin", insecure=True)
+
+        self.assertEqual(json.loads(self.content.decode('utf-8')), restlib.request_get("/pools"))
+        headers = mock_https.return_value.request.call_args[1]['headers']
+        self.assertEqual("gzip, deflate", headers["Accept-Encoding"])
+
+
+class IterJsonArrayTests(unittest.TestCase):
+    def _chunked(self, text, size):
+        data = text.encode('utf-8')
+        return [data[i:i + size] for i in range(0, len(data), size)]
+
+    def test_items_in_any_chunking(self):
+        items = [{"id": "1", "name": u"p\u00f6\u00f6l [1], \\\"quoted\\\""}, [1, {"a": []}], 1234.5,
+                 -17, "text", True, None, {}]
+        text = ' [ %s ] \n' % ' , '.join(json.dumps(item) for item in items)
+        for size in range(1, len(text) + 1):
+            self.assertEqual(items, list(connection.iter_json_array(self._chunked(text, size))))
+
+    def test_items_yielded_as_they_arrive(self):
+        received = []
+
+        def chunks():
+            for chunk in (b'[{"id": 1},', b' {"id"', b': 2}]'):
+                received.append(chunk)
+                yield chunk
+
+        items = connection.iter_json_array(chunks())
+        self.assertEqual({"id": 1}, next(items))
+        self.assertEqual(1, len(received))
+        self.assertEqual({"id": 2}, next(items))
+        self.assertEqual(3, len(received))
+
+    def test_empty(self):
+        self.assertEqual([], list(connection.iter_json_array([b'[', b']'])))
+
+    def test_invalid(self):
+        for text in ('', '{"id": 1}', '[1, 2', '[1 2]', '[1,]', '[1] 2', '[{"id": 1]'):
+            self.assertRaises(ValueError, list, connection.iter_json_array(self._chunked(text, 2)))
+
+    @patch('rhsm.connection.drift_check', Mock(return_value=False))
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_restlib_stream(self, mock_https):
+        pools = [{"id": str(i)} for i in range(20)]
+        response = FakeResponse(json.dumps(pools).encode('utf-8'))
+        mock_https.return_value.getresponse.return_value = response
+        restlib = Restlib("somehost", "123", "/candlepin", insecure=True)
+
+        items = restlib.request_get("/pools", stream=True)
+        self.assertEqual(0, response.reads)
+        self.assertEqual(pools[0], next(items))
+        self.assertEqual(pools[1:], list(items))
+
+    @patch('rhsm.connection.drift_check', Mock(return_value=False))
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_restlib_stream_error(self, mock_https):
+        mock_https.return_value.getresponse.return_value = FakeResponse(
+            json.dumps({"displayMessage": "Nope"}).encode('utf-8'), status=403)
+        restlib = Restlib("somehost", "123", "/candlepin", insecure=True)
+        self.assertRaises(RestlibException, restlib.request_get, "/pools", stream=True)
+
+    def test_uep_passes_stream(self):
+        cp = UEPConnection(username="dummy", password="dummy", handler="/Test/", insecure=True)
+        cp.conn = Mock()
+        cp.getCertificates("abc", serials=["1", "2"], stream=True)
+        cp.conn.request_get.assert_called_once_with("/consumers/abc/certificates?serials=1,2",
+                                                    stream=True)
+
+
+class RequestBodyTests(unittest.TestCase):
+    report = {"hypervisors": [{"hypervisorId": {"hypervisorId": "host%d" % i},
+                               "name": u"h\u00f6st %d" % i,
+                               "guestIds": [{"guestId": "guest-%d-%d" % (i, j)} for j in range(i % 4)],
+                               "facts": {"cpu.cpu_socket(s)": "2"}}
+                              for i in range(30)]}
+
+    def test_iter_json(self):
+        for obj in (self.report, {"host1": ["a", "b"], "host2": []}, {}, [], [1, [2, [3]]],
+                    {1: "non string key"}, {"set": set([1])}, "text", None):
+            self.assertEqual(json.dumps(obj, default=json.encode), "".join(connection.iter_json(obj)))
+
+    def test_identity(self):
+        body = connection.RequestBody(self.report)
+        self.assertEqual(self.report, json.loads(body.read().decode('utf-8')))
+        self.assertEqual(body.encoded_bytes, body.wire_bytes)
+
+    def test_gzip(self):
+        body = connection.RequestBody(self.report, compress=True, chunk_size=100)
+        gzipped = body.read()
+        self.assertEqual(self.report, json.loads(zlib.decompress(gzipped, 16 + zlib.MAX_WBITS).decode('utf-8')))
+        self.assertEqual(len(gzipped), body.wire_bytes)
+        self.assertEqual(len(json.dumps(self.report)), body.encoded_bytes)
+
+    def test_split_hypervisor_report(self):
+        size = 1000
+        reports = list(connection.split_hypervisor_report(self.report, size))
+        self.assertTrue(len(reports) > 1)
+        for report in reports:
+            self.assertTrue(len(json.dumps(report)) <= size)
+        self.assertEqual(self.report["hypervisors"], sum([r["hypervisors"] for r in reports], []))
+
+    def test_split_oversized_hypervisor(self):
+        reports = list(connection.split_hypervisor_report(self.report, 10))
+        self.assertEqual([[h] for h in self.report["hypervisors"]], [r["hypervisors"] for r in reports])
+
+    def test_split_empty_report(self):
+        self.assertEqual([{"hypervisors": []}],
+                         list(connection.split_hypervisor_report({"hypervisors": []}, 1000)))
+
+
+class HypervisorStandIn(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Takes hypervisor reports the way candlepin does, keeping the raw bodies
+    for the test to look at once the check-in is done.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.posted.append((self.path, self.headers.get('Content-Encoding'), body))
+        response = json.dumps({"id": "job%d" % len(self.server.posted)}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+
+class PlainHTTPConnection(http_client.HTTPConnection):
+    def __init__(self, host, port, context=None, timeout=None):
+        http_client.HTTPConnection.__init__(self, host, port, timeout=timeout)
+
+
+@patch('rhsm.connection.drift_check', Mock(return_value=False))
+@patch('rhsm.connection.httplib.HTTPSConnection', PlainHTTPConnection)
+class HypervisorCheckInTests(unittest.TestCase):
+    def setUp(self):
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), HypervisorStandIn)
+        self.server.posted = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.cp = UEPConnection(host='127.0.0.1', ssl_port=self.server.server_address[1],
+                                username="dummy", password="dummy", handler="/candlepin",
+                                insecure=True)
+        self.cp.capabilities = ['hypervisors_async', connection.REQUEST_COMPRESSION_CAPABILITY]
+        self.report = {"hypervisors": [{"hypervisorId": {"hypervisorId": "host%d" % i},
+                                        "guestIds": [{"guestId": "%d-%d" % (i, j), "state": 1}
+                                                     for j in range(20)]}
+                                       for i in range(2000)]}
+
+    def _posted_reports(self):
+        reports = []
+        for (path, encoding, body) in self.server.posted:
+            self.assertTrue(path.startswith('/candlepin/hypervisors/owner?'))
+            if encoding == 'gzip':
+                body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+            else:
+                self.assertEqual(None, encoding)
+            reports.append(json.loads(body.decode('utf-8')))
+        return reports
+
+    def _peak_memory(self, func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_gzip(self):
+        self.assertEqual({"id": "job1"}, self.cp.hypervisorCheckIn("owner", "", self.report))
+        self.assertEqual([self.report], self._posted_reports())
+        self.assertEqual('gzip', self.server.posted[0][1])
+        self.assertTrue(len(self.server.posted[0][2]) < len(json.dumps(self.report)) / 10)
+
+    def test_no_compression_capability(self):
+        self.cp.capabilities = ['hypervisors_async']
+        self.cp.hypervisorCheckIn("owner", "", self.report)
+        self.assertEqual([self.report], self._posted_reports())
+        self.assertEqual(None, self.server.posted[0][1])
+
+    def test_split_jobs(self):
+        max_job_size = 64 * 1024
+        jobs = self.cp.hypervisorCheckIn("owner", "", self.report, max_job_size=max_job_size)
+
+        reports = self._posted_reports()
+        self.assertTrue(len(reports) > 1)
+        self.assertEqual([{"id": "job%d" % (i + 1)} for i in range(len(reports))], jobs)
+        for (path, encoding, body) in self.server.posted:
+            self.assertTrue(len(zlib.decompress(body, 16 + zlib.MAX_WBITS)) <= max_job_size)
+        self.assertEqual(self.report["hypervisors"], sum([r["hypervisors"] for r in reports], []))
+        self.assertEqual('application/json', self.cp.conn.headers['Content-type'])
+
+    def test_peak_memory(self):
+        if tracemalloc is None:
+            raise SkipTest("tracemalloc is not available")
+        json_size = len(json.dumps(self.report))
+        peak = self._peak_memory(lambda: self.cp.hypervisorCheckIn("owner", "", self.report))
+        # no copy of the whole uncompressed report is ever made:
+        self.assertTrue(peak < json_size / 2, "peak %d bytes for %d bytes of JSON" % (peak, json_size))
+
+        self.cp.capabilities = ['hypervisors_async']
+        peak = self._peak_memory(lambda: self.cp.hypervisorCheckIn("owner", "", self.report))
+        self.assertTrue(peak > json_size)
+
+
+class DictConsumerCache(object):
+    """
+    Consumer cache without expiry, as UEPConnection expects one.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, kind, uuid):
+        return self.entries.get((kind, uuid))
+
+    def set(self, kind, uuid, value):
+        self.entries[(kind, uuid)] = value
+
+    def invalidate(self):
+        self.entries = {}
+
+
+class ConsumerCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.consumer_cache = DictConsumerCache()
+        self.cp = UEPConnection(username="dummy", password="dummy", handler="/Test/",
+                                insecure=True, consumer_cache=self.consumer_cache)
+        self.cp.conn.request_get = Mock(return_value={'uuid': 'abc', 'name': 'test'})
+
+    def test_consumer_fetched_once(self):
+        self.assertEqual('test', self.cp.getConsumer('abc')['name'])
+        self.assertEqual('test', self.cp.getConsumer('abc')['name'])
+        self.cp.conn.request_get.assert_called_once_with('/consumers/abc')
+
+    def test_consumer_and_owner_cached_apart(self):
+        self.cp.getConsumer('abc')
+        self.cp.getOwner('abc')
+        self.assertEqual(2, self.cp.conn.request_get.call_count)
+        self.assertEqual('/consumers/abc/owner', self.cp.conn.request_get.call_args[0][0])
+
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_write_invalidates(self, mock_https):
+        response = mock_https.return_value.getresponse.return_value
+        response.status = 204
+        response.read.return_value = b''
+        response.getheaders.return_value = []
+        response.getheader.return_value = None
+
+        self.cp.getConsumer('abc')
+        self.cp.updateConsumer('abc', role='server')
+        self.cp.getConsumer('abc')
+        self.assertEqual(2, self.cp.conn.request_get.call_count)
+
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_read_during_write_not_kept(self, mock_https):
+        response = mock_https.return_value.getresponse.return_value
+        response.status = 204
+        response.read.return_value = b''
+        response.getheaders.return_value = []
+        response.getheader.return_value = None
+
+        def get_response():
+            # another thread reads the consumer while the update is sent:
+            self.cp.getConsumer('abc')
+            return response
+        mock_https.return_value.getresponse.side_effect = get_response
+
+        self.cp.updateConsumer('abc', role='server')
+        self.cp.getConsumer('abc')
+        self.assertEqual(2, self.cp.conn.request_get.call_count)
+
+    @patch('rhsm.connection.httplib.HTTPSConnection')
+    def test_failed_write_invalidates(self, mock_https):
+        def get_response():
+            self.cp.getConsumer('abc')
+            raise socket.error("connection reset")
+        mock_https.return_value.getresponse.side_effect = get_response
+
+        self.assertRaises(socket.error, self.cp.updateConsumer, 'abc', role='server')
+        self.cp.getConsumer('abc')
+        self.assertEqual(2, self.cp.conn.request_get.call_count)
+
+
+class ContentConnectionTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_ent_dir = mkdtemp()
+        self.v3_pair = self._write_pair("1", certdata.ENTITLEMENT_CERT_V3_0)
+        self.v1_pair = self._write_pair("2", certdata.ENTITLEMENT_CERT_V1_0)
+        self.bad_pair = self._write_pair("3", "xxxxxx\n")
+        self.cont_conn = ContentConnection(host="foobar", insecure=True)
+        self.cont_conn.ent_dir = self.temp_ent_dir
+        self.cont_conn._get_context = Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_ent_dir)
+
+    def _write_pair(self, serial, pem):
+        cert_path = os.path.join(self.temp_ent_dir, "%s.pem" % serial)
+        key_path = os.path.join(self.temp_ent_dir, "%s-key.pem" % serial)
+        with open(cert_path, 'w') as cert:
+            cert.write(pem)
+        with open(key_path, 'w') as key:
+            key.write('xxxxxx\n')
+        return (cert_path, key_path)
+
+    def _mock_connection(self, status=200, will_close=False):
+        conn = Mock()
+        response = conn.getresponse.return_value
+        response.read.return_value = b"7Server\n"
+        response.status = status
+        response.will_close = will_close
+        response.getheaders.return_value = []
+        return conn
+
+    def test_select_matching_certs(self):
+        pairs = [self.bad_pair, self.v1_pair, self.v3_pair]
+        selected = self.cont_conn._select_ent_cert_key_pairs("//foo/path/always//listing", pairs)
+        self.assertEqual([self.v3_pair, self.bad_pair, self.v1_pair], selected)
+
+        selected = self.cont_conn._select_ent_cert_key_pairs("//path/to/awesomeos/x86_64", pairs)
+        self.assertEqual([self.v1_pair, self.v3_pair, self.bad_pair], selected)
+
+        selected = self.cont_conn._select_ent_cert_key_pairs("//not/entitled/listing", pairs)
+        self.assertEqual([self.bad_pair, self.v1_pair], selected)
+
+    def test_request_skips_unentitled_certs(self):
+        conn = self._mock_connection()
+        self.cont_conn._create_connection = Mock(return_value=conn)
+        result = self.cont_conn.get_versions("/foo/path/always/listing",
+                                             [self.v1_pair, self.v3_pair])
+        self.assertEqual("7Server\n", result)
+        self.assertEqual(1, conn.request.call_count)
+        self.cont_conn._get_context.assert_called_once_with(*self.v3_pair)
+
+    def test_no_entitled_cert(self):
+        self.cont_conn._create_connection = Mock()
+        self.assertRaises(connection.NoValidEntitlement, self.cont_conn.get_versions,
+                          "/not/entitled/listing", [self.v3_pair])
+        self.assertFalse(self.cont_conn._create_connection.called)
+
+    def test_conditional_listing(self):
+        conn = self._mock_connection(status=304)
+        self.cont_conn._create_connection = Mock(return_value=conn)
+        result = self.cont_conn.get_listing("/foo/path/always/listing", [self.v3_pair],
+                                            etag='"abc"')
+        self.assertEqual(304, result["status"])
+        headers = conn.request.call_args[1]["headers"]
+        self.assertEqual('"abc"', headers["If-None-Match"])
+        self.assertFalse("If-Modified-Since" in headers)
+
+        # Without validators a 304 is not a valid answer:
+        self.assertRaises(connection.NoValidEntitlement, self.cont_conn.get_listing,
+                          "/foo/path/always/listing", [self.v3_pair])
+
+    def test_connection_reused(self):
+        conn = self._mock_connection()
+        self.cont_conn._create_connection = Mock(return_value=conn)
+        self.cont_conn.get_versions("/foo/path/always/listing", [self.v3_pair])
+        self.cont_conn.get_versions("/foo/path/never/listing", [self.v3_pair])
+        self.assertEqual(1, self.cont_conn._create_connection.call_count)
+        self.assertEqual(2, conn.request.call_count)
+
+        self.cont_conn.close()
+        conn.close.assert_called_once_with()
+
+    def test_closed_connection_not_reused(self):
+        conn = self._mock_connection(will_close=True)
+        self.cont_conn._create_connection = Mock(return_value=conn)
+        self.cont_conn.get_versions("/foo/path/always/listing", [self.v3_pair])
+        self.cont_conn.get_versions("/foo/path/always/listing", [self.v3_pair])
+        self.assertEqual(2, self.cont_conn._create_connection.call_count)
+
+    def test_stale_connection_retried(self):
+        stale = self._mock_connection()
+        fresh = self._mock_connection()
+        self.cont_conn._create_connection = Mock(side_effect=[stale, fresh])
+        self.cont_conn.get_versions("/foo/path/always/listing", [self.v3_pair])
+        stale.getresponse.side_effect = socket.error("Connection reset by peer")
+        self.assertEqual("7Server\n",
+                         self.cont_conn.get_versions("/foo/path/always/listing", [self.v3_pair]))
+        self.assertTrue(stale.close.called)
+        self.assertEqual(1, fresh.request.call_count)
+
+
 class RestlibValidateResponseTests(unittest.TestCase):
     def setUp(self):
         self.restlib = Restlib("somehost", "123", "somehandler")
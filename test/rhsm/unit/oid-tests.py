@@ -2,7 +2,7 @@ from __future__ import print_function, division, absolute_import
 
 import unittest
 
-from rhsm.certificate import OID
+from rhsm.certificate import Extensions, OID
 
 
 class OIDTests(unittest.TestCase):
@@ -32,3 +32,58 @@ class OIDTests(unittest.TestCase):
 
         # Not an OID
         self.assertFalse(self.oid.match("1.2.3.4.5.6.7"))
+
+
+class ExtensionsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ext = Extensions(dict((OID(oid), value) for (oid, value) in [
+            ("1.2.10.1", "a"),
+            ("1.2.10.2", "b"),
+            ("1.2.9.1", "c"),
+            ("1.2.9", "d"),
+            ("1.3.9.1", "e"),
+            ("2.2.10.1", "f"),
+        ]))
+
+    def _found(self, oid, *args):
+        return [(str(k), v) for (k, v) in self.ext.find(oid, *args)]
+
+    def test_get(self):
+        self.assertEqual("a", self.ext.get("1.2.10.1"))
+        self.assertEqual("d", self.ext.get(OID("1.2.9")))
+        self.assertEqual(None, self.ext.get("1.2.10"))
+        self.assertEqual("x", self.ext.get("7.7", "x"))
+
+    def test_find_wildcard(self):
+        self.assertEqual([("1.2.10.1", "a"), ("1.2.9.1", "c"), ("1.3.9.1", "e")],
+                         self._found("1.*.*.1"))
+        self.assertEqual([("1.2.10.1", "a")], self._found("1.*.*.1", 1))
+
+    def test_find_prefix(self):
+        self.assertEqual([("1.2.9", "d"), ("1.2.9.1", "c")], self._found("1.2.9."))
+        self.assertEqual([], self._found("1.4."))
+
+    def test_find_suffix(self):
+        self.assertEqual([("1.2.10.1", "a"), ("2.2.10.1", "f")], self._found(".10.1"))
+
+    def test_branch(self):
+        branch = self.ext.branch("1.2")
+        self.assertEqual(4, len(branch))
+        self.assertEqual("a", branch.get("10.1"))
+        self.assertEqual("d", branch.get("9"))
+        self.assertEqual([("10.1", "a"), ("9.1", "c")],
+                         [(str(k), v) for (k, v) in branch.find("*.1")])
+        self.assertEqual("c", branch.branch("9").get("1"))
+
+    def test_branch_wildcard(self):
+        branch = self.ext.branch("*.2")
+        self.assertEqual(dict([("10.1", "f"), ("10.2", "b"), ("9.1", "c"), ("9", "d")]),
+                         dict((str(k), v) for (k, v) in branch.items()))
+
+    def test_changes_after_lookup(self):
+        self.assertEqual(None, self.ext.get("1.2.11"))
+        self.ext[OID("1.2.11")] = "g"
+        self.assertEqual("g", self.ext.get("1.2.11"))
+        del self.ext[OID("1.2.11")]
+        self.assertEqual(None, self.ext.get("1.2.11"))
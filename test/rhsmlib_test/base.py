@@ -127,6 +127,8 @@ class DBusObjectTest(unittest.TestCase):
         use this method, you will need to call self.handler_complete_event.wait() at the end of your
         test so that the test runner itself will block until the async callback finishes.'''
 
+        # Wait for this request, not one made before it
+        self.handler_complete_event.clear()
         DBusRequestThread(kwargs={
             'proxy': proxy,
             'proxy_args': proxy_args,
@@ -18,11 +18,15 @@ try:
 except ImportError:
     import unittest
 
+import os
 import platform
+import shutil
+import tempfile
+
 import mock
 from test.fixture import open_mock
 
-from rhsmlib.facts import collector, firmware_info
+from rhsmlib.facts import collector, custom, firmware_info
 
 
 class GetArchTest(unittest.TestCase):
@@ -43,3 +47,81 @@ class GetArchTest(unittest.TestCase):
     def test_get_platform_specific_info_provider(self):
         info_provider = firmware_info.get_firmware_collector(arch=platform.machine())
         self.assertTrue(info_provider is not None)
+
+
+class FactsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = collector.FactsCache(max_age=60)
+        self.collect = mock.Mock(return_value={'a': '1'})
+
+    @mock.patch('time.time')
+    def test_static_facts_kept(self, mock_time):
+        mock_time.return_value = 1000
+        self.assertEqual({'a': '1'}, self.cache.get('static', self.collect, static=True))
+        mock_time.return_value = 100000
+        self.assertEqual({'a': '1'}, self.cache.get('static', self.collect, static=True))
+        self.assertEqual(1, self.collect.call_count)
+
+    @mock.patch('time.time')
+    def test_dynamic_facts_expire(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.get('dynamic', self.collect)
+        mock_time.return_value = 1059
+        self.cache.get('dynamic', self.collect)
+        self.assertEqual(1, self.collect.call_count)
+        mock_time.return_value = 1060
+        self.cache.get('dynamic', self.collect)
+        self.assertEqual(2, self.collect.call_count)
+
+    def test_state_change_expires(self):
+        state = mock.Mock(return_value=1)
+        self.cache.get('files', self.collect, static=True, state=state)
+        self.cache.get('files', self.collect, static=True, state=state)
+        self.assertEqual(1, self.collect.call_count)
+        state.return_value = 2
+        self.cache.get('files', self.collect, static=True, state=state)
+        self.assertEqual(2, self.collect.call_count)
+
+    def test_invalidate(self):
+        self.cache.get('static', self.collect, static=True)
+        self.cache.invalidate()
+        self.cache.get('static', self.collect, static=True)
+        self.assertEqual(2, self.collect.call_count)
+
+    def test_returns_copy(self):
+        self.cache.get('static', self.collect, static=True)['b'] = '2'
+        self.assertEqual({'a': '1'}, self.cache.get('static', self.collect, static=True))
+
+    def test_collector_without_cache(self):
+        facts_collector = collector.FactsCollector()
+        facts_collector.cached('static', self.collect, static=True)
+        facts_collector.cached('static', self.collect, static=True)
+        self.assertEqual(2, self.collect.call_count)
+
+
+class CustomFactsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.facts_dir = tempfile.mkdtemp()
+        self.facts_file = os.path.join(self.facts_dir, 'test.facts')
+        self.write_facts('{"custom.fact": "1"}', 1000)
+        self.collector = custom.CustomFactsCollector(
+            path_and_globs=[(self.facts_dir, '*.facts')],
+            facts_cache=collector.FactsCache()
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.facts_dir)
+
+    def write_facts(self, content, mtime):
+        with open(self.facts_file, 'w') as facts_file:
+            facts_file.write(content)
+        os.utime(self.facts_file, (mtime, mtime))
+
+    def test_reread_when_changed(self):
+        self.assertEqual({'custom.fact': '1'}, self.collector.get_all())
+        with mock.patch.object(self.collector, 'get_custom_facts') as mock_get:
+            self.assertEqual({'custom.fact': '1'}, self.collector.get_all())
+            self.assertFalse(mock_get.called)
+
+        self.write_facts('{"custom.fact": "2"}', 2000)
+        self.assertEqual({'custom.fact': '2'}, self.collector.get_all())
@@ -23,10 +23,12 @@ from subscription_manager import injection as inj
 from subscription_manager.identity import Identity
 from subscription_manager.cert_sorter import CertSorter
 from subscription_manager.reasons import Reasons
-from subscription_manager.certdirectory import EntitlementDirectory
+from subscription_manager.cache import EntitlementStatusCache
+from subscription_manager.certdirectory import EntitlementDirectory, ProductDirectory
 from subscription_manager.cp_provider import CPProvider
 
 from rhsm import connection
+from rhsm.certificate import GMT
 
 from rhsmlib.dbus import constants
 from rhsmlib.dbus.objects import EntitlementDBusObject
@@ -427,6 +429,11 @@ class TestEntitlementDBusObject(DBusObjectTest, InjectionMockingTest):
         self.mock_cp = mock.Mock(spec=connection.UEPConnection, name="UEPConnection").return_value
         self.mock_sorter_class = mock.Mock(spec=CertSorter, name="CertSorter")
         self.mock_ent_dir = mock.Mock(spec=EntitlementDirectory, name="EntitlementDirectory").return_value
+        self.mock_ent_dir.list.return_value = []
+        self.mock_prod_dir = mock.Mock(spec=ProductDirectory, name="ProductDirectory").return_value
+        self.mock_status_cache = mock.Mock(spec=EntitlementStatusCache, name="EntitlementStatusCache")
+        self.mock_provider = mock.Mock(spec=CPProvider, name="CPProvider")
+        self.mock_provider.get_consumer_auth_cp.return_value = self.mock_cp
 
     def injection_definitions(self, *args, **kwargs):
         if args[0] == inj.IDENTITY:
@@ -439,10 +446,12 @@ class TestEntitlementDBusObject(DBusObjectTest, InjectionMockingTest):
             return instance
         elif args[0] == inj.ENT_DIR:
             return self.mock_ent_dir
+        elif args[0] == inj.PROD_DIR:
+            return self.mock_prod_dir
+        elif args[0] == inj.ENTITLEMENT_STATUS_CACHE:
+            return self.mock_status_cache
         elif args[0] == inj.CP_PROVIDER:
-            provider = mock.Mock(spec=CPProvider, name="CPProvider")
-            provider.get_consumer_auth_cp.return_value = mock.Mock(name="MockCP")
-            return provider
+            return self.mock_provider
         else:
             return None
 
@@ -461,6 +470,87 @@ class TestEntitlementDBusObject(DBusObjectTest, InjectionMockingTest):
         dbus_method_args = ["", ""]
         self.dbus_request(assertions, self.interface.GetStatus, dbus_method_args)
 
+    def test_get_status_cached(self):
+        expected_status = {'status': 'Current', 'reasons': {}, 'valid': True}
+        expected_return = json.dumps(expected_status)
+
+        def assertions(*args):
+            self.assertEqual(expected_return, args[0])
+
+        self.mock_entitlement.get_status.return_value = expected_status
+        self.mock_status_cache.timestamp.return_value = 1000.0
+        self.mock_ent_dir.generation.return_value = (('1.pem', (1, 1000.0, 10)),)
+        self.dbus_request(assertions, self.interface.GetStatus, ["", ""])
+        self.assertEqual(1, self.mock_entitlement.get_status.call_count)
+
+        # Nothing changed, so nothing is computed or fetched again:
+        self.mock_provider.reset_mock()
+        self.mock_cp.reset_mock()
+        for i in range(3):
+            self.dbus_request(assertions, self.interface.GetStatus, ["", ""])
+        self.assertEqual(1, self.mock_entitlement.get_status.call_count)
+        self.assertEqual([], self.mock_provider.method_calls)
+        self.assertEqual([], self.mock_cp.method_calls)
+
+        # A new entitlement certificate invalidates the status:
+        self.mock_ent_dir.generation.return_value = (('1.pem', (1, 1000.0, 10)), ('2.pem', (2, 1001.0, 10)))
+        self.dbus_request(assertions, self.interface.GetStatus, ["", ""])
+        self.assertEqual(2, self.mock_entitlement.get_status.call_count)
+
+    @mock.patch('rhsmlib.dbus.constants.STATUS_MAX_AGE', 0)
+    def test_get_status_expires(self):
+        self.mock_entitlement.get_status.return_value = {'status': 'Current', 'reasons': {}, 'valid': True}
+        self.mock_status_cache.timestamp.return_value = 1000.0
+        self.mock_ent_dir.generation.return_value = ()
+        self.dbus_request(lambda *args: None, self.interface.GetStatus, ["", ""])
+        self.assertEqual(0, self.mock_entitlement.reload.call_count)
+
+        # The compliance status is fetched again once the status is due:
+        self.dbus_request(lambda *args: None, self.interface.GetStatus, ["", ""])
+        self.assertEqual(2, self.mock_entitlement.get_status.call_count)
+        self.assertEqual(1, self.mock_entitlement.reload.call_count)
+
+    def test_status_until_next_certificate_boundary(self):
+        now = datetime.datetime.now(GMT())
+        max_age = datetime.timedelta(seconds=constants.STATUS_MAX_AGE)
+        self.assertEqual(now + max_age, EntitlementDBusObject._status_until(now))
+
+        cert = mock.Mock()
+        cert.valid_range.begin.return_value = now - datetime.timedelta(days=1)
+        cert.valid_range.end.return_value = now + datetime.timedelta(minutes=1)
+        future_cert = mock.Mock()
+        future_cert.valid_range.begin.return_value = now + datetime.timedelta(minutes=2)
+        future_cert.valid_range.end.return_value = now + datetime.timedelta(days=1)
+        self.mock_ent_dir.list.return_value = [future_cert, cert]
+        self.assertEqual(now + datetime.timedelta(minutes=1), EntitlementDBusObject._status_until(now))
+
+    def test_status_changed(self):
+        entitlement_object = self.server_thread.server.object_map["EntitlementDBusObject"]
+        status_changed_patcher = mock.patch.object(entitlement_object, 'StatusChanged')
+        status_changed = status_changed_patcher.start()
+        self.addCleanup(status_changed_patcher.stop)
+
+        self.mock_entitlement.get_status.return_value = {'status': 'Current', 'reasons': {}, 'valid': True}
+        self.mock_status_cache.timestamp.return_value = 1000.0
+        self.mock_ent_dir.generation.return_value = ()
+        self.dbus_request(lambda *args: None, self.interface.GetStatus, ["", ""])
+
+        # Nothing changed:
+        entitlement_object.check_status()
+        self.assertEqual(1, self.mock_entitlement.get_status.call_count)
+
+        # Same status after a change:
+        self.mock_status_cache.timestamp.return_value = 1001.0
+        entitlement_object.check_status()
+        self.assertEqual(2, self.mock_entitlement.get_status.call_count)
+        self.assertEqual(0, status_changed.call_count)
+
+        expected_status = {'status': 'Invalid', 'reasons': {'1': 'Not supported'}, 'valid': False}
+        self.mock_entitlement.get_status.return_value = expected_status
+        self.mock_status_cache.timestamp.return_value = 1002.0
+        entitlement_object.check_status()
+        status_changed.assert_called_once_with(json.dumps(expected_status))
+
     def test_remove_entitlement_by_serial(self):
         """
         Test of D-Bus object for removing entitlements by serial number.
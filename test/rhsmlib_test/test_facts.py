@@ -46,3 +46,14 @@ class TestFactsDBusObject(DBusObjectTest):
 
         with self.assertRaises(dbus.exceptions.DBusException):
             self.dbus_request(assertions, self.interface.MissingMethod)
+
+    def test_refresh(self):
+        def assertions(*args):
+            result = args[0]
+            self.assertIn("uname.machine", result)
+
+        def refreshed(*args):
+            pass
+
+        self.dbus_request(refreshed, self.interface.Refresh)
+        self.dbus_request(assertions, self.interface.GetFacts)
@@ -17,8 +17,12 @@ from rhsmlib import file_monitor
 from six.moves import configparser
 from mock import Mock, patch
 from test import fixture
-from threading import Thread
+from threading import Event, Thread
+import os
+import shutil
 import subprocess
+import tempfile
+import time
 
 
 class TestFilesystemWatcher(fixture.SubManFixture):
@@ -34,7 +38,7 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         self.dw3 = file_monitor.DirectoryWatch(self.testpath2, [self.mock_cb1, self.mock_cb2], is_glob=False)
         self.dir_list = [self.dw1, self.dw2, self.dw3]
         self.fsw1 = file_monitor.FilesystemWatcher(self.dir_list)
-        self.fsw2 = file_monitor.InotifyFilesystemWatcher(self.dir_list)
+        self.fsw2 = file_monitor.InotifyFilesystemWatcher(self.dir_list, debounce=0)
 
     def tearDown(self):
         super(TestFilesystemWatcher, self).tearDown()
@@ -46,9 +50,9 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         Tests that create_filesystem_watcher returns the correct object
 
         create_filesystem_watcher should return an inotify filesystem watcher if
-        pyinotify is available and configured, and a polling filesystem watcher otherwise
-        :param mock_config: mock of whether pyinotify is configured or not according to is_inotify_config()
-        :param mock_avail: mock of whether pyinotify is available or not according to is_inotify_avail()
+        inotify is available and configured, and a polling filesystem watcher otherwise
+        :param mock_config: mock of whether inotify is configured or not according to is_inotify_config()
+        :param mock_avail: mock of whether inotify is available or not according to is_inotify_avail()
         :return:
         """
         mock_config.return_value = True
@@ -68,7 +72,7 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         fsw = file_monitor.create_filesystem_watcher(self.dir_list)
         self.assertIsInstance(fsw, file_monitor.FilesystemWatcher)
 
-    @patch("rhsmlib.file_monitor.pyinotify", new=None)
+    @patch("rhsmlib.file_monitor.libc", new=None)
     def test_inotify_None(self):
         self.assertFalse(file_monitor.is_inotify_available())
 
@@ -93,6 +97,17 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         mock_config.__getitem__.return_value.get_int.return_value = None
         self.assertTrue(file_monitor.is_inotify_config())
 
+    @patch("rhsmlib.file_monitor.conf")
+    def test_inotify_debounce(self, mock_config):
+        mock_config.__getitem__.return_value.get_int.return_value = 1000
+        self.assertEqual(1000, file_monitor.get_inotify_debounce())
+        mock_config.__getitem__.return_value.get_int.return_value = -1
+        self.assertEqual(file_monitor.DEFAULT_DEBOUNCE, file_monitor.get_inotify_debounce())
+        mock_config.__getitem__.return_value.get_int.return_value = None
+        self.assertEqual(file_monitor.DEFAULT_DEBOUNCE, file_monitor.get_inotify_debounce())
+        mock_config.__getitem__.return_value.get_int.side_effect = ValueError("bees?")
+        self.assertEqual(file_monitor.DEFAULT_DEBOUNCE, file_monitor.get_inotify_debounce())
+
     def test_polling_stop_value_change(self):
         self.assertFalse(self.fsw1.should_stop)
         self.fsw1.stop()
@@ -161,16 +176,18 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         self.fsw2.loop()
 
     @patch("rhsmlib.file_monitor.DirectoryWatch.notify")
-    @patch("pyinotify.Event")
-    def test_handle_event(self, mock_event, mock_notify):
+    def test_handle_event(self, mock_notify):
+        mock_event = Mock()
         mock_event.path = self.testpath1
         mock_event.pathname = self.testpath1
         mock_event.mask = self.dw3.IN_MODIFY
         self.fsw2.handle_event(mock_event)
+        self.fsw2.notify_pending()
         self.assertEqual(mock_notify.call_count, 1)
         mock_notify.call_count = 0
         mock_event.mask = 0
         self.fsw2.handle_event(mock_event)
+        self.fsw2.notify_pending()
         self.assertEqual(mock_notify.call_count, 0)
         mock_notify.call_count = 0
 
@@ -178,10 +195,12 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         mock_event.pathname = self.testpath2
         mock_event.mask = self.dw3.IN_MODIFY
         self.fsw2.handle_event(mock_event)
+        self.fsw2.notify_pending()
         self.assertEqual(mock_notify.call_count, 2)
         mock_notify.call_count = 0
         mock_event.mask = 0
         self.fsw2.handle_event(mock_event)
+        self.fsw2.notify_pending()
         self.assertEqual(mock_notify.call_count, 0)
         mock_notify.call_count = 0
 
@@ -189,12 +208,102 @@ class TestFilesystemWatcher(fixture.SubManFixture):
         mock_event.pathname = self.testpath3
         mock_event.mask = self.dw3.IN_MODIFY
         self.fsw2.handle_event(mock_event)
+        self.fsw2.notify_pending()
         self.assertEqual(mock_notify.call_count, 0)
         mock_notify.call_count = 0
         mock_event.mask = 0
         self.fsw2.handle_event(mock_event)
+        self.fsw2.notify_pending()
         self.assertEqual(mock_notify.call_count, 0)
 
+    @patch("rhsmlib.file_monitor.DirectoryWatch.notify")
+    def test_handle_event_debounced(self, mock_notify):
+        fsw = file_monitor.InotifyFilesystemWatcher(self.dir_list, debounce=60 * 1000)
+        event = file_monitor.InotifyEvent(self.testpath1, self.testpath1, file_monitor.IN_MODIFY)
+        fsw.handle_event(event)
+        fsw.handle_event(event)
+        self.assertEqual(set(), fsw.notify_pending())
+        self.assertEqual(0, mock_notify.call_count)
+        self.assertTrue(fsw.timeout() <= file_monitor.LOOP_TIMEOUT)
+
+        fsw.pending[self.dw1] = 0
+        self.assertEqual({self.dw1}, fsw.notify_pending())
+        self.assertEqual(1, mock_notify.call_count)
+        self.assertEqual({}, fsw.pending)
+
+    @patch("rhsmlib.file_monitor.DirectoryWatch.notify")
+    def test_handle_event_overflow(self, mock_notify):
+        self.fsw2.handle_event(file_monitor.InotifyEvent(None, None, file_monitor.IN_Q_OVERFLOW))
+        self.assertEqual({self.dw1, self.dw2, self.dw3}, self.fsw2.notify_pending())
+
+
+class TestInotifyFilesystemWatcher(fixture.SubManFixture):
+    def setUp(self):
+        super(TestInotifyFilesystemWatcher, self).setUp()
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.reloads = []
+        self.dir_watch = file_monitor.DirectoryWatch(self.path, [lambda: self.reloads.append(time.time())])
+        self.fsw = file_monitor.InotifyFilesystemWatcher([self.dir_watch], debounce=200)
+
+    def start(self):
+        started = Event()
+
+        def loop_cb():
+            started.set()
+            return False
+
+        thread = Thread(target=self.fsw.loop, args=(loop_cb,))
+        thread.start()
+
+        def stop():
+            self.fsw.stop()
+            thread.join(5.0)
+        self.addCleanup(stop)
+        self.assertTrue(started.wait(5.0))
+
+    def wait_for_reloads(self, count):
+        deadline = time.time() + 5.0
+        while len(self.reloads) < count and time.time() < deadline:
+            time.sleep(0.05)
+        # and for any more that would come after them:
+        time.sleep(0.5)
+
+    def test_inotify_events(self):
+        inotify = file_monitor.Inotify()
+        self.addCleanup(inotify.close)
+        inotify.add_watch(self.path, file_monitor.IN_MODIFY | file_monitor.IN_MOVED_TO)
+        self.assertEqual([], inotify.read_events(0))
+
+        with open(os.path.join(self.path, "1.pem.tmp"), "w") as cert:
+            cert.write("cert")
+        os.rename(os.path.join(self.path, "1.pem.tmp"), os.path.join(self.path, "1.pem"))
+        events = inotify.read_events(1.0)
+        self.assertEqual([self.path] * 2, [event.path for event in events])
+        self.assertEqual([os.path.join(self.path, "1.pem.tmp"), os.path.join(self.path, "1.pem")],
+                         [event.pathname for event in events])
+        self.assertTrue(events[0].mask & file_monitor.IN_MODIFY)
+        self.assertTrue(events[1].mask & file_monitor.IN_MOVED_TO)
+
+    def test_add_watch_missing_path(self):
+        inotify = file_monitor.Inotify()
+        self.addCleanup(inotify.close)
+        self.assertRaises(OSError, inotify.add_watch, os.path.join(self.path, "missing"),
+                          file_monitor.IN_MODIFY)
+
+    def test_burst_of_writes_notifies_once(self):
+        self.start()
+        for serial in range(500):
+            with open(os.path.join(self.path, "%d.pem" % serial), "w") as cert:
+                cert.write("cert %d" % serial)
+        self.wait_for_reloads(1)
+        self.assertEqual(1, len(self.reloads))
+
+        # a later change is a new burst:
+        os.remove(os.path.join(self.path, "0.pem"))
+        self.wait_for_reloads(2)
+        self.assertEqual(2, len(self.reloads))
+
 
 class TestDirectoryWatch(fixture.SubManFixture):
     def setUp(self):
@@ -214,8 +323,8 @@ class TestDirectoryWatch(fixture.SubManFixture):
         self.mock_cb1.assert_called_once()
         self.mock_cb2.assert_called_once()
 
-    @patch("pyinotify.Event")
-    def test_paths_match(self, mock_event):
+    def test_paths_match(self):
+        mock_event = Mock()
         mock_event.path = self.testpath2
         mock_event.pathname = self.testpath2
         self.assertTrue(self.dw3.paths_match(mock_event.path, mock_event.pathname))
@@ -227,8 +336,8 @@ class TestDirectoryWatch(fixture.SubManFixture):
         mock_event.pathname = self.testpath1
         self.assertFalse(self.dw3.paths_match(mock_event.path, mock_event.pathname))
 
-    @patch("pyinotify.Event")
-    def test_file_modified(self, mock_event):
+    def test_file_modified(self):
+        mock_event = Mock()
         mock_event.mask = 1
         self.assertFalse(self.dw3.file_modified(mock_event.mask))
         mock_event.mask = 2
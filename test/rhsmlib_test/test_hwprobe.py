@@ -18,6 +18,11 @@ try:
 except ImportError:
     import unittest
 
+import os
+import shutil
+import tempfile
+import time
+
 import six
 
 from mock import patch
@@ -26,7 +31,7 @@ from mock import mock_open
 
 import test.fixture
 from test.fixture import OPEN_FUNCTION
-from rhsmlib.facts import hwprobe
+from rhsmlib.facts import collector, hwprobe
 
 PROC_BONDING_RR = """Ethernet Channel Bonding Driver: v3.6.0 (September 26, 2009)
 
@@ -190,9 +195,18 @@ class HardwareProbeTest(test.fixture.SubManFixture):
             Mock(return_value=True)
         )
         self.hw_check_topo_patcher.start()
+        # These tests cover the per CPU topology detection, which is used
+        # when the bulk SysCpuTopology can not describe the topology.
+        self.read_topo_patcher = patch.object(
+            self.hw_check_topo,
+            'read_cpu_topology',
+            Mock(return_value=Mock(complete=False))
+        )
+        self.read_topo_patcher.start()
         super(HardwareProbeTest, self).setUp()
 
     def tearDown(self):
+        self.read_topo_patcher.stop()
         self.hw_check_topo_patcher.stop()
         super(HardwareProbeTest, self).tearDown()
 
@@ -703,6 +717,24 @@ class HardwareProbeTest(test.fixture.SubManFixture):
             }
             self.assert_equal_dict(expected, self.hw_check_topo.get_cpu_info())
 
+    def test_facts_cache_keeps_static_facts(self):
+        static_method = Mock(return_value={'cpu.cpu(s)': '4'})
+        dynamic_method = Mock(return_value={'memory.memfree': '1024'})
+        hw = hwprobe.HardwareCollector(facts_cache=collector.FactsCache())
+        hw.hardware_methods = [static_method, dynamic_method]
+        hw.static_hardware_methods = [static_method]
+
+        expected = {'cpu.cpu(s)': '4', 'memory.memfree': '1024'}
+        self.assertEqual(expected, hw.get_all())
+        self.assertEqual(expected, hw.get_all())
+        self.assertEqual(1, static_method.call_count)
+        self.assertEqual(1, dynamic_method.call_count)
+
+        hw.facts_cache.invalidate('hardware.dynamic')
+        hw.get_all()
+        self.assertEqual(1, static_method.call_count)
+        self.assertEqual(2, dynamic_method.call_count)
+
 
 class TestLscpu(unittest.TestCase):
     @patch('os.environ', {
@@ -718,3 +750,163 @@ class TestLscpu(unittest.TestCase):
         for key, value in facts.items():
             key.encode('ascii')
             value.encode('ascii')
+
+
+def format_cpu_list(cpus):
+    """Formats CPU numbers the way sysfs lists them, like 0-3,8-11"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join('%d' % start if start == end else '%d-%d' % (start, end)
+                    for (start, end) in ranges)
+
+
+def make_fake_sysfs(root, sockets, cores, threads, nodes=1):
+    """
+    Creates the sysfs CPU and NUMA node files of a host with the given
+    number of sockets, cores per socket and threads per core. Like Linux
+    does on x86, the second thread of every core is numbered after all of
+    the first threads, and each socket is a NUMA node of its own when there
+    are as many nodes as sockets.
+    """
+    def write(path, content):
+        path = os.path.join(root, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as sys_file:
+            sys_file.write(content + '\n')
+
+    cpu_count = sockets * cores * threads
+
+    def cpu_number(socket, core, thread):
+        return thread * sockets * cores + socket * cores + core
+
+    write('sys/devices/system/cpu/online', format_cpu_list(range(cpu_count)))
+    for socket in range(sockets):
+        socket_cpus = [cpu_number(socket, core, thread)
+                       for core in range(cores) for thread in range(threads)]
+        for core in range(cores):
+            core_cpus = [cpu_number(socket, core, thread) for thread in range(threads)]
+            for cpu in core_cpus:
+                topology = 'sys/devices/system/cpu/cpu%d/topology/' % cpu
+                write(topology + 'core_siblings_list', format_cpu_list(socket_cpus))
+                write(topology + 'thread_siblings_list', format_cpu_list(core_cpus))
+
+    write('sys/devices/system/node/online', format_cpu_list(range(nodes)))
+    for node in range(nodes):
+        node_cpus = [cpu for cpu in range(cpu_count)
+                     if (cpu % (sockets * cores)) // cores % nodes == node]
+        write('sys/devices/system/node/node%d/cpulist' % node, format_cpu_list(node_cpus))
+
+
+class SysCpuTopologyTest(unittest.TestCase):
+    # name -> (sockets, cores per socket, threads per core, NUMA nodes)
+    LAYOUTS = {
+        '1cpu': (1, 1, 1, 1),
+        '64cpu': (2, 16, 2, 2),
+        '1024cpu': (4, 128, 2, 4),
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sysfs_root = tempfile.mkdtemp()
+        for (name, layout) in cls.LAYOUTS.items():
+            make_fake_sysfs(os.path.join(cls.sysfs_root, name), *layout)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.sysfs_root)
+
+    def collector(self, name):
+        return hwprobe.HardwareCollector(arch='x86_64', prefix=os.path.join(self.sysfs_root, name))
+
+    def assert_cpu_info(self, name):
+        (sockets, cores, threads, nodes) = self.LAYOUTS[name]
+        expected = {
+            'cpu.cpu(s)': sockets * cores * threads,
+            'cpu.cpu_socket(s)': sockets,
+            'cpu.core(s)_per_socket': cores,
+            'cpu.thread(s)_per_core': threads,
+            'cpu.topology_source': 'kernel /sys cpu sibling lists',
+        }
+        hw = self.collector(name)
+        with patch(OPEN_FUNCTION, side_effect=open) as mock_open_file:
+            self.assertEqual(expected, hw.get_cpu_info())
+        # the online file, then both sibling lists of one CPU per socket
+        self.assertEqual(1 + 2 * sockets, mock_open_file.call_count)
+
+    def test_1cpu(self):
+        self.assert_cpu_info('1cpu')
+
+    def test_64cpu(self):
+        self.assert_cpu_info('64cpu')
+
+    def test_1024cpu(self):
+        self.assert_cpu_info('1024cpu')
+
+    def test_1024cpu_time(self):
+        hw = self.collector('1024cpu')
+        start = time.time()
+        for i in range(10):
+            hw.get_cpu_info()
+        self.assertTrue((time.time() - start) / 10 < 0.05)
+
+    @patch('os.access', Mock(return_value=True))
+    @patch('rhsmlib.facts.hwprobe.compat_check_output')
+    def test_lscpu_run_for_small_hosts(self, mock_check_output):
+        mock_check_output.return_value = "Socket(s): 2\n"
+        self.assertEqual({'lscpu.socket(s)': '2'}, self.collector('64cpu').get_ls_cpu_info())
+        self.assertTrue(mock_check_output.called)
+
+    @patch('rhsmlib.facts.hwprobe.compat_check_output')
+    def test_lscpu_skipped_for_big_hosts(self, mock_check_output):
+        lscpu_info = self.collector('1024cpu').get_ls_cpu_info()
+        self.assertFalse(mock_check_output.called)
+        expected = {
+            'lscpu.architecture': 'x86_64',
+            'lscpu.cpu(s)': '1024',
+            'lscpu.on-line_cpu(s)_list': '0-1023',
+            'lscpu.thread(s)_per_core': '2',
+            'lscpu.core(s)_per_socket': '128',
+            'lscpu.socket(s)': '4',
+            'lscpu.numa_node(s)': '4',
+            'lscpu.numa_node0_cpu(s)': '0-127,512-639',
+            'lscpu.numa_node1_cpu(s)': '128-255,640-767',
+            'lscpu.numa_node2_cpu(s)': '256-383,768-895',
+            'lscpu.numa_node3_cpu(s)': '384-511,896-1023',
+        }
+        self.assertEqual(expected, lscpu_info)
+
+    def test_incomplete_without_online(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        make_fake_sysfs(root, 1, 2, 2)
+        os.unlink(os.path.join(root, 'sys/devices/system/cpu/online'))
+        self.assertFalse(hwprobe.SysCpuTopology(os.path.join(root, 'sys/devices/system/cpu'),
+                                                os.path.join(root, 'sys/devices/system/node')).complete)
+
+    def test_incomplete_uneven_sockets(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        make_fake_sysfs(root, 2, 2, 1)
+        # a socket with one core offline
+        with open(os.path.join(root, 'sys/devices/system/cpu/online'), 'w') as online:
+            online.write('0-2\n')
+        with open(os.path.join(root, 'sys/devices/system/cpu/cpu2/topology/core_siblings_list'), 'w') as siblings:
+            siblings.write('2\n')
+        topology = hwprobe.SysCpuTopology(os.path.join(root, 'sys/devices/system/cpu'),
+                                          os.path.join(root, 'sys/devices/system/node'))
+        self.assertFalse(topology.complete)
+
+    def test_incomplete_with_books(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        make_fake_sysfs(root, 1, 2, 1)
+        with open(os.path.join(root, 'sys/devices/system/cpu/cpu0/topology/book_siblings_list'), 'w') as books:
+            books.write('0-1\n')
+        topology = hwprobe.SysCpuTopology(os.path.join(root, 'sys/devices/system/cpu'),
+                                          os.path.join(root, 'sys/devices/system/node'))
+        self.assertFalse(topology.complete)
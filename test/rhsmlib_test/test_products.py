@@ -225,21 +225,22 @@ class TestProductService(InjectionMockingTest):
     def test_list_installed_products_without_filter(self):
         self.mock_cp.getConsumer.return_value = CONTENT_JSON
         self.mock_cert_sorter.reasons = mock.Mock()
-        self.mock_cert_sorter.reasons.get_product_reasons = mock.Mock(return_value=[])
+        self.mock_cert_sorter.reasons.get_product_reasons_map = mock.Mock(return_value={})
         self.mock_cert_sorter.get_status = mock.Mock(return_value="subscribed")
         # Mock methods in calculator
-        self.mock_calculator.calculate = mock.Mock()
+        date_range = mock.Mock()
 
-        self.mock_calculator.calculate.return_value.begin = mock.Mock()
-        self.mock_calculator.calculate.return_value.begin.return_value.astimezone = mock.Mock()
-        self.mock_calculator.calculate.return_value.begin.return_value.astimezone.return_value.strftime = mock.Mock(
+        date_range.begin = mock.Mock()
+        date_range.begin.return_value.astimezone = mock.Mock()
+        date_range.begin.return_value.astimezone.return_value.strftime = mock.Mock(
             return_value='{d.day}.{d.month}.{d.year}'.format(d=START_DATE)
         )
-        self.mock_calculator.calculate.return_value.end = mock.Mock()
-        self.mock_calculator.calculate.return_value.end.return_value.astimezone = mock.Mock()
-        self.mock_calculator.calculate.return_value.end.return_value.astimezone.return_value.strftime = mock.Mock(
+        date_range.end = mock.Mock()
+        date_range.end.return_value.astimezone = mock.Mock()
+        date_range.end.return_value.astimezone.return_value.strftime = mock.Mock(
             return_value='{d.day}.{d.month}.{d.year}'.format(d=END_DATE)
         )
+        self.mock_calculator.calculate_all = mock.Mock(return_value={'69': date_range, '70': date_range})
 
         expected_result = [
             (
@@ -276,21 +277,22 @@ class TestProductService(InjectionMockingTest):
     def test_list_installed_products_with_filter(self):
         self.mock_cp.getConsumer.return_value = CONTENT_JSON
         self.mock_cert_sorter.reasons = mock.Mock()
-        self.mock_cert_sorter.reasons.get_product_reasons = mock.Mock(return_value=[])
+        self.mock_cert_sorter.reasons.get_product_reasons_map = mock.Mock(return_value={})
         self.mock_cert_sorter.get_status = mock.Mock(return_value="subscribed")
         # Mock methods in calculator
-        self.mock_calculator.calculate = mock.Mock()
+        date_range = mock.Mock()
 
-        self.mock_calculator.calculate.return_value.begin = mock.Mock()
-        self.mock_calculator.calculate.return_value.begin.return_value.astimezone = mock.Mock()
-        self.mock_calculator.calculate.return_value.begin.return_value.astimezone.return_value.strftime = mock.Mock(
+        date_range.begin = mock.Mock()
+        date_range.begin.return_value.astimezone = mock.Mock()
+        date_range.begin.return_value.astimezone.return_value.strftime = mock.Mock(
             return_value='{d.day}.{d.month}.{d.year}'.format(d=START_DATE)
         )
-        self.mock_calculator.calculate.return_value.end = mock.Mock()
-        self.mock_calculator.calculate.return_value.end.return_value.astimezone = mock.Mock()
-        self.mock_calculator.calculate.return_value.end.return_value.astimezone.return_value.strftime = mock.Mock(
+        date_range.end = mock.Mock()
+        date_range.end.return_value.astimezone = mock.Mock()
+        date_range.end.return_value.astimezone.return_value.strftime = mock.Mock(
             return_value='{d.day}.{d.month}.{d.year}'.format(d=END_DATE)
         )
+        self.mock_calculator.calculate_all = mock.Mock(return_value={'69': date_range, '70': date_range})
 
         expected_result = [
             (
@@ -0,0 +1,238 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from rhsmlib.facts import dmiinfo, smbios
+
+# SMBIOS tables in the format of /sys/firmware/dmi/tables, each with the
+# facts collected from them in expected_facts.json. These tables are built
+# by hand after the machines they are named for, and their expected facts
+# come from this decoder, so they only guard against regressions. They are
+# no proof of parity with dmidecode, which is why decoding them is off by
+# default; that needs real captures and python-dmidecode's facts for them.
+SMBIOS_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "smbios")
+
+
+class SmbiosDecodeTest(unittest.TestCase):
+    def assert_facts(self, name):
+        tables_dir = os.path.join(SMBIOS_DATA_DIR, name)
+        with open(os.path.join(tables_dir, "expected_facts.json")) as expected_file:
+            expected = json.load(expected_file)
+
+        dmi_collector = dmiinfo.DmiFirmwareInfoCollector()
+        dmi_collector.smbios_dir = tables_dir
+        dmi_collector.use_smbios = True
+        with mock.patch.object(dmi_collector, 'get_all_dmidecode') as mock_dmidecode:
+            self.assertEqual(expected, dmi_collector.get_all())
+            self.assertFalse(mock_dmidecode.called)
+
+    def test_dell_smbios_2_5(self):
+        self.assert_facts("dell-precision-t5400")
+
+    def test_kvm_smbios_2_8(self):
+        self.assert_facts("kvm-rhel7")
+
+    def test_hpe_smbios_3_1(self):
+        self.assert_facts("hpe-proliant-dl380-gen10")
+
+    def test_same_facts_twice(self):
+        dmi_collector = dmiinfo.DmiFirmwareInfoCollector()
+        dmi_collector.smbios_dir = os.path.join(SMBIOS_DATA_DIR, "dell-precision-t5400")
+        dmi_collector.use_smbios = True
+        self.assertEqual(dmi_collector.get_all(), dmi_collector.get_all())
+
+    @mock.patch('rhsmlib.facts.dmiinfo.initConfig')
+    def test_disabled_by_default(self, mock_config):
+        mock_config.return_value.get_int.return_value = None
+        dmi_collector = dmiinfo.DmiFirmwareInfoCollector()
+        dmi_collector.smbios_dir = os.path.join(SMBIOS_DATA_DIR, "kvm-rhel7")
+        with mock.patch.object(dmi_collector, 'get_all_dmidecode') as mock_dmidecode:
+            mock_dmidecode.return_value = {'dmi.bios.vendor': 'dmidecode'}
+            self.assertEqual({'dmi.bios.vendor': 'dmidecode'}, dmi_collector.get_all())
+        mock_config.return_value.get_int.assert_called_with('rhsm', 'read_smbios_tables')
+
+
+class SmbiosFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.tables_dir = tempfile.mkdtemp()
+        self.dmi_collector = dmiinfo.DmiFirmwareInfoCollector()
+        self.dmi_collector.smbios_dir = self.tables_dir
+        self.dmi_collector.use_smbios = True
+        patcher = mock.patch.object(self.dmi_collector, 'get_all_dmidecode')
+        self.mock_dmidecode = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_dmidecode.return_value = {'dmi.bios.vendor': 'dmidecode'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tables_dir)
+
+    def write_tables(self, entry_point, table):
+        with open(os.path.join(self.tables_dir, smbios.ENTRY_POINT_FILE), 'wb') as entry_point_file:
+            entry_point_file.write(entry_point)
+        with open(os.path.join(self.tables_dir, smbios.TABLE_FILE), 'wb') as table_file:
+            table_file.write(table)
+
+    def test_unreadable_tables(self):
+        self.assertEqual({'dmi.bios.vendor': 'dmidecode'}, self.dmi_collector.get_all())
+        self.assertFalse(smbios.tables_readable(self.tables_dir))
+
+    def test_unknown_entry_point(self):
+        self.write_tables(b'_XX_' + b'\0' * 27, b'\x7f\x04\xff\xfe\0\0')
+        self.assertEqual({'dmi.bios.vendor': 'dmidecode'}, self.dmi_collector.get_all())
+
+    def test_broken_table(self):
+        with open(os.path.join(SMBIOS_DATA_DIR, "kvm-rhel7", "smbios_entry_point"), 'rb') as ep:
+            entry_point = ep.read()
+        # A structure claiming to be longer than the table:
+        self.write_tables(entry_point, b'\x00\x40\x00\x00\x01\x02')
+        self.assertEqual({'dmi.bios.vendor': 'dmidecode'}, self.dmi_collector.get_all())
+
+    def test_dump_file_uses_dmidecode(self):
+        self.dmi_collector.dump_file = os.path.join(self.tables_dir, dmiinfo.FIRMWARE_DUMP_FILENAME)
+        self.dmi_collector.smbios_dir = os.path.join(SMBIOS_DATA_DIR, "kvm-rhel7")
+        self.assertEqual({'dmi.bios.vendor': 'dmidecode'}, self.dmi_collector.get_all())
+
+
+class ParseEntryPointTest(unittest.TestCase):
+    def test_smbios_2(self):
+        self.assertEqual((2, 8), smbios.parse_entry_point(b'_SM_\0\x1f\x02\x08' + b'\0' * 23))
+
+    def test_smbios_2_bogus_minor(self):
+        self.assertEqual((2, 3), smbios.parse_entry_point(b'_SM_\0\x1f\x02\x21' + b'\0' * 23))
+
+    def test_smbios_3(self):
+        self.assertEqual((3, 2), smbios.parse_entry_point(b'_SM3_\0\x18\x03\x02' + b'\0' * 15))
+
+    def test_unknown(self):
+        self.assertRaises(smbios.SmbiosError, smbios.parse_entry_point, b'garbage')
+
+
+class DecodeStructureTest(unittest.TestCase):
+    def processor(self, family, manufacturer=b'Intel', family_2=0):
+        # The formatted area up to the Processor Family 2 field:
+        data = bytearray(0x2a)
+        data[0x00:0x02] = b'\x04\x2a'
+        (data[0x06], data[0x07]) = (family, 1)
+        data[0x28:0x2a] = bytearray([family_2 & 0xff, family_2 >> 8])
+        return smbios.Structure(4, 0x0400, data, [manufacturer.decode('ascii')])
+
+    def family(self, structure, version=(3, 1)):
+        return smbios.decode_processor(structure, version)['Family']
+
+    def test_processor_families(self):
+        self.assertEqual(u'80486', self.family(self.processor(0x06)))
+        self.assertEqual(u'FX', self.family(self.processor(0x3f)))
+        self.assertEqual(u'Multi-Core Xeon 7400', self.family(self.processor(0xaf)))
+        self.assertEqual(u'RV64', self.family(self.processor(0xfe, family_2=0x201)))
+        self.assertEqual(u'<OUT OF SPEC>', self.family(self.processor(0x16)))
+
+    def test_processor_family_pentium_pro(self):
+        self.assertEqual(u'Pentium Pro', self.family(self.processor(0x30), (2, 0)))
+        self.assertEqual(u'Alpha', self.family(self.processor(0x30), (2, 1)))
+        self.assertEqual(u'Alpha', self.family(self.processor(0x30, b'DEC'), (2, 0)))
+
+    def test_processor_family_core_2_or_k7(self):
+        self.assertEqual(u'Core 2', self.family(self.processor(0xbe, b'GenuineIntel')))
+        self.assertEqual(u'K7', self.family(self.processor(0xbe, b'Advanced Micro Devices (AMD)')))
+        self.assertEqual(u'Core 2 or K7', self.family(self.processor(0xbe, b'Unknown')))
+
+    def test_bios_language(self):
+        data = bytearray(0x16)
+        data[0x00:0x02] = b'\x0d\x16'
+        (data[0x04], data[0x05], data[0x15]) = (2, 0x01, 2)
+        structure = smbios.Structure(13, 0x0d00, data, [u'enUS', u'frFR'])
+        self.assertEqual({
+            'Installable Languages': [u'enUS', u'frFR'],
+            'Currently Installed Language': u'frFR',
+            'Language Description Format': u'Abbreviated',
+        }, smbios.decode_bios_language(structure, (2, 8)))
+        self.assertNotIn('Language Description Format', smbios.decode_bios_language(structure, (2, 0)))
+
+    def test_onboard_device(self):
+        structure = smbios.Structure(41, 0x2900, bytearray(b'\x29\x0b\x00\x29\x01\x09\x02\x01\x00\x3b\x0a'),
+                                     [u'Embedded SATA Controller #2'])
+        self.assertEqual({
+            'Reference Designation': u'Embedded SATA Controller #2',
+            'Type': u'SATA Controller',
+            'Status': u'Disabled',
+            'Type Instance': u'2',
+            'Bus Address': u'0001:3b:01.2',
+        }, smbios.decode_onboard_device(structure, (3, 1)))
+
+    def test_onboard_device_without_bus_address(self):
+        structure = smbios.Structure(41, 0x2900, bytearray(b'\x29\x0b\x00\x29\x01\x85\x01\xff\xff\xff\xff'),
+                                     [u'NIC'])
+        self.assertNotIn('Bus Address', smbios.decode_onboard_device(structure, (3, 1)))
+
+    def test_memory_module(self):
+        structure = smbios.Structure(6, 0x0600, bytearray(b'\x06\x0c\x00\x06\x01\xf1\x46\x00\x01\x8b\x0b\x00'),
+                                     [u'DIMM1'])
+        self.assertEqual({
+            'Socket Designation': u'DIMM1',
+            'Bank Connections': u'1',
+            'Current Speed': u'70 ns',
+            'Installed Size': u'2048 MB (Double-bank Connection)',
+            'Enabled Size': u'2048 MB (Single-bank Connection)',
+            'Error Status': u'OK',
+        }, smbios.decode_memory_module(structure, (2, 0)))
+
+    def test_onboard_devices(self):
+        structure = smbios.Structure(10, 0x0a00, bytearray(b'\x0a\x08\x00\x0a\x83\x01\x05\x02'),
+                                     [u'Onboard VGA', u'Onboard LAN'])
+        self.assertEqual({
+            'Type': u'Ethernet',
+            'Status': u'Disabled',
+            'Description': u'Onboard LAN',
+        }, smbios.decode_onboard_devices(structure, (2, 5)))
+
+    def test_system_reset(self):
+        structure = smbios.Structure(23, 0x1700, bytearray(b'\x17\x0d\x00\x17\x23\xff\xff\x05\x00\x0a\x00\xff\xff'),
+                                     [])
+        self.assertEqual({
+            'Status': u'Enabled',
+            'Watchdog Timer': u'Present',
+            'Boot Option': u'Operating System',
+            'Boot Option On Limit': u'Reserved',
+            'Reset Count': u'Unknown',
+            'Reset Limit': u'5',
+            'Timer Interval': u'10 min',
+            'Timeout': u'Unknown',
+        }, smbios.decode_system_reset(structure, (2, 5)))
+
+    def test_every_group_type_decoded(self):
+        for dmi_types in smbios.GROUPS.values():
+            for dmi_type in dmi_types:
+                self.assertIn(dmi_type, smbios.DECODERS)
+
+    def test_undecoded_type(self):
+        with open(os.path.join(SMBIOS_DATA_DIR, "kvm-rhel7", "smbios_entry_point"), 'rb') as ep:
+            entry_point = ep.read()
+        table = b'\x17\x0d\x00\x17' + b'\0' * 9 + b'\0\0' + b'\x7f\x04\xff\xfe\0\0'
+        decoders = dict(smbios.DECODERS)
+        del decoders[23]
+        with mock.patch.object(smbios, 'DECODERS', decoders):
+            self.assertRaises(smbios.SmbiosError, smbios.decode_tables, entry_point, table)
+        self.assertEqual('Disabled', smbios.decode_tables(entry_point, table)['system']['0x1700']['data']['Status'])
@@ -0,0 +1,118 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+import dbus
+import mock
+
+from test.rhsmlib_test.base import InjectionMockingTest, DBusObjectTest
+
+from subscription_manager import injection as inj
+from subscription_manager.cache import SyspurposeComplianceStatusCache
+from subscription_manager.certdirectory import EntitlementDirectory, ProductDirectory
+from subscription_manager.cp_provider import CPProvider
+
+from rhsm import connection
+
+from rhsmlib.dbus import constants
+from rhsmlib.dbus.objects import SyspurposeDBusObject
+
+
+class TestSyspurposeDBusObject(DBusObjectTest, InjectionMockingTest):
+    def setUp(self):
+        super(TestSyspurposeDBusObject, self).setUp()
+        self.proxy = self.proxy_for(SyspurposeDBusObject.default_dbus_path)
+        self.interface = dbus.Interface(self.proxy, constants.SYSPURPOSE_INTERFACE)
+
+        self.mock_identity.is_valid.return_value = True
+        self.mock_identity.uuid = "43b30b32-86cf-459e-9310-cb4182c23c4a"
+        self.mock_cp = mock.Mock(spec=connection.UEPConnection, name="UEPConnection").return_value
+        self.mock_cp.has_capability.return_value = True
+        self.mock_cp.getSyspurposeCompliance.return_value = {'status': 'valid'}
+        self.mock_ent_dir = mock.Mock(spec=EntitlementDirectory, name="EntitlementDirectory").return_value
+        self.mock_ent_dir.generation.return_value = ()
+        self.mock_prod_dir = mock.Mock(spec=ProductDirectory, name="ProductDirectory").return_value
+        self.mock_prod_dir.generation.return_value = ()
+        self.mock_status_cache = mock.Mock(spec=SyspurposeComplianceStatusCache,
+                                           name="SyspurposeComplianceStatusCache")
+        self.mock_status_cache.timestamp.return_value = 1000.0
+        self.mock_provider = mock.Mock(spec=CPProvider, name="CPProvider")
+        self.mock_provider.get_consumer_auth_cp.return_value = self.mock_cp
+
+        self.syspurpose_object = self.server_thread.server.object_map["SyspurposeDBusObject"]
+        status_changed_patcher = mock.patch.object(self.syspurpose_object, 'StatusChanged')
+        self.status_changed = status_changed_patcher.start()
+        self.addCleanup(status_changed_patcher.stop)
+
+    def injection_definitions(self, *args, **kwargs):
+        if args[0] == inj.IDENTITY:
+            return self.mock_identity
+        elif args[0] == inj.ENT_DIR:
+            return self.mock_ent_dir
+        elif args[0] == inj.PROD_DIR:
+            return self.mock_prod_dir
+        elif args[0] == inj.SYSTEMPURPOSE_COMPLIANCE_STATUS_CACHE:
+            return self.mock_status_cache
+        elif args[0] == inj.CP_PROVIDER:
+            return self.mock_provider
+        else:
+            return None
+
+    def dbus_objects(self):
+        return [SyspurposeDBusObject]
+
+    def _get_status(self, expected):
+        def assertions(*args):
+            self.assertEqual(expected, args[0])
+        self.dbus_request(assertions, self.interface.GetSyspurposeStatus, [])
+
+    def test_get_status_cached(self):
+        self._get_status("Current")
+        for i in range(3):
+            self._get_status("Current")
+        self.assertEqual(1, self.mock_cp.getSyspurposeCompliance.call_count)
+
+        # A new entitlement certificate invalidates the status:
+        self.mock_ent_dir.generation.return_value = (('1.pem', (1, 1000.0, 10)),)
+        self._get_status("Current")
+        self.assertEqual(2, self.mock_cp.getSyspurposeCompliance.call_count)
+
+        # So does a status fetched by another client:
+        self.mock_status_cache.timestamp.return_value = 1001.0
+        self._get_status("Current")
+        self.assertEqual(3, self.mock_cp.getSyspurposeCompliance.call_count)
+        self.assertEqual(0, self.status_changed.call_count)
+
+    @mock.patch('rhsmlib.dbus.constants.STATUS_MAX_AGE', 0)
+    def test_get_status_expires(self):
+        self._get_status("Current")
+        self.mock_cp.getSyspurposeCompliance.return_value = {'status': 'partial'}
+        self._get_status("Insufficient")
+        self.assertEqual(2, self.mock_cp.getSyspurposeCompliance.call_count)
+        self.status_changed.assert_called_once_with("Insufficient")
+
+    def test_status_changed(self):
+        # Nobody asked for the status yet:
+        self.syspurpose_object.reload()
+        self.assertEqual(0, self.mock_cp.getSyspurposeCompliance.call_count)
+
+        self._get_status("Current")
+        self.syspurpose_object.reload()
+        self.assertEqual(1, self.mock_cp.getSyspurposeCompliance.call_count)
+
+        self.mock_cp.getSyspurposeCompliance.return_value = {'status': 'invalid'}
+        self.mock_ent_dir.generation.return_value = (('1.pem', (1, 1000.0, 10)),)
+        self.syspurpose_object.reload()
+        self.status_changed.assert_called_once_with("Invalid")
+        self._get_status("Invalid")
+        self.assertEqual(2, self.mock_cp.getSyspurposeCompliance.call_count)
@@ -26,7 +26,7 @@ from rhsm import config
 from subscription_manager.cert_sorter import CertSorter
 from subscription_manager.cache import EntitlementStatusCache, ProductStatusCache, \
         OverrideStatusCache, ProfileManager, InstalledProductsManager, ReleaseStatusCache, \
-        PoolStatusCache
+        PoolStatusCache, ReleaseListingCache, ServerCapabilityCache
 from subscription_manager.facts import Facts
 from subscription_manager.lock import ActionLock
 from rhsm.certificate import GMT
@@ -502,10 +502,10 @@ class StubUEP(object):
     def setSyspurposeCompliance(self, status):
         self.syspurpose_compliance_status = status
 
-    def getEntitlementList(self, uuid):
+    def getEntitlementList(self, uuid, stream=False):
         return [{'id': 'ent1'}, {'id': 'ent2'}]
 
-    def getPoolsList(self, uuid, listAll, active_on, owner):
+    def getPoolsList(self, uuid, listAll, active_on, owner, stream=False):
         return [{'id': 'pool1'}, {'id': 'pool2'}]
 
     def getSubscriptionList(self, owner):
@@ -533,6 +533,9 @@ class StubBackend(object):
 
 
 class StubContentConnection(object):
+    host = "cdn.example.com"
+    ssl_port = 443
+    handler = "/"
     proxy_hostname = None
     proxy_port = None
 
@@ -554,7 +557,7 @@ class StubFacts(Facts):
         return self.delta_values
 
     def update_check(self, uep, consumer_uuid, force=False):
-        uep.updateConsumer(consumer_uuid, self.facts)
+        self._sync_with_server(uep, consumer_uuid)
 
     def get_last_update(self):
         return None
@@ -698,6 +701,32 @@ class StubReleaseStatusCache(ReleaseStatusCache):
         self.server_status = None
 
 
+class StubReleaseListingCache(ReleaseListingCache):
+
+    def __init__(self):
+        super(StubReleaseListingCache, self).__init__()
+        self.listings = {}
+
+    def write_cache(self, debug=True):
+        self._changed = False
+
+    def delete_cache(self):
+        self.listings = {}
+
+
+class StubServerCapabilityCache(ServerCapabilityCache):
+
+    def __init__(self):
+        super(StubServerCapabilityCache, self).__init__()
+        self.servers = {}
+
+    def write_cache(self, debug=True):
+        pass
+
+    def delete_cache(self):
+        self.servers = {}
+
+
 class StubPool(object):
 
     def __init__(self, poolid):
@@ -35,10 +35,10 @@ class ListPoolsStubUEP(stubs.StubUEP):
     def getOwner(self, consumeruuid):
         return {'key': 'owner'}
 
-    def getPoolsList(self, consumer, listAll=None, active_on=None, owner=None):
+    def getPoolsList(self, consumer, listAll=None, active_on=None, owner=None, stream=False):
         return []
 
-    def getEntitlementList(self, consumeruuid=None):
+    def getEntitlementList(self, consumeruuid=None, stream=False):
         return []
 
 
@@ -37,7 +37,7 @@ from rhsm import ourjson as json
 from subscription_manager.cache import ProfileManager, \
     InstalledProductsManager, EntitlementStatusCache, \
     PoolTypeCache, ReleaseStatusCache, ContentAccessCache, \
-    PoolStatusCache
+    PoolStatusCache, ReleaseListingCache, ServerCapabilityCache
 
 from rhsm.profile import Package, RPMProfile, EnabledReposProfile, ModulesProfile
 
@@ -626,6 +626,91 @@ class TestEntitlementStatusCache(SubManFixture):
         self.assertEqual(None, self.status_cache.load_status(uep, "aaa"))
 
 
+class TestReleaseListingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.listing_cache = ReleaseListingCache()
+        self.listing_cache.CACHE_FILE = os.path.join(self.cache_dir, 'release_listings.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_update_and_reload(self):
+        self.assertEqual(None, self.listing_cache.get('/content/listing'))
+        self.listing_cache.update('/content/listing', '7Server\n',
+                                  {'ETag': '"abc"', 'Last-Modified': 'Tue, 01 May 2018 10:00:00 GMT'})
+        self.assertTrue(self.listing_cache.has_changed())
+        self.listing_cache.write_cache()
+        self.assertFalse(self.listing_cache.has_changed())
+
+        reloaded = ReleaseListingCache()
+        reloaded.CACHE_FILE = self.listing_cache.CACHE_FILE
+        entry = reloaded.get('/content/listing')
+        self.assertEqual('7Server\n', entry['content'])
+        self.assertEqual('"abc"', entry['etag'])
+        self.assertEqual('Tue, 01 May 2018 10:00:00 GMT', entry['last_modified'])
+        self.assertTrue(reloaded.is_fresh(entry))
+
+    def test_stale_entry(self):
+        self.listing_cache.update('/content/listing', '7Server\n', {})
+        entry = self.listing_cache.get('/content/listing')
+        entry['fetched'] -= ReleaseListingCache.TTL + 1
+        self.assertFalse(self.listing_cache.is_fresh(entry))
+        self.listing_cache.revalidated('/content/listing')
+        self.assertTrue(self.listing_cache.is_fresh(entry))
+
+    def test_delete_cache(self):
+        self.listing_cache.update('/content/listing', '7Server\n', {})
+        self.listing_cache.write_cache()
+        self.listing_cache.delete_cache()
+        self.assertFalse(os.path.exists(self.listing_cache.CACHE_FILE))
+        self.assertEqual(None, self.listing_cache.get('/content/listing'))
+
+
+class TestServerCapabilityCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.capability_cache = ServerCapabilityCache()
+        self.capability_cache.CACHE_FILE = os.path.join(self.cache_dir, 'server_capabilities.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _reload(self):
+        reloaded = ServerCapabilityCache()
+        reloaded.CACHE_FILE = self.capability_cache.CACHE_FILE
+        return reloaded
+
+    def test_update_and_reload(self):
+        self.assertEqual(None, self.capability_cache.get('server:443/candlepin'))
+        self.capability_cache.update('server:443/candlepin', resources={'consumers': '/consumers'})
+        self.capability_cache.update('server:443/candlepin', capabilities=['cores'])
+
+        entry = self._reload().get('server:443/candlepin')
+        self.assertEqual({'consumers': '/consumers'}, entry['resources'])
+        self.assertEqual(['cores'], entry['capabilities'])
+
+    def test_stale_entry(self):
+        self.capability_cache.update('server:443/candlepin', capabilities=['cores'])
+        self.capability_cache.servers['server:443/candlepin']['created'] -= ServerCapabilityCache.TTL + 1
+        self.assertEqual(None, self.capability_cache.get('server:443/candlepin'))
+
+        # A stale entry is replaced rather than extended:
+        self.capability_cache.update('server:443/candlepin', version='2.0-1')
+        self.assertEqual(None, self.capability_cache.get('server:443/candlepin').get('capabilities'))
+
+    def test_invalidate(self):
+        self.capability_cache.update('server:443/candlepin', capabilities=['cores'])
+        self.capability_cache.update('other:443/candlepin', capabilities=['ram'])
+        self.capability_cache.invalidate('server:443/candlepin')
+
+        reloaded = self._reload()
+        self.assertEqual(None, reloaded.get('server:443/candlepin'))
+        self.assertEqual(['ram'], reloaded.get('other:443/candlepin')['capabilities'])
+
+
 class TestPoolStatusCache(SubManFixture):
     """
     Class for testing PoolStatusCache
@@ -652,18 +737,16 @@ class TestPoolStatusCache(SubManFixture):
 
     def test_load_from_server(self):
         uep = Mock()
-        dummy_pools = {
-                'pools': {
-                    'pool1': 'Pool 1',
-                    'pool2': 'Pool 2'
-                },
-                'tags': ['p1', 'p2']
-        }
-        uep.getEntitlementList = Mock(return_value=dummy_pools)
+        dummy_pools = [
+            {'id': 'ent1', 'pool': {'id': 'pool1', 'type': 'NORMAL'}},
+            {'id': 'ent2', 'pool': {'id': 'pool2', 'type': 'NORMAL'}},
+        ]
+        uep.getEntitlementList = Mock(return_value=iter(dummy_pools))
 
         self.pool_status_cache.read_status(uep, "THISISAUUID")
 
         self.assertEqual(dummy_pools, self.pool_status_cache.server_status)
+        uep.getEntitlementList.assert_called_once_with("THISISAUUID", stream=True)
 
 
 class TestPoolTypeCache(SubManFixture):
@@ -816,6 +899,16 @@ after
         self.MOCK_OPEN_EMPTY.assert_any_call(self.cert.path, 'w')
         self.MOCK_OPEN_EMPTY().write.assert_any_call(''.join(self.MOCK_CONTENT['contentListing']['42']))
 
+    @patch('subscription_manager.cache.open', MOCK_OPEN_EMPTY)
+    def test_cert_updated_in_transaction(self):
+        self.cert.serial = 42
+        self.cert.path = '/etc/pki/entitlement/42.pem'
+        transaction = Mock()
+        update_data = self.cache.check_for_update()
+        self.cache.update_cert(self.cert, update_data, transaction)
+        transaction.write.assert_called_once_with(
+            '42.pem', ''.join(self.MOCK_CONTENT['contentListing']['42']))
+
     @patch('subscription_manager.cache.open', MOCK_OPEN_CACHE)
     def test_check_for_update_provides_date(self):
         mock_exists = Mock(return_value=True)
@@ -23,7 +23,8 @@ from .stubs import StubEntitlementCertificate, StubProduct, StubProductCertifica
     StubEntitlementDirectory, StubProductDirectory, \
     StubUEP, StubCertSorter
 import subscription_manager.cert_sorter
-from subscription_manager.cert_sorter import CertSorter, UNKNOWN
+from subscription_manager.cert_sorter import CertSorter, UNKNOWN, SUBSCRIBED, NOT_SUBSCRIBED
+from rhsm.certificate import GMT
 from subscription_manager.cache import EntitlementStatusCache
 from datetime import timedelta, datetime
 from mock import Mock, patch
@@ -246,6 +247,82 @@ class CertSorterTests(SubManFixture):
         self.assertEqual('Insufficient', self.sorter.get_system_status())
 
 
+class CertSorterFingerprintTests(SubManFixture):
+
+    @patch('subscription_manager.cache.InstalledProductsManager.update_check')
+    def setUp(self, mock_update):
+        SubManFixture.setUp(self)
+        self.prod_dir = StubProductDirectory(pids=[INST_PID_1, INST_PID_2, INST_PID_3, "expired"])
+        self.prod_dir.generation = Mock(return_value=("prod", 1))
+        self.prod_dir.get_installed_products = Mock(wraps=self.prod_dir.get_installed_products)
+        self.ent_dir = StubEntitlementDirectory([
+            StubEntitlementCertificate(PROD_1, ent_id=ENT_ID_1),
+            StubEntitlementCertificate(StubProduct("expired"),
+                start_date=datetime.now() - timedelta(days=365),
+                end_date=datetime.now() - timedelta(days=2)),
+        ])
+        self.ent_dir.generation = Mock(return_value=("ent", 1))
+        self.ent_dir.list = Mock(wraps=self.ent_dir.list)
+
+        self.status = copy.deepcopy(SAMPLE_COMPLIANCE_JSON)
+        self.status_mgr = EntitlementStatusCache()
+        self.status_mgr.load_status = Mock(side_effect=lambda *args: copy.deepcopy(self.status))
+        self.status_mgr.write_cache = Mock()
+        inj.provide(inj.ENTITLEMENT_STATUS_CACHE, self.status_mgr)
+        inj.provide(inj.PROD_DIR, self.prod_dir)
+        inj.provide(inj.ENT_DIR, self.ent_dir)
+        self.sorter = CertSorter()
+        self.assertEqual(["expired"], list(self.sorter.expired_products.keys()))
+        self.prod_dir.get_installed_products.reset_mock()
+        self.ent_dir.list.reset_mock()
+
+    def test_unchanged(self):
+        expired_products = self.sorter.expired_products
+        reasons = self.sorter.reasons
+        self.sorter.load()
+        self.assertFalse(self.prod_dir.get_installed_products.called)
+        self.assertFalse(self.ent_dir.list.called)
+        self.assertTrue(expired_products is self.sorter.expired_products)
+        self.assertTrue(reasons is self.sorter.reasons)
+        self.assertEqual(SUBSCRIBED, self.sorter.get_status(INST_PID_1))
+        self.assertEqual(NOT_SUBSCRIBED, self.sorter.get_status(INST_PID_3))
+
+    def test_status_date_ignored(self):
+        self.status['date'] = "2013-04-27T13:43:12.436+0000"
+        self.sorter.load()
+        self.assertFalse(self.ent_dir.list.called)
+
+    def test_status_changed(self):
+        self.status['compliantUntil'] = None
+        self.sorter.load()
+        self.assertTrue(self.ent_dir.list.called)
+        self.assertEqual(None, self.sorter.compliant_until)
+
+    def test_entitlements_changed(self):
+        self.ent_dir.generation.return_value = ("ent", 2)
+        self.sorter.load()
+        self.assertTrue(self.ent_dir.list.called)
+        self.assertFalse(self.prod_dir.get_installed_products.called)
+
+    def test_products_changed(self):
+        self.prod_dir.generation.return_value = ("prod", 2)
+        self.sorter.load()
+        self.assertTrue(self.prod_dir.get_installed_products.called)
+        self.assertTrue(self.ent_dir.list.called)
+
+    def test_certificate_boundary_passed(self):
+        self.assertTrue(self.sorter._sorted_until > datetime.now(GMT()))
+        self.sorter._sorted_until = datetime.now(GMT()) - timedelta(seconds=1)
+        self.sorter.load()
+        self.assertTrue(self.ent_dir.list.called)
+
+    def test_in_memory_directories(self):
+        self.ent_dir.generation.return_value = None
+        self.sorter.load()
+        self.sorter.load()
+        self.assertEqual(2, self.ent_dir.list.call_count)
+
+
 SAMPLE_COMPLIANCE_JSON = json.loads("""
 {
   "date" : "2013-04-26T13:43:12.436+0000",
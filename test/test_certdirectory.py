@@ -19,7 +19,9 @@ try:
 except ImportError:
     import unittest
 
+import sys
 import tempfile
+import threading
 import os
 
 from mock import patch, MagicMock
@@ -28,7 +30,9 @@ from shutil import rmtree
 from .stubs import StubProduct, StubEntitlementCertificate, \
     StubProductCertificate
 from subscription_manager.certdirectory import Path, EntitlementDirectory, \
-    ProductDirectory, ProductCertificateDirectory, Directory
+    ProductDirectory, ProductCertificateDirectory, Directory, \
+    CertificateDirectory, DirectoryTransaction, Writer, COMMIT_COUNT_FILE, \
+    STAGING_PREFIX, STALE_STAGING_AGE, read_commit_count
 from subscription_manager.repolib import YumRepoFile
 from subscription_manager.productid import ProductDatabase
 
@@ -169,6 +173,23 @@ class DirectoryTest(unittest.TestCase):
     def test_listdirs(self, mockPath):
         self.d.listdirs()
 
+    def test_generation(self, mockPath):
+        generation = self.d.generation()
+        self.assertEqual(generation, self.d.generation())
+
+        new_path = self.d.abspath('new.pem')
+        with open(new_path, 'w') as new_file:
+            new_file.write('x')
+        added = self.d.generation()
+        self.assertNotEqual(generation, added)
+
+        with open(new_path, 'w') as new_file:
+            new_file.write('xyz')
+        self.assertNotEqual(added, self.d.generation())
+
+        os.unlink(new_path)
+        self.assertEqual(generation, self.d.generation())
+
     @patch('os.path.exists')
     @patch('os.makedirs')
     def test_missing_dir(self, mockPath, mockMakedirs, mockExists):
@@ -411,3 +432,215 @@ class AlsoProductDirectoryTest(unittest.TestCase):
         self.assertEqual(1, len(results))
         resulting_ids = [cert.products[0].id for cert in results]
         self.assertTrue("top" in resulting_ids)
+
+
+class FakePem(object):
+    def __init__(self, content, serial=None):
+        self.content = content
+        self.serial = serial
+        self.path = None
+
+    def write(self, path):
+        with open(path, 'w') as pem_file:
+            pem_file.write(self.content)
+        self.path = path
+
+
+class FakeCert(object):
+    """
+    What fake_create_from_file reads back: the content of a certificate
+    file, and whether its key was there when it was read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path) as cert_file:
+            self.content = cert_file.read()
+        self.has_key = os.path.exists(path[:-len('.pem')] + '-key.pem')
+
+    def delete(self):
+        os.unlink(self.path)
+        os.unlink(self.path[:-len('.pem')] + '-key.pem')
+
+
+def tmpfs_dir():
+    # the stress test wants a fast filesystem, when there is one
+    if os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return None
+
+
+@patch('subscription_manager.certdirectory.create_from_file', FakeCert)
+class DirectoryTransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='subscription-manager-unit-tests-tmp', dir=tmpfs_dir())
+        self.addCleanup(rmtree, self.path)
+        self.cert_dir = CertificateDirectory(self.path)
+
+    def _write(self, batch, serials):
+        with DirectoryTransaction(self.cert_dir) as transaction:
+            for serial in serials:
+                transaction.stage('%s-key.pem' % serial, FakePem('key'))
+                transaction.stage('%s.pem' % serial, FakePem(batch))
+
+    def test_commit(self):
+        key = FakePem('key')
+        cert = FakePem('cert', serial=12)
+        Writer(ent_dir=self.cert_dir).write(key, cert)
+
+        self.assertEqual([COMMIT_COUNT_FILE, '12-key.pem', '12.pem'], sorted(os.listdir(self.path)))
+        self.assertEqual(os.path.join(self.path, '12.pem'), cert.path)
+        self.assertEqual(os.path.join(self.path, '12-key.pem'), key.path)
+        self.assertEqual(2, read_commit_count(self.path))
+        self.assertEqual(['cert'], [c.content for c in self.cert_dir.list()])
+
+    def test_nothing_staged_until_commit(self):
+        transaction = DirectoryTransaction(self.cert_dir)
+        transaction.stage('1.pem', FakePem('cert'))
+        transaction.write('2.pem', 'cert')
+        self.assertEqual([], self.cert_dir.list())
+        self.assertEqual(None, read_commit_count(self.path))
+
+        transaction.commit()
+        self.cert_dir.refresh()
+        self.assertEqual(2, len(self.cert_dir.list()))
+        self.assertEqual(2, read_commit_count(self.path))
+
+    def test_abort(self):
+        try:
+            with DirectoryTransaction(self.cert_dir) as transaction:
+                transaction.stage('1.pem', FakePem('cert'))
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual([], os.listdir(self.path))
+
+    def test_delete(self):
+        self._write('one', [1, 2])
+        with DirectoryTransaction(self.cert_dir) as transaction:
+            for cert in self.cert_dir.list():
+                transaction.delete(cert)
+            # nothing changes until the commit:
+            self.assertEqual(2, read_commit_count(self.path))
+            self.assertEqual(5, len(os.listdir(self.path)))
+        self.assertEqual([COMMIT_COUNT_FILE], os.listdir(self.path))
+        self.assertEqual(4, read_commit_count(self.path))
+
+    def test_abort_keeps_deleted(self):
+        self._write('one', [1])
+        try:
+            with DirectoryTransaction(self.cert_dir) as transaction:
+                transaction.delete(self.cert_dir.list()[0])
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(3, len(os.listdir(self.path)))
+
+    def test_stale_staging_removed(self):
+        stale = os.path.join(self.path, STAGING_PREFIX + 'crashed')
+        recent = os.path.join(self.path, STAGING_PREFIX + 'running')
+        for path in (stale, recent):
+            os.mkdir(path)
+            FakePem('cert').write(os.path.join(path, '1.pem'))
+        long_ago = os.stat(stale).st_mtime - STALE_STAGING_AGE - 1
+        os.utime(stale, (long_ago, long_ago))
+
+        self._write('one', [1])
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(recent))
+
+    def test_crashed_commit(self):
+        with open(os.path.join(self.path, COMMIT_COUNT_FILE), 'w') as count_file:
+            count_file.write('7')
+        self._write('one', [1])
+        self.assertEqual(10, read_commit_count(self.path))
+
+    def test_refresh_skips_unchanged(self):
+        self._write('one', [1, 2])
+        listing = self.cert_dir.list()
+        self.cert_dir.refresh()
+        self.assertTrue(listing is self.cert_dir.list())
+
+        self._write('two', [3])
+        self.cert_dir.refresh()
+        self.assertEqual(3, len(self.cert_dir.list()))
+
+    def test_refresh_without_generation(self):
+        FakePem('cert').write(os.path.join(self.path, '1.pem'))
+        listing = self.cert_dir.list()
+        self.cert_dir.refresh()
+        self.assertFalse(listing is self.cert_dir.list())
+
+    def test_refresh_sees_other_writers(self):
+        self._write('one', [1])
+        self.assertEqual(1, len(self.cert_dir.list()))
+        # a later second, so the directory mtime surely changes:
+        FakePem('cert').write(os.path.join(self.path, '2.pem'))
+        mtime = os.stat(self.path).st_mtime + 1
+        os.utime(self.path, (mtime, mtime))
+        self.cert_dir.refresh()
+        self.assertEqual(2, len(self.cert_dir.list()))
+
+    def test_crashed_commit_listed(self):
+        self._write('one', [1])
+        self.cert_dir.list()
+        with open(os.path.join(self.path, COMMIT_COUNT_FILE), 'w') as count_file:
+            count_file.write('3')
+        self.cert_dir.refresh()
+        with patch('subscription_manager.certdirectory.COMMIT_TIMEOUT', 0.05):
+            self.assertEqual(1, len(self.cert_dir.list()))
+
+    def test_concurrent_readers(self):
+        batches = 200
+        batch_size = 5
+        self._write('0', range(batch_size))
+        errors = []
+        done = threading.Event()
+
+        def write():
+            try:
+                for batch in range(1, batches + 1):
+                    with DirectoryTransaction(self.cert_dir) as transaction:
+                        for cert in self.cert_dir.list():
+                            transaction.delete(cert)
+                        for i in range(batch_size):
+                            serial = batch * batch_size + i
+                            transaction.stage('%s-key.pem' % serial, FakePem('key'))
+                            transaction.stage('%s.pem' % serial, FakePem(str(batch)))
+                    self.cert_dir.refresh()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        def read():
+            reader = CertificateDirectory(self.path)
+            try:
+                while not done.is_set():
+                    reader.refresh()
+                    listing = reader.list()
+                    contents = set(cert.content for cert in listing)
+                    if len(listing) != batch_size or len(contents) != 1 or \
+                            not all(cert.has_key for cert in listing):
+                        errors.append("Inconsistent listing: %s" %
+                                      sorted((c.path, c.content, c.has_key) for c in listing))
+                        return
+            except Exception as e:
+                errors.append(e)
+
+        # switch threads as often as possible, to get readers in mid commit
+        if hasattr(sys, 'setswitchinterval'):
+            self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+            sys.setswitchinterval(1e-6)
+
+        readers = [threading.Thread(target=read) for i in range(3)]
+        writer = threading.Thread(target=write)
+        for thread in readers + [writer]:
+            thread.start()
+        for thread in readers + [writer]:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(batches * 2 + 2, read_commit_count(self.path))
+        self.assertEqual(batch_size * 2 + 1, len(os.listdir(self.path)))
@@ -14,6 +14,8 @@ from __future__ import print_function, division, absolute_import
 # in this software or its documentation.
 #
 
+import threading
+import time
 from datetime import datetime, timedelta
 
 import mock
@@ -21,6 +23,8 @@ from . import stubs
 
 from rhsm import ourjson as json
 from subscription_manager import action_client
+from subscription_manager import base_action_client
+from subscription_manager import certlib
 from subscription_manager import content_action_client
 from subscription_manager import entcertlib
 from subscription_manager import identitycertlib
@@ -158,6 +162,15 @@ class TestActionClient(ActionClientTestBase):
         actionclient = action_client.ActionClient()
         actionclient.update()
 
+    def test_single_consumer_update(self):
+        inj.provide(inj.FACTS, stubs.StubFacts({"mock.facts": "true"}))
+        actionclient = action_client.ActionClient()
+        actionclient.update()
+        self.assertEqual(1, self.mock_uep.updateConsumer.call_count)
+        sent = self.mock_uep.updateConsumer.call_args[1]
+        self.assertTrue("facts" in sent)
+        self.assertTrue("installed_products" in sent)
+
     # see bz #852706
     @mock.patch.object(entcertlib.EntCertActionInvoker, 'update')
     def test_gone_exception(self, mock_update):
@@ -299,6 +312,14 @@ class TestHealingActionClient(TestActionClient):
         actionclient.update(autoheal=True)
         self.assertTrue(self.mock_uep.bind.called)
 
+    def test_consumer_updated_before_heal(self):
+        self.mock_cert_sorter.is_valid = mock.Mock(return_value=False)
+        actionclient = action_client.HealingActionClient()
+        actionclient.update(autoheal=True)
+        calls = [call[0] for call in self.mock_uep.method_calls]
+        self.assertEqual(1, calls.count('updateConsumer'))
+        self.assertTrue(calls.index('updateConsumer') < calls.index('bind'))
+
     @mock.patch.object(entcertlib.EntitlementCertBundleInstaller, 'build_cert')
     def test_healing_needs_heal_tomorrow(self, cert_build_mock):
         # Valid today, but not valid 24h from now:
@@ -327,3 +348,89 @@ class TestHealingActionClient(TestActionClient):
             if call[0] == 'exception' and isinstance(call[1][0], TypeError):
                 return
         self.fail("Did not see TypeError in the logged exceptions")
+
+
+class RecordingLib(object):
+    """
+    A lib that records when it ran, and waits for its event if it has one.
+    """
+
+    def __init__(self, name, calls, event=None, error=None):
+        self.name = name
+        self.calls = calls
+        self.event = event
+        self.error = error
+        self.released = None
+
+    def update(self):
+        self.calls.append(self.name)
+        if self.event is not None:
+            self.released = self.event.wait(5)
+        if self.error is not None:
+            raise self.error
+        return certlib.ActionReport()
+
+    def __str__(self):
+        return self.name
+
+
+class TestLibDependencies(SubManFixture):
+
+    def _client(self, libs, dependencies):
+        class Client(base_action_client.BaseActionClient):
+            def _get_libset(self):
+                return libs
+
+            def _get_lib_dependencies(self):
+                return dependencies
+
+        return Client()
+
+    def test_default_order(self):
+        calls = []
+        libs = [RecordingLib(name, calls) for name in ("a", "b", "c")]
+        client = base_action_client.BaseActionClient()
+        client._libset = libs
+        client._lib_dependencies = client._get_lib_dependencies()
+        client.update()
+        self.assertEqual(["a", "b", "c"], calls)
+
+    def test_independent_libs_overlap(self):
+        calls = []
+        release = threading.Event()
+        first = RecordingLib("first", calls, event=release)
+
+        class ReleasingLib(RecordingLib):
+            def update(self):
+                # Only runs while first is still waiting
+                release.set()
+                return RecordingLib.update(self)
+
+        second = ReleasingLib("second", calls)
+        last = RecordingLib("last", calls)
+        client = self._client([first, second, last], {last: [first, second]})
+        client.update()
+
+        self.assertTrue(first.released)
+        self.assertEqual("last", calls[-1])
+        self.assertEqual(3, len(client.update_reports))
+        for report in client.update_reports:
+            self.assertTrue(report.duration is not None)
+
+    def test_reports_in_libset_order(self):
+        (slow_report, fast_report) = (certlib.ActionReport(), certlib.ActionReport())
+        slow = mock.Mock()
+        slow.update.side_effect = lambda: time.sleep(0.05) or slow_report
+        fast = mock.Mock()
+        fast.update.return_value = fast_report
+        client = self._client([slow, fast], {})
+        client.update()
+        self.assertEqual([slow_report, fast_report], client.update_reports)
+
+    def test_gone_stops_dependents(self):
+        calls = []
+        gone = RecordingLib("gone", calls, error=GoneException(410, "bye bye", "234234"))
+        dependent = RecordingLib("dependent", calls)
+        client = self._client([gone, dependent], {dependent: [gone]})
+        self.assertRaises(GoneException, client.update)
+        self.assertEqual(["gone"], calls)
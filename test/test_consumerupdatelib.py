@@ -0,0 +1,104 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+import mock
+
+from . import fixture
+
+from rhsm.connection import RestlibException
+from subscription_manager import injection as inj
+from subscription_manager.consumerupdatelib import ConsumerUpdateBatch, \
+    ConsumerUpdateActionInvoker
+
+
+class TestConsumerUpdateBatch(fixture.SubManFixture):
+
+    def setUp(self):
+        super(TestConsumerUpdateBatch, self).setUp()
+        self.batch = ConsumerUpdateBatch()
+        self.uep = mock.Mock()
+
+    def test_not_batching_sends_right_away(self):
+        self.batch.update_consumer(self.uep, "uuid", facts={"a": "1"})
+        self.uep.updateConsumer.assert_called_once_with("uuid", facts={"a": "1"})
+        self.assertFalse(self.batch.has_pending())
+
+    def test_updates_merged(self):
+        self.batch.start()
+        self.batch.update_consumer(self.uep, "uuid", facts={"a": "1"})
+        self.batch.update_consumer(self.uep, "uuid", installed_products=[], content_tags=set())
+        self.batch.update_consumer(self.uep, "uuid", facts={"a": "2"})
+        self.assertFalse(self.uep.updateConsumer.called)
+        self.assertEqual(set(["facts", "installed_products", "content_tags"]),
+                         self.batch.pending_attributes())
+
+        self.assertEqual(1, self.batch.flush())
+        self.uep.updateConsumer.assert_called_once_with(
+            "uuid", facts={"a": "2"}, installed_products=[], content_tags=set())
+        self.assertEqual(0, self.batch.flush())
+        self.assertEqual(1, self.uep.updateConsumer.call_count)
+
+    def test_failed_flush_calls_back(self):
+        on_failure = mock.Mock()
+        self.uep.updateConsumer.side_effect = RestlibException(500, "oops")
+        self.batch.start()
+        self.batch.update_consumer(self.uep, "uuid", on_failure=on_failure, facts={})
+        self.assertRaises(RestlibException, self.batch.flush)
+        on_failure.assert_called_once_with()
+        self.assertFalse(self.batch.has_pending())
+
+    def test_stop_drops_pending(self):
+        on_failure = mock.Mock()
+        self.batch.start()
+        self.batch.update_consumer(self.uep, "uuid", on_failure=on_failure, facts={})
+        self.batch.stop()
+        on_failure.assert_called_once_with()
+        self.assertFalse(self.uep.updateConsumer.called)
+
+        self.batch.update_consumer(self.uep, "uuid", facts={})
+        self.assertEqual(1, self.uep.updateConsumer.call_count)
+
+    def test_nested(self):
+        self.batch.start()
+        self.batch.start()
+        self.batch.update_consumer(self.uep, "uuid", facts={})
+        self.batch.stop()
+        self.assertTrue(self.batch.batching)
+        self.assertTrue(self.batch.has_pending())
+        self.batch.stop()
+        self.assertFalse(self.batch.batching)
+        self.assertFalse(self.batch.has_pending())
+
+
+class TestConsumerUpdateActionInvoker(fixture.SubManFixture):
+
+    def setUp(self):
+        super(TestConsumerUpdateActionInvoker, self).setUp()
+        self.batch = inj.require(inj.CONSUMER_UPDATE_BATCH)
+        self.uep = mock.Mock()
+
+    def test_nothing_changed(self):
+        report = ConsumerUpdateActionInvoker().update()
+        self.assertEqual(0, report._status)
+        self.assertEqual([], report.attributes)
+
+    def test_flush(self):
+        self.batch.start()
+        self.batch.update_consumer(self.uep, "uuid", role="server", usage="dev")
+        report = ConsumerUpdateActionInvoker().update()
+        self.assertEqual(1, report._status)
+        self.assertEqual(["role", "usage"], report.attributes)
+        self.uep.updateConsumer.assert_called_once_with("uuid", role="server", usage="dev")
@@ -0,0 +1,78 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2018 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+import mock
+
+from .fixture import SubManFixture
+
+from subscription_manager.cp_provider import CPProvider, ConsumerCache
+
+
+class TestConsumerCache(SubManFixture):
+
+    def setUp(self):
+        super(TestConsumerCache, self).setUp()
+        self.cache = ConsumerCache()
+
+    def test_hits_and_misses(self):
+        self.assertEqual(None, self.cache.get('consumer', 'abc'))
+        self.cache.set('consumer', 'abc', {'uuid': 'abc'})
+        self.assertEqual({'uuid': 'abc'}, self.cache.get('consumer', 'abc'))
+        self.assertEqual(None, self.cache.get('owner', 'abc'))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_returns_copies(self):
+        consumer = {'uuid': 'abc', 'facts': {}}
+        self.cache.set('consumer', 'abc', consumer)
+        consumer['facts']['a'] = '1'
+        self.cache.get('consumer', 'abc')['facts']['b'] = '2'
+        self.assertEqual({}, self.cache.get('consumer', 'abc')['facts'])
+
+    def test_invalidate(self):
+        self.cache.set('consumer', 'abc', {'uuid': 'abc'})
+        self.cache.invalidate()
+        self.assertEqual(None, self.cache.get('consumer', 'abc'))
+
+    @mock.patch('subscription_manager.cp_provider.time.time')
+    def test_expires(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.set('consumer', 'abc', {'uuid': 'abc'})
+        mock_time.return_value = 1000 + ConsumerCache.MAX_AGE + 1
+        self.assertEqual(None, self.cache.get('consumer', 'abc'))
+
+
+class TestCPProvider(SubManFixture):
+
+    def test_connections_share_consumer_cache(self):
+        cp_provider = CPProvider()
+        cp_provider.set_user_pass("admin", "admin")
+        consumer_cp = cp_provider.get_consumer_auth_cp()
+        basic_cp = cp_provider.get_basic_auth_cp()
+        self.assertTrue(consumer_cp.consumer_cache is cp_provider.consumer_cache)
+        self.assertTrue(basic_cp.consumer_cache is cp_provider.consumer_cache)
+
+        consumer_cp.conn.request_get = mock.Mock(return_value={'uuid': 'abc'})
+        basic_cp.conn.request_get = mock.Mock()
+        consumer_cp.getConsumer('abc')
+        self.assertEqual({'uuid': 'abc'}, basic_cp.getConsumer('abc'))
+        self.assertFalse(basic_cp.conn.request_get.called)
+
+    def test_clean_invalidates(self):
+        cp_provider = CPProvider()
+        cp_provider.consumer_cache.set('consumer', 'abc', {'uuid': 'abc'})
+        cp_provider.clean()
+        self.assertEqual(None, cp_provider.consumer_cache.get('consumer', 'abc'))
@@ -17,7 +17,7 @@ from __future__ import print_function, division, absolute_import
 # in this software or its documentation.
 #
 
-from mock import Mock, patch
+from mock import MagicMock, Mock, patch
 from datetime import timedelta, datetime
 import six
 
@@ -25,7 +25,7 @@ from .stubs import StubEntitlementCertificate, StubProduct, StubEntitlementDirec
 
 from . import fixture
 
-from subscription_manager.certdirectory import Writer
+from subscription_manager.certdirectory import DirectoryTransaction, Writer
 from subscription_manager import entcertlib
 from subscription_manager import injection as inj
 
@@ -107,6 +107,55 @@ class UpdateActionTests(fixture.SubManFixture):
         self.assertTrue(valid_ent.serial in update_report.expected)
         self.assertTrue(expired_ent.serial in update_report.expected)
 
+    @patch("subscription_manager.entcertlib.EntitlementCertBundleInstaller.build_cert")
+    def test_install_in_transaction(self, build_cert_mock):
+        key = Mock()
+        cert = StubEntitlementCertificate(StubProduct("Prod"))
+        build_cert_mock.return_value = (key, cert)
+        transaction = Mock()
+        self.set_consumer_auth_cp(Mock())
+        inj.provide(inj.ENT_DIR, StubEntitlementDirectory([]))
+
+        report = entcertlib.EntCertUpdateReport()
+        installer = entcertlib.EntitlementCertBundlesInstaller(report, transaction)
+        installer.install([{'key': key, 'cert': cert}])
+
+        self.assertEqual([cert], report.added)
+        transaction.stage.assert_any_call('%s-key.pem' % cert.serial, key)
+        transaction.stage.assert_any_call('%s.pem' % cert.serial, cert)
+        self.assertFalse(transaction.commit.called)
+
+    @patch("subscription_manager.entcertlib.EntitlementCertBundleInstaller.build_cert")
+    @patch("subscription_manager.entcertlib.DirectoryTransaction")
+    def test_certificates_fetched_before_transaction(self, transaction_mock, build_cert_mock):
+        events = []
+        new_ent = MagicMock(serial=1234, products=[])
+        rogue_ent = StubEntitlementCertificate(StubProduct("Rogue"))
+        build_cert_mock.return_value = (Mock(), new_ent)
+        transaction_mock.side_effect = lambda ent_dir: events.append("transaction") or \
+            DirectoryTransaction(ent_dir)
+
+        def get_certificates(uuid, serials=None, stream=False):
+            events.append("fetch")
+            return [{'key': 'key', 'cert': 'cert'}]
+
+        mock_uep = Mock()
+        mock_uep.getCertificateSerials.return_value = [{'serial': new_ent.serial}]
+        mock_uep.getCertificates.side_effect = get_certificates
+        mock_uep.has_capability.return_value = False
+        self.set_consumer_auth_cp(mock_uep)
+        inj.provide(inj.ENT_DIR, StubEntitlementDirectory([rogue_ent]))
+
+        update_action = TestingUpdateAction()
+        update_action.content_access_hook = Mock()
+        update_action.repo_hook = Mock()
+        update_action.branding_hook = Mock()
+        update_action.perform()
+
+        self.assertEqual(["fetch", "transaction"], events)
+        self.assertEqual([new_ent], update_action.report.added)
+        self.assertEqual([rogue_ent], update_action.report.rogue)
+
     def test_delete(self):
         ent = StubEntitlementCertificate(StubProduct("Prod"))
         ent.delete = Mock(side_effect=OSError("Cert has already been deleted"))
@@ -35,14 +35,16 @@ from rct.manifest_commands import CatManifestCommand
 from rct.manifest_commands import DumpManifestCommand
 from rct.manifest_commands import get_value
 from rct.manifest_commands import RCTManifestCommand
+from rct.manifest_commands import StoredMember
 from rct.manifest_commands import ZipExtractAll
+from rhsm import ourjson as json
 
 from .fixture import Capture, SubManFixture
 
 
-def _build_valid_manifest():
+def _build_valid_manifest(compression=zipfile.ZIP_STORED):
     manifest_zip = six.BytesIO()
-    manifest_object = ZipFile(manifest_zip, "w", compression=zipfile.ZIP_STORED)
+    manifest_object = ZipFile(manifest_zip, "w", compression=compression)
     manifest_object.writestr("signature", "dummy")
     consumer_export_zip = six.BytesIO()
     consumer_export_object = ZipFile(consumer_export_zip, "w", compression=zipfile.ZIP_STORED)
@@ -74,6 +76,7 @@ class RCTManifestCommandTests(SubManFixture):
         catman = CatManifestCommand()
         parser = OptionParser()
         parser.add_option("--no-content")
+        parser.add_option("--json")
         (options, args) = parser.parse_args([])
         catman.options = options
         catman.args = [_build_valid_manifest()]
@@ -84,6 +87,47 @@ class RCTManifestCommandTests(SubManFixture):
         self.assertEqual("", cap.err)
         self.assert_string_equals(manifestdata.correct_manifest_output, cap.out)
 
+    def test_cat_manifest_json(self):
+        catman = CatManifestCommand()
+        (options, args) = catman.parser.parse_args(["--json"])
+        catman.options = options
+        catman.args = [_build_valid_manifest()]
+
+        with Capture() as cap:
+            catman._do_command()
+
+        self.assertEqual("", cap.err)
+        records = [json.loads(line) for line in cap.out.splitlines()]
+        self.assertEqual(["general", "consumer", "subscription"],
+                         [record["type"] for record in records])
+        self.assertEqual("sam_org", records[1]["name"])
+        subscription = records[2]
+        self.assertEqual("RH1569626", subscription["sku"])
+        self.assertEqual("1.0", subscription["certificate_version"])
+        self.assertEqual("export/entitlement_certificates/2414805806930829936.pem",
+                         subscription["certificate_file"])
+        self.assertEqual([], subscription["content_sets"])
+
+    def test_cat_manifest_json_no_content(self):
+        catman = CatManifestCommand()
+        (options, args) = catman.parser.parse_args(["--json", "--no-content"])
+        catman.options = options
+        catman.args = [_build_valid_manifest()]
+
+        with Capture() as cap:
+            catman._do_command()
+
+        subscription = json.loads(cap.out.splitlines()[-1])
+        self.assertEqual("1.0", subscription["certificate_version"])
+        self.assertEqual(None, subscription["content_sets"])
+
+    def test_inner_zip_opened_in_place(self):
+        archive = ZipExtractAll(_build_valid_manifest(), 'r')
+        inner = archive._get_inner_zip()
+        self.assertTrue(isinstance(inner.fp, StoredMember))
+        self.assertTrue(len(archive._get_entitlements()) == 1)
+        self.assertTrue(archive._read_file("export/meta.json"))
+
     def test_extract_manifest(self):
         tmp_dir = tempfile.mkdtemp()
         mancommand = RCTManifestCommand()
@@ -94,6 +138,31 @@ class RCTManifestCommandTests(SubManFixture):
 
         shutil.rmtree(tmp_dir)
 
+    def test_extract_manifest_no_intermediate_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        mancommand = RCTManifestCommand()
+        mancommand.args = [_build_valid_manifest()]
+        mancommand._extract_manifest(tmp_dir)
+
+        self.assertFalse(os.path.exists(os.path.join(tmp_dir, RCTManifestCommand.INNER_FILE)))
+        self.assertTrue(os.path.exists(os.path.join(tmp_dir, "signature")))
+        with open(os.path.join(tmp_dir, "export", "meta.json")) as meta:
+            self.assertEqual(manifestdata.meta_json, meta.read())
+
+        shutil.rmtree(tmp_dir)
+
+    def test_extract_manifest_compressed_inner_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        mancommand = RCTManifestCommand()
+        mancommand.args = [_build_valid_manifest(compression=zipfile.ZIP_DEFLATED)]
+        mancommand._extract_manifest(tmp_dir)
+
+        self.assertFalse(os.path.exists(os.path.join(tmp_dir, RCTManifestCommand.INNER_FILE)))
+        with open(os.path.join(tmp_dir, "export", "consumer.json")) as consumer:
+            self.assertEqual(manifestdata.consumer_json, consumer.read())
+
+        shutil.rmtree(tmp_dir)
+
     def test_dump_manifest_current(self):
         original_directory = os.getcwd()
         new_directory = tempfile.mkdtemp()
@@ -216,6 +285,39 @@ class RCTManifestExtractTests(unittest.TestCase):
         archive.close()
         shutil.rmtree(tmp_dir)
 
+    def test_extractall_threads(self):
+        zip_file_object = six.BytesIO()
+        archive = ZipExtractAll(zip_file_object, "w", compression=zipfile.ZIP_DEFLATED)
+        for i in range(50):
+            archive.writestr("some/path/file%d" % i, "contents of file %d" % i * 100)
+        archive.close()
+
+        archive = ZipExtractAll(zip_file_object, "r")
+        tmp_dir = tempfile.mkdtemp()
+        archive.extractall(tmp_dir, threads=4)
+        archive.close()
+
+        for i in range(50):
+            with open(os.path.join(tmp_dir, "some", "path", "file%d" % i)) as extracted:
+                self.assertEqual("contents of file %d" % i * 100, extracted.read())
+        shutil.rmtree(tmp_dir)
+
+    def test_extractall_exclude(self):
+        zip_file_object = six.BytesIO()
+        archive = ZipExtractAll(zip_file_object, "w", compression=zipfile.ZIP_STORED)
+        archive.writestr("keep", "kept")
+        archive.writestr("skip", "skipped")
+        archive.close()
+
+        archive = ZipExtractAll(zip_file_object, "r")
+        tmp_dir = tempfile.mkdtemp()
+        archive.extractall(tmp_dir, exclude=["skip"])
+        archive.close()
+
+        self.assertTrue(os.path.exists(os.path.join(tmp_dir, "keep")))
+        self.assertFalse(os.path.exists(os.path.join(tmp_dir, "skip")))
+        shutil.rmtree(tmp_dir)
+
     @mock.patch("sys.exit")
     def test_extractall_nonzip(self, mock_exit):
         not_zip_file_object = six.BytesIO()
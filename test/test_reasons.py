@@ -18,7 +18,7 @@ try:
 except ImportError:
     import unittest
 
-from .stubs import StubEntitlementCertificate, StubProduct
+from .stubs import StubEntitlementCertificate, StubProduct, StubProductCertificate
 from mock import Mock
 from subscription_manager.reasons import Reasons
 
@@ -123,6 +123,21 @@ class ReasonsTests(unittest.TestCase):
         self.assertEqual(0, len(messages))
         self.sorter.reasons.reasons.remove(reason)
 
+    def test_get_product_reasons_map(self):
+        self.sorter.installed_products = {
+            INST_PID_1: StubProductCertificate(PROD_1),
+            INST_PID_2: StubProductCertificate(PROD_2),
+            INST_PID_4: StubProductCertificate(PROD_4),
+        }
+        reasons_map = self.sorter.reasons.get_product_reasons_map()
+        self.assertEqual(set([INST_PID_1, INST_PID_2, INST_PID_4]), set(reasons_map))
+        for product in (PROD_1, PROD_2, PROD_4):
+            self.assertEqual(sorted(self.sorter.reasons.get_product_reasons(product)),
+                             sorted(reasons_map[product.id]))
+
+        reasons_map = self.sorter.reasons.get_product_reasons_map([PROD_2])
+        self.assertEqual([INST_PID_2], list(reasons_map))
+
     def test_get_subscription_reasons(self):
         sub_reasons = self.sorter.reasons.get_subscription_reasons(ENT_ID_1)
         self.assertEqual(0, len(sub_reasons))
@@ -185,6 +200,20 @@ class ReasonsTests(unittest.TestCase):
         sub_reason_map = self.sorter.reasons.get_subscription_reasons_map()
         self.assertTrue(ENT_ID_2 in sub_reason_map)
 
+    def test_index_built_once(self):
+        index = self.sorter.reasons.get_index()
+        self.sorter.reasons.get_product_reasons(PROD_4)
+        self.sorter.reasons.get_subscription_reasons_map()
+        self.assertTrue(index is self.sorter.reasons.get_index())
+
+        # Replacing the valid entitlement certs invalidates the index:
+        self.sorter.valid_entitlement_certs = []
+        self.assertFalse(index is self.sorter.reasons.get_index())
+        self.assertEqual({}, self.sorter.reasons.get_subscription_reasons_map())
+
+    def test_get_stack_subscriptions_unknown_stack(self):
+        self.assertEqual([], self.sorter.reasons.get_stack_subscriptions('not-a-stack'))
+
     def test_get_reason_id(self):
         reason = self.build_ent_reason_with_attrs(
                 'SOCKETS', 'some message', '8', '6', ent='1234')
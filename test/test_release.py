@@ -179,21 +179,74 @@ class TestCdnReleaseVerionProvider(fixture.SubManFixture):
 
         # mock content_connection so we can verify it's calls
         with mock.patch.object(cdn_rv_provider, 'content_connection') as mock_cc:
-            mock_cc.get_versions.side_effect = \
+            mock_cc.get_listing.side_effect = \
                     six.moves.http_client.BadStatusLine("some bogus status")
             releases = cdn_rv_provider.get_releases()
             self.assertEqual([], releases)
 
-            mock_cc.get_versions.side_effect = \
+            mock_cc.get_listing.side_effect = \
                     socket.error()
             releases = cdn_rv_provider.get_releases()
             self.assertEqual([], releases)
 
-            mock_cc.get_versions.side_effect = \
+            mock_cc.get_listing.side_effect = \
                     ssl.SSLError()
             releases = cdn_rv_provider.get_releases()
             self.assertEqual([], releases)
 
+    def test_get_releases_cached(self):
+        cdn_rv_provider = self._get_cdn_rv_provider()
+        cdn_rv_provider.content_connection = mock.Mock()
+        cdn_rv_provider.content_connection.get_listing.return_value = \
+            {"status": 200, "content": versions, "headers": {"ETag": '"v1"'}}
+
+        releases = cdn_rv_provider.get_releases()
+        self.assertEqual(releases, cdn_rv_provider.get_releases())
+        self.assertEqual(1, cdn_rv_provider.content_connection.get_listing.call_count)
+
+    def test_get_releases_cached_per_cdn(self):
+        listing = {"status": 200, "content": versions, "headers": {}}
+        for (host, port, handler) in [("cdn.example.com", 443, "/"), ("cdn.example.com", 8443, "/"),
+                                      ("other.example.com", 443, "/"),
+                                      ("other.example.com", 443, "/prefix")]:
+            cdn_rv_provider = self._get_cdn_rv_provider()
+            cdn_rv_provider.content_connection = mock.Mock(host=host, ssl_port=port, handler=handler)
+            cdn_rv_provider.content_connection.get_listing.return_value = listing
+            cdn_rv_provider.get_releases()
+            self.assertEqual(1, cdn_rv_provider.content_connection.get_listing.call_count)
+
+    def test_get_releases_revalidates_stale_listing(self):
+        cdn_rv_provider = self._get_cdn_rv_provider()
+        cdn_rv_provider.content_connection = mock.Mock()
+        cdn_rv_provider.content_connection.get_listing.return_value = \
+            {"status": 200, "content": versions, "headers": {"ETag": '"v1"'}}
+        releases = cdn_rv_provider.get_releases()
+
+        listing_cache = inj.require(inj.RELEASE_LISTING_CACHE)
+        for entry in listing_cache.listings.values():
+            entry["fetched"] -= listing_cache.TTL + 1
+        cdn_rv_provider.content_connection.get_listing.return_value = \
+            {"status": 304, "content": "", "headers": {}}
+
+        self.assertEqual(releases, cdn_rv_provider.get_releases())
+        args, kwargs = cdn_rv_provider.content_connection.get_listing.call_args
+        self.assertEqual('"v1"', kwargs["etag"])
+        self.assertFalse(listing_cache.has_changed())
+
+    def test_get_releases_multiple_listings(self):
+        contents = [stubs.StubContent("c%d" % i, required_tags='rhel-6', gpg=None,
+                                      enabled="1", url="/content/c%d/$releasever/os" % i)
+                    for i in range(6)]
+        self.ent_dir = stubs.StubEntitlementDirectory(
+            [stubs.StubEntitlementCertificate(stubs.StubProduct("rhel-6"), content=contents)])
+        cdn_rv_provider = self._get_cdn_rv_provider()
+        cdn_rv_provider.content_connection = mock.Mock()
+        cdn_rv_provider.content_connection.get_listing.side_effect = \
+            lambda path, pairs, **kwargs: {"status": 200, "content": path.split("/")[2], "headers": {}}
+
+        self.assertEqual(["c%d" % i for i in range(6)], cdn_rv_provider.get_releases())
+        self.assertEqual(6, cdn_rv_provider.content_connection.get_listing.call_count)
+
 
 class TestReleaseIsCorrectRhel(fixture.SubManFixture):
 
@@ -178,7 +178,8 @@ class SyspurposeSyncActionCommandTests(SubManFixture):
             # So if these two are the same then the cache will have been updated with the new result.
             self.assert_equal_dict(mock_cache.syspurpose, mock_merge.return_value)
 
-            mock_write.assert_called_once_with(mock_merge.return_value)
+            # The local file already has the merged values, so it is left alone.
+            mock_write.assert_not_called()
             ident = inj.require(inj.IDENTITY)
             update.assert_called_once_with(ident.uuid, role=result[ROLE],
                                            addons=result[ADDONS],
@@ -276,8 +277,58 @@ class SyspurposeSyncActionCommandTests(SubManFixture):
             self.assert_equal_dict(mock_cache.syspurpose, expected)
 
             mock_write.assert_called_once_with(expected)
-            ident = inj.require(inj.IDENTITY)
-            update.assert_called_once_with(ident.uuid, role=result[ROLE],
-                                           addons=result[ADDONS],
-                                           service_level=result[SERVICE_LEVEL],
-                                           usage=result[USAGE])
+            # The result is what the server has already
+            update.assert_not_called()
+
+    @mock.patch('subscription_manager.syspurposelib.write_syspurpose')
+    @mock.patch('subscription_manager.syspurposelib.SyspurposeCache')
+    @mock.patch('subscription_manager.syspurposelib.read_syspurpose')
+    def test_sync_nothing_changed(self, mock_read_sp, mock_cache, mock_write):
+        """
+        When the local file, the cache and the server agree, sync writes nothing and
+        sends nothing.
+        """
+        self._inject_mock_valid_consumer()
+
+        mock_cache = mock_cache.return_value
+
+        self.stub_cp_provider.consumer_auth_cp._capabilities.append('syspurpose')
+        # The server may return addons in any order
+        remote_sp = dict(self.remote_sp, addOns=["Addon 2", "Super shiny Addon 1"])
+        self.stub_cp_provider.consumer_auth_cp.registered_consumer_info = remote_sp
+        local_sp = dict(self.base, addons=["Super shiny Addon 1", "Addon 2"])
+        mock_read_sp.return_value = local_sp
+        mock_cache.read_cache_only.return_value = dict(local_sp)
+
+        with mock.patch.object(self.stub_cp_provider.consumer_auth_cp, 'updateConsumer') as update:
+            result = self.command.sync()
+
+            self.assert_equal_dict(result, local_sp)
+            mock_cache.write_cache.assert_not_called()
+            mock_write.assert_not_called()
+            update.assert_not_called()
+
+    @mock.patch('subscription_manager.syspurposelib.write_syspurpose')
+    @mock.patch('subscription_manager.syspurposelib.SyspurposeCache')
+    @mock.patch('subscription_manager.syspurposelib.read_syspurpose')
+    def test_sync_server_changed(self, mock_read_sp, mock_cache, mock_write):
+        """
+        A change made on the server is written locally, but not sent back.
+        """
+        self._inject_mock_valid_consumer()
+
+        mock_cache = mock_cache.return_value
+        mock_cache.read_cache_only.return_value = dict(self.base)
+
+        self.stub_cp_provider.consumer_auth_cp._capabilities.append('syspurpose')
+        remote_sp = dict(self.remote_sp, usage="Production")
+        self.stub_cp_provider.consumer_auth_cp.registered_consumer_info = remote_sp
+        mock_read_sp.return_value = dict(self.base)
+
+        with mock.patch.object(self.stub_cp_provider.consumer_auth_cp, 'updateConsumer') as update:
+            result = self.command.sync()
+
+            self.assertEqual("Production", result[USAGE])
+            mock_cache.write_cache.assert_called_once()
+            mock_write.assert_called_once_with(result)
+            update.assert_not_called()
@@ -106,6 +106,23 @@ class ValidProductDateRangeCalculatorTests(SubManFixture):
     def test_product_without_status(self):
         self.assertTrue(self.calculator.calculate(INST_PID_3) is None)
 
+    def test_calculate_all(self):
+        date_ranges = self.calculator.calculate_all()
+        self.assertEqual(set([INST_PID_1, INST_PID_2, INST_PID_3]), set(date_ranges))
+        self.assertTrue(date_ranges[INST_PID_3] is None)
+        for pid in (INST_PID_1, INST_PID_2, INST_PID_3):
+            self.assertEqual(self.calculator.calculate(pid), date_ranges[pid])
+
+        date_ranges = self.calculator.calculate_all([INST_PID_1, 'NOTTHERE'])
+        self.assertEqual([INST_PID_1], list(date_ranges))
+
+    def test_calculate_all_missing_installed_status(self):
+        for prod in self.status:
+            prod.pop('startDate')
+            prod.pop('endDate')
+        self.assertEqual(dict.fromkeys([INST_PID_1, INST_PID_2, INST_PID_3]),
+                         self.calculator.calculate_all())
+
     def test_unregistered(self):
         id_mock = NonCallableMock()
         id_mock.is_valid.return_value = False
@@ -113,3 +130,4 @@ class ValidProductDateRangeCalculatorTests(SubManFixture):
         self.calculator = ValidProductDateRangeCalculator(None)
         for pid in (INST_PID_1, INST_PID_2, INST_PID_3):
             self.assertTrue(self.calculator.calculate(pid) is None)
+        self.assertEqual({}, self.calculator.calculate_all())